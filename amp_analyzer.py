@@ -16,15 +16,25 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """""
 
 import sys
-from gui.main_window import MainWindow
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+
+def create_window():
+    # Imported here so QApplication exists before matplotlib and the rest of the gui are imported
+    from gui.main_window import MainWindow
 
-def main():
-    app = QApplication(sys.argv)
     window = MainWindow()
     window.setWindowTitle("Amp Analyzer")
     window.show()
-    window.on_load_clicked(ask_for_file_location=False)
+    return window
+
+def main():
+    app = QApplication(sys.argv)
+    # Names the app data directory, e.g. for the stall log
+    app.setApplicationName("AmpAnalyzer")
+    window = create_window()
+    # Restore autosave once the event loop is running so the window is shown first
+    QTimer.singleShot(0, lambda: window.on_load_clicked(ask_for_file_location=False))
     sys.exit(app.exec()) 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""
+Generates synthetic .pssession and .pst files for benchmarking.
+
+Files are laid out as <root>/<dataspace folder>/<channel>-<index>.<ext> so that
+extract_pssession_pst_data_from_file derives set names the same way as for real data.
+
+Usage:
+    python -m benchmarks.generate_sessions <root> --dataspaces 4 --datasets 32 --samples 1000
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+
+TIME_TYPE = "PalmSens.Data.DataArrayTime"
+CURRENT_TYPE = "PalmSens.Data.DataArrayCurrents"
+POTENTIAL_TYPE = "PalmSens.Data.DataArrayPotentials"
+
+# .NET ticks at 2024-01-01 00:00:00, pssession files store timestamps as ticks
+TICKS_2024 = 638396640000000000
+TICKS_PER_SECOND = 10_000_000
+
+def synthetic_transient(samples: int, interval: float, concentration: float, rng: np.random.Generator):
+    # Cottrell-like decay towards a concentration dependent plateau with some noise and occasional spikes
+    times = np.arange(1, samples + 1) * interval
+    plateau = -0.5 - 0.8 * concentration
+    currents = -2.0 / np.sqrt(times) + plateau
+    currents += rng.normal(0, 0.01, samples)
+    spikes = rng.random(samples) < 0.001
+    currents[spikes] += rng.normal(0, 0.5, spikes.sum())
+    return times, currents
+
+def pssession_measurement(times, currents, potential: float, timestamp: int, title: str, capitalized: bool):
+    if capitalized:
+        keys = ("DataSet", "Values", "Type", "DataValues", "V")
+        meta_keys = ("Title", "TimeStamp", "Method")
+    else:
+        keys = ("dataset", "values", "type", "datavalues", "v")
+        meta_keys = ("title", "timestamp", "method")
+    key_dataset, key_values, key_type, key_datavalues, key_value = keys
+    key_title, key_timestamp, key_method = meta_keys
+
+    def data_array(array_type, values):
+        return {
+            key_type: array_type,
+            key_datavalues: [{key_value: float(value), "S": 0, "C": 0} for value in values]
+        }
+
+    interval = float(times[1] - times[0]) if len(times) > 1 else 0.1
+    method = f"#method\r\nMETHOD_ID=ad\r\nE={potential}\r\nT_INTERVAL={interval}\r\nRUN_TIME={float(times[-1])}\r\n"
+    return {
+        key_title: title,
+        key_timestamp: timestamp,
+        key_method: method,
+        key_dataset: {
+            key_values: [
+                data_array(TIME_TYPE, times),
+                data_array(POTENTIAL_TYPE, np.full(len(times), potential)),
+                data_array(CURRENT_TYPE, currents)
+            ]
+        }
+    }
+
+def write_pssession(filepath, measurements: list, capitalized: bool = True):
+    key_measurements = "Measurements" if capitalized else "measurements"
+    document = {"Type": "PalmSens.DataFiles.SessionFile", key_measurements: measurements}
+    # Real files are UTF-16 LE with a byte order mark
+    with open(filepath, "w", encoding="utf-16-le") as f:
+        f.write("\ufeff")
+        f.write(json.dumps(document))
+
+def write_pst(filepath, times, currents, timestamp: int):
+    lines = [
+        "Chronoamperometry",
+        f"Date and time measurement: {timestamp}",
+        "s µA"
+    ]
+    lines.extend(f"{t:.3f} {c:.5E}" for t, c in zip(times, currents))
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+def generate_session_tree(root, dataspaces: int = 2, datasets: int = 16, samples: int = 1000, interval: float = 0.1,
+                          file_format: str = "pssession", measurements_per_file: int = 1, seed: int = 0):
+    """
+    Write dataspaces * datasets files under root and return their paths.
+    file_format is "pssession", "pst" or "mixed". Mixed alternates formats and key casings.
+    """
+    rng = np.random.default_rng(seed)
+    concentrations = [0, 1, 2, 5, 10]
+    filepaths = []
+
+    for space_index in range(dataspaces):
+        folder = os.path.join(root, f"batch_{space_index:03d}")
+        os.makedirs(folder, exist_ok=True)
+        for set_index in range(datasets):
+            concentration = concentrations[set_index % len(concentrations)]
+            channel = f"CH{set_index % 16 + 1}"
+            timestamp = TICKS_2024 + (space_index * datasets + set_index) * 60 * TICKS_PER_SECOND
+
+            if file_format == "mixed":
+                extension = "pssession" if set_index % 2 == 0 else "pst"
+            else:
+                extension = file_format
+            filepath = os.path.join(folder, f"{channel}-{set_index:05d}.{extension}")
+
+            if extension == "pst":
+                times, currents = synthetic_transient(samples, interval, concentration, rng)
+                write_pst(filepath, times, currents, timestamp)
+            else:
+                measurements = []
+                for measurement_index in range(measurements_per_file):
+                    times, currents = synthetic_transient(samples, interval, concentration, rng)
+                    title = f"Chronoamperometry {measurement_index}"
+                    measurements.append(pssession_measurement(times, currents, 0.4, timestamp, title, capitalized=True))
+                # Older files use lowercase keys, mixed sets cover both
+                capitalized = not (file_format == "mixed" and set_index % 4 == 0)
+                if not capitalized:
+                    measurements = [lowercase_keys(measurement) for measurement in measurements]
+                write_pssession(filepath, measurements, capitalized)
+            filepaths.append(filepath)
+    return filepaths
+
+def lowercase_keys(value):
+    if isinstance(value, dict):
+        return {key.lower(): lowercase_keys(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [lowercase_keys(item) for item in value]
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic .pssession/.pst files")
+    parser.add_argument("root", help="Output directory")
+    parser.add_argument("--dataspaces", type=int, default=2)
+    parser.add_argument("--datasets", type=int, default=16, help="Datasets per dataspace")
+    parser.add_argument("--samples", type=int, default=1000, help="Samples per dataset")
+    parser.add_argument("--interval", type=float, default=0.1, help="Sample interval in seconds")
+    parser.add_argument("--format", choices=["pssession", "pst", "mixed"], default="pssession")
+    parser.add_argument("--measurements", type=int, default=1, help="Measurements per .pssession file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    filepaths = generate_session_tree(args.root, args.dataspaces, args.datasets, args.samples, args.interval,
+                                      args.format, args.measurements, args.seed)
+    print(f"Generated {len(filepaths)} files in {args.root}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Headless benchmark suite.
+
+Times parsing, save/load, results, trendlines and offscreen plotting on synthetic
+sessions and writes the results as JSON so that runs can be compared.
+
+Usage, from the repository root or as a script from anywhere:
+    python -m benchmarks.run_benchmarks --dataspaces 4 --datasets 64 --samples 2000 --output bench.json
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+    python benchmarks/run_benchmarks.py --output bench.json
+"""
+
+import os
+# Must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("MPLBACKEND", "QtAgg")
+
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import contextlib
+import tempfile
+import tracemalloc
+import statistics
+import numpy as np
+
+# Run as a script the repository root is not on the path, the app packages are imported from it
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.generate_sessions import generate_session_tree
+
+def measure(function, repeat: int, trace_memory: bool):
+    # Returns timing statistics in seconds and peak traced memory in bytes
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    peak_memory = None
+    if trace_memory:
+        # Separate run, tracemalloc slows down allocations
+        gc.collect()
+        tracemalloc.start()
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.mean(timings),
+        "max_s": max(timings),
+        "peak_memory_bytes": peak_memory
+    }
+
+def build_dataspaces(filepaths_by_space: dict, parsed: dict):
+    # Same structure as PlotDataHandler.dataspaces
+    concentrations = [0, 1, 2, 5, 10]
+    dataspaces = {}
+    set_id = 0
+    for space_id, (folder, filepaths) in enumerate(sorted(filepaths_by_space.items())):
+        datasets = {}
+        for index, filepath in enumerate(filepaths):
+            times, currents, set_name = parsed[filepath]
+            datasets[set_id] = {
+                "name": set_name,
+                "times": times,
+                "currents": currents,
+                "concentration": float(concentrations[index % len(concentrations)]),
+                "notes": "",
+                "hidden": False,
+                "line_color": "tab:blue"
+            }
+            set_id += 1
+        dataspaces[space_id] = {"name": os.path.basename(folder), "notes": "", "datasets": datasets}
+    return dataspaces
+
+def run(args):
+    from PyQt6.QtWidgets import QApplication
+    import gui.data_operations as do
+    from gui.blob_store import get_blob_store
+    import gui.curve_index as ci
+    from gui.session_catalog import SessionCatalog
+    from plotting.plotter import PlotCanvas
+    from plotting import dataset_statistics, window_statistics, range_index
+    from plotting.memory_accounting import get_nbytes
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or os.path.join(tmp_dir, "data")
+        start = time.perf_counter()
+        filepaths = generate_session_tree(data_dir, args.dataspaces, args.datasets, args.samples,
+                                          args.interval, args.format, args.measurements, args.seed)
+        generate_time = time.perf_counter() - start
+        file_bytes = sum(os.path.getsize(filepath) for filepath in filepaths)
+
+        # Parsing
+        parsed = {}
+        def parse_all():
+            for filepath in filepaths:
+                parsed[filepath] = do.extract_pssession_pst_data_from_file(filepath)
+        results["extract_pssession_pst_data_from_file"] = measure(parse_all, args.repeat, args.memory)
+        results["extract_pssession_pst_data_from_file"]["files"] = len(filepaths)
+        def extract_all_measurements():
+            for filepath in filepaths:
+                do.extract_measurements_from_file(filepath)
+        results["extract_measurements_from_file"] = measure(extract_all_measurements, args.repeat, args.memory)
+
+        # Session catalog, the first run reads every file and the others only check modification times
+        catalog = SessionCatalog(os.path.join(tmp_dir, "session_catalog.sqlite"))
+        results["session_catalog_scan"] = measure(lambda: catalog.scan(data_dir, workers=1), args.repeat, args.memory)
+        catalog.close()
+
+        # Curve index, the first run builds it and the others only check the files
+        index_dir = os.path.join(tmp_dir, "curve_index")
+        results["build_curve_index"] = measure(lambda: ci.build_curve_index(filepaths, index_dir, workers=1), args.repeat, args.memory)
+        curve_index = ci.CurveIndex(index_dir)
+        query_times, query_currents, _ = parsed[filepaths[0]]
+        results["curve_index_query"] = measure(lambda: curve_index.query(query_times, query_currents, 10), args.repeat, args.memory)
+        results["curve_index_query"]["curves"] = curve_index.get_count()
+
+        filepaths_by_space = {}
+        for filepath in filepaths:
+            filepaths_by_space.setdefault(os.path.dirname(filepath), []).append(filepath)
+        dataspaces = build_dataspaces(filepaths_by_space, parsed)
+
+        canvas = PlotCanvas()
+        canvas.resize(1300, 700)
+        handler = canvas.data_handler
+        handler.dataspaces.clear()
+        handler.dataspaces.update(dataspaces)
+        handler.selected_space_id = 0
+        handler.active_spaces_ids = list(dataspaces.keys())
+        last_time = min(float(dataset["times"][-1]) for dataspace in dataspaces.values() for dataset in dataspace["datasets"].values())
+        handler.time_range = (last_time * 0.9, last_time)
+        for space_id in dataspaces:
+            handler.mark_changed(space_id)
+        # Snapshot for other threads after a change to one dataset
+        first_set_id = next(iter(dataspaces[0]["datasets"]))
+        results["publish_snapshot"] = measure(lambda: handler.set_dataset_hidden(first_set_id, False, 0), args.repeat, args.memory)
+        # Summaries of every dataset without the cache, as at import
+        results["dataset_summaries"] = measure(
+            lambda: [dataset_statistics.get_summaries(dataspace["datasets"], {}) for dataspace in dataspaces.values()], args.repeat, args.memory
+        )
+        # Replicate mean curves, resampling every dataset, and again from the cached rows
+        def calculate_all_replicate_curves():
+            return [handler.calculate_replicate_curves(space_id) for space_id in dataspaces]
+        results["replicate_curves"] = measure(lambda: (handler.drop_caches(), calculate_all_replicate_curves()), args.repeat, args.memory)
+        results["replicate_curves_cached"] = measure(calculate_all_replicate_curves, args.repeat, args.memory)
+
+        # Save/load
+        state = {
+            "window": {"space_widget_id": len(dataspaces), "set_widget_id": len(filepaths), "current_convert_value": ""},
+            "plot": {
+                "show_debug_info": False, "show_legend": True, "show_equation": True,
+                "span_initialized": True, "span_extents": handler.time_range,
+                "selected_space_id": 0, "active_spaces_ids": handler.active_spaces_ids,
+                "dataspaces": dataspaces, "color_index": 0,
+                "unit_current": "mA", "unit_concentration": "mmol"
+            }
+        }
+        save_path = os.path.join(tmp_dir, "bench.pickle")
+        results["save_program_state_to_file"] = measure(lambda: do.save_program_state_to_file(state, save_path), args.repeat, args.memory)
+        results["save_program_state_to_file"]["file_bytes"] = os.path.getsize(save_path)
+        results["save_program_state_to_file"]["blob_bytes"] = get_blob_store(os.path.join(tmp_dir, do.BLOB_DIRECTORY)).get_size()
+        results["load_program_state_from_file"] = measure(lambda: do.load_program_state_from_file(save_path), args.repeat, args.memory)
+
+        # Results and trendlines
+        def calculate_all_results():
+            return [handler.calculate_results(dataspace["datasets"], space_id) for space_id, dataspace in dataspaces.items()]
+        results["calculate_results"] = measure(calculate_all_results, args.repeat, args.memory)
+
+        trendline_inputs = []
+        for result in calculate_all_results():
+            concentrations, calculated_currents = zip(*result)
+            avg_currents, _ = zip(*calculated_currents)
+            trendline_inputs.append((concentrations, avg_currents))
+        def calculate_all_trendlines():
+            for concentrations, avg_currents in trendline_inputs:
+                handler.calculate_trendline(concentrations, avg_currents)
+        results["calculate_trendline"] = measure(calculate_all_trendlines, args.repeat, args.memory)
+        all_results = calculate_all_results()
+        results["calculate_trendlines_batched"] = measure(lambda: handler.calculate_trendlines(all_results), args.repeat, args.memory)
+
+        # Named windows, the cost per added window should stay small
+        for window_count in (1, 20):
+            for space_id in dataspaces:
+                handler.set_windows([
+                    {"name": str(i), "start": last_time * i / (window_count + 1), "end": last_time * (i + 1) / (window_count + 1)}
+                    for i in range(window_count)
+                ], space_id)
+            def calculate_all_window_results():
+                return [handler.calculate_window_results(space_id) for space_id in dataspaces]
+            results[f"calculate_window_results_{window_count}"] = measure(calculate_all_window_results, args.repeat, args.memory)
+        for space_id in dataspaces:
+            handler.set_windows([], space_id)
+
+        # Robust window statistics. The session traces are partitioned per window, a long trace gets a range index
+        for statistic in ("median", "trimmed_mean"):
+            for space_id in dataspaces:
+                handler.set_window_statistic_config({"statistic": statistic}, space_id)
+            results[f"calculate_results_{statistic}"] = measure(calculate_all_results, args.repeat, args.memory)
+        for space_id in dataspaces:
+            handler.set_window_statistic_config({}, space_id)
+        # A long trace, partitioning its windows against building and querying a range index of it
+        long_times = np.linspace(0, 100, window_statistics.RANGE_INDEX_MIN_SAMPLES * 5)
+        long_currents = np.sin(long_times) + np.random.default_rng(0).normal(0, 0.1, len(long_times))
+        long_packed = window_statistics.pack_datasets([0], [long_times], [long_currents])
+        long_windows = [(start, start + 50) for start in np.linspace(0, 50, 20)]
+        first, last = window_statistics.get_window_ranges(long_packed, np.array(long_windows))
+        results["long_trace_median_partition"] = measure(lambda: window_statistics.window_statistic(long_packed, long_windows, {"statistic": "median"}), args.repeat, args.memory)
+        results["range_index_build"] = measure(lambda: range_index.build_range_index(long_currents), args.repeat, args.memory)
+        long_index = range_index.build_range_index(long_currents)
+        results["range_index_build"]["index_bytes"] = get_nbytes(long_index)
+        results["long_trace_median_indexed"] = measure(lambda: range_index.range_medians(long_index, first[0], last[0]), args.repeat, args.memory)
+
+        # Cottrell fits of every dataset, without the cache
+        for exponential in (False, True):
+            for space_id in dataspaces:
+                handler.set_transient_fit_config({"exponential": exponential}, space_id)
+            def calculate_all_transient_fits():
+                handler.drop_caches()
+                return [handler.calculate_transient_fits(space_id) for space_id in dataspaces]
+            name = "calculate_transient_fits_exponential" if exponential else "calculate_transient_fits"
+            results[name] = measure(calculate_all_transient_fits, args.repeat, args.memory)
+        for space_id in dataspaces:
+            handler.set_transient_fit_config({}, space_id)
+
+        # Every file quantified as an unknown sample against the first dataspace, parsing included
+        def quantify_all_files():
+            samples = [
+                {"times": measurement["arrays"]["time"], "currents": measurement["arrays"]["currents"]}
+                for measurements in do.extract_measurements_from_files(filepaths) for measurement in measurements
+            ]
+            return handler.quantify_samples(samples, 0)
+        results["quantify_samples"] = measure(quantify_all_files, args.repeat, args.memory)
+
+        # Offscreen plotting, includes rendering the figure to the canvas buffer
+        def plot_data():
+            canvas.plot_data()
+            canvas.draw()
+        def plot_results():
+            canvas.plot_results()
+            canvas.draw()
+        results["plot_data"] = measure(plot_data, args.repeat, args.memory)
+        results["plot_results"] = measure(plot_results, args.repeat, args.memory)
+
+        app.processEvents()
+
+    return {
+        "scale": {
+            "dataspaces": args.dataspaces,
+            "datasets_per_dataspace": args.datasets,
+            "samples_per_dataset": args.samples,
+            "measurements_per_file": args.measurements,
+            "format": args.format,
+            "files": len(filepaths),
+            "file_bytes": file_bytes,
+            "generate_s": generate_time
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "benchmarks": results
+    }
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{'benchmark':40} {'old median':>12} {'new median':>12} {'ratio':>8}")
+    for name, new_result in new["benchmarks"].items():
+        old_result = old["benchmarks"].get(name)
+        if old_result is None:
+            print(f"{name:40} {'-':>12} {new_result['median_s']:12.4f} {'-':>8}")
+            continue
+        ratio = new_result["median_s"] / old_result["median_s"] if old_result["median_s"] else float("nan")
+        print(f"{name:40} {old_result['median_s']:12.4f} {new_result['median_s']:12.4f} {ratio:8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless benchmarks on synthetic sessions")
+    parser.add_argument("--dataspaces", type=int, default=2)
+    parser.add_argument("--datasets", type=int, default=32, help="Datasets per dataspace")
+    parser.add_argument("--samples", type=int, default=1000, help="Samples per dataset")
+    parser.add_argument("--interval", type=float, default=0.1, help="Sample interval in seconds")
+    parser.add_argument("--format", choices=["pssession", "pst", "mixed"], default="mixed")
+    parser.add_argument("--measurements", type=int, default=1, help="Measurements per .pssession file")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip peak memory measurement")
+    parser.add_argument("--data-dir", help="Keep generated files in this directory instead of a temporary one")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Keep stdout clean for the JSON report, the application prints its own messages
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        for name, result in report["benchmarks"].items():
+            print(f"{name:40} median {result['median_s']:.4f}s")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
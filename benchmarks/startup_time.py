@@ -0,0 +1,77 @@
+"""
+Measures cold start time of the application in fresh processes.
+
+Reports the time from process launch until
+- "shown": the main window has been created and shown
+- "interactive": the event loop has processed its first batch of events, including deferred startup work
+
+Usage:
+    python -m benchmarks.startup_time --runs 5 --output startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys, time
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+app = QApplication(sys.argv)
+import amp_analyzer
+window = amp_analyzer.create_window()
+print("shown", flush=True)
+
+def on_interactive():
+    print("interactive", flush=True)
+    window.rt.stop()
+    # quit() would close the window and ask for confirmation
+    app.exit(0)
+
+# Runs after the events queued during startup, like the deferred first plot draw
+QTimer.singleShot(0, lambda: QTimer.singleShot(0, on_interactive))
+app.exec()
+"""
+
+def measure_once(python):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    process = subprocess.Popen([python, "-c", PROBE], cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    marks = {}
+    for line in process.stdout:
+        mark = line.strip()
+        if mark in ("shown", "interactive"):
+            marks[mark] = time.perf_counter() - start
+    process.wait()
+    if process.returncode != 0 or len(marks) != 2:
+        raise RuntimeError(f"Startup probe failed with exit code {process.returncode}")
+    return marks
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure application cold start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--python", default=sys.executable, help="Interpreter used to start the application")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    runs = [measure_once(args.python) for _ in range(args.runs)]
+    report = {"runs": runs}
+    for mark in ("shown", "interactive"):
+        values = [run[mark] for run in runs]
+        report[mark] = {"min_s": min(values), "median_s": statistics.median(values), "max_s": max(values)}
+        print(f"{mark:12} median {report[mark]['median_s']:.3f}s  min {report[mark]['min_s']:.3f}s")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Content-addressed store for the arrays of saved sessions.
+
+Arrays are written once as <directory>/<first 2 hex digits>/<digest>.npy, named by a hash of their dtype,
+shape and data. Save files hold BlobRefs instead of the arrays, so saves share the traces they have in common.
+
+Remove blobs no save file refers to:
+    python -m gui.blob_store gc <folder with save files> [--min-age 3600] [--dry-run]
+"""
+
+import os
+import time
+import hashlib
+import weakref
+import threading
+import argparse
+import numpy as np
+
+class BlobRef():
+    # Reference to an array in a BlobStore, pickled into save files in place of the array
+    __slots__ = ("digest", "dtype", "shape")
+
+    def __init__(self, digest: str, dtype: str, shape: tuple):
+        self.digest = digest
+        self.dtype = dtype
+        self.shape = shape
+
+    def __getstate__(self):
+        return (self.digest, self.dtype, self.shape)
+
+    def __setstate__(self, state):
+        self.digest, self.dtype, self.shape = state
+
+    def __repr__(self):
+        return f"BlobRef({self.digest[:12]}, {self.dtype}, {self.shape})"
+
+def get_digest(array: np.ndarray):
+    # blake2b is faster than sha256 and content addressing needs no more than 160 bits
+    array = np.ascontiguousarray(array)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{array.dtype.str}{array.shape}".encode("ascii"))
+    digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+class BlobStore():
+    def __init__(self, directory: str):
+        self.directory = directory
+        # Digests of arrays that were already stored, by array id. The weak reference tells if the id was reused
+        self.known_arrays = {}
+
+    def get_path(self, digest: str):
+        return os.path.join(self.directory, digest[:2], f"{digest}.npy")
+
+    def put(self, array):
+        # Stores the array if it is not stored yet and returns its reference.
+        # Arrays are assumed not to change in place, replaced data must be a new array
+        # Known arrays are only trusted while their blob exists, garbage collection may have removed it since
+        known = self.known_arrays.get(id(array))
+        if known != None and known[0]() is array and os.path.exists(self.get_path(known[1].digest)):
+            return known[1]
+
+        values = np.asarray(array)
+        if values.dtype == object:
+            values = values.astype(float)
+        digest = get_digest(values)
+        path = self.get_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                np.save(file, values, allow_pickle=False)
+            os.replace(temp_path, path)
+        ref = BlobRef(digest, values.dtype.str, values.shape)
+
+        if isinstance(array, np.ndarray):
+            array_id = id(array)
+            self.known_arrays[array_id] = (weakref.ref(array, lambda _: self.known_arrays.pop(array_id, None)), ref)
+        return ref
+
+    def get(self, ref: BlobRef):
+        array = np.load(self.get_path(ref.digest), allow_pickle=False)
+        # The loaded array has the digest of the file, no need to hash it again on the next save
+        array_id = id(array)
+        self.known_arrays[array_id] = (weakref.ref(array, lambda _: self.known_arrays.pop(array_id, None)), ref)
+        return array
+
+    def iter_blobs(self):
+        # Yields (digest, path) of every stored blob
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in os.listdir(self.directory):
+            folder = os.path.join(self.directory, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for filename in os.listdir(folder):
+                if filename.endswith(".npy"):
+                    yield filename[:-len(".npy")], os.path.join(folder, filename)
+
+    def remove_unreferenced(self, referenced: set, min_age: float = 3600, dry_run: bool = False):
+        # Removes blobs whose digest is not in referenced. Blobs newer than min_age seconds are kept,
+        # they may belong to a save that is being written. Returns the number of blobs and bytes removed
+        now = time.time()
+        removed_count = 0
+        removed_bytes = 0
+        removed_digests = set()
+        for digest, path in list(self.iter_blobs()):
+            if digest in referenced:
+                continue
+            stat = os.stat(path)
+            if now - stat.st_mtime < min_age:
+                continue
+            if not dry_run:
+                os.remove(path)
+                removed_digests.add(digest)
+            removed_count += 1
+            removed_bytes += stat.st_size
+        # Arrays of removed blobs have to be written again by the next save
+        for array_id, (_, ref) in list(self.known_arrays.items()):
+            if ref.digest in removed_digests:
+                self.known_arrays.pop(array_id, None)
+        # Leftovers of interrupted writes
+        for prefix in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            folder = os.path.join(self.directory, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for filename in os.listdir(folder):
+                path = os.path.join(folder, filename)
+                if filename.endswith(".tmp") and now - os.stat(path).st_mtime >= min_age and not dry_run:
+                    os.remove(path)
+            if not dry_run and not os.listdir(folder):
+                os.rmdir(folder)
+        return removed_count, removed_bytes
+
+    def get_size(self):
+        return sum(os.path.getsize(path) for _, path in self.iter_blobs())
+
+# One store per directory so the known digests survive between saves
+stores = {}
+
+def get_blob_store(directory: str):
+    directory = os.path.abspath(directory)
+    if directory not in stores:
+        stores[directory] = BlobStore(directory)
+    return stores[directory]
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the blob store of saved sessions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    gc_parser = subparsers.add_parser("gc", help="Remove blobs that no save file in the folder refers to")
+    gc_parser.add_argument("folder", help="Folder with the save files and their blobs directory")
+    gc_parser.add_argument("--min-age", type=float, default=3600, help="Keep blobs newer than this many seconds")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    args = parser.parse_args()
+
+    # Imported here, data_operations imports this module
+    import gui.data_operations as do
+    removed_count, removed_bytes = do.collect_blob_garbage(args.folder, args.min_age, args.dry_run)
+    action = "Would remove" if args.dry_run else "Removed"
+    print(f"{action} {removed_count} blobs, {removed_bytes / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Compiles amp_analyzer.ui into gui/ui_main_window.py so that startup does not parse the XML.
+Run after editing amp_analyzer.ui:
+    python -m gui.build_ui
+
+MainWindow falls back to loading the .ui file at runtime if the compiled module is missing
+or was built from a different version of the .ui file.
+"""
+
+import os
+import io
+import hashlib
+
+UI_PATH = "amp_analyzer.ui"
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui_main_window.py")
+
+def ui_source_hash(ui_path=UI_PATH):
+    with open(ui_path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def build_ui(ui_path=UI_PATH, output_path=OUTPUT_PATH):
+    from PyQt6.uic import compileUi
+
+    code = io.StringIO()
+    with open(ui_path, encoding="utf-8") as ui_file:
+        compileUi(ui_file, code)
+
+    with open(output_path, "w", encoding="utf-8") as file:
+        file.write(code.getvalue())
+        file.write(f"\n\n# Hash of the .ui file this module was compiled from\nUI_SOURCE_HASH = \"{ui_source_hash(ui_path)}\"\n")
+    print("Compiled", ui_path, "to", output_path)
+
+if __name__ == "__main__":
+    build_ui()
@@ -0,0 +1,204 @@
+import os
+import math
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+# Persistent history of calibrations, one row per dataspace and window every time results are recorded.
+# The dataspace name is the sensor batch. Identical sets of source file hashes are stored once and shared.
+
+DEFAULT_PATH = os.path.join(os.getcwd(), "calibration_history.sqlite")
+
+FIELDS = ("slope", "intercept", "r_squared", "slope_se", "intercept_se")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS source_sets (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    hashes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calibrations (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    batch TEXT NOT NULL,
+    window TEXT NOT NULL,
+    start REAL,
+    end REAL,
+    weighted INTEGER NOT NULL,
+    origin TEXT NOT NULL,
+    slope REAL,
+    intercept REAL,
+    r_squared REAL,
+    slope_se REAL,
+    intercept_se REAL,
+    dataset_count INTEGER NOT NULL,
+    source_set_id INTEGER REFERENCES source_sets(id)
+);
+CREATE TABLE IF NOT EXISTS concentration_stats (
+    calibration_id INTEGER NOT NULL REFERENCES calibrations(id) ON DELETE CASCADE,
+    concentration REAL NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL,
+    std REAL
+);
+CREATE INDEX IF NOT EXISTS calibrations_batch_window_created ON calibrations(batch, window, created);
+CREATE INDEX IF NOT EXISTS calibrations_window_created ON calibrations(window, created);
+CREATE INDEX IF NOT EXISTS calibrations_created ON calibrations(created);
+CREATE INDEX IF NOT EXISTS concentration_stats_calibration ON concentration_stats(calibration_id);
+"""
+
+def to_float(value):
+    # nan is stored as NULL
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def get_calibration_entries(data_handler, space_ids: list, weighted: bool = False):
+    '''
+    Calibrations of the span and the named windows of the dataspaces, ready for CalibrationHistory.record:
+    [{"batch", "window", "start", "end", "weighted", "slope", ..., "concentrations": [(concentration, count, mean, std)], "sources": [sha1]}]
+    '''
+    entries = []
+    for space_id in space_ids:
+        windows = [{"name": "span", "start": float(data_handler.time_range[0]), "end": float(data_handler.time_range[1])}]
+        windows += data_handler.get_windows(space_id)
+        results = data_handler.calculate_window_results(space_id, windows, weighted)
+        entries += get_result_entries(data_handler.dataspaces[space_id], results, weighted)
+    return entries
+
+def get_result_entries(dataspace: dict, results: dict, weighted: bool):
+    # Entries of one dataspace from the results of PlotDataHandler.calculate_window_results, none without a calibration
+    if len(results["concentrations"]) < 2:
+        return []
+    entries = []
+    datasets = dataspace["datasets"]
+    sources = sorted({datasets[set_id].get("metadata", {}).get("sha1") for set_id in results["set_ids"]} - {None})
+    for j, window in enumerate(results["windows"]):
+        entry = {
+            "batch": dataspace["name"],
+            "window": window["name"],
+            "start": window["start"],
+            "end": window["end"],
+            "weighted": weighted,
+            "dataset_count": len(results["set_ids"]),
+            "concentrations": [
+                (float(concentration), int(results["counts"][i]), results["averages"][i, j], results["stds"][i, j])
+                for i, concentration in enumerate(results["concentrations"])
+            ],
+            "sources": sources
+        }
+        for field, key in zip(FIELDS, ("slopes", "intercepts", "r_squared", "slope_ses", "intercept_ses")):
+            entry[field] = results[key][j]
+        entries.append(entry)
+    return entries
+
+def get_entry_signature(entry: dict):
+    # Entries with the same signature are the same calibration, recording it again adds nothing
+    return (
+        entry["batch"], entry["window"], round(entry["start"], 9), round(entry["end"], 9), entry["weighted"],
+        tuple(None if to_float(entry[field]) == None else round(entry[field], 12) for field in FIELDS), tuple(entry["sources"])
+    )
+
+class CalibrationHistory():
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        # One connection shared by all threads, serialized by the lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+        self.last_signatures = {}
+        self.source_set_ids = {}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_source_set_id(self, hashes: list):
+        if len(hashes) == 0:
+            return None
+        key = tuple(hashes)
+        if key not in self.source_set_ids:
+            text = json.dumps(hashes)
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            self.connection.execute("INSERT OR IGNORE INTO source_sets (digest, hashes) VALUES (?, ?)", (digest, text))
+            self.source_set_ids[key] = self.connection.execute("SELECT id FROM source_sets WHERE digest = ?", (digest,)).fetchone()[0]
+        return self.source_set_ids[key]
+
+    def record(self, entries: list, origin: str = "results", created: float = None, skip_unchanged: bool = True):
+        # Inserts the entries in one transaction and returns how many were recorded.
+        # With skip_unchanged an entry equal to the last one recorded for its batch and window is skipped
+        if created == None:
+            created = time.time()
+        recorded = 0
+        with self.lock, self.connection:
+            for entry in entries:
+                signature = get_entry_signature(entry)
+                key = (entry["batch"], entry["window"])
+                if skip_unchanged and self.last_signatures.get(key) == signature:
+                    continue
+                self.last_signatures[key] = signature
+                cursor = self.connection.execute(
+                    "INSERT INTO calibrations (created, batch, window, start, end, weighted, origin, slope, intercept, r_squared, "
+                    "slope_se, intercept_se, dataset_count, source_set_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (created, entry["batch"], entry["window"], entry["start"], entry["end"], int(entry["weighted"]), origin,
+                     *[to_float(entry[field]) for field in FIELDS], entry["dataset_count"], self.get_source_set_id(entry["sources"]))
+                )
+                self.connection.executemany(
+                    "INSERT INTO concentration_stats (calibration_id, concentration, count, mean, std) VALUES (?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, concentration, count, to_float(mean), to_float(std)) for concentration, count, mean, std in entry["concentrations"]]
+                )
+                recorded += 1
+        return recorded
+
+    def get_batches(self):
+        # Distinct values straight from the index
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT DISTINCT batch FROM calibrations ORDER BY batch")]
+
+    def get_windows(self, batch: str = None):
+        with self.lock:
+            if batch == None:
+                rows = self.connection.execute("SELECT DISTINCT window FROM calibrations ORDER BY window")
+            else:
+                rows = self.connection.execute("SELECT DISTINCT window FROM calibrations WHERE batch = ? ORDER BY window", (batch,))
+            return [row[0] for row in rows]
+
+    def query_drift(self, batch: str, window: str = "span", field: str = "slope", since: float = None, until: float = None):
+        '''
+        A field of the calibrations of one batch and window over time, oldest first:
+        {"ids", "created": unix times, "values", "errors": standard errors for slope and intercept, else nan}
+        '''
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        error_field = {"slope": "slope_se", "intercept": "intercept_se"}.get(field)
+        columns = f"id, created, {field}, {error_field if error_field else 'NULL'}"
+        query = f"SELECT {columns} FROM calibrations WHERE batch = ? AND window = ? AND created >= ? AND created <= ? ORDER BY created"
+        with self.lock:
+            rows = self.connection.execute(query, (batch, window, since or 0, until or float("inf"))).fetchall()
+        rows = np.array(rows, dtype=float).reshape(-1, 4)
+        return {"ids": rows[:, 0].astype(int), "created": rows[:, 1], "values": rows[:, 2], "errors": rows[:, 3]}
+
+    def get_concentration_stats(self, calibration_id: int):
+        # int() as the ids from query_drift are numpy integers, which sqlite would bind as bytes
+        calibration_id = int(calibration_id)
+        with self.lock:
+            return self.connection.execute(
+                "SELECT concentration, count, mean, std FROM concentration_stats WHERE calibration_id = ? ORDER BY concentration", (calibration_id,)
+            ).fetchall()
+
+    def get_sources(self, calibration_id: int):
+        calibration_id = int(calibration_id)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT hashes FROM source_sets JOIN calibrations ON calibrations.source_set_id = source_sets.id WHERE calibrations.id = ?", (calibration_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def get_count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM calibrations").fetchone()[0]
@@ -0,0 +1,78 @@
+from datetime import datetime
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from gui.session_catalog import COLUMNS
+
+class CatalogTableModel(QAbstractTableModel):
+    # Table model over rows of SessionCatalog.search. Only visible rows are formatted,
+    # so tens of thousands of files show without creating an item per cell.
+
+    # Column key, header
+    columns = [
+        ("set_name", "Set"),
+        ("channel", "Channel"),
+        ("timestamp", "Measured"),
+        ("measurements", "Measurements"),
+        ("samples", "Samples"),
+        ("duration", "Duration (s)"),
+        ("method", "Method"),
+        ("title", "Title"),
+        ("path", "Path")
+    ]
+    numeric_keys = {"measurements", "samples", "duration"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.indices = [COLUMNS.index(key) for key, _ in self.columns]
+
+    def set_rows(self, rows: list):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def get_path(self, row: int):
+        return self.rows[row][COLUMNS.index("path")]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.columns[section][1]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.columns[index.column()][0]
+        value = self.rows[index.row()][self.indices[index.column()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value == None:
+                return ""
+            if key == "timestamp":
+                return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+            if key == "duration":
+                return f"{value:.6g}"
+            return str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and key in self.numeric_keys:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.ToolTipRole and key == "path":
+            return value
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # Missing values sort last either way. A reset clears the selection, so it can not point at other rows afterwards
+        index = self.indices[column]
+        reverse = order == Qt.SortOrder.DescendingOrder
+        present = [row for row in self.rows if row[index] != None]
+        missing = [row for row in self.rows if row[index] == None]
+        self.beginResetModel()
+        self.rows = sorted(present, key=lambda row: row[index], reverse=reverse) + missing
+        self.endResetModel()
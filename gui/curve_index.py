@@ -0,0 +1,235 @@
+import os
+import json
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import gui.data_operations as do
+
+# Similarity index of archived measurement curves.
+# Every curve is resampled to FEATURE_LENGTH points evenly over its own time range and z-normalized, so curves
+# compare by shape. The features are a float32 matrix in an .npy file that queries read memory mapped.
+# The coarse matrix holds block means of the features (piecewise aggregate approximation). Its distances
+# times COARSE_BLOCK are a lower bound of the full ones, so it is small enough to scan first and pick candidates.
+
+FEATURE_LENGTH = 128
+COARSE_LENGTH = 16
+COARSE_BLOCK = FEATURE_LENGTH // COARSE_LENGTH
+# With the prefilter the full distance is only computed for this many candidates per match, at least
+PREFILTER_FACTOR = 20
+PREFILTER_MIN_CANDIDATES = 1000
+# Rows per block of the full scan, bounds the memory of the distances
+SCAN_BLOCK_ROWS = 65536
+
+FEATURES_FILE = "features.npy"
+COARSE_FILE = "coarse.npy"
+ENTRIES_FILE = "entries.json"
+
+def get_features(times, currents, length: int = FEATURE_LENGTH):
+    # Returns the float32 feature vector of one curve. Flat and empty curves are all zeros
+    times = np.asarray(times, dtype=float)
+    currents = np.asarray(currents, dtype=float)
+    finite = np.isfinite(times) & np.isfinite(currents)
+    times, currents = times[finite], currents[finite]
+    if len(times) < 2 or times[-1] <= times[0]:
+        return np.zeros(length, dtype=np.float32)
+    resampled = np.interp(np.linspace(times[0], times[-1], length), times, currents)
+    std = resampled.std()
+    if std == 0:
+        return np.zeros(length, dtype=np.float32)
+    return ((resampled - resampled.mean()) / std).astype(np.float32)
+
+def get_coarse_features(features: np.ndarray):
+    return features.reshape(len(features), COARSE_LENGTH, COARSE_BLOCK).mean(axis=-1, dtype=np.float32)
+
+def extract_file_features(filepath):
+    # Entries and feature rows of every measurement in a file, run in worker processes when building
+    try:
+        measurements = do.extract_measurements_from_file(filepath)
+    except Exception as e:
+        print(f"extract_file_features: {filepath}: {e}")
+        return [], np.empty((0, FEATURE_LENGTH), dtype=np.float32)
+    entries = []
+    features = np.empty((len(measurements), FEATURE_LENGTH), dtype=np.float32)
+    for i, measurement in enumerate(measurements):
+        times = measurement["arrays"]["time"]
+        metadata = measurement["metadata"]
+        entries.append({
+            "name": measurement["name"],
+            "source": filepath,
+            "measurement_index": metadata["measurement_index"],
+            "sha1": metadata["sha1"],
+            "title": metadata.get("title", ""),
+            "timestamp": metadata.get("timestamp"),
+            "samples": len(times),
+            "duration": float(times[-1] - times[0]) if len(times) > 1 else 0.0
+        })
+        features[i] = get_features(times, measurement["arrays"]["currents"])
+    return entries, features
+
+def get_file_stamp(filepath):
+    stat = os.stat(filepath)
+    return [stat.st_mtime, stat.st_size]
+
+def build_curve_index(filepaths: list, directory: str, workers: int = None, progress=None):
+    '''
+    Builds or updates the index in directory from the given .pssession and .pst files and returns a CurveIndex.
+    Rows of files whose modification time and size did not change since the last build are reused, files that are
+    no longer listed are dropped. progress(done, total) is called as new files are parsed.
+    '''
+    os.makedirs(directory, exist_ok=True)
+    old_index = CurveIndex(directory) if os.path.exists(os.path.join(directory, ENTRIES_FILE)) else None
+    old_rows = {}
+    if old_index != None:
+        for row, entry in enumerate(old_index.entries):
+            old_rows.setdefault(entry["source"], []).append(row)
+
+    filepaths = list(dict.fromkeys(os.path.abspath(filepath) for filepath in filepaths))
+    stamps = {}
+    for filepath in filepaths:
+        try:
+            stamps[filepath] = get_file_stamp(filepath)
+        except OSError as e:
+            print(f"build_curve_index: {e}")
+    reused = [
+        filepath for filepath in stamps
+        if old_index != None and filepath in old_rows and old_index.files.get(filepath) == stamps[filepath]
+    ]
+    reused_set = set(reused)
+    parse_paths = [filepath for filepath in stamps if filepath not in reused_set]
+
+    # Parse the new and changed files in worker processes, JSON decoding dominates and holds the GIL. Spawned rather than forked,
+    # forking the GUI process while its other threads hold locks can copy the held locks into the children. Starting them takes
+    # about a second, so small updates are parsed here
+    parsed = {}
+    if len(parse_paths) > 0:
+        if workers == None:
+            workers = os.cpu_count() or 1
+        chunk_size = max(1, len(parse_paths) // (workers * 4))
+        parse_bytes = sum(stamps[filepath][1] for filepath in parse_paths)
+        if workers > 1 and len(parse_paths) > 1 and parse_bytes >= do.PARALLEL_MIN_BYTES:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                for i, (filepath, result) in enumerate(zip(parse_paths, pool.map(extract_file_features, parse_paths, chunksize=chunk_size))):
+                    parsed[filepath] = result
+                    if progress != None:
+                        progress(i + 1, len(parse_paths))
+        else:
+            for i, filepath in enumerate(parse_paths):
+                parsed[filepath] = extract_file_features(filepath)
+                if progress != None:
+                    progress(i + 1, len(parse_paths))
+
+    # Rows in the order of filepaths
+    entries = []
+    row_count = sum(len(old_rows[filepath]) for filepath in reused) + sum(len(parsed[filepath][0]) for filepath in parse_paths)
+    temp_path = os.path.join(directory, f"{FEATURES_FILE}.tmp")
+    if row_count > 0:
+        features = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.float32, shape=(row_count, FEATURE_LENGTH))
+    else:
+        # Zero sized files can not be memory mapped
+        features = np.empty((0, FEATURE_LENGTH), dtype=np.float32)
+        with open(temp_path, "wb") as file:
+            np.save(file, features)
+    row = 0
+    for filepath in stamps:
+        if filepath in reused_set:
+            rows = old_rows[filepath]
+            file_entries = [old_index.entries[i] for i in rows]
+            file_features = old_index.features[rows]
+        else:
+            file_entries, file_features = parsed[filepath]
+        features[row:row + len(file_entries)] = file_features
+        entries.extend(file_entries)
+        row += len(file_entries)
+    if row_count > 0:
+        features.flush()
+    coarse = get_coarse_features(np.asarray(features))
+    del features
+    if old_index != None:
+        old_index.close()
+
+    with open(os.path.join(directory, f"{COARSE_FILE}.tmp"), "wb") as file:
+        np.save(file, coarse)
+    with open(os.path.join(directory, f"{ENTRIES_FILE}.tmp"), "w", encoding="utf-8") as file:
+        json.dump({"feature_length": FEATURE_LENGTH, "files": stamps, "entries": entries}, file)
+    # The entries last, they are what makes the index exist
+    os.replace(temp_path, os.path.join(directory, FEATURES_FILE))
+    os.replace(os.path.join(directory, f"{COARSE_FILE}.tmp"), os.path.join(directory, COARSE_FILE))
+    os.replace(os.path.join(directory, f"{ENTRIES_FILE}.tmp"), os.path.join(directory, ENTRIES_FILE))
+    return CurveIndex(directory)
+
+class CurveIndex():
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, ENTRIES_FILE), "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data["feature_length"] != FEATURE_LENGTH:
+            raise ValueError(f"Index in {directory} has features of length {data['feature_length']}, rebuild it")
+        self.files = data["files"]
+        self.entries = data["entries"]
+        if len(self.entries) > 0:
+            self.features = np.load(os.path.join(directory, FEATURES_FILE), mmap_mode="r")
+        else:
+            # Zero sized files can not be memory mapped
+            self.features = np.empty((0, FEATURE_LENGTH), dtype=np.float32)
+        self.coarse = np.load(os.path.join(directory, COARSE_FILE))
+        # Squared norms for distances from dot products, FEATURE_LENGTH except for flat curves
+        self.coarse_norms = np.einsum("ij,ij->i", self.coarse, self.coarse)
+        self.norms = None
+
+    def close(self):
+        # Releases the memory map so the files can be replaced
+        self.features = None
+
+    def get_count(self):
+        return len(self.entries)
+
+    def get_norms(self):
+        if self.norms is None:
+            self.norms = np.concatenate([
+                np.einsum("ij,ij->i", block, block) for block in self.iter_blocks()
+            ]) if len(self.entries) > 0 else np.empty(0, dtype=np.float32)
+        return self.norms
+
+    def iter_blocks(self):
+        for first in range(0, len(self.entries), SCAN_BLOCK_ROWS):
+            yield np.asarray(self.features[first:first + SCAN_BLOCK_ROWS])
+
+    def query(self, times, currents, k: int = 10, prefilter: bool = True, exclude: tuple = None):
+        '''
+        The k curves most similar to the given one, nearest first: [(row, distance)].
+        The distance is the RMS difference of the z-normalized curves, 0 for the same shape and about 1.4 for unrelated ones.
+        With prefilter only the candidates nearest by the coarse features are compared in full, which can miss a match
+        but keeps queries fast on large archives. The curve with exclude = (sha1, measurement_index), usually the queried one, is skipped.
+        '''
+        count = len(self.entries)
+        if count == 0 or k < 1:
+            return []
+        query = get_features(times, currents)
+        query_norm = float(query @ query)
+        excluded = None
+        if exclude != None:
+            excluded = np.array([(entry["sha1"], entry["measurement_index"]) == tuple(exclude) for entry in self.entries])
+        k_plus = k + (int(excluded.sum()) if excluded is not None else 0)
+
+        candidate_count = max(k_plus * PREFILTER_FACTOR, PREFILTER_MIN_CANDIDATES)
+        if prefilter and count > candidate_count:
+            coarse_query = get_coarse_features(query[None])[0]
+            bounds = self.coarse_norms + float(coarse_query @ coarse_query) - 2 * (self.coarse @ coarse_query)
+            rows = np.sort(np.argpartition(bounds, candidate_count)[:candidate_count])
+            candidates = np.asarray(self.features[rows])
+            distances = np.einsum("ij,ij->i", candidates, candidates) + query_norm - 2 * (candidates @ query)
+        else:
+            rows = np.arange(count)
+            distances = np.concatenate([
+                self.get_norms()[first:first + len(block)] + query_norm - 2 * (block @ query)
+                for first, block in zip(range(0, count, SCAN_BLOCK_ROWS), self.iter_blocks())
+            ])
+
+        if excluded is not None:
+            distances = np.where(excluded[rows], np.inf, distances)
+        k_plus = min(k_plus, len(distances))
+        nearest = np.argpartition(distances, k_plus - 1)[:k_plus]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        nearest = nearest[np.isfinite(distances[nearest])][:k]
+        rms = np.sqrt(np.maximum(distances[nearest], 0) / FEATURE_LENGTH)
+        return [(int(rows[i]), float(distance)) for i, distance in zip(nearest, rms)]
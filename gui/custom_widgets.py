@@ -1,23 +1,17 @@
-from PyQt6.QtWidgets import QLineEdit, QPushButton, QScrollArea
+from PyQt6.QtWidgets import QLineEdit, QPushButton, QTableView, QStyledItemDelegate, QAbstractItemDelegate, QAbstractItemView, QHeaderView
 from PyQt6.QtCore import pyqtSignal, Qt
+from gui.dataset_table_model import DatasetTableModel
 
 class CustomQLineEdit(QLineEdit):
     # Selects all text on mouse click
-    # Allows moving and copying between line edits with arrow keys + ctrl
-    
-    custom_line_edit_sets = {}
-    main_window = None
+    # Allows moving and copying between table cells with arrow keys + ctrl
 
-    def __init__(self, set_index, text, parent=None):
-        super().__init__(text, parent)
-        self.main_window = parent
-        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+    # step, copy_text
+    arrowKeyPressed = pyqtSignal(int, bool)
 
-        self.set_index = set_index
-        if set_index not in self.custom_line_edit_sets:
-            self.custom_line_edit_sets[set_index] = []
-        
-        self.custom_line_edit_sets[set_index].append(self)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
@@ -28,46 +22,103 @@ class CustomQLineEdit(QLineEdit):
         if event.key() == Qt.Key.Key_Up:
             if modifiers == Qt.KeyboardModifier.ControlModifier:
                 # Ctrl + Up Arrow
-                self.focusLineEdit(-1, True)
+                self.arrowKeyPressed.emit(-1, True)
             elif modifiers == Qt.KeyboardModifier.NoModifier:
                 # Up Arrow
-                self.focusLineEdit(-1, False)
+                self.arrowKeyPressed.emit(-1, False)
         elif event.key() == Qt.Key.Key_Down:
             if modifiers == Qt.KeyboardModifier.ControlModifier:
                 # Ctrl + Down Arrow
-                self.focusLineEdit(1, True)
+                self.arrowKeyPressed.emit(1, True)
             elif modifiers == Qt.KeyboardModifier.NoModifier:
                 # Down Arrow
-                self.focusLineEdit(1, False)
+                self.arrowKeyPressed.emit(1, False)
         else:
             super().keyPressEvent(event)
 
+class DatasetItemDelegate(QStyledItemDelegate):
+    # Creates CustomQLineEdit editors for the text cells of DatasetTableView
 
-    def focusLineEdit(self, step: int, copy_text: bool):
-        current_set = self.custom_line_edit_sets[self.set_index]
-        current_index = current_set.index(self)
-        
-        next_index = current_index + step
-        
-        # Check if next_index is out of bounds
-        if next_index >= len(current_set) or next_index < 0:
+    def __init__(self, view, parent=None):
+        super().__init__(parent)
+        self.view = view
+
+    def createEditor(self, parent, option, index):
+        editor = CustomQLineEdit(parent)
+        editor.arrowKeyPressed.connect(lambda step, copy_text: self.view.move_editor(editor, step, copy_text))
+
+        # Update concentration on every keystroke, same as before the table view
+        if index.column() == DatasetTableModel.COLUMN_CONCENTRATION:
+            editor.textEdited.connect(lambda text: self.on_concentration_text_changed(editor, text))
+        return editor
+
+    def on_concentration_text_changed(self, editor: QLineEdit, text):
+        # Check if input is numeric
+        try:
+            float(text)
+        except ValueError:
+            editor.setStyleSheet("background-color: rgba(140, 0, 0, 0.3)")
             return
-            
-        while not current_set[next_index].isEnabled():
-            next_index += step
-            
-            # Check if next_index is out of bounds
-            if next_index >= len(current_set) or next_index < 0:
-                return
-        
-        next_line_edit: CustomQLineEdit = current_set[next_index]
+        editor.setStyleSheet("")
+        self.commitData.emit(editor)
+
+    def setModelData(self, editor: QLineEdit, model, index):
+        model.setData(index, editor.text(), Qt.ItemDataRole.EditRole)
+
+class DatasetTableView(QTableView):
+    # Only the visible rows are rendered, so the view stays fast with thousands of datasets
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setItemDelegate(DatasetItemDelegate(self, self))
+
+    def setModel(self, model):
+        super().setModel(model)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(DatasetTableModel.COLUMN_TOGGLE, QHeaderView.ResizeMode.Fixed)
+        header.resizeSection(DatasetTableModel.COLUMN_TOGGLE, 24)
+        header.resizeSection(DatasetTableModel.COLUMN_NAME, 120)
+        header.resizeSection(DatasetTableModel.COLUMN_CONCENTRATION, 90)
+        self.verticalHeader().setDefaultSectionSize(24)
+
+    def keyPressEvent(self, event):
+        # Ctrl + arrow keys also work when no editor is open
+        modifiers = event.modifiers()
+        if modifiers == Qt.KeyboardModifier.ControlModifier and event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down):
+            step = -1 if event.key() == Qt.Key.Key_Up else 1
+            self.move_current_cell(step, True, False)
+        else:
+            super().keyPressEvent(event)
+
+    def move_editor(self, editor: QLineEdit, step: int, copy_text: bool):
+        # Commit and close the open editor before moving to the next row
+        self.commitData(editor)
+        self.closeEditor(editor, QAbstractItemDelegate.EndEditHint.NoHint)
+        self.move_current_cell(step, copy_text, True)
+
+    def move_current_cell(self, step: int, copy_text: bool, open_editor: bool):
+        model = self.model()
+        current = self.currentIndex()
+        if model is None or not current.isValid():
+            return
+
+        # Skip rows where the cell is disabled (hidden datasets)
+        next_row = current.row() + step
+        while 0 <= next_row < model.rowCount():
+            next_index = model.index(next_row, current.column())
+            if model.flags(next_index) & Qt.ItemFlag.ItemIsEnabled:
+                break
+            next_row += step
+        else:
+            return
+
         if copy_text:
-            next_line_edit.setText(self.text())
-        next_line_edit.setFocus()
-        next_line_edit.selectAll()
-        
-        scroll_area: QScrollArea = self.main_window.scrollArea_datasets
-        scroll_area.ensureWidgetVisible(next_line_edit)
+            model.setData(next_index, model.data(current, Qt.ItemDataRole.EditRole), Qt.ItemDataRole.EditRole)
+        self.setCurrentIndex(next_index)
+        self.scrollTo(next_index)
+        # Edit triggers may have opened the editor already
+        if open_editor and self.state() != QAbstractItemView.State.EditingState:
+            self.edit(next_index)
 
 class EditableButton(QPushButton):
     btnTextEditingFinished = pyqtSignal(str)
@@ -0,0 +1,165 @@
+import os
+import csv
+import zipfile
+import numpy as np
+from plotting.decimation import decimate_block_mean
+from utils import instrumentation
+
+# Exports results of every dataspace, and optionally the traces, as CSV files and/or one NPZ file.
+# Everything is written one dataspace or one chunk of samples at a time, so the export never needs
+# a second copy of the session in memory.
+
+TRACE_CHUNK_SAMPLES = 65536
+
+WINDOW_MEANS_HEADER = ["space_id", "dataspace", "set_id", "dataset", "concentration", "window", "start", "end", "mean"]
+CONCENTRATION_STATS_HEADER = ["space_id", "dataspace", "window", "concentration", "count", "mean", "std"]
+TRENDLINES_HEADER = ["space_id", "dataspace", "window", "start", "end", "slope", "intercept", "r_squared", "slope_se", "intercept_se", "weighted"]
+TRACES_HEADER = ["space_id", "set_id", "time", "current"]
+
+class ExportCancelled(Exception):
+    pass
+
+class NpzWriter():
+    # Writes arrays into an .npz file one by one, the same format np.load reads
+    def __init__(self, filepath):
+        self.zip_file = zipfile.ZipFile(filepath, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def write(self, name: str, array):
+        with self.zip_file.open(f"{name}.npy", mode="w", force_zip64=True) as file:
+            np.lib.format.write_array(file, np.asanyarray(array), allow_pickle=False)
+
+    def close(self):
+        self.zip_file.close()
+
+class TableColumns():
+    # Collects the rows of a table as columns, written to the NPZ as one array per column
+    def __init__(self, header: list):
+        self.columns = {name: [] for name in header}
+
+    def add_row(self, row: list):
+        for values, value in zip(self.columns.values(), row):
+            values.append(value)
+
+    def write(self, npz: NpzWriter, table_name: str):
+        for name, values in self.columns.items():
+            npz.write(f"{table_name}/{name}", np.array(values))
+
+def get_dataspace_results(data_handler, space_id, weighted: bool):
+    # Span results followed by the named windows of the dataspace
+    windows = [{"name": "span", "start": float(data_handler.time_range[0]), "end": float(data_handler.time_range[1])}]
+    windows += data_handler.get_windows(space_id)
+    return data_handler.calculate_window_results(space_id, windows, weighted)
+
+def get_trace(dataset: dict, traces: str, decimation_factor: int):
+    times = np.asarray(dataset["times"])
+    currents = np.asarray(dataset["currents"])
+    if traces == "decimated":
+        times, currents = decimate_block_mean(times, currents, decimation_factor)
+    return times, currents
+
+def write_trace_csv(file, space_id, set_id, times: np.ndarray, currents: np.ndarray):
+    for start in range(0, len(times), TRACE_CHUNK_SAMPLES):
+        chunk = np.column_stack((times[start:start + TRACE_CHUNK_SAMPLES], currents[start:start + TRACE_CHUNK_SAMPLES]))
+        np.savetxt(file, chunk, fmt=f"{space_id},{set_id},%.10g,%.10g")
+
+@instrumentation.instrument("io.export")
+def export_session(data_handler, path_base: str, formats = ("csv", "npz"), traces: str = None, decimation_factor: int = 10,
+                   weighted: bool = False, space_ids: list = None, progress = None):
+    '''
+    Writes the results of the dataspaces to files named path_base + suffix and returns their paths.
+    CSV: _window_means.csv, _concentration_stats.csv, _trendlines.csv and with traces _traces.csv.
+    NPZ: one .npz with a column array per table, e.g. "trendlines/slope", and with traces "traces/<space_id>/<set_id>/times".
+    traces is None, "raw" or "decimated". progress is called with (done, total) dataspaces and returns False to cancel,
+    in which case the partial files are removed and ExportCancelled is raised.
+    '''
+    if space_ids == None:
+        space_ids = list(data_handler.dataspaces.keys())
+    write_csv = "csv" in formats
+    write_npz = "npz" in formats
+
+    filepaths = []
+    files = {}
+    writers = {}
+    npz = None
+    tables = {
+        "window_means": TableColumns(WINDOW_MEANS_HEADER),
+        "concentration_stats": TableColumns(CONCENTRATION_STATS_HEADER),
+        "trendlines": TableColumns(TRENDLINES_HEADER)
+    }
+    try:
+        if write_csv:
+            headers = {
+                "window_means": WINDOW_MEANS_HEADER,
+                "concentration_stats": CONCENTRATION_STATS_HEADER,
+                "trendlines": TRENDLINES_HEADER
+            }
+            if traces:
+                headers["traces"] = TRACES_HEADER
+            for name, header in headers.items():
+                filepath = f"{path_base}_{name}.csv"
+                filepaths.append(filepath)
+                files[name] = open(filepath, "w", newline="", encoding="utf-8")
+                writers[name] = csv.writer(files[name])
+                writers[name].writerow(header)
+        if write_npz:
+            filepath = f"{path_base}.npz"
+            filepaths.append(filepath)
+            npz = NpzWriter(filepath)
+
+        for done, space_id in enumerate(space_ids):
+            if progress and progress(done, len(space_ids)) == False:
+                raise ExportCancelled()
+
+            dataspace = data_handler.dataspaces[space_id]
+            space_name = dataspace["name"]
+            datasets = dataspace["datasets"]
+            results = get_dataspace_results(data_handler, space_id, weighted)
+
+            rows = {"window_means": [], "concentration_stats": [], "trendlines": []}
+            for j, window in enumerate(results["windows"]):
+                for i, set_id in enumerate(results["set_ids"]):
+                    dataset = datasets[set_id]
+                    rows["window_means"].append([space_id, space_name, set_id, dataset["name"], dataset["concentration"],
+                                                 window["name"], window["start"], window["end"], results["means"][i, j]])
+                for i, concentration in enumerate(results["concentrations"]):
+                    rows["concentration_stats"].append([space_id, space_name, window["name"], concentration,
+                                                        results["counts"][i], results["averages"][i, j], results["stds"][i, j]])
+                rows["trendlines"].append([space_id, space_name, window["name"], window["start"], window["end"],
+                                           results["slopes"][j], results["intercepts"][j], results["r_squared"][j],
+                                           results["slope_ses"][j], results["intercept_ses"][j], weighted])
+            for name, table_rows in rows.items():
+                if write_csv:
+                    writers[name].writerows(table_rows)
+                if write_npz:
+                    for row in table_rows:
+                        tables[name].add_row(row)
+
+            if traces:
+                for set_id, dataset in datasets.items():
+                    times, currents = get_trace(dataset, traces, decimation_factor)
+                    if write_csv:
+                        write_trace_csv(files["traces"], space_id, set_id, times, currents)
+                    if write_npz:
+                        npz.write(f"traces/{space_id}/{set_id}/times", times)
+                        npz.write(f"traces/{space_id}/{set_id}/currents", currents)
+
+        if write_npz:
+            for name, table in tables.items():
+                table.write(npz, name)
+        if progress:
+            progress(len(space_ids), len(space_ids))
+    except BaseException:
+        for file in files.values():
+            file.close()
+        if npz:
+            npz.close()
+        for filepath in filepaths:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+        raise
+
+    for file in files.values():
+        file.close()
+    if npz:
+        npz.close()
+    return filepaths
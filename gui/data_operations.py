@@ -1,10 +1,19 @@
 import os
-import pandas as pd
+import re
 import json
 import pickle
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from datetime import datetime
+import numpy as np
+from utils import instrumentation
+from gui.blob_store import BlobRef, get_blob_store
 
 def handle_csv_data(self, filenames):
     # Doesnt work anymore. Fix or delete later
+    import pandas as pd # Slow to import, only needed here
 
     data_frame = pd.read_csv(filenames[0], encoding="utf-16", header=5)
     data_frame = data_frame.dropna()
@@ -19,31 +28,101 @@ def handle_csv_data(self, filenames):
         self.canvas.add_dataset(id, name, times, currents, concentration, notes)
             
 def extract_pssession_pst_data_from_file(filepath):
-    if os.path.splitext(filepath)[1] == ".pssession":
-        with open(filepath, encoding="utf-16-le") as f:
-            data = f.read()
-            data = data.replace("\ufeff", "")
-            json_data = json.loads(data)
-        times = parse_pssession_data_by_type(json_data, "PalmSens.Data.DataArrayTime")
-        currents = parse_pssession_data_by_type(json_data, "PalmSens.Data.DataArrayCurrents")
-    elif os.path.splitext(filepath)[1] == ".pst":
-        with open(filepath, encoding="utf-8") as f:
-            data = f.read()
-            times, currents = parse_pst_data(data)
+    # Times and currents of the last measurement in the file, None if the file has none. Use extract_measurements_from_file to get all of them
+    measurements = extract_measurements_from_file(filepath)
+    arrays = measurements[-1]["arrays"] if len(measurements) > 0 else {}
+    if "time" not in arrays or "currents" not in arrays:
+        return None, None, get_set_name(filepath)
+    return arrays["time"].tolist(), arrays["currents"].tolist(), get_set_name(filepath)
 
+def get_channel(filepath):
+    # Files are named <channel>-<index>
+    return os.path.splitext(os.path.basename(filepath))[0].split("-")[0]
+
+def get_set_name(filepath):
     # Attempt extracting directory + channel name from file name             
+    set_name = os.path.basename(filepath)
     try:         
         dir_name = os.path.basename(os.path.dirname(filepath))
         filename = os.path.splitext(os.path.basename(filepath))[0]
-        channel = filename.split("-")[0]
+        channel = get_channel(filepath)
         if len(channel) > 1:
             set_name = f"{dir_name} {channel}"
         else:
             set_name = filename
     except Exception as e:
         print(e)
+    return set_name
+
+@instrumentation.instrument("parse.file")
+def extract_measurements_from_file(filepath):
+    '''
+    Every measurement in a .pssession or .pst file:
+    [{"name", "arrays": {"time": ndarray, "currents": ndarray, "potentials": ndarray, ...}, "metadata": {...}}]
+    Files with more than one measurement get the measurement title or number appended to the name.
+    '''
+    extension = os.path.splitext(filepath)[1]
+    if extension not in (".pssession", ".pst"):
+        raise ValueError(f"Unsupported file type: {filepath}")
+    # Read as bytes once so the content hash comes without a second read
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    sha1 = hashlib.sha1(raw).hexdigest()
+
+    if extension == ".pssession":
+        json_data = json.loads(raw.decode("utf-16-le").replace("\ufeff", ""))
+        measurements = parse_pssession_measurements(json_data)
+    else:
+        # Universal newlines like reading in text mode
+        times, currents = parse_pst_data(raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"))
+        measurements = [{"arrays": {"time": np.array(times), "currents": np.array(currents)}, "metadata": {}}]
+
+    set_name = get_set_name(filepath)
+    for index, measurement in enumerate(measurements):
+        metadata = measurement["metadata"]
+        if len(measurements) > 1:
+            measurement["name"] = f"{set_name} {metadata.get('title') or index + 1}"
+        else:
+            measurement["name"] = set_name
+        metadata["source"] = filepath
+        metadata["sha1"] = sha1
+        metadata["measurement_index"] = index
+        metadata["measurement_count"] = len(measurements)
+    return measurements
+
+def try_extract_measurements_from_file(filepath):
+    # For worker processes, a file that fails gives no measurements
+    try:
+        return extract_measurements_from_file(filepath)
+    except Exception as e:
+        print(f"extract_measurements_from_file: {filepath}: {e}")
+        return []
+
+# Imports of fewer bytes than this are parsed without worker processes
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
 
-    return times, currents, set_name
+def extract_measurements_from_files(filepaths: list, workers: int = None, progress=None):
+    # Measurements of each file, in the order of filepaths. Parsed in worker processes, json decoding holds the GIL.
+    # progress(done, total) is called as files are parsed. The workers are spawned rather than forked, forking the GUI process
+    # while its other threads hold locks can copy the held locks into the children
+    if workers == None:
+        workers = os.cpu_count() or 1
+    results = []
+    # Starting spawned workers takes about a second, small imports are parsed faster here
+    total_bytes = sum(os.path.getsize(filepath) for filepath in filepaths if os.path.isfile(filepath))
+    if workers > 1 and len(filepaths) > 1 and total_bytes >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(max_workers=min(workers, len(filepaths)), mp_context=multiprocessing.get_context("spawn")) as pool:
+            chunk_size = max(1, len(filepaths) // (workers * 4))
+            for measurements in pool.map(try_extract_measurements_from_file, filepaths, chunksize=chunk_size):
+                results.append(measurements)
+                if progress != None:
+                    progress(len(results), len(filepaths))
+    else:
+        for filepath in filepaths:
+            results.append(try_extract_measurements_from_file(filepath))
+            if progress != None:
+                progress(len(results), len(filepaths))
+    return results
 
 def parse_pst_data(data: str):
     times = []
@@ -62,51 +141,300 @@ def parse_pst_data(data: str):
             currents.append(float(values[1]))
     return times, currents
 
-def parse_pssession_data_by_type(data, target_type):
-    # The json is capitalized in newer pssession files
-    for key in data.keys():
-        if key == "Measurements":
-            key_measurements = "Measurements"
-            key_dataset = "DataSet"
-            key_values = "Values"
-            key_type = "Type"
-            key_datavalues = "DataValues"
-            key_value = "V"
-            break
-        elif key == "measurements":
-            key_measurements = "measurements"
-            key_dataset = "dataset"
-            key_values = "values"
-            key_type = "type"
-            key_datavalues = "datavalues"
-            key_value = "v"
+# Key names of .pssession json. Newer files are capitalized
+PSSESSION_KEYS = {
+    "Measurements": {"measurements": "Measurements", "dataset": "DataSet", "values": "Values", "type": "Type",
+                     "datavalues": "DataValues", "value": "V", "title": "Title", "timestamp": "TimeStamp", "method": "Method"},
+    "measurements": {"measurements": "measurements", "dataset": "dataset", "values": "values", "type": "type",
+                     "datavalues": "datavalues", "value": "v", "title": "title", "timestamp": "timestamp", "method": "method"}
+}
+PSSESSION_ARRAY_PREFIX = "PalmSens.Data.DataArray"
+
+def parse_pssession_measurements(data: dict):
+    # Walks the measurements once and returns the arrays of each by type name, e.g. "time", "currents", "potentials"
+    keys = next((PSSESSION_KEYS[key] for key in data if key in PSSESSION_KEYS), None)
+    if keys == None:
+        raise ValueError("No measurements in .pssession data")
+
+    measurements = []
+    for measurement in data[keys["measurements"]]:
+        arrays = {}
+        for value in measurement[keys["dataset"]][keys["values"]]:
+            array_type: str = value[keys["type"]]
+            name = array_type[len(PSSESSION_ARRAY_PREFIX):] if array_type.startswith(PSSESSION_ARRAY_PREFIX) else array_type
+            datavalues = value[keys["datavalues"]]
+            arrays[name.lower()] = np.fromiter(map(itemgetter(keys["value"]), datavalues), dtype=float, count=len(datavalues))
+
+        # Only measurements with a time and current array are usable
+        if "time" not in arrays or "currents" not in arrays:
+            continue
+        metadata = {
+            "title": measurement.get(keys["title"], ""),
+            "timestamp": measurement.get(keys["timestamp"]),
+            "method": measurement.get(keys["method"], ""),
+            "arrays": sorted(arrays.keys())
+        }
+        if "potentials" in arrays and len(arrays["potentials"]) > 0:
+            metadata["potential"] = float(np.median(arrays["potentials"]))
+        measurements.append({"arrays": arrays, "metadata": metadata})
+    return measurements
+
+# Cheap file summaries for the session catalog. The .pssession text is searched instead of decoding the json,
+# which is what makes parsing slow. Data values are flat objects, so a DataValues array ends at the first "]".
+# Files that do not look like this fall back to a full parse
+PSSESSION_TIME_ARRAY = re.compile(r'"(?:Type|type)"\s*:\s*"PalmSens\.Data\.DataArrayTime"')
+PSSESSION_DATAVALUES = re.compile(r'"(?:DataValues|datavalues)"\s*:\s*\[')
+PSSESSION_VALUE = re.compile(r'"[Vv]"\s*:\s*([-+0-9.eE]+)')
+PSSESSION_TITLE = re.compile(r'"(?:Title|title)"\s*:\s*("(?:[^"\\]|\\.)*")')
+PSSESSION_TIMESTAMP = re.compile(r'"(?:TimeStamp|timestamp)"\s*:\s*(-?\d+)')
+METHOD_ID = re.compile(r"METHOD_ID=(\w+)")
+PST_TIMESTAMP_PREFIX = "Date and time measurement:"
+# .NET ticks (100 ns since year 1) at the unix epoch, .pssession timestamps are ticks
+UNIX_EPOCH_TICKS = 621355968000000000
+
+def ticks_to_unix_time(ticks: int):
+    return (ticks - UNIX_EPOCH_TICKS) / 1e7
+
+def parse_timestamp(text: str):
+    # Unix time from ticks or a date and time string, None if neither
+    text = text.strip()
+    try:
+        return ticks_to_unix_time(int(text))
+    except ValueError:
+        pass
+    for date_format in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%d.%m.%Y %H:%M:%S"):
+        try:
+            return datetime.strptime(text, date_format).timestamp()
+        except ValueError:
+            pass
+    return None
+
+def summarize_pssession_text(text: str):
+    # Sample count and duration of every time array, None if the layout is not the expected one
+    samples = []
+    durations = []
+    for match in PSSESSION_TIME_ARRAY.finditer(text):
+        values = PSSESSION_DATAVALUES.search(text, match.end())
+        if values == None:
+            return None
+        start = values.end()
+        end = text.find("]", start)
+        if end < 0:
+            return None
+        key = '"V"' if text.find('"V"', start, end) >= 0 else '"v"'
+        count = text.count(key, start, end)
+        samples.append(count)
+        if count > 1:
+            first = PSSESSION_VALUE.match(text, text.find(key, start, end))
+            last = PSSESSION_VALUE.match(text, text.rfind(key, start, end))
+            if first == None or last == None:
+                return None
+            durations.append(float(last.group(1)) - float(first.group(1)))
+        else:
+            durations.append(0.0)
+    if len(samples) == 0:
+        return None
+    title = PSSESSION_TITLE.search(text)
+    timestamp = PSSESSION_TIMESTAMP.search(text)
+    method = METHOD_ID.search(text)
+    return {
+        "measurements": len(samples),
+        "samples": sum(samples),
+        "duration": max(durations),
+        "timestamp": ticks_to_unix_time(int(timestamp.group(1))) if timestamp else None,
+        "method": method.group(1) if method else "",
+        "title": json.loads(title.group(1)) if title else ""
+    }
+
+def summarize_pst_text(text: str):
+    lines = text.splitlines()
+    timestamp = None
+    for line in lines:
+        if line.startswith(PST_TIMESTAMP_PREFIX):
+            timestamp = parse_timestamp(line[len(PST_TIMESTAMP_PREFIX):])
             break
-    
-    # Parse data into list
-    datavalues = None
-    for measurement in data[key_measurements]:
-        for value in measurement[key_dataset][key_values]:
-            if value[key_type] == target_type:
-                datavalues = value[key_datavalues] 
-    if datavalues is None:
-        return
-    
-    values = [item[key_value] for item in datavalues]
-    return values
+    # Same rule as parse_pst_data, a data line starts with a number. Only the first and last lines are converted
+    def get_time(line):
+        try:
+            return float(line.split(sep=" ")[0])
+        except ValueError:
+            return None
+    data_lines = [line for line in lines if line.strip() and line[0] in "0123456789-+."]
+    times = [time for time in (get_time(line) for line in (data_lines[:1] + data_lines[-1:])) if time != None]
+    return {
+        "measurements": 1,
+        "samples": len(data_lines),
+        "duration": times[-1] - times[0] if len(times) > 1 else 0.0,
+        "timestamp": timestamp,
+        "method": lines[0].strip() if lines else "",
+        "title": ""
+    }
+
+def extract_file_summary(filepath):
+    '''
+    Metadata of a .pssession or .pst file without parsing the data values:
+    {"set_name", "channel", "measurements", "samples", "duration", "timestamp" (unix time or None), "method", "title"}
+    '''
+    extension = os.path.splitext(filepath)[1]
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    summary = None
+    if extension == ".pssession":
+        summary = summarize_pssession_text(raw.decode("utf-16-le"))
+    elif extension == ".pst":
+        summary = summarize_pst_text(raw.decode("utf-8", errors="replace"))
+    else:
+        raise ValueError(f"Unsupported file type: {filepath}")
+
+    if summary == None:
+        measurements = extract_measurements_from_file(filepath)
+        times_list = [measurement["arrays"]["time"] for measurement in measurements]
+        timestamp = measurements[0]["metadata"].get("timestamp") if measurements else None
+        method = METHOD_ID.search(measurements[0]["metadata"].get("method") or "") if measurements else None
+        summary = {
+            "measurements": len(measurements),
+            "samples": sum(len(times) for times in times_list),
+            "duration": max((float(times[-1] - times[0]) for times in times_list if len(times) > 1), default=0.0),
+            "timestamp": ticks_to_unix_time(int(timestamp)) if isinstance(timestamp, int) else None,
+            "method": method.group(1) if method else "",
+            "title": measurements[0]["metadata"].get("title", "") if measurements else ""
+        }
+    summary["set_name"] = get_set_name(filepath)
+    summary["channel"] = get_channel(filepath)
+    return summary
+
+# Save files are a header pickle followed by one pickle per dataspace.
+# The header has everything except the datasets, so loading can show all dataspaces before their data arrives.
+# From format 3 times and currents are BlobRefs to a blob store next to the save file, so a save only writes
+# the arrays no earlier save wrote. Single pickled dicts (format 1) and files with the arrays inline (2) still load.
+STATE_FORMAT_VERSION = 3
+BLOB_DIRECTORY = "blobs"
+ARRAY_KEYS = ("times", "currents")
+
+def get_blob_directory(filepath, header: dict):
+    return os.path.join(os.path.dirname(os.path.abspath(filepath)), header.get("blob_directory", BLOB_DIRECTORY))
 
+def store_dataset_arrays(datasets: dict, store):
+    # Copies of the datasets with the arrays replaced by blob references
+    stored = {}
+    for set_id, data in datasets.items():
+        stored[set_id] = dict(data)
+        for key in ARRAY_KEYS:
+            stored[set_id][key] = store.put(data[key])
+    return stored
+
+def load_dataset_arrays(datasets: dict, store):
+    for data in datasets.values():
+        for key in ARRAY_KEYS:
+            if isinstance(data[key], BlobRef):
+                data[key] = store.get(data[key])
+    return datasets
+
+def get_dataspace_load_order(dataspaces: dict, selected_space_id, active_spaces_ids):
+    # Selected dataspace first, then active ones, then the rest
+    order = []
+    if selected_space_id in dataspaces:
+        order.append(selected_space_id)
+    order.extend(space_id for space_id in active_spaces_ids if space_id in dataspaces and space_id not in order)
+    order.extend(space_id for space_id in dataspaces if space_id not in order)
+    return order
+
+def split_program_state(data: dict):
+    # Returns header dict and (space_id, datasets) records in load order
+    plot_state = dict(data["plot"])
+    dataspaces: dict = plot_state.pop("dataspaces")
+    plot_state["dataspaces"] = {
+        space_id: dict(
+            {key: value for key, value in dataspace.items() if key != "datasets"},
+            dataset_count=len(dataspace["datasets"])
+        )
+        for space_id, dataspace in dataspaces.items()
+    }
+    order = get_dataspace_load_order(dataspaces, plot_state["selected_space_id"], plot_state["active_spaces_ids"])
+    header = {
+        "format": STATE_FORMAT_VERSION,
+        "blob_directory": BLOB_DIRECTORY,
+        "window": data["window"],
+        "plot": plot_state,
+        "dataspace_order": order
+    }
+    records = [(space_id, dataspaces[space_id]["datasets"]) for space_id in order]
+    return header, records
+
+@instrumentation.instrument("io.save")
 def save_program_state_to_file(data: dict, filepath):
     try:
-        with open(filepath, "wb") as file:
-            pickle.dump(data, file)
+        header, records = split_program_state(data)
+        store = get_blob_store(get_blob_directory(filepath, header))
+        # Write to a temporary file first so an interrupted save does not destroy the previous one.
+        # The blobs are written before the file that refers to them
+        temp_filepath = f"{filepath}.tmp"
+        with open(temp_filepath, "wb") as file:
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            for space_id, datasets in records:
+                pickle.dump({"space_id": space_id, "datasets": store_dataset_arrays(datasets, store)}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filepath, filepath)
         print("File saved at:", filepath)
     except Exception as e:
         print(f"save_program_state_to_file: {e}")
 
+def iter_program_state_file(filepath, load_arrays: bool = True):
+    # Yields the header dict first, then (space_id, datasets) for each dataspace in load order.
+    # Without load_arrays the datasets of format 3 files keep their BlobRefs
+    with open(filepath, "rb") as file:
+        first = pickle.load(file)
+        if first.get("format", 1) < 2:
+            header, records = split_program_state(first)
+            yield header
+            yield from records
+            return
+
+        yield first
+        store = get_blob_store(get_blob_directory(filepath, first)) if first["format"] >= 3 else None
+        for _ in first["dataspace_order"]:
+            record = pickle.load(file)
+            datasets = record["datasets"]
+            if store != None and load_arrays:
+                datasets = load_dataset_arrays(datasets, store)
+            yield record["space_id"], datasets
+
+@instrumentation.instrument("io.load")
 def load_program_state_from_file(filepath):
+    # Reads the whole file into the same dict that was given to save_program_state_to_file
     try:
-        with open(filepath, "rb") as file:
-            data = pickle.load(file)
-            return data
+        items = iter_program_state_file(filepath)
+        header = next(items)
+        loaded_datasets = dict(items)
+        # Keep the original dataspace order, the file is in load order
+        dataspaces = {}
+        for space_id, dataspace in header["plot"]["dataspaces"].items():
+            dataspaces[space_id] = {key: value for key, value in dataspace.items() if key != "dataset_count"}
+            dataspaces[space_id]["datasets"] = loaded_datasets[space_id]
+        plot_state = dict(header["plot"], dataspaces=dataspaces)
+        return {"window": header["window"], "plot": plot_state}
     except Exception as e:    
         print(f"load_program_state_from_file: {e}")
         return
+
+def collect_blob_garbage(folder, min_age: float = 3600, dry_run: bool = False):
+    # Removes the blobs no save file in the folder refers to. Returns the number of blobs and bytes removed
+    store = get_blob_store(os.path.join(folder, BLOB_DIRECTORY))
+    referenced = set()
+    for filename in os.listdir(folder):
+        # Temporary files of saves in progress refer to blobs too
+        if not filename.endswith((".pickle", ".pickle.tmp")):
+            continue
+        filepath = os.path.join(folder, filename)
+        try:
+            items = iter_program_state_file(filepath, load_arrays=False)
+            header = next(items)
+            if header["format"] < 3 or get_blob_directory(filepath, header) != store.directory:
+                continue
+            for _, datasets in items:
+                for data in datasets.values():
+                    referenced.update(data[key].digest for key in ARRAY_KEYS if isinstance(data[key], BlobRef))
+        except Exception as e:
+            # An unreadable save file could refer to any blob
+            print(f"collect_blob_garbage: Can not read {filepath}, nothing removed: {e}")
+            return 0, 0
+    return store.remove_unreferenced(referenced, min_age, dry_run)
@@ -0,0 +1,154 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from plotting.plot_data_handler import PlotDataHandler
+
+class DatasetTableModel(QAbstractTableModel):
+    # Table model over the datasets of one dataspace in PlotDataHandler.
+    # Rows are read straight from the data handler when the view asks for them,
+    # so only visible rows cost anything and no widgets are created per dataset.
+
+    COLUMN_TOGGLE = 0
+    COLUMN_NAME = 1
+    COLUMN_CONCENTRATION = 2
+    COLUMN_NOTES = 3
+
+    headers = ["", "Name", "Concentration", "Notes"]
+    keys = {
+        COLUMN_NAME: "name",
+        COLUMN_CONCENTRATION: "concentration",
+        COLUMN_NOTES: "notes"
+    }
+
+    # set_id, update_plot
+    datasetEdited = pyqtSignal(int, bool)
+    # set_id
+    datasetToggled = pyqtSignal(int)
+
+    def __init__(self, data_handler: PlotDataHandler, parent=None):
+        super().__init__(parent)
+        self.data_handler = data_handler
+        self.space_id = None
+        self.set_ids = []
+        data_handler.listeners.append(self.on_datasets_changed)
+
+    def set_dataspace(self, space_id):
+        self.beginResetModel()
+        self.space_id = space_id
+        datasets = self.data_handler.get_datasets(space_id)
+        if datasets == None:
+            self.set_ids = []
+        else:
+            self.set_ids = list(datasets.keys())
+        self.endResetModel()
+
+    def refresh(self):
+        # Call after datasets were added or removed in the shown dataspace
+        self.set_dataspace(self.space_id)
+
+    def update_rows(self):
+        # Call after values of the shown datasets changed, e.g. many were hidden at once. Keeps the selection
+        if self.set_ids:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.set_ids) - 1, self.columnCount() - 1))
+
+    def on_datasets_changed(self, space_ids: set):
+        # Reset once per data handler notification, batches send only one
+        if self.space_id in space_ids:
+            self.refresh()
+
+    def get_dataset(self, row: int):
+        datasets = self.data_handler.get_datasets(self.space_id)
+        if datasets == None or row < 0 or row >= len(self.set_ids):
+            return None
+        return datasets.get(self.set_ids[row])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.set_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        dataset = self.get_dataset(index.row())
+        if dataset == None:
+            return None
+
+        column = index.column()
+        if column == self.COLUMN_TOGGLE:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Unchecked if dataset["hidden"] else Qt.CheckState.Checked
+            return None
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            value = dataset[self.keys[column]]
+            if column == self.COLUMN_CONCENTRATION:
+                # Show whole numbers without decimals like the old line edits did
+                value = float(value)
+                return str(int(value)) if value.is_integer() else str(value)
+            return value
+        if role == Qt.ItemDataRole.ToolTipRole and column == self.COLUMN_NOTES:
+            return dataset["notes"] or None
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if index.column() == self.COLUMN_TOGGLE:
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable
+
+        # Text cells of hidden datasets are disabled
+        dataset = self.get_dataset(index.row())
+        if dataset == None or dataset["hidden"]:
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid():
+            return False
+        dataset = self.get_dataset(index.row())
+        if dataset == None:
+            return False
+        set_id = self.set_ids[index.row()]
+        column = index.column()
+
+        if column == self.COLUMN_TOGGLE:
+            if role != Qt.ItemDataRole.CheckStateRole:
+                return False
+            hidden = Qt.CheckState(value) != Qt.CheckState.Checked
+            self.data_handler.set_dataset_hidden(set_id, hidden, self.space_id)
+            # Whole row changes enabled state
+            self.dataChanged.emit(self.index(index.row(), 0), self.index(index.row(), self.columnCount() - 1))
+            self.datasetToggled.emit(set_id)
+            return True
+
+        if role != Qt.ItemDataRole.EditRole:
+            return False
+
+        name = dataset["name"]
+        concentration = dataset["concentration"]
+        notes = dataset["notes"]
+        if column == self.COLUMN_NAME:
+            name = str(value)
+        elif column == self.COLUMN_CONCENTRATION:
+            # Check if input is numeric
+            try:
+                concentration = float(value)
+            except ValueError:
+                return False
+        elif column == self.COLUMN_NOTES:
+            notes = str(value)
+
+        self.data_handler.update_dataset(set_id, name, concentration, notes, self.space_id)
+        self.dataChanged.emit(index, index)
+        # Notes do not affect the plot
+        self.datasetEdited.emit(set_id, column != self.COLUMN_NOTES)
+        return True
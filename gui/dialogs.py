@@ -0,0 +1,1309 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLabel, QHeaderView, QInputDialog, 
+                             QMessageBox, QSplitter, QGroupBox, QFormLayout, QSpinBox, QDoubleSpinBox, QComboBox, QDialogButtonBox, QFileDialog, QCheckBox,
+                             QProgressDialog, QTableView, QLineEdit, QAbstractItemView)
+from PyQt6.QtCore import Qt, QTimer
+import os
+import csv
+import time
+from datetime import datetime
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from utils.stall_watchdog import StallWatchdog
+from plotting import memory_accounting as ma
+from plotting import preprocessing, transient_fit, window_statistics
+from plotting.decimation import DEFAULT_INGEST_OPTIONS
+from gui import calibration_history
+import gui.data_operations as do
+from gui.catalog_table_model import CatalogTableModel
+from gui.statistics_table_model import StatisticsTableModel
+
+class NumericTableWidgetItem(QTableWidgetItem):
+    # Sorts by the numeric value instead of the displayed text
+    def __init__(self, value: float, text: str):
+        super().__init__(text)
+        self.value = value
+        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+    def __lt__(self, other):
+        if isinstance(other, NumericTableWidgetItem):
+            return self.value < other.value
+        return super().__lt__(other)
+
+class StallReportDialog(QDialog):
+    # Top sources of GUI thread stalls recorded by StallWatchdog
+
+    headers = ["Source", "Stalls", "Total (s)", "Max (s)", "Span"]
+
+    def __init__(self, watchdog: StallWatchdog, parent=None):
+        super().__init__(parent)
+        self.watchdog = watchdog
+        self.setWindowTitle("Stall Report")
+        self.resize(800, 400)
+
+        self.label_info = QLabel(self)
+        self.table = QTableWidget(0, len(self.headers), self)
+        self.table.setHorizontalHeaderLabels(self.headers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+
+        button_refresh = QPushButton("Refresh", self)
+        button_refresh.clicked.connect(self.refresh)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(button_refresh)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.label_info)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        rows = self.watchdog.get_summary()
+        self.label_info.setText(
+            f"{self.watchdog.stall_count} stalls longer than {self.watchdog.threshold * 1000:.0f} ms, "
+            f"max event loop latency {self.watchdog.max_latency * 1000:.0f} ms"
+        )
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row, data in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(data["source"]))
+            self.table.setItem(row, 1, NumericTableWidgetItem(data["count"], str(data["count"])))
+            self.table.setItem(row, 2, NumericTableWidgetItem(data["total_s"], f"{data['total_s']:.2f}"))
+            self.table.setItem(row, 3, NumericTableWidgetItem(data["max_s"], f"{data['max_s']:.2f}"))
+            self.table.setItem(row, 4, QTableWidgetItem(data["span"]))
+        self.table.setSortingEnabled(True)
+
+class MemoryUsageDialog(QDialog):
+    # Memory held by each dataspace, with actions to free it
+
+    space_headers = ["Dataspace", "Datasets", "Samples", "Raw", "Caches", "Indexes", "Artists", "Artist data", "Widgets", "Total"]
+    dataset_headers = ["Dataset", "Samples", "Type", "Raw", "Artist data"]
+
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.rows = []
+        self.setWindowTitle("Memory Usage")
+        self.resize(900, 500)
+
+        self.label_info = QLabel(self)
+        self.table_spaces = self.create_table(self.space_headers)
+        self.table_spaces.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table_spaces.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table_spaces.itemSelectionChanged.connect(self.update_dataset_table)
+        self.table_datasets = self.create_table(self.dataset_headers)
+        # Largest first
+        self.table_spaces.sortByColumn(len(self.space_headers) - 1, Qt.SortOrder.DescendingOrder)
+        self.table_datasets.sortByColumn(3, Qt.SortOrder.DescendingOrder)
+
+        splitter = QSplitter(Qt.Orientation.Vertical, self)
+        splitter.addWidget(self.table_spaces)
+        splitter.addWidget(self.table_datasets)
+
+        button_drop_caches = QPushButton("Drop Caches", self)
+        button_drop_caches.clicked.connect(self.on_drop_caches_clicked)
+        button_decimate = QPushButton("Decimate...", self)
+        button_decimate.clicked.connect(self.on_decimate_clicked)
+        button_unload = QPushButton("Unload", self)
+        button_unload.clicked.connect(self.on_unload_clicked)
+        button_refresh = QPushButton("Refresh", self)
+        button_refresh.clicked.connect(self.refresh)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(button_drop_caches)
+        buttons.addWidget(button_decimate)
+        buttons.addWidget(button_unload)
+        buttons.addStretch()
+        buttons.addWidget(button_refresh)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.label_info)
+        layout.addWidget(splitter)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def create_table(self, headers):
+        table = QTableWidget(0, len(headers), self)
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSortingEnabled(True)
+        return table
+
+    def refresh(self):
+        plot = self.main_window.plot
+        self.rows = ma.get_memory_usage(plot.data_handler, plot.data_artists, plot.result_artists)
+        for row in self.rows:
+            widgets = self.main_window.widgets.get(row["space_id"])
+            row["widget_count"] = len(widgets["dataspace_widgets"]) if widgets else 0
+
+        total = sum(row["total_bytes"] for row in self.rows)
+        rss = ma.get_process_rss()
+        info = f"{len(self.rows)} dataspaces, {ma.format_bytes(total)} accounted"
+        if rss != None:
+            info += f", process resident memory {ma.format_bytes(rss)}"
+        self.label_info.setText(info)
+
+        selected_space_id = self.get_selected_space_id()
+        self.table_spaces.setSortingEnabled(False)
+        self.table_spaces.setRowCount(len(self.rows))
+        for i, row in enumerate(self.rows):
+            name_item = QTableWidgetItem(row["name"])
+            name_item.setData(Qt.ItemDataRole.UserRole, row["space_id"])
+            self.table_spaces.setItem(i, 0, name_item)
+            self.set_number(self.table_spaces, i, 1, row["dataset_count"])
+            self.set_number(self.table_spaces, i, 2, row["samples"])
+            self.set_bytes(self.table_spaces, i, 3, row["raw_bytes"])
+            self.set_bytes(self.table_spaces, i, 4, row["cache_bytes"])
+            self.set_bytes(self.table_spaces, i, 5, row["index_bytes"])
+            self.set_number(self.table_spaces, i, 6, row["artist_count"])
+            self.set_bytes(self.table_spaces, i, 7, row["artist_bytes"])
+            self.set_number(self.table_spaces, i, 8, row["widget_count"])
+            self.set_bytes(self.table_spaces, i, 9, row["total_bytes"])
+        self.table_spaces.setSortingEnabled(True)
+
+        # Keep the selection over refreshes
+        for i in range(self.table_spaces.rowCount()):
+            if self.table_spaces.item(i, 0).data(Qt.ItemDataRole.UserRole) == selected_space_id:
+                self.table_spaces.selectRow(i)
+                break
+        self.update_dataset_table()
+
+    def update_dataset_table(self):
+        space_id = self.get_selected_space_id()
+        row = next((row for row in self.rows if row["space_id"] == space_id), None)
+        datasets = list(row["datasets"].values()) if row else []
+
+        self.table_datasets.setSortingEnabled(False)
+        self.table_datasets.setRowCount(len(datasets))
+        for i, dataset in enumerate(datasets):
+            self.table_datasets.setItem(i, 0, QTableWidgetItem(dataset["name"]))
+            self.set_number(self.table_datasets, i, 1, dataset["samples"])
+            self.table_datasets.setItem(i, 2, QTableWidgetItem(dataset["dtype"]))
+            self.set_bytes(self.table_datasets, i, 3, dataset["raw_bytes"])
+            self.set_bytes(self.table_datasets, i, 4, dataset["artist_bytes"])
+        self.table_datasets.setSortingEnabled(True)
+
+    def set_number(self, table: QTableWidget, row, column, value):
+        table.setItem(row, column, NumericTableWidgetItem(value, str(value)))
+
+    def set_bytes(self, table: QTableWidget, row, column, value):
+        table.setItem(row, column, NumericTableWidgetItem(value, ma.format_bytes(value)))
+
+    def get_selected_space_id(self):
+        items = self.table_spaces.selectedItems()
+        if not items:
+            return None
+        return self.table_spaces.item(items[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+
+    def on_drop_caches_clicked(self):
+        space_id = self.get_selected_space_id()
+        if space_id == None:
+            return
+        self.main_window.plot.data_handler.drop_caches(space_id)
+        self.refresh()
+
+    def on_decimate_clicked(self):
+        space_id = self.get_selected_space_id()
+        if space_id == None:
+            return
+        factor, ok = QInputDialog.getInt(self, "Decimate", "Replace every N samples with their mean, N:", 10, 2, 10000)
+        if not ok:
+            return
+        self.main_window.decimate_dataspace(space_id, factor)
+        self.refresh()
+
+    def on_unload_clicked(self):
+        space_id = self.get_selected_space_id()
+        if space_id == None:
+            return
+        name = self.main_window.plot.data_handler.dataspaces[space_id]["name"]
+        reply = QMessageBox.question(self, "Unload", f"Remove dataspace \"{name}\" and all its datasets?")
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.main_window.remove_dataspace_widget(space_id)
+        self.refresh()
+
+class PreprocessingDialog(QDialog):
+    # Edits the preprocessing settings of one dataspace
+
+    def __init__(self, config: dict, space_name: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Preprocessing - {space_name}")
+        config = preprocessing.get_config(config)
+
+        # Spike clipping
+        self.group_clip = self.create_group("Spike clipping", config["clip"])
+        self.spinBox_clip_window = self.create_spin_box(3, 101, config["clip"]["window"], step=2)
+        self.doubleSpinBox_clip_threshold = self.create_double_spin_box(0.5, 100, config["clip"]["threshold"], decimals=1)
+        self.group_clip.layout().addRow("Median window (samples)", self.spinBox_clip_window)
+        self.group_clip.layout().addRow("Threshold (MADs)", self.doubleSpinBox_clip_threshold)
+
+        # Baseline subtraction
+        self.group_baseline = self.create_group("Baseline subtraction", config["baseline"])
+        self.doubleSpinBox_baseline_start = self.create_double_spin_box(-1e6, 1e6, config["baseline"]["start"], decimals=3)
+        self.doubleSpinBox_baseline_end = self.create_double_spin_box(-1e6, 1e6, config["baseline"]["end"], decimals=3)
+        self.group_baseline.layout().addRow("Start time (s)", self.doubleSpinBox_baseline_start)
+        self.group_baseline.layout().addRow("End time (s)", self.doubleSpinBox_baseline_end)
+
+        # Smoothing
+        self.group_smooth = self.create_group("Smoothing", config["smooth"])
+        self.comboBox_smooth_method = QComboBox(self)
+        for method, text in preprocessing.SMOOTHING_METHODS.items():
+            self.comboBox_smooth_method.addItem(text, method)
+        self.comboBox_smooth_method.setCurrentIndex(max(0, self.comboBox_smooth_method.findData(config["smooth"]["method"])))
+        self.spinBox_smooth_window = self.create_spin_box(3, 1001, config["smooth"]["window"], step=2)
+        self.spinBox_smooth_polyorder = self.create_spin_box(0, 10, config["smooth"]["polyorder"])
+        self.comboBox_smooth_method.currentIndexChanged.connect(self.update_polyorder_enabled)
+        self.group_smooth.layout().addRow("Method", self.comboBox_smooth_method)
+        self.group_smooth.layout().addRow("Window (samples)", self.spinBox_smooth_window)
+        self.group_smooth.layout().addRow("Polynomial order", self.spinBox_smooth_polyorder)
+        self.update_polyorder_enabled()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Stages are applied from top to bottom.", self))
+        layout.addWidget(self.group_clip)
+        layout.addWidget(self.group_baseline)
+        layout.addWidget(self.group_smooth)
+        layout.addWidget(buttons)
+
+    def create_group(self, title: str, params: dict):
+        group = QGroupBox(title, self)
+        group.setCheckable(True)
+        group.setChecked(params["enabled"])
+        group.setLayout(QFormLayout())
+        return group
+
+    def create_spin_box(self, minimum: int, maximum: int, value: int, step: int = 1):
+        spin_box = QSpinBox(self)
+        spin_box.setRange(minimum, maximum)
+        spin_box.setSingleStep(step)
+        spin_box.setValue(int(value))
+        return spin_box
+
+    def create_double_spin_box(self, minimum: float, maximum: float, value: float, decimals: int):
+        spin_box = QDoubleSpinBox(self)
+        spin_box.setRange(minimum, maximum)
+        spin_box.setDecimals(decimals)
+        spin_box.setValue(float(value))
+        return spin_box
+
+    def update_polyorder_enabled(self):
+        self.spinBox_smooth_polyorder.setEnabled(self.comboBox_smooth_method.currentData() == "savgol")
+
+    def get_config(self):
+        return {
+            "clip": {
+                "enabled": self.group_clip.isChecked(),
+                "window": self.spinBox_clip_window.value(),
+                "threshold": self.doubleSpinBox_clip_threshold.value()
+            },
+            "baseline": {
+                "enabled": self.group_baseline.isChecked(),
+                "start": self.doubleSpinBox_baseline_start.value(),
+                "end": self.doubleSpinBox_baseline_end.value()
+            },
+            "smooth": {
+                "enabled": self.group_smooth.isChecked(),
+                "method": self.comboBox_smooth_method.currentData(),
+                "window": self.spinBox_smooth_window.value(),
+                "polyorder": self.spinBox_smooth_polyorder.value()
+            }
+        }
+
+class WindowsDialog(QDialog):
+    # Edits the named time windows and the window statistic of one dataspace and shows a trendline and concentration averages per window
+
+    window_headers = ["Name", "Start (s)", "End (s)"]
+
+    def __init__(self, main_window, space_id, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.data_handler = main_window.plot.data_handler
+        self.space_id = space_id
+        self.setWindowTitle(f"Time Windows - {self.data_handler.dataspaces[space_id]['name']}")
+        self.resize(900, 550)
+
+        self.table_windows = QTableWidget(0, len(self.window_headers), self)
+        self.table_windows.setHorizontalHeaderLabels(self.window_headers)
+        self.table_windows.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for window in self.data_handler.get_windows(space_id):
+            self.add_window_row(window["name"], window["start"], window["end"])
+
+        # Statistic of the currents within the span and every window, median and trimmed mean are robust to spikes
+        config = self.data_handler.get_window_statistic_config(space_id)
+        self.comboBox_statistic = QComboBox(self)
+        for key, label in window_statistics.WINDOW_STATISTICS.items():
+            self.comboBox_statistic.addItem(label, key)
+        self.comboBox_statistic.setCurrentIndex(max(0, self.comboBox_statistic.findData(config["statistic"])))
+        self.spinBox_trim = QSpinBox(self)
+        self.spinBox_trim.setRange(0, 49)
+        self.spinBox_trim.setSuffix(" %")
+        self.spinBox_trim.setValue(round(config["trim"] * 100))
+        self.comboBox_statistic.currentIndexChanged.connect(self.update_trim_enabled)
+        self.update_trim_enabled()
+        form = QFormLayout()
+        form.addRow("Window statistic", self.comboBox_statistic)
+        form.addRow("Trimmed from each end", self.spinBox_trim)
+
+        button_add_span = QPushButton("Add From Span", self)
+        button_add_span.clicked.connect(self.on_add_from_span_clicked)
+        button_remove = QPushButton("Remove", self)
+        button_remove.clicked.connect(self.on_remove_clicked)
+        button_apply = QPushButton("Apply", self)
+        button_apply.clicked.connect(self.apply)
+        window_buttons = QHBoxLayout()
+        window_buttons.addWidget(button_add_span)
+        window_buttons.addWidget(button_remove)
+        window_buttons.addStretch()
+        window_buttons.addWidget(button_apply)
+
+        self.table_results = QTableWidget(0, 0, self)
+        self.table_results.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        button_export = QPushButton("Export CSV...", self)
+        button_export.clicked.connect(self.on_export_clicked)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(button_export)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(self.table_windows)
+        layout.addLayout(window_buttons)
+        layout.addWidget(self.table_results)
+        layout.addLayout(buttons)
+
+        self.update_results_table()
+
+    def add_window_row(self, name: str, start: float, end: float):
+        row = self.table_windows.rowCount()
+        self.table_windows.insertRow(row)
+        self.table_windows.setItem(row, 0, QTableWidgetItem(name))
+        self.table_windows.setItem(row, 1, QTableWidgetItem(f"{start:g}"))
+        self.table_windows.setItem(row, 2, QTableWidgetItem(f"{end:g}"))
+
+    def update_trim_enabled(self):
+        self.spinBox_trim.setEnabled(self.comboBox_statistic.currentData() == "trimmed_mean")
+
+    def on_add_from_span_clicked(self):
+        start, end = self.data_handler.time_range
+        self.add_window_row(f"{end:g} s", start, end)
+
+    def on_remove_clicked(self):
+        rows = sorted({index.row() for index in self.table_windows.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.table_windows.removeRow(row)
+
+    def get_windows(self):
+        windows = []
+        for row in range(self.table_windows.rowCount()):
+            name_item = self.table_windows.item(row, 0)
+            try:
+                start = float(self.table_windows.item(row, 1).text())
+                end = float(self.table_windows.item(row, 2).text())
+            except (AttributeError, ValueError):
+                QMessageBox.warning(self, "Time Windows", f"Window on row {row + 1} needs numeric start and end times.")
+                return None
+            name = name_item.text() if name_item and name_item.text() else f"{end:g} s"
+            windows.append({"name": name, "start": min(start, end), "end": max(start, end)})
+        return windows
+
+    def apply(self):
+        windows = self.get_windows()
+        if windows == None:
+            return
+        with self.data_handler.batch_update():
+            self.data_handler.set_windows(windows, self.space_id)
+            self.data_handler.set_window_statistic_config(
+                {"statistic": self.comboBox_statistic.currentData(), "trim": self.spinBox_trim.value() / 100}, self.space_id
+            )
+        self.main_window.plot.draw_plot()
+        self.update_results_table()
+
+    def get_results_rows(self):
+        # Header and rows of the results table: one row per window
+        results = self.data_handler.calculate_window_results(self.space_id)
+        if results == None:
+            return [], []
+        concentrations = results["concentrations"]
+        header = ["Window", "Start (s)", "End (s)", "Slope", "Intercept", "R²"]
+        for concentration in concentrations:
+            header += [f"Mean at {concentration:g}", f"Std at {concentration:g}"]
+        rows = []
+        for j, window in enumerate(results["windows"]):
+            row = [window["name"], window["start"], window["end"], results["slopes"][j], results["intercepts"][j], results["r_squared"][j]]
+            for i in range(len(concentrations)):
+                row += [results["averages"][i, j], results["stds"][i, j]]
+            rows.append(row)
+        return header, rows
+
+    def update_results_table(self):
+        header, rows = self.get_results_rows()
+        self.table_results.clear()
+        self.table_results.setColumnCount(len(header))
+        self.table_results.setHorizontalHeaderLabels(header)
+        self.table_results.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            self.table_results.setItem(i, 0, QTableWidgetItem(row[0]))
+            for column, value in enumerate(row[1:], start=1):
+                self.table_results.setItem(i, column, NumericTableWidgetItem(value, f"{value:.6g}"))
+
+    def on_export_clicked(self):
+        header, rows = self.get_results_rows()
+        if len(rows) == 0:
+            QMessageBox.information(self, "Export CSV", "No windows to export. Add windows and apply them first.")
+            return
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Window Results", "windows.csv", "CSV Files (*.csv)")
+        if not filepath:
+            return
+        with open(filepath, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+class TransientFitDialog(QDialog):
+    # Cottrell fit settings of one dataspace, the fitted parameters per dataset and the statistic of the calibration curve
+
+    result_headers = ["Dataset", "Concentration", "a", "b", "c", "tau (s)", "Residual RMS", "Plateau", "Samples"]
+
+    def __init__(self, main_window, space_id, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.data_handler = main_window.plot.data_handler
+        self.space_id = space_id
+        self.setWindowTitle(f"Transient Fit - {self.data_handler.dataspaces[space_id]['name']}")
+        self.resize(900, 550)
+        config = self.data_handler.get_transient_fit_config(space_id)
+
+        self.doubleSpinBox_start = QDoubleSpinBox(self)
+        self.doubleSpinBox_start.setRange(0, 1e6)
+        self.doubleSpinBox_start.setDecimals(3)
+        self.doubleSpinBox_start.setValue(config["start"])
+        # The minimum shows as "End of trace" and means no end time
+        self.doubleSpinBox_end = QDoubleSpinBox(self)
+        self.doubleSpinBox_end.setRange(0, 1e6)
+        self.doubleSpinBox_end.setDecimals(3)
+        self.doubleSpinBox_end.setSpecialValueText("End of trace")
+        self.doubleSpinBox_end.setValue(config["end"] if config["end"] != None else 0)
+        self.checkBox_exponential = QCheckBox("Exponential decay term c·exp(-t/tau)", self)
+        self.checkBox_exponential.setChecked(config["exponential"])
+        self.comboBox_statistic = QComboBox(self)
+        for statistic, text in transient_fit.CALIBRATION_STATISTICS.items():
+            self.comboBox_statistic.addItem(text, statistic)
+        self.comboBox_statistic.setCurrentIndex(max(0, self.comboBox_statistic.findData(main_window.plot.calibration_statistic)))
+
+        form = QFormLayout()
+        form.addRow("Fit start (s)", self.doubleSpinBox_start)
+        form.addRow("Fit end (s)", self.doubleSpinBox_end)
+        form.addRow(self.checkBox_exponential)
+        form.addRow("Calibration statistic (all dataspaces)", self.comboBox_statistic)
+
+        button_apply = QPushButton("Apply", self)
+        button_apply.clicked.connect(self.apply)
+        apply_buttons = QHBoxLayout()
+        apply_buttons.addStretch()
+        apply_buttons.addWidget(button_apply)
+
+        self.table_results = QTableWidget(0, len(self.result_headers), self)
+        self.table_results.setHorizontalHeaderLabels(self.result_headers)
+        self.table_results.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table_results.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        button_export = QPushButton("Export CSV...", self)
+        button_export.clicked.connect(self.on_export_clicked)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(button_export)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Model I = a·t^-1/2 + b, optionally + c·exp(-t/tau). b is the plateau the transient decays to.", self))
+        layout.addLayout(form)
+        layout.addLayout(apply_buttons)
+        layout.addWidget(self.table_results)
+        layout.addLayout(buttons)
+
+        self.update_results_table()
+
+    def get_config(self):
+        end = self.doubleSpinBox_end.value()
+        return {
+            "start": self.doubleSpinBox_start.value(),
+            "end": end if end > self.doubleSpinBox_end.minimum() else None,
+            "exponential": self.checkBox_exponential.isChecked()
+        }
+
+    def apply(self):
+        self.data_handler.set_transient_fit_config(self.get_config(), self.space_id)
+        self.main_window.plot.set_calibration_statistic(self.comboBox_statistic.currentData())
+        self.update_results_table()
+
+    def get_results_rows(self):
+        fits = self.data_handler.calculate_transient_fits(self.space_id)
+        datasets = self.data_handler.dataspaces[self.space_id]["datasets"]
+        rows = []
+        for i, set_id in enumerate(fits["set_ids"]):
+            row = [datasets[set_id]["name"], datasets[set_id]["concentration"]]
+            row += [fits[name][i] for name in ("a", "b", "c", "tau", "rms", "plateau", "count")]
+            rows.append(row)
+        return rows
+
+    def update_results_table(self):
+        rows = self.get_results_rows()
+        self.table_results.setSortingEnabled(False)
+        self.table_results.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            self.table_results.setItem(i, 0, QTableWidgetItem(row[0]))
+            for column, value in enumerate(row[1:], start=1):
+                self.table_results.setItem(i, column, NumericTableWidgetItem(value, f"{value:.6g}"))
+        self.table_results.setSortingEnabled(True)
+
+    def on_export_clicked(self):
+        rows = self.get_results_rows()
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Transient Fits", "transient_fits.csv", "CSV Files (*.csv)")
+        if not filepath:
+            return
+        with open(filepath, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.result_headers)
+            writer.writerows(rows)
+
+class ExportDialog(QDialog):
+    # Options for exporting results and traces
+
+    traces_options = {"None": None, "Decimated": "decimated", "Raw": "raw"}
+
+    def __init__(self, weighted: bool, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Results")
+
+        self.checkBox_csv = QCheckBox("CSV files", self)
+        self.checkBox_csv.setChecked(True)
+        self.checkBox_npz = QCheckBox("NPZ file", self)
+        self.checkBox_active_only = QCheckBox("Active dataspaces only", self)
+        self.checkBox_weighted = QCheckBox("Weighted trendlines (1/σ²)", self)
+        self.checkBox_weighted.setChecked(weighted)
+
+        self.comboBox_traces = QComboBox(self)
+        self.comboBox_traces.addItems(self.traces_options.keys())
+        self.spinBox_decimation = self.create_decimation_spin_box()
+        self.comboBox_traces.currentTextChanged.connect(self.update_decimation_enabled)
+        self.update_decimation_enabled()
+
+        form = QFormLayout()
+        form.addRow(self.checkBox_csv)
+        form.addRow(self.checkBox_npz)
+        form.addRow(self.checkBox_active_only)
+        form.addRow(self.checkBox_weighted)
+        form.addRow("Traces", self.comboBox_traces)
+        form.addRow("Decimation factor", self.spinBox_decimation)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+
+    def create_decimation_spin_box(self):
+        spin_box = QSpinBox(self)
+        spin_box.setRange(2, 10000)
+        spin_box.setValue(10)
+        return spin_box
+
+    def update_decimation_enabled(self):
+        self.spinBox_decimation.setEnabled(self.comboBox_traces.currentText() == "Decimated")
+
+    def get_options(self):
+        formats = []
+        if self.checkBox_csv.isChecked():
+            formats.append("csv")
+        if self.checkBox_npz.isChecked():
+            formats.append("npz")
+        return {
+            "formats": formats,
+            "active_only": self.checkBox_active_only.isChecked(),
+            "weighted": self.checkBox_weighted.isChecked(),
+            "traces": self.traces_options[self.comboBox_traces.currentText()],
+            "decimation_factor": self.spinBox_decimation.value()
+        }
+
+class ImportOptionsDialog(QDialog):
+    # Decimation and storage precision applied to imported measurements
+
+    decimation_options = {"None": None, "Block mean": "mean", "Min/max": "minmax"}
+
+    def __init__(self, options: dict, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import Options")
+        options = {**DEFAULT_INGEST_OPTIONS, **options}
+
+        self.comboBox_decimation = QComboBox(self)
+        self.comboBox_decimation.addItems(self.decimation_options.keys())
+        for text, method in self.decimation_options.items():
+            if method == options["decimation"]:
+                self.comboBox_decimation.setCurrentText(text)
+        self.doubleSpinBox_target_rate = QDoubleSpinBox(self)
+        self.doubleSpinBox_target_rate.setRange(0.01, 100000)
+        self.doubleSpinBox_target_rate.setDecimals(2)
+        self.doubleSpinBox_target_rate.setSuffix(" Hz")
+        self.doubleSpinBox_target_rate.setValue(options["target_rate"])
+        self.checkBox_float32 = QCheckBox("Store currents as float32", self)
+        self.checkBox_float32.setChecked(options["float32"])
+        self.comboBox_decimation.currentTextChanged.connect(self.update_target_rate_enabled)
+        self.update_target_rate_enabled()
+
+        form = QFormLayout()
+        form.addRow("Decimation", self.comboBox_decimation)
+        form.addRow("Target sample rate", self.doubleSpinBox_target_rate)
+        form.addRow(self.checkBox_float32)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Applied to measurements imported from now on. The options are stored in the dataset metadata.", self))
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+
+    def update_target_rate_enabled(self):
+        self.doubleSpinBox_target_rate.setEnabled(self.decimation_options[self.comboBox_decimation.currentText()] != None)
+
+    def get_options(self):
+        return {
+            "decimation": self.decimation_options[self.comboBox_decimation.currentText()],
+            "target_rate": self.doubleSpinBox_target_rate.value(),
+            "float32": self.checkBox_float32.isChecked()
+        }
+
+class CalibrationHistoryDialog(QDialog):
+    # Trend of a calibration parameter of one batch and window over time, from the calibration history
+
+    field_names = {"slope": "Slope", "intercept": "Intercept", "r_squared": "R²"}
+
+    def __init__(self, history: calibration_history.CalibrationHistory, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.setWindowTitle("Calibration History")
+        self.resize(900, 600)
+
+        self.comboBox_batch = QComboBox(self)
+        self.comboBox_batch.addItems(history.get_batches())
+        self.comboBox_window = QComboBox(self)
+        self.comboBox_field = QComboBox(self)
+        for field, text in self.field_names.items():
+            self.comboBox_field.addItem(text, field)
+        # 0 months shows everything
+        self.spinBox_months = QSpinBox(self)
+        self.spinBox_months.setRange(0, 1200)
+        self.spinBox_months.setValue(6)
+        self.spinBox_months.setSpecialValueText("All")
+        self.label_count = QLabel(self)
+
+        self.comboBox_batch.currentTextChanged.connect(self.update_windows)
+        self.comboBox_window.currentTextChanged.connect(self.update_plot)
+        self.comboBox_field.currentIndexChanged.connect(self.update_plot)
+        self.spinBox_months.valueChanged.connect(self.update_plot)
+
+        form = QFormLayout()
+        form.addRow("Batch (dataspace)", self.comboBox_batch)
+        form.addRow("Window", self.comboBox_window)
+        form.addRow("Parameter", self.comboBox_field)
+        form.addRow("Last months", self.spinBox_months)
+
+        self.figure = Figure()
+        self.axes = self.figure.subplots()
+        self.canvas = FigureCanvasQTAgg(self.figure)
+
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.label_count)
+        buttons.addStretch()
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addWidget(self.canvas)
+        layout.addLayout(buttons)
+
+        self.update_windows()
+
+    def update_windows(self):
+        windows = self.history.get_windows(self.comboBox_batch.currentText()) if self.comboBox_batch.count() > 0 else []
+        self.comboBox_window.blockSignals(True)
+        self.comboBox_window.clear()
+        self.comboBox_window.addItems(windows)
+        if "span" in windows:
+            self.comboBox_window.setCurrentText("span")
+        self.comboBox_window.blockSignals(False)
+        self.update_plot()
+
+    def update_plot(self):
+        self.axes.clear()
+        batch = self.comboBox_batch.currentText()
+        window = self.comboBox_window.currentText()
+        field = self.comboBox_field.currentData()
+        if not batch or not window:
+            self.label_count.setText("No calibrations recorded")
+            self.canvas.draw()
+            return
+        months = self.spinBox_months.value()
+        since = time.time() - months * 30.44 * 86400 if months > 0 else None
+        drift = self.history.query_drift(batch, window, field, since)
+
+        dates = [datetime.fromtimestamp(created) for created in drift["created"]]
+        self.axes.errorbar(dates, drift["values"], yerr=drift["errors"], marker="o", markersize=3, linestyle="-", linewidth=0.8, capsize=2)
+        self.axes.set_title(f"{batch} - {window}")
+        self.axes.set_ylabel(self.field_names[field])
+        self.axes.grid(True)
+        self.figure.autofmt_xdate()
+        self.figure.tight_layout()
+        self.canvas.draw()
+        self.label_count.setText(f"{len(dates)} calibrations")
+
+class SimilarCurvesDialog(QDialog):
+    # Nearest curves of a dataset in the curve index of archived measurements
+
+    result_headers = ["Rank", "Name", "Distance", "Samples", "Duration (s)", "Source"]
+
+    def __init__(self, main_window, space_id, set_id, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.dataset = main_window.plot.data_handler.dataspaces[space_id]["datasets"][set_id]
+        self.matches = []
+        self.setWindowTitle(f"Similar Curves - {self.dataset['name']}")
+        self.resize(900, 550)
+
+        self.label_index = QLabel(self)
+        button_open = QPushButton("Open Index...", self)
+        button_open.clicked.connect(self.on_open_clicked)
+        button_build = QPushButton("Add Folder To Index...", self)
+        button_build.clicked.connect(self.on_build_clicked)
+        index_buttons = QHBoxLayout()
+        index_buttons.addWidget(self.label_index)
+        index_buttons.addStretch()
+        index_buttons.addWidget(button_open)
+        index_buttons.addWidget(button_build)
+
+        self.spinBox_k = QSpinBox(self)
+        self.spinBox_k.setRange(1, 1000)
+        self.spinBox_k.setValue(10)
+        self.checkBox_prefilter = QCheckBox("Coarse prefilter (faster, can miss matches)", self)
+        self.checkBox_prefilter.setChecked(True)
+        form = QFormLayout()
+        form.addRow("Matches", self.spinBox_k)
+        form.addRow(self.checkBox_prefilter)
+
+        self.label_time = QLabel(self)
+        button_search = QPushButton("Search", self)
+        button_search.clicked.connect(self.search)
+        search_buttons = QHBoxLayout()
+        search_buttons.addWidget(self.label_time)
+        search_buttons.addStretch()
+        search_buttons.addWidget(button_search)
+
+        self.table_results = QTableWidget(0, len(self.result_headers), self)
+        self.table_results.setHorizontalHeaderLabels(self.result_headers)
+        self.table_results.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table_results.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+
+        self.button_load = QPushButton("Load Matches Into New Dataspace", self)
+        self.button_load.clicked.connect(self.on_load_clicked)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.button_load)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(index_buttons)
+        layout.addLayout(form)
+        layout.addLayout(search_buttons)
+        layout.addWidget(self.table_results)
+        layout.addLayout(buttons)
+
+        self.update_index_label()
+        self.update_results_table()
+
+    def update_index_label(self):
+        index = self.main_window.get_curve_index()
+        count = index.get_count() if index != None else 0
+        self.label_index.setText(f"{count} curves in {self.main_window.curve_index_directory}")
+
+    def on_open_clicked(self):
+        directory = QFileDialog.getExistingDirectory(self, "Curve Index Folder", self.main_window.curve_index_directory)
+        if not directory:
+            return
+        self.main_window.set_curve_index_directory(directory)
+        self.update_index_label()
+
+    def on_build_clicked(self):
+        folder = QFileDialog.getExistingDirectory(self, "Folder With Measurements", os.getcwd())
+        if not folder:
+            return
+        filepaths = []
+        for root, _, filenames in os.walk(folder):
+            filepaths.extend(os.path.join(root, filename) for filename in filenames if filename.endswith((".pssession", ".pst")))
+        # Files indexed before stay in the index
+        index = self.main_window.get_curve_index()
+        if index != None:
+            filepaths = list(index.files) + filepaths
+
+        progress_dialog = QProgressDialog("Indexing measurements...", None, 0, 1, self)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        def on_progress(done, total):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+        self.main_window.build_curve_index(filepaths, on_progress)
+        progress_dialog.close()
+        self.update_index_label()
+
+    def search(self):
+        index = self.main_window.get_curve_index()
+        if index == None:
+            return
+        metadata = self.dataset.get("metadata", {})
+        # The dataset itself is in the index when it was imported from the archive
+        exclude = (metadata["sha1"], metadata.get("measurement_index", 0)) if "sha1" in metadata else None
+        start = time.perf_counter()
+        results = index.query(self.dataset["times"], self.dataset["currents"], self.spinBox_k.value(), self.checkBox_prefilter.isChecked(), exclude)
+        self.label_time.setText(f"Searched {index.get_count()} curves in {(time.perf_counter() - start) * 1000:.1f} ms")
+        self.matches = [dict(index.entries[row], distance=distance) for row, distance in results]
+        self.update_results_table()
+
+    def update_results_table(self):
+        self.table_results.setSortingEnabled(False)
+        self.table_results.setRowCount(len(self.matches))
+        for i, match in enumerate(self.matches):
+            self.table_results.setItem(i, 0, NumericTableWidgetItem(i + 1, str(i + 1)))
+            self.table_results.setItem(i, 1, QTableWidgetItem(match["name"]))
+            self.table_results.setItem(i, 2, NumericTableWidgetItem(match["distance"], f"{match['distance']:.4g}"))
+            self.table_results.setItem(i, 3, NumericTableWidgetItem(match["samples"], str(match["samples"])))
+            self.table_results.setItem(i, 4, NumericTableWidgetItem(match["duration"], f"{match['duration']:.6g}"))
+            self.table_results.setItem(i, 5, QTableWidgetItem(match["source"]))
+        self.table_results.setSortingEnabled(True)
+        self.button_load.setEnabled(len(self.matches) > 0)
+
+    def on_load_clicked(self):
+        self.main_window.load_curve_matches(self.matches, f"Similar to {self.dataset['name']}")
+
+class SessionCatalogDialog(QDialog):
+    # Filterable list of the cataloged measurement files, selected files are imported
+
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.catalog = main_window.get_session_catalog()
+        self.setWindowTitle("Session Catalog")
+        self.resize(1100, 650)
+
+        button_scan = QPushButton("Scan Folder...", self)
+        button_scan.clicked.connect(self.on_scan_clicked)
+        self.label_scan = QLabel(self)
+        scan_buttons = QHBoxLayout()
+        scan_buttons.addWidget(self.label_scan)
+        scan_buttons.addStretch()
+        scan_buttons.addWidget(button_scan)
+
+        self.lineEdit_filter = QLineEdit(self)
+        self.lineEdit_filter.setPlaceholderText("Path, set name or title contains...")
+        self.comboBox_channel = QComboBox(self)
+        self.comboBox_method = QComboBox(self)
+        # Filter once typing pauses, not on every key
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.update_rows)
+        self.lineEdit_filter.textChanged.connect(self.filter_timer.start)
+        self.comboBox_channel.currentIndexChanged.connect(self.update_rows)
+        self.comboBox_method.currentIndexChanged.connect(self.update_rows)
+        filters = QHBoxLayout()
+        filters.addWidget(self.lineEdit_filter, 1)
+        filters.addWidget(QLabel("Channel", self))
+        filters.addWidget(self.comboBox_channel)
+        filters.addWidget(QLabel("Method", self))
+        filters.addWidget(self.comboBox_method)
+
+        self.model = CatalogTableModel(self)
+        self.table_files = QTableView(self)
+        self.table_files.setModel(self.model)
+        self.table_files.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_files.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table_files.setSortingEnabled(True)
+        self.table_files.verticalHeader().setDefaultSectionSize(22)
+        self.table_files.horizontalHeader().setSectionResizeMode(len(self.model.columns) - 1, QHeaderView.ResizeMode.Stretch)
+        self.table_files.selectionModel().selectionChanged.connect(self.update_selection_label)
+
+        self.label_selection = QLabel(self)
+        self.button_import = QPushButton("Import Selected", self)
+        self.button_import.clicked.connect(self.on_import_clicked)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.label_selection)
+        buttons.addStretch()
+        buttons.addWidget(self.button_import)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(scan_buttons)
+        layout.addLayout(filters)
+        layout.addWidget(self.table_files)
+        layout.addLayout(buttons)
+
+        self.update_filters()
+
+    def update_filters(self):
+        # Fills the channel and method choices, keeping the current ones
+        for comboBox, column in ((self.comboBox_channel, "channel"), (self.comboBox_method, "method")):
+            current = comboBox.currentData()
+            comboBox.blockSignals(True)
+            comboBox.clear()
+            comboBox.addItem("All", None)
+            for value in self.catalog.get_distinct(column):
+                comboBox.addItem(value, value)
+            comboBox.setCurrentIndex(max(0, comboBox.findData(current)))
+            comboBox.blockSignals(False)
+        self.update_rows()
+
+    def update_rows(self):
+        self.filter_timer.stop()
+        rows = self.catalog.search(self.lineEdit_filter.text(), self.comboBox_channel.currentData(), self.comboBox_method.currentData())
+        self.model.set_rows(rows)
+        self.label_scan.setText(f"{len(rows)} of {self.catalog.get_count()} files")
+        self.update_selection_label()
+
+    def get_selected_paths(self):
+        return [self.model.get_path(index.row()) for index in self.table_files.selectionModel().selectedRows()]
+
+    def update_selection_label(self):
+        count = len(self.table_files.selectionModel().selectedRows())
+        self.label_selection.setText(f"{count} selected")
+        self.button_import.setEnabled(count > 0)
+
+    def on_scan_clicked(self):
+        folder = QFileDialog.getExistingDirectory(self, "Folder With Measurements", os.getcwd())
+        if not folder:
+            return
+        progress_dialog = QProgressDialog("Reading new and changed files...", None, 0, 1, self)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        def on_progress(done, total):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+        start = time.perf_counter()
+        counts = self.catalog.scan(folder, progress=on_progress)
+        progress_dialog.close()
+        self.update_filters()
+        self.label_scan.setText(
+            f"{self.label_scan.text()}. Scanned {counts['files']} files in {time.perf_counter() - start:.1f} s, "
+            f"{counts['changed']} new or changed, {counts['removed']} removed"
+        )
+
+    def on_import_clicked(self):
+        paths = self.get_selected_paths()
+        if len(paths) == 0:
+            return
+        self.main_window.import_files(sorted(paths))
+
+class QuantificationDialog(QDialog):
+    # Concentrations of many unknown-sample files from the calibration of one dataspace
+
+    result_headers = ["Sample", "Statistic", "Concentration", "Standard error", "Range", "Source"]
+
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.data_handler = main_window.plot.data_handler
+        # Parsed measurements of the added files: {"name", "source", "times", "currents"}
+        self.samples = []
+        self.rows = []
+        self.setWindowTitle("Quantify Samples")
+        self.resize(1000, 600)
+
+        self.comboBox_calibration = QComboBox(self)
+        for space_id, dataspace in self.data_handler.dataspaces.items():
+            self.comboBox_calibration.addItem(dataspace["name"], space_id)
+        self.comboBox_calibration.setCurrentIndex(max(0, self.comboBox_calibration.findData(self.data_handler.selected_space_id)))
+        self.comboBox_calibration.currentIndexChanged.connect(self.update_results)
+        statistic = main_window.plot.calibration_statistic
+        time_range = self.data_handler.time_range
+        statistic_text = transient_fit.CALIBRATION_STATISTICS[statistic]
+        if statistic == "mean":
+            statistic_text += f" {time_range[0]:.6g} - {time_range[1]:.6g} s"
+        form = QFormLayout()
+        form.addRow("Calibration dataspace", self.comboBox_calibration)
+        form.addRow("Statistic", QLabel(statistic_text, self))
+
+        self.label_samples = QLabel(self)
+        button_add = QPushButton("Add Files...", self)
+        button_add.clicked.connect(self.on_add_clicked)
+        button_clear = QPushButton("Clear", self)
+        button_clear.clicked.connect(self.on_clear_clicked)
+        file_buttons = QHBoxLayout()
+        file_buttons.addWidget(self.label_samples)
+        file_buttons.addStretch()
+        file_buttons.addWidget(button_add)
+        file_buttons.addWidget(button_clear)
+
+        self.table_results = QTableWidget(0, len(self.result_headers), self)
+        self.table_results.setHorizontalHeaderLabels(self.result_headers)
+        self.table_results.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table_results.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        self.label_calibration = QLabel(self)
+        button_export = QPushButton("Export CSV...", self)
+        button_export.clicked.connect(self.on_export_clicked)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.label_calibration)
+        buttons.addStretch()
+        buttons.addWidget(button_export)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(form)
+        layout.addLayout(file_buttons)
+        layout.addWidget(self.table_results)
+        layout.addLayout(buttons)
+
+        self.update_results()
+
+    def on_add_clicked(self):
+        filepaths, _ = QFileDialog.getOpenFileNames(self, "Unknown Samples", os.getcwd(), "Measurements (*.pssession *.pst)")
+        if not filepaths:
+            return
+        self.add_files(sorted(filepaths))
+
+    def add_files(self, filepaths: list):
+        progress_dialog = QProgressDialog("Reading samples...", None, 0, len(filepaths), self)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        start = time.perf_counter()
+        measurements_list = do.extract_measurements_from_files(filepaths, progress=lambda done, total: progress_dialog.setValue(done))
+        progress_dialog.close()
+        for filepath, measurements in zip(filepaths, measurements_list):
+            for measurement in measurements:
+                self.samples.append({
+                    "name": measurement["name"],
+                    "source": filepath,
+                    "times": measurement["arrays"]["time"],
+                    "currents": measurement["arrays"]["currents"]
+                })
+        self.update_results()
+        self.label_samples.setText(f"{self.label_samples.text()}, last {len(filepaths)} files read in {time.perf_counter() - start:.1f} s")
+
+    def on_clear_clicked(self):
+        self.samples = []
+        self.update_results()
+
+    def get_results_rows(self):
+        # Rows of the table and the export, None if the dataspace has no calibration line
+        space_id = self.comboBox_calibration.currentData()
+        if space_id == None or len(self.samples) == 0:
+            return [], None
+        plot = self.main_window.plot
+        quantified = self.data_handler.quantify_samples(self.samples, space_id, plot.calibration_statistic, plot.weighted_fit)
+        if quantified == None:
+            return [], None
+        rows = []
+        for i, sample in enumerate(self.samples):
+            rows.append([
+                sample["name"], quantified["values"][i], quantified["concentrations"][i], quantified["ses"][i],
+                "Out Of Range" if quantified["out_of_range"][i] else "", sample["source"]
+            ])
+        return rows, quantified["calibration"]
+
+    def update_results(self):
+        self.rows, calibration = self.get_results_rows()
+        out_of_range = sum(1 for row in self.rows if row[4])
+        self.label_samples.setText(f"{len(self.samples)} samples, {out_of_range} out of range")
+        if calibration != None:
+            self.label_calibration.setText(
+                f"Calibration: slope {calibration['slope']:.6g}, intercept {calibration['intercept']:.6g}, {calibration['count']} concentrations"
+            )
+        elif len(self.samples) > 0:
+            self.label_calibration.setText("The calibration dataspace needs at least 2 concentrations")
+        else:
+            self.label_calibration.setText("")
+
+        self.table_results.setSortingEnabled(False)
+        self.table_results.setRowCount(len(self.rows))
+        for i, row in enumerate(self.rows):
+            self.table_results.setItem(i, 0, QTableWidgetItem(row[0]))
+            for column in (1, 2, 3):
+                self.table_results.setItem(i, column, NumericTableWidgetItem(row[column], f"{row[column]:.6g}"))
+            self.table_results.setItem(i, 4, QTableWidgetItem(row[4]))
+            self.table_results.setItem(i, 5, QTableWidgetItem(row[5]))
+        self.table_results.setSortingEnabled(True)
+
+    def on_export_clicked(self):
+        if len(self.rows) == 0:
+            return
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Quantification", "quantification.csv", "CSV Files (*.csv)")
+        if not filepath:
+            return
+        with open(filepath, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.result_headers)
+            writer.writerows(self.rows)
+
+class DatasetStatisticsDialog(QDialog):
+    # Summary statistics of the datasets of one dataspace, sortable and filterable, to find and hide bad channels at once
+
+    operators = {">": lambda value, limit: value > limit, "<": lambda value, limit: value < limit}
+
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent or main_window)
+        self.main_window = main_window
+        self.data_handler = main_window.plot.data_handler
+        # Rows of all datasets, the model shows the ones matching the filter
+        self.all_rows = []
+        self.setWindowTitle("Dataset Statistics")
+        self.resize(1200, 650)
+
+        self.comboBox_dataspace = QComboBox(self)
+        for space_id, dataspace in self.data_handler.dataspaces.items():
+            self.comboBox_dataspace.addItem(dataspace["name"], space_id)
+        self.comboBox_dataspace.setCurrentIndex(max(0, self.comboBox_dataspace.findData(self.data_handler.selected_space_id)))
+        self.comboBox_dataspace.currentIndexChanged.connect(self.update_rows)
+
+        self.comboBox_descriptor = QComboBox(self)
+        for key, header in StatisticsTableModel.columns:
+            if key in StatisticsTableModel.numeric_keys:
+                self.comboBox_descriptor.addItem(header, key)
+        self.comboBox_descriptor.setCurrentIndex(self.comboBox_descriptor.findData("noise"))
+        self.comboBox_operator = QComboBox(self)
+        self.comboBox_operator.addItems(list(self.operators))
+        self.lineEdit_value = QLineEdit(self)
+        self.lineEdit_value.setPlaceholderText("Value, empty shows all")
+        self.comboBox_descriptor.currentIndexChanged.connect(self.apply_filter)
+        self.comboBox_operator.currentIndexChanged.connect(self.apply_filter)
+        self.lineEdit_value.textChanged.connect(self.apply_filter)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Dataspace", self))
+        filter_layout.addWidget(self.comboBox_dataspace)
+        filter_layout.addSpacing(20)
+        filter_layout.addWidget(QLabel("Filter", self))
+        filter_layout.addWidget(self.comboBox_descriptor)
+        filter_layout.addWidget(self.comboBox_operator)
+        filter_layout.addWidget(self.lineEdit_value)
+        filter_layout.addStretch()
+
+        self.model = StatisticsTableModel(self)
+        self.table_statistics = QTableView(self)
+        self.table_statistics.setModel(self.model)
+        self.table_statistics.setSortingEnabled(True)
+        self.table_statistics.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
+        self.table_statistics.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_statistics.verticalHeader().setVisible(False)
+        self.table_statistics.verticalHeader().setDefaultSectionSize(22)
+
+        self.label_matches = QLabel(self)
+        button_hide = QPushButton("Hide Matching", self)
+        button_hide.clicked.connect(lambda: self.set_matching_hidden(True))
+        button_show = QPushButton("Show Matching", self)
+        button_show.clicked.connect(lambda: self.set_matching_hidden(False))
+        button_show_all = QPushButton("Show All", self)
+        button_show_all.clicked.connect(self.on_show_all_clicked)
+        button_close = QPushButton("Close", self)
+        button_close.clicked.connect(self.close)
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.label_matches)
+        buttons.addStretch()
+        buttons.addWidget(button_hide)
+        buttons.addWidget(button_show)
+        buttons.addWidget(button_show_all)
+        buttons.addWidget(button_close)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.table_statistics)
+        layout.addLayout(buttons)
+
+        self.update_rows()
+
+    def update_rows(self):
+        space_id = self.comboBox_dataspace.currentData()
+        datasets = self.data_handler.get_datasets(space_id) if space_id != None else None
+        if datasets == None:
+            self.all_rows = []
+            self.apply_filter()
+            return
+        summaries = self.data_handler.get_dataset_summaries(space_id)
+        # Mean current in the span, from the same cached window means as the results
+        window_means = {}
+        if self.main_window.plot.span_initialized and len(datasets) > 0:
+            set_ids, means = self.data_handler.get_window_means([self.data_handler.time_range], space_id, statistic_config={"statistic": "mean"})
+            window_means = dict(zip(set_ids, means[:, 0]))
+        self.all_rows = [
+            dict(summaries[set_id], set_id=set_id, name=data["name"], concentration=data["concentration"], hidden=data["hidden"],
+                 window_mean=float(window_means.get(set_id, float("nan"))))
+            for set_id, data in datasets.items()
+        ]
+        self.apply_filter()
+
+    def get_filter(self):
+        # (key, operator, limit), None without a valid value
+        try:
+            limit = float(self.lineEdit_value.text())
+        except ValueError:
+            return None
+        return self.comboBox_descriptor.currentData(), self.operators[self.comboBox_operator.currentText()], limit
+
+    def apply_filter(self):
+        condition = self.get_filter()
+        if condition == None:
+            rows = self.all_rows
+        else:
+            key, operator, limit = condition
+            # nan never matches
+            rows = [row for row in self.all_rows if operator(row[key], limit)]
+        self.model.set_rows(rows)
+        hidden_count = sum(1 for row in rows if row["hidden"])
+        self.label_matches.setText(f"{len(rows)} of {len(self.all_rows)} datasets match, {hidden_count} of them hidden")
+
+    def set_hidden(self, set_ids: list, hidden: bool):
+        space_id = self.comboBox_dataspace.currentData()
+        if space_id == None:
+            return
+        self.main_window.set_datasets_hidden(set_ids, hidden, space_id)
+        hidden_by_id = {set_id: hidden for set_id in set_ids}
+        for row in self.all_rows:
+            row["hidden"] = hidden_by_id.get(row["set_id"], row["hidden"])
+        # Rows are shared with the model, refilter to update the view and the counts
+        self.apply_filter()
+
+    def set_matching_hidden(self, hidden: bool):
+        self.set_hidden([row["set_id"] for row in self.model.rows], hidden)
+
+    def on_show_all_clicked(self):
+        self.set_hidden([row["set_id"] for row in self.all_rows], False)
@@ -2,56 +2,59 @@ import os
 import traceback
 import numpy as np
 import gui.data_operations as do
+import gui.data_export as de
+import gui.calibration_history as ch
+import gui.curve_index as ci
+import gui.session_catalog as sc
 from datetime import datetime
-from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QLineEdit, QHBoxLayout, QMessageBox, QFileDialog, QCheckBox
-from PyQt6.uic import loadUi
-from PyQt6.QtCore import Qt, QFileInfo
+from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QHBoxLayout, QMessageBox, QFileDialog, QCheckBox, QInputDialog, QProgressBar, QPushButton, QProgressDialog
+from PyQt6.QtCore import Qt, QFileInfo, QTimer, QStandardPaths
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
-from plotting import plotter
+from gui.build_ui import UI_PATH, ui_source_hash
+from plotting import plotter, quantification
+from plotting.decimation import decimate_block_mean, apply_ingest_options, DEFAULT_INGEST_OPTIONS
 from utils.repeated_timer import RepeatedTimer
-from gui.custom_widgets import CustomQLineEdit, EditableButton
+from utils import instrumentation
+from utils.stall_watchdog import StallWatchdog
+from gui.dialogs import (StallReportDialog, MemoryUsageDialog, PreprocessingDialog, WindowsDialog, ExportDialog, ImportOptionsDialog, TransientFitDialog,
+                         CalibrationHistoryDialog, SimilarCurvesDialog, SessionCatalogDialog, QuantificationDialog,
+                         DatasetStatisticsDialog)
+from gui.custom_widgets import EditableButton, DatasetTableView
+from gui.dataset_table_model import DatasetTableModel
+from gui.session_restore import SessionRestoreWorker
 
 class MainWindow(QMainWindow):
     space_widget_id = 0
     set_widget_id = 0
-    layout_datasets: QVBoxLayout
+    import_options = DEFAULT_INGEST_OPTIONS # Decimation and precision of imported measurements
+    curve_index_directory = os.path.join(os.getcwd(), "curve_index") # Similarity index of archived measurements
+    current_convert_value = "" # Text of the current to concentration converter
+    autosave_paused = False # After a cancelled restore of the autosave, so the partial session does not replace it
     layout_dataspaces: QVBoxLayout
+    tableView_datasets: DatasetTableView
+    dataset_model: DatasetTableModel
     widgets = {}
     '''
     widgets structure:
     {
         space_id0: { 
+            "dataspace_name": space_name,
             "dataspace_widgets": {
                 "checkbox_toggle": checkbox_toggle_space,
                 "button_space": button_space
-            },
-            "dataset_widgets": {
-                dataset_id0: {
-                    "checkbox_toggle": checkbox_toggle_active,
-                    "line_edit_name": line_edit_name,
-                    "line_edit_concentration": line_edit_concentration,
-                    "line_edit_notes": line_edit_notes,
-                    "button_paste": button_paste
-                },
-                dataset_id1: {
-                    "checkbox_toggle": checkbox_toggle_active,
-                    "line_edit_name": line_edit_name,
-                    "line_edit_concentration": line_edit_concentration,
-                    "line_edit_notes": line_edit_notes,
-                    "button_paste": button_paste
-                }
             }
         },
         space_id1 {
             ...
         }
     }
+    Datasets have no widgets of their own. They are shown by tableView_datasets through dataset_model.
     '''
 
     def __init__(self):
         super().__init__()
 
-        loadUi("amp_analyzer.ui", self)
+        self.setup_ui()
         self.setAcceptDrops(True) # Enable dropping onto the main window
 
         self.plot = plotter.PlotCanvas(self.plotWidget)
@@ -63,12 +66,29 @@ class MainWindow(QMainWindow):
         #self.actionImport_data_from_XLSX.triggered.connect(self.on_import_data_from_csv_clicked)
         #self.actionImport_data_from_CSV.triggered.connect(self.on_import_data_from_csv_clicked)
         self.actionImport_data_from_PSSESSION_PST.triggered.connect(self.on_import_data_from_pssession_pst_clicked)
+        self.actionImport_Options.triggered.connect(self.on_import_options_clicked)
+        self.actionSession_Catalog.triggered.connect(self.on_session_catalog_clicked)
         self.actionDebug_Info.triggered.connect(self.plot.toggle_debug_info)
         self.actionLegend.triggered.connect(self.plot.toggle_legend)
         self.actionEquation.triggered.connect(self.plot.toggle_equation)
+        self.actionWeighted_Fit.triggered.connect(self.plot.toggle_weighted_fit)
+        self.actionReplicate_Means.triggered.connect(self.plot.toggle_replicate_means)
         self.actionSave.triggered.connect(lambda: self.on_save_clicked(ask_for_file_location=False))
         self.actionSave_as.triggered.connect(lambda: self.on_save_clicked(ask_for_file_location=True))
         self.actionLoad.triggered.connect(lambda: self.on_load_clicked(ask_for_file_location=True))
+        self.actionClean_Up_Saved_Data.triggered.connect(self.on_clean_up_saved_data_clicked)
+        self.actionExport.triggered.connect(self.on_export_clicked)
+        self.actionProfile_Next_Actions.triggered.connect(self.on_profile_next_actions_clicked)
+        self.actionExport_Timing_Trace.triggered.connect(self.on_export_timing_trace_clicked)
+        self.actionStall_Report.triggered.connect(self.on_stall_report_clicked)
+        self.actionMemory_Usage.triggered.connect(self.on_memory_usage_clicked)
+        self.actionPreprocessing.triggered.connect(self.on_preprocessing_clicked)
+        self.actionTime_Windows.triggered.connect(self.on_time_windows_clicked)
+        self.actionTransient_Fit.triggered.connect(self.on_transient_fit_clicked)
+        self.actionCalibration_History.triggered.connect(self.on_calibration_history_clicked)
+        self.actionSimilar_Curves.triggered.connect(self.on_similar_curves_clicked)
+        self.actionQuantify_Samples.triggered.connect(self.on_quantify_samples_clicked)
+        self.actionDataset_Statistics.triggered.connect(self.on_dataset_statistics_clicked)
 
         # Dataspace button signals
         self.pushButton_dataspace_add.clicked.connect(lambda: self.on_dataspace_add_clicked())
@@ -77,6 +97,8 @@ class MainWindow(QMainWindow):
 
         # Current to concentration signal
         self.lineEdit_convert_current.textChanged.connect(lambda: self.find_concentration_from_current(self.lineEdit_convert_current.text()))
+        # Kept for autosave, which runs on the timer thread and must not read widgets
+        self.lineEdit_convert_current.textChanged.connect(lambda text: setattr(self, "current_convert_value", text))
 
         # Dataspace notes signal
         self.plainTextEdit_space_notes.textChanged.connect(lambda: self.update_dataspace_notes(self.plainTextEdit_space_notes.toPlainText()))
@@ -97,16 +119,83 @@ class MainWindow(QMainWindow):
         navigation_toolbar = NavigationToolbar(self.plot, self)
         self.horizontalLayout_toolbox.addWidget(navigation_toolbar)
         
-        self.layout_datasets = QVBoxLayout(self.scrollAreaWidgetContents_datasets)
+        # Dataset table
+        self.dataset_model = DatasetTableModel(self.plot.data_handler, self)
+        self.dataset_model.datasetEdited.connect(self.on_dataset_edited)
+        self.dataset_model.datasetToggled.connect(self.on_dataset_toggled)
+        self.tableView_datasets.setModel(self.dataset_model)
+
         self.layout_dataspaces = QVBoxLayout(self.scrollAreaWidgetContents_dataspaces)
 
-        # Initialize one dataspace
-        self.add_dataspace_widget(initialize_dataset=True)
+        # Session restore progress, shown in the status bar while a save file is loading
+        self.restore_worker = None
+        self.restore_filepath = None
+        self.restore_header = None
+        self.restore_loaded_count = 0
+        self.progressBar_restore = QProgressBar(self)
+        self.progressBar_restore.setMaximumWidth(200)
+        self.progressBar_restore.setFormat("Loading %v/%m")
+        self.pushButton_restore_cancel = QPushButton("Cancel", self)
+        self.pushButton_restore_cancel.clicked.connect(self.cancel_restore)
+        self.statusbar.addPermanentWidget(self.progressBar_restore)
+        self.statusbar.addPermanentWidget(self.pushButton_restore_cancel)
+        self.progressBar_restore.hide()
+        self.pushButton_restore_cancel.hide()
+
+        # Initialize one dataspace, the first plot is drawn after the window is shown
+        with self.plot.hold_redraw(defer=True):
+            self.add_dataspace_widget(initialize_dataset=True)
         self.setFocus()
 
+        # Calibrations are recorded once the results stop changing, not on every redraw while the span is dragged
+        self.calibration_history = None
+        self.curve_index = None
+        self.session_catalog = None
+        self.history_timer = QTimer(self)
+        self.history_timer.setSingleShot(True)
+        self.history_timer.setInterval(2000)
+        self.history_timer.timeout.connect(self.record_calibration_history)
+        self.plot.results_listeners.append(lambda space_ids: self.history_timer.start())
+
         # Save program state to file every 60s
         self.rt = RepeatedTimer(60, lambda: self.on_save_clicked(False, "autosave"))
 
+        # Log event loop stalls longer than 0.5s with the stack of the blocked GUI thread
+        self.stall_watchdog = StallWatchdog(threshold=0.5, log_path=self.get_stall_log_path())
+        self.heartbeat_timer = QTimer(self)
+        self.heartbeat_timer.timeout.connect(lambda: self.stall_watchdog.beat(self.heartbeat_timer.interval() / 1000))
+        self.heartbeat_timer.start(100)
+        self.stall_watchdog.start()
+
+    def get_stall_log_path(self):
+        # In the app data directory, e.g. ~/.local/share/AmpAnalyzer on Linux, rather than the working directory
+        directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppLocalDataLocation)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print("Stall log disabled, can not create", directory, e)
+            return None
+        return os.path.join(directory, "stalls.log")
+
+    def setup_ui(self):
+        # Use the precompiled ui module when it was built from the current .ui file
+        try:
+            from gui import ui_main_window
+            compiled_is_current = not os.path.exists(UI_PATH) or ui_main_window.UI_SOURCE_HASH == ui_source_hash(UI_PATH)
+        except ImportError:
+            compiled_is_current = False
+
+        if compiled_is_current:
+            ui = ui_main_window.Ui_MainWindow()
+            ui.setupUi(self)
+            # Expose widgets as attributes of the window like loadUi does
+            for name, widget in vars(ui).items():
+                setattr(self, name, widget)
+        else:
+            print(f"setup_ui: Compiled ui is missing or out of date, loading {UI_PATH}. Run 'python -m gui.build_ui' to rebuild it.")
+            from PyQt6.uic import loadUi
+            loadUi(UI_PATH, self)
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
@@ -133,17 +222,7 @@ class MainWindow(QMainWindow):
         if individual_files:
             filepaths.extend([file for file in individual_files if file.endswith('.pssession') or file.endswith('.pst')])
 
-        space_id = self.plot.data_handler.selected_space_id
-        if space_id not in self.plot.data_handler.dataspaces:
-            self.add_dataspace_widget(space_id=space_id, initialize_dataset=False)
-            self.handle_pssession_pst_data(sorted(filepaths))
-        else: 
-            if len(self.plot.data_handler.dataspaces[space_id]["datasets"]) > 0:
-                ret = self.msg_box_overwrite(space_id)
-                if ret == 1:
-                    self.handle_pssession_pst_data(sorted(filepaths))
-            else:
-                self.handle_pssession_pst_data(sorted(filepaths))
+        self.import_files(sorted(filepaths))
 
     def closeEvent(self, event):
         reply = QMessageBox.question(self, 'Confirmation', 
@@ -152,6 +231,10 @@ class MainWindow(QMainWindow):
 
         if reply == QMessageBox.StandardButton.Yes:
             self.rt.stop()
+            self.stall_watchdog.stop()
+            if self.restore_worker:
+                self.restore_worker.requestInterruption()
+                self.restore_worker.wait()
             event.accept() # Allow the window to close
         else:
             event.ignore() # Ignore the close event
@@ -191,6 +274,9 @@ class MainWindow(QMainWindow):
         self.plot.update_plot_units()
 
     def on_save_clicked(self, ask_for_file_location: bool, filename = None):
+        if filename == "autosave" and (self.restore_worker or self.autosave_paused):
+            # Do not overwrite the autosave with a partially restored session
+            return
         if filename == None:
             current_datetime = datetime.now()
             filename = current_datetime.strftime("%Y-%m-%d_%H-%M-%S")
@@ -203,22 +289,29 @@ class MainWindow(QMainWindow):
         if not filepath:
             return  
         
-        # Add all pickleable objects to a dict
+        # Add all pickleable objects to a dict. Autosave runs on the timer thread, so the datasets and the span come from
+        # the read-only snapshot that the GUI thread can not change while they are written, and no widget is read
+        snapshot = self.plot.data_handler.snapshot
         data = {
             "window": {
                 "space_widget_id": self.space_widget_id,
                 "set_widget_id": self.set_widget_id,
-                "current_convert_value": self.lineEdit_convert_current.text()
+                "current_convert_value": self.current_convert_value,
+                "import_options": self.import_options,
+                "curve_index_directory": self.curve_index_directory
             },
             "plot": {
                 "show_debug_info": self.plot.show_debug_info,
                 "show_legend": self.plot.show_legend,
                 "show_equation": self.plot.show_equation,
+                "weighted_fit": self.plot.weighted_fit,
+                "show_replicate_means": self.plot.show_replicate_means,
+                "calibration_statistic": self.plot.calibration_statistic,
                 "span_initialized": self.plot.span_initialized,
-                "span_extents": self.plot.span.extents,
-                "selected_space_id": self.plot.data_handler.selected_space_id,
-                "active_spaces_ids": self.plot.data_handler.active_spaces_ids,
-                "dataspaces": self.plot.data_handler.dataspaces,
+                "span_extents": snapshot.time_range,
+                "selected_space_id": snapshot.selected_space_id,
+                "active_spaces_ids": list(snapshot.active_spaces_ids),
+                "dataspaces": snapshot.get_dataspaces_dict(),
                 "color_index": self.plot.data_handler.color_index,
                 "unit_current": self.plot.unit_current,
                 "unit_concentration": self.plot.unit_concentration
@@ -227,7 +320,248 @@ class MainWindow(QMainWindow):
 
         do.save_program_state_to_file(data, filepath)   
 
+    def on_clean_up_saved_data_clicked(self):
+        # Saves share their arrays through the blob store next to them, remove the arrays no save refers to anymore
+        folder = QFileDialog.getExistingDirectory(self, "Folder With Save Files", os.getcwd())
+        if not folder:
+            return
+        count, size = do.collect_blob_garbage(folder, dry_run=True)
+        if count == 0:
+            QMessageBox.information(self, "Clean Up Saved Data", "No unused saved data found.")
+            return
+        reply = QMessageBox.question(self, "Clean Up Saved Data",
+            f"Remove {count} arrays ({size / 1e6:.1f} MB) that no save file in the folder uses?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        count, size = do.collect_blob_garbage(folder)
+        self.statusbar.showMessage(f"Removed {count} arrays, {size / 1e6:.1f} MB", 5000)
+
+    def on_export_clicked(self):
+        dialog = ExportDialog(self.plot.weighted_fit, self)
+        if dialog.exec() != ExportDialog.DialogCode.Accepted:
+            return
+        options = dialog.get_options()
+        if not options["formats"]:
+            return
+
+        filename = datetime.now().strftime("export_%Y-%m-%d_%H-%M-%S")
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Results", filename, "All Files (*)")
+        if not filepath:
+            return
+        path_base = os.path.splitext(filepath)[0]
+
+        data_handler = self.plot.data_handler
+        if options["active_only"]:
+            space_ids = [space_id for space_id in data_handler.active_spaces_ids if space_id in data_handler.dataspaces]
+        else:
+            space_ids = list(data_handler.dataspaces.keys())
+
+        progress_dialog = QProgressDialog("Exporting...", "Cancel", 0, len(space_ids), self)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        def on_progress(done, total):
+            progress_dialog.setValue(done)
+            return not progress_dialog.wasCanceled()
+
+        try:
+            filepaths = de.export_session(
+                data_handler, path_base, options["formats"], options["traces"], options["decimation_factor"],
+                options["weighted"], space_ids, on_progress
+            )
+            print("Exported:", ", ".join(filepaths))
+            self.record_calibration_history(space_ids, origin="export")
+        except de.ExportCancelled:
+            print("Export cancelled")
+        except Exception as e:
+            traceback.print_exc()
+            QMessageBox.warning(self, "Export Results", f"Export failed: {e}")
+        finally:
+            progress_dialog.close()
+
+    def on_profile_next_actions_clicked(self):
+        action_count, ok = QInputDialog.getInt(self, "Profile Next Actions", "Number of actions to profile:", 5, 1, 1000)
+        if not ok:
+            return
+        filename = datetime.now().strftime("profile_%Y-%m-%d_%H-%M-%S.prof")
+        filepath, _ = QFileDialog.getSaveFileName(self, "Save Profile Stats", filename, "Profile Stats (*.prof)")
+        if not filepath:
+            return
+        instrumentation.profile_next_actions(action_count, filepath)
+
+    def on_export_timing_trace_clicked(self):
+        if not instrumentation.stats:
+            QMessageBox.information(self, "Export Timing Trace", "No timings recorded. Enable View > Debug Info to collect timings.")
+            return
+        filename = datetime.now().strftime("trace_%Y-%m-%d_%H-%M-%S.json")
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Timing Trace", filename, "Trace Files (*.json)")
+        if not filepath:
+            return
+        instrumentation.export_trace(filepath)
+
+    def on_stall_report_clicked(self):
+        dialog = StallReportDialog(self.stall_watchdog, self)
+        dialog.exec()
+
+    def on_memory_usage_clicked(self):
+        dialog = MemoryUsageDialog(self)
+        dialog.exec()
+
+    def on_preprocessing_clicked(self):
+        data_handler = self.plot.data_handler
+        space_id = data_handler.selected_space_id
+        if space_id not in data_handler.dataspaces:
+            return
+        dialog = PreprocessingDialog(data_handler.get_preprocessing(space_id), data_handler.dataspaces[space_id]["name"], self)
+        if dialog.exec() != PreprocessingDialog.DialogCode.Accepted:
+            return
+        data_handler.set_preprocessing(dialog.get_config(), space_id)
+        self.plot.draw_plot()
+
+    def on_time_windows_clicked(self):
+        space_id = self.plot.data_handler.selected_space_id
+        if space_id not in self.plot.data_handler.dataspaces:
+            return
+        dialog = WindowsDialog(self, space_id)
+        dialog.exec()
+
+    def get_calibration_history(self):
+        # Opened on first use
+        if self.calibration_history == None:
+            self.calibration_history = ch.CalibrationHistory()
+        return self.calibration_history
+
+    def record_calibration_history(self, space_ids: list = None, origin: str = "results"):
+        data_handler = self.plot.data_handler
+        if space_ids == None:
+            space_ids = [space_id for space_id in data_handler.active_spaces_ids if space_id in data_handler.dataspaces]
+        # Batch runs are recorded even if nothing changed since the last record
+        skip_unchanged = origin == "results"
+        try:
+            entries = ch.get_calibration_entries(data_handler, space_ids, self.plot.weighted_fit)
+            self.get_calibration_history().record(entries, origin, skip_unchanged=skip_unchanged)
+        except Exception as e:
+            print("Recording calibration history failed:", e)
+
+    def on_calibration_history_clicked(self):
+        # Record the current results first so they show up
+        self.history_timer.stop()
+        self.record_calibration_history()
+        dialog = CalibrationHistoryDialog(self.get_calibration_history(), self)
+        dialog.exec()
+
+    def on_transient_fit_clicked(self):
+        space_id = self.plot.data_handler.selected_space_id
+        if space_id not in self.plot.data_handler.dataspaces:
+            return
+        dialog = TransientFitDialog(self, space_id)
+        dialog.exec()
+
+    def get_selected_set_id(self):
+        # Dataset of the current row in the datasets table, else the first dataset of the selected dataspace
+        row = self.tableView_datasets.currentIndex().row()
+        if 0 <= row < len(self.dataset_model.set_ids):
+            return self.dataset_model.set_ids[row]
+        return self.dataset_model.set_ids[0] if self.dataset_model.set_ids else None
+
+    def get_curve_index(self):
+        # Opened on first use, None until an index is built
+        if self.curve_index == None and os.path.exists(os.path.join(self.curve_index_directory, ci.ENTRIES_FILE)):
+            try:
+                self.curve_index = ci.CurveIndex(self.curve_index_directory)
+            except Exception as e:
+                print(f"get_curve_index: {e}")
+        return self.curve_index
+
+    def set_curve_index_directory(self, directory: str):
+        if directory != self.curve_index_directory:
+            self.curve_index_directory = directory
+            self.curve_index = None
+
+    def build_curve_index(self, filepaths: list, progress=None):
+        if self.curve_index != None:
+            # Release the memory map of the old features before they are replaced
+            self.curve_index.close()
+            self.curve_index = None
+        self.curve_index = ci.build_curve_index(filepaths, self.curve_index_directory, progress=progress)
+
+    def on_quantify_samples_clicked(self):
+        if len(self.plot.data_handler.dataspaces) == 0:
+            return
+        dialog = QuantificationDialog(self)
+        dialog.exec()
+
+    def on_dataset_statistics_clicked(self):
+        if len(self.plot.data_handler.dataspaces) == 0:
+            return
+        dialog = DatasetStatisticsDialog(self)
+        dialog.exec()
+
+    def set_datasets_hidden(self, set_ids: list, hidden: bool, space_id):
+        # Bulk hide or show with one update of the dataset table and one redraw
+        if self.plot.data_handler.set_datasets_hidden(set_ids, hidden, space_id) == 0:
+            return
+        if space_id == self.dataset_model.space_id:
+            self.dataset_model.update_rows()
+        self.plot.draw_plot()
+
+    def on_similar_curves_clicked(self):
+        space_id = self.plot.data_handler.selected_space_id
+        if space_id not in self.plot.data_handler.dataspaces:
+            return
+        set_id = self.get_selected_set_id()
+        if set_id == None:
+            return
+        dialog = SimilarCurvesDialog(self, space_id, set_id)
+        dialog.exec()
+
+    def load_curve_matches(self, matches: list, space_name: str):
+        # Imports the matched measurements into a new dataspace, each file is parsed once
+        measurements_by_source = {}
+        batch = []
+        for match in matches:
+            source = match["source"]
+            try:
+                if source not in measurements_by_source:
+                    measurements_by_source[source] = do.extract_measurements_from_file(source)
+                measurement = measurements_by_source[source][match["measurement_index"]]
+            except Exception as e:
+                print(f"load_curve_matches: {source}: {e}")
+                continue
+            times, currents, ingest = apply_ingest_options(measurement["arrays"]["time"], measurement["arrays"]["currents"], self.import_options)
+            batch.append({
+                "set_id": self.create_dataset_id(),
+                "name": measurement["name"],
+                "times": times,
+                "currents": currents,
+                "notes": f"Distance {match['distance']:.4g}",
+                "metadata": {**measurement["metadata"], "ingest": ingest}
+            })
+        if len(batch) == 0:
+            return
+        space_id = self.add_dataspace_widget(space_name=space_name, initialize_dataset=False)
+        self.add_datasets(batch, space_name, "", space_id)
+        self.switch_dataspace(space_id)
+        self.set_active_dataspaces()
+
+    def decimate_dataspace(self, space_id, factor: int):
+        # Replace the samples of every dataset in the dataspace with block means to free memory
+        data_handler = self.plot.data_handler
+        with data_handler.batch_update():
+            for set_id, dataset in data_handler.get_datasets(space_id).items():
+                times, currents = decimate_block_mean(dataset["times"], dataset["currents"], factor)
+                data_handler.replace_dataset_data(set_id, times, currents, space_id)
+                # Recorded next to the ingest options so results stay reproducible
+                metadata = dataset.get("metadata", {})
+                data_handler.set_dataset_metadata(set_id, {**metadata, "decimations": metadata.get("decimations", []) + [{"decimation": "mean", "factor": factor}]}, space_id)
+            data_handler.notify_changed(space_id)
+        self.plot.draw_plot()
+
     def on_load_clicked(self, ask_for_file_location: bool):
+        if self.restore_worker:
+            QMessageBox.information(self, "Load", "A session is still loading. Cancel it before loading another file.")
+            return
+
         if ask_for_file_location:
             filepath, _ = QFileDialog.getOpenFileName(self, "Load File", "", "Pickle Files (*.pickle)")
             if not filepath:
@@ -239,101 +573,155 @@ class MainWindow(QMainWindow):
             if not os.path.exists(filepath):
                 return
 
-        # Read pickled data
-        try:
-            data = do.load_program_state_from_file(filepath)
-            if data == None:
-                return
-            
-            # Delete currents widgets  
-            space_ids = list(self.widgets.keys())
-            if space_ids:
-                for space_id in space_ids:
-                    self.remove_dataspace_widget(space_id)
+        # Read the file in a background thread. Dataspaces are shown as soon as the header is read
+        # and their datasets are filled in as they arrive, selected dataspace first
+        self.restore_filepath = filepath
+        self.restore_header = None
+        self.restore_loaded_count = 0
+        self.restore_worker = SessionRestoreWorker(filepath, self)
+        self.restore_worker.headerLoaded.connect(self.on_restore_header_loaded)
+        self.restore_worker.dataspaceLoaded.connect(self.on_restore_dataspace_loaded)
+        self.restore_worker.restoreFailed.connect(self.on_restore_failed)
+        self.restore_worker.finished.connect(self.on_restore_finished)
+
+        self.progressBar_restore.setRange(0, 0) # Busy until the header is read
+        self.progressBar_restore.show()
+        self.pushButton_restore_cancel.show()
+        self.restore_worker.start()
+
+    def on_restore_header_loaded(self, header: dict):
+        if self.restore_worker == None or self.restore_worker.isInterruptionRequested():
+            return
+        with instrumentation.span("io.restore"), self.plot.hold_redraw(), self.plot.data_handler.batch_update():
+            self.restore_program_state(header)
+        self.restore_header = header
+        self.progressBar_restore.setRange(0, len(header["dataspace_order"]))
+        self.progressBar_restore.setValue(0)
+
+    def on_restore_dataspace_loaded(self, space_id, datasets: dict):
+        if self.restore_worker == None or self.restore_worker.isInterruptionRequested():
+            return
+        self.restore_loaded_count += 1
+        self.progressBar_restore.setValue(self.restore_loaded_count)
 
-            space_widget_id = data["window"]["space_widget_id"]
-            set_widget_id = data["window"]["set_widget_id"]
-
-            self.plot.show_debug_info = data["plot"]["show_debug_info"]
-            self.plot.show_legend = data["plot"]["show_legend"]
-            self.plot.show_equation = data["plot"]["show_equation"]
-            selected_space_id = data["plot"]["selected_space_id"]
-            active_spaces_ids = data["plot"]["active_spaces_ids"]
-            dataspaces: dict = data["plot"]["dataspaces"]
-            self.plot.data_handler.color_index = data["plot"]["color_index"]
-
-            # Reconstruct data and gui
-            for space_id, dataspace in dataspaces.items():
-                space_name = dataspace["name"]
-                space_notes = dataspace["notes"]
-                if space_id in active_spaces_ids:
-                    space_toggled_on = True
-                else:
-                    space_toggled_on = False
-
-                self.add_dataspace_widget(
-                    space_id=space_id, 
-                    space_name=space_name, 
-                    space_notes=space_notes, 
-                    initialize_dataset=False, 
-                    space_toggled_on=space_toggled_on
-                )
-                self.plot.data_handler.selected_space_id = space_id
-
-                datasets: dict = dataspace["datasets"]
-                for set_id, dataset in datasets.items():
-                    set_name = dataset["name"]
-                    times = dataset["times"]
-                    currents = dataset["currents"]
-                    concentration = dataset["concentration"]
-                    notes = dataset["notes"]
-                    hidden = dataset["hidden"]
-                    color = dataset["line_color"]
-
-                    _ = self.add_dataset_widget(
-                        name=set_name, 
-                        concentration=concentration, 
-                        notes=notes, 
-                        set_id=set_id, 
-                        space_id=space_id, 
-                        dataset_hidden=hidden
-                    )
-                    self.plot.data_handler.add_dataset(
-                        set_id=set_id, 
-                        set_name=set_name, 
-                        space_name=space_name,
-                        space_notes=space_notes,
-                        times=times, 
-                        currents=currents, 
-                        concentration=concentration, 
-                        notes=notes, 
-                        space_id=space_id, 
-                        hidden=hidden, 
-                        color=color
-                    )
-
-            self.space_widget_id = space_widget_id
-            self.set_widget_id = set_widget_id
-
-            self.lineEdit_convert_current.setText(data["window"]["current_convert_value"])
-            self.actionDebug_Info.setChecked(self.plot.show_debug_info)
-            self.actionLegend.setChecked(self.plot.show_legend)
-            self.actionEquation.setChecked(self.plot.show_equation)
-
-            self.switch_dataspace(selected_space_id)
-            self.set_active_dataspaces()
+        # Dataspace may have been removed while loading
+        if space_id not in self.widgets:
+            return
 
-            self.set_current_unit(data["plot"]["unit_current"])
-            self.set_concentration_unit(data["plot"]["unit_concentration"])
-            
-            self.plot.span_initialized = data["plot"]["span_initialized"]  
-            self.plot.span.extents = data["plot"]["span_extents"]
-            self.plot.draw_plot()         
+        with instrumentation.span("io.restore"):
+            batch = [dict(dataset, set_id=set_id) for set_id, dataset in datasets.items()]
+            data_handler = self.plot.data_handler
+            dataspace = data_handler.dataspaces[space_id]
+            data_handler.add_datasets_batch(batch, dataspace["name"], dataspace["notes"], space_id)
 
-            print("File loaded from:", filepath)
-        except Exception as e:
-            print(f"An error occurred while loading: {e}")
-            traceback.print_exc()
+        # Only datasets of the selected and active dataspaces are drawn
+        if space_id == data_handler.selected_space_id or space_id in data_handler.active_spaces_ids:
+            with self.plot.hold_redraw(defer=True):
+                self.plot.draw_plot()
+            if space_id == data_handler.selected_space_id:
+                self.find_concentration_from_current(self.lineEdit_convert_current.text())
+
+    def on_restore_failed(self, error: str):
+        print(f"An error occurred while loading: {error}")
+        QMessageBox.warning(self, "Load", f"Loading {self.restore_filepath} failed:\n{error}")
+
+    def cancel_restore(self):
+        if self.restore_worker:
+            self.restore_worker.requestInterruption()
+
+    def on_restore_finished(self):
+        worker = self.restore_worker
+        header = self.restore_header
+        self.restore_worker = None
+        self.progressBar_restore.hide()
+        self.pushButton_restore_cancel.hide()
+        worker.deleteLater()
+        if header == None:
+            return
+
+        if worker.isInterruptionRequested():
+            # Remove dataspaces whose datasets never arrived
+            loaded_count = self.restore_loaded_count
+            for space_id in header["dataspace_order"][loaded_count:]:
+                if space_id in self.widgets:
+                    self.remove_dataspace_widget(space_id)
+            message = f"Loading cancelled, {loaded_count}/{len(header['dataspace_order'])} sets loaded"
+            # The next autosave would replace the complete autosave with the partial session
+            if os.path.basename(self.restore_filepath) == "autosave.pickle" and not self.confirm_partial_autosave(message):
+                self.autosave_paused = True
+                message += ". Autosave is paused until a session is loaded completely, autosave.pickle keeps the full session"
+            # No timeout, so it stays until the next message
+            self.statusbar.showMessage(message)
+        else:
+            self.autosave_paused = False
+            print("File loaded from:", self.restore_filepath)
+
+    def confirm_partial_autosave(self, message: str):
+        reply = QMessageBox.question(self, "Autosave",
+            f"{message}.\n\nKeep autosaving? The next autosave replaces autosave.pickle, which has the full session, with the sets loaded now.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+        return reply == QMessageBox.StandardButton.Yes
+
+    def restore_program_state(self, header: dict):
+        # Restores everything but the datasets, which are added by on_restore_dataspace_loaded
+        # Delete currents widgets  
+        space_ids = list(self.widgets.keys())
+        if space_ids:
+            for space_id in space_ids:
+                self.remove_dataspace_widget(space_id)
+
+        self.plot.set_debug_info(header["plot"]["show_debug_info"])
+        self.plot.show_legend = header["plot"]["show_legend"]
+        self.plot.show_equation = header["plot"]["show_equation"]
+        self.plot.weighted_fit = header["plot"].get("weighted_fit", False)
+        self.plot.show_replicate_means = header["plot"].get("show_replicate_means", False)
+        self.plot.calibration_statistic = header["plot"].get("calibration_statistic", "mean")
+        selected_space_id = header["plot"]["selected_space_id"]
+        active_spaces_ids = header["plot"]["active_spaces_ids"]
+        dataspaces: dict = header["plot"]["dataspaces"]
+
+        # Reconstruct dataspaces and gui
+        for space_id, dataspace in dataspaces.items():
+            space_name = dataspace["name"]
+            space_notes = dataspace["notes"]
+            if space_id in active_spaces_ids:
+                space_toggled_on = True
+            else:
+                space_toggled_on = False
+
+            self.add_dataspace_widget(
+                space_id=space_id, 
+                space_name=space_name, 
+                space_notes=space_notes, 
+                initialize_dataset=False, 
+                space_toggled_on=space_toggled_on
+            )
+            self.plot.data_handler.create_dataspace(space_id, space_name, space_notes, dataspace)
+
+        # Ids continue from the saved ones so datasets created while loading do not collide
+        self.plot.data_handler.color_index = header["plot"]["color_index"]
+        self.space_widget_id = header["window"]["space_widget_id"]
+        self.set_widget_id = header["window"]["set_widget_id"]
+
+        self.lineEdit_convert_current.setText(header["window"]["current_convert_value"])
+        self.import_options = header["window"].get("import_options", DEFAULT_INGEST_OPTIONS)
+        self.set_curve_index_directory(header["window"].get("curve_index_directory", MainWindow.curve_index_directory))
+        self.actionDebug_Info.setChecked(self.plot.show_debug_info)
+        self.actionLegend.setChecked(self.plot.show_legend)
+        self.actionEquation.setChecked(self.plot.show_equation)
+        self.actionWeighted_Fit.setChecked(self.plot.weighted_fit)
+        self.actionReplicate_Means.setChecked(self.plot.show_replicate_means)
+
+        self.switch_dataspace(selected_space_id)
+        self.set_active_dataspaces()
+
+        self.set_current_unit(header["plot"]["unit_current"])
+        self.set_concentration_unit(header["plot"]["unit_concentration"])
+        
+        self.plot.span_initialized = header["plot"]["span_initialized"]  
+        self.plot.span.extents = header["plot"]["span_extents"]
+        self.plot.data_handler.time_range = self.plot.span.extents
+        self.plot.draw_plot()         
 
     def on_dataspace_add_clicked(self):
         self.add_dataspace_widget(initialize_dataset=True)
@@ -361,36 +749,33 @@ class MainWindow(QMainWindow):
             self.lineEdit_convert_concentration.setText("")
             return
         
-        datasets = self.plot.data_handler.get_datasets()
+        data_handler = self.plot.data_handler
+        space_id = data_handler.selected_space_id
+        datasets = data_handler.get_datasets(space_id)
         if datasets == None:
             self.lineEdit_convert_concentration.setText("Out Of Range")
             return
         
+        # The same line as the plotted trendline and Quantify Samples: preprocessed currents, the window statistic and weights of the dataspace
         try:
-            result = self.plot.data_handler.calculate_results(datasets)
-            if len(result) < 2:
+            if self.plot.calibration_statistic == "mean":
+                results = data_handler.calculate_results(datasets, space_id)
+            else:
+                results = data_handler.calculate_fit_results(datasets, space_id, self.plot.calibration_statistic)
+            calibration = quantification.get_calibration(results, self.plot.weighted_fit)
+            if calibration == None:
                 self.lineEdit_convert_concentration.setText("Out Of Range")
                 return
-            
-            concentrations, calculated_currents = zip(*result)
-            avg_currents, _ = zip(*calculated_currents) 
-            _, _, _, trendline = self.plot.data_handler.calculate_trendline(concentrations, avg_currents)   
+            prediction = quantification.predict_concentrations([current], calibration)
         except Exception as e:
             print(e)
             traceback.print_exc()
             return
 
-        # Reverse the arrays if average currents are decreasing
-        if avg_currents[0] > avg_currents[-1]:
-            trendline = trendline[::-1]
-            concentrations = concentrations[::-1]
-
-        # Interpolate to find concentration corresponding to current
-        concentration = np.interp(current, trendline, concentrations)
-        if current < min(trendline) or current > max(trendline):
+        if prediction["out_of_range"][0]:
             concentration_text = "Out Of Range"
         else:
-            concentration_text = str(round(concentration, 5))
+            concentration_text = str(round(float(prediction["concentrations"][0]), 5))
 
         # Update widget
         self.lineEdit_convert_concentration.setText(concentration_text)
@@ -427,20 +812,18 @@ class MainWindow(QMainWindow):
             "dataspace_widgets": {
                 "checkbox_toggle": checkbox_toggle_space,
                 "button_space": button_space
-            },
-            "dataset_widgets": {}
+            }
         }
 
         if initialize_dataset:   
-            self.switch_dataspace(space_id)
-            set_id = self.add_dataset_widget()
-            _, set_name, concentration, notes = self.get_widgets_text(set_id)
+            self.plot.data_handler.selected_space_id = space_id
+            set_id = self.create_dataset_id()
             times = np.arange(0, 100.1, 0.1)
             currents = np.linspace(-15, -5, len(times))
+            self.plot.data_handler.add_dataset(set_id, f"Data {set_id}", space_name, space_notes, times, currents, 0, "", space_id=space_id)
+            self.switch_dataspace(space_id)
             self.set_active_dataspaces()
-            self.plot.data_handler.add_dataset(set_id, set_name, space_name, space_notes, times, currents, concentration, notes, space_id=space_id)
             self.plainTextEdit_space_notes.setPlainText(space_notes)
-            self.plot.draw_plot()
 
         return space_id
 
@@ -455,12 +838,6 @@ class MainWindow(QMainWindow):
         for widget in dataspace_widgets.values():
             widget.deleteLater()
 
-        # Delete all dataset widgets within current dataspace
-        dataset_widgets: dict = self.widgets[space_id]["dataset_widgets"]
-        for dataset_widget in dataset_widgets.values():
-            for widget in dataset_widget.values():
-                widget.deleteLater()
-
         # Remove dictionary entry
         self.widgets.pop(space_id)
         # Delete all data within current dataspace
@@ -470,6 +847,8 @@ class MainWindow(QMainWindow):
         if len(self.widgets) > 0:
             first_id = list(self.widgets.keys())[0]
             self.switch_dataspace(first_id)     
+        else:
+            self.dataset_model.set_dataspace(None)
 
     def rename_dataspace_widget(self):
         space_id = self.plot.data_handler.selected_space_id
@@ -494,14 +873,8 @@ class MainWindow(QMainWindow):
         # Update current to concentration widgets
         self.find_concentration_from_current(self.lineEdit_convert_current.text())
 
-        # Show dataset widgets that are in current dataspace only
-        for widgets in self.widgets.values(): 
-            for dataset_widgets in widgets["dataset_widgets"].values():
-                for dataset_widget in dataset_widgets.values():
-                    dataset_widget.hide()  
-        for dataset_widgets in self.widgets[space_id]["dataset_widgets"].values():
-            for dataset_widget in dataset_widgets.values():
-                dataset_widget.show()
+        # Show datasets that are in current dataspace only
+        self.dataset_model.set_dataspace(space_id)
         
         # Update notes text box
         dataspaces = self.plot.data_handler.dataspaces
@@ -522,123 +895,19 @@ class MainWindow(QMainWindow):
     def update_dataspace_notes(self, text):
         data_handler = self.plot.data_handler
         space_id = data_handler.selected_space_id
-        data_handler.dataspaces[space_id]["notes"] = text
+        data_handler.set_dataspace_notes(space_id, text)
     
-    def add_dataset_widget(self, name = None, concentration = 0, notes = "", set_id = None, space_id = None, dataset_hidden = False):
-        if set_id == None:
-            set_id = self.set_widget_id
-            self.set_widget_id += 1
-        if space_id == None: 
-            space_id = self.plot.data_handler.selected_space_id
-        
-        line_edit_name = QLineEdit(self)
-        if name == None:
-            line_edit_name.setText(f"Data {set_id}")
-        else: 
-            line_edit_name.setText(name)
-        line_edit_name.setFixedWidth(100)
-        line_edit_concentration = CustomQLineEdit(space_id, str(concentration), self)
-        line_edit_concentration.setFixedWidth(50)
-        line_edit_notes = QLineEdit(notes, self)
-
-        if dataset_hidden:
-            line_edit_name.setEnabled(False)
-            line_edit_concentration.setEnabled(False)
-            line_edit_notes.setEnabled(False)
-
-        # Update dataset on text edited
-        line_edit_name.editingFinished.connect(lambda: self.on_dataset_text_edited(set_id))
-        line_edit_concentration.textChanged.connect(lambda: self.on_dataset_text_edited(set_id))
-        line_edit_notes.editingFinished.connect(lambda: self.on_dataset_text_edited(set_id, False))
-      
-        checkbox_toggle_active = QCheckBox(self)
-        if dataset_hidden:
-            checkbox_toggle_active.setChecked(False)
-        else:
-            checkbox_toggle_active.setChecked(True)
-        checkbox_toggle_active.stateChanged.connect(lambda: self.toggle_dataset(set_id))
-
-        hbox = QHBoxLayout()
-        hbox.addWidget(checkbox_toggle_active)
-        hbox.addWidget(line_edit_name)
-        hbox.addWidget(line_edit_concentration)
-        hbox.addWidget(line_edit_notes)
-
-        # Add hbox to parent layout
-        self.layout_datasets.addLayout(hbox)
-        self.layout_datasets.setAlignment(Qt.AlignmentFlag.AlignTop)
-
-        # Store references to the widgets for later access
-        dataset_widget = {
-            "checkbox_toggle": checkbox_toggle_active,
-            "line_edit_name": line_edit_name,
-            "line_edit_concentration": line_edit_concentration,
-            "line_edit_notes": line_edit_notes
-        }
-
-        if not space_id in self.widgets:
-            space_id = self.add_dataspace_widget(initialize_dataset=False)
-        self.widgets[space_id]["dataset_widgets"][set_id] = dataset_widget
-
+    def create_dataset_id(self):
+        set_id = self.set_widget_id
+        self.set_widget_id += 1
         return set_id
 
-    def delete_dataset_widget(self, set_id: int):   
-        for widgets in self.widgets.values():
-            if set_id not in widgets["dataset_widgets"]:
-                continue
-            # Delete widgets
-            dataset_widget: dict = widgets["dataset_widgets"][set_id]
-            for widget in dataset_widget.values():
-                widget.deleteLater()
-            # Remove dictionary entry
-            widgets["dataset_widgets"].pop(set_id)          
-
-    def toggle_dataset(self, set_id: int):
-        space_id = self.plot.data_handler.selected_space_id
-        if set_id not in self.widgets[space_id]["dataset_widgets"]:
-            print(f"toggle_dataset: Dataset with ID {set_id} does not exist.")
-            return
-              
-        # Toggle widgets
-        dataset_widget: dict = self.widgets[space_id]["dataset_widgets"][set_id]
-        for key, widget in dataset_widget.items():
-            if key != "checkbox_toggle": # Do not toggle the checkbox itself
-                widget.setEnabled(not widget.isEnabled())
-
-        # Toggle dataset
-        dataset = self.plot.data_handler.dataspaces[space_id]["datasets"][set_id]
-        dataset["hidden"] = not dataset["hidden"]
+    def on_dataset_toggled(self, set_id: int):
         self.plot.draw_plot()
 
-        self.setFocus() # Prevent setting focus to next widget
-
-    def concentration_input_is_valid(self, set_id, input):
-        space_id = self.plot.data_handler.selected_space_id
-        concentration_widget = self.widgets[space_id]["dataset_widgets"][set_id]["line_edit_concentration"]
-        # Check if input is numeric
-        try:
-            float(input)    
-            concentration_widget.setStyleSheet("")
-            return True
-        except ValueError:
-            concentration_widget.setStyleSheet("background-color: rgba(140, 0, 0, 0.3)")
-            return False
-
-    def on_dataset_text_edited(self, id, update_plot = True):
-        _, name, concentration, notes = self.get_widgets_text(id)
-        if self.concentration_input_is_valid(id, concentration):
-            self.plot.data_handler.update_dataset(id, name, concentration, notes)
-            if update_plot:
-                self.plot.draw_plot()
-
-    def get_widgets_text(self, set_id):
-        space_id = self.plot.data_handler.selected_space_id
-        space_name = self.widgets[space_id]["dataspace_name"]
-        dataset_widgets = self.widgets[space_id]["dataset_widgets"][set_id]
-        set_name = dataset_widgets["line_edit_name"].text()
-        concentration = dataset_widgets["line_edit_concentration"].text()
-        notes = dataset_widgets["line_edit_notes"].text()
-        return space_name, set_name, concentration, notes
+    def on_dataset_edited(self, set_id: int, update_plot: bool):
+        if update_plot:
+            self.plot.draw_plot()
 
     def on_import_data_from_csv_clicked(self):
         dialog = QFileDialog(self)
@@ -656,26 +925,63 @@ class MainWindow(QMainWindow):
             return
         
         filepaths = dialog.selectedFiles()
-        print("Selected file:", filepaths)
+        self.import_files(sorted(filepaths))
 
+    def import_files(self, filepaths: list):
+        # Imports into the selected dataspace, asking first whether to overwrite its datasets
         data_handler = self.plot.data_handler
         space_id = data_handler.selected_space_id
         if space_id not in data_handler.dataspaces:
             self.add_dataspace_widget(space_id=space_id, initialize_dataset=False)
+            self.handle_pssession_pst_data(filepaths)
         else: 
             if len(data_handler.dataspaces[space_id]["datasets"]) > 0:
                 ret = self.msg_box_overwrite(space_id)
                 if ret == 1:
-                    self.handle_pssession_pst_data(sorted(filepaths))
+                    self.handle_pssession_pst_data(filepaths)
             else:
-                self.handle_pssession_pst_data(sorted(filepaths))
+                self.handle_pssession_pst_data(filepaths)
+
+    def get_session_catalog(self):
+        # Opened on first use
+        if self.session_catalog == None:
+            self.session_catalog = sc.SessionCatalog()
+        return self.session_catalog
+
+    def on_session_catalog_clicked(self):
+        dialog = SessionCatalogDialog(self)
+        dialog.exec()
+
+    def on_import_options_clicked(self):
+        dialog = ImportOptionsDialog(self.import_options, self)
+        if dialog.exec() == ImportOptionsDialog.DialogCode.Accepted:
+            self.import_options = dialog.get_options()
 
+    @instrumentation.instrument("import.files")
     def handle_pssession_pst_data(self, filepaths):
+        space_id = self.plot.data_handler.selected_space_id
+        if not space_id in self.widgets:
+            space_id = self.add_dataspace_widget(initialize_dataset=False)
+            self.plot.data_handler.selected_space_id = space_id
+        dataspace_name = self.widgets[space_id]["dataspace_name"]
+
+        # Every measurement of a file becomes its own dataset
+        batch = []
         for filepath in filepaths:
-            times, currents, set_name = do.extract_pssession_pst_data_from_file(filepath)
-            set_id = self.add_dataset_widget(set_name)
-            dataspace_name, _, concentration, notes = self.get_widgets_text(set_id)
-            self.plot.data_handler.add_dataset(set_id, set_name, dataspace_name, "", times, currents, concentration, notes)
+            for measurement in do.extract_measurements_from_file(filepath):
+                times, currents, ingest = apply_ingest_options(measurement["arrays"]["time"], measurement["arrays"]["currents"], self.import_options)
+                batch.append({
+                    "set_id": self.create_dataset_id(),
+                    "name": measurement["name"],
+                    "times": times,
+                    "currents": currents,
+                    "metadata": {**measurement["metadata"], "ingest": ingest}
+                })
+        self.add_datasets(batch, dataspace_name, "", space_id)
+
+    def add_datasets(self, datasets: list[dict], space_name: str, space_notes: str, space_id: int):
+        # Insert datasets in one batch so the table resets and the plot redraws only once
+        self.plot.data_handler.add_datasets_batch(datasets, space_name, space_notes, space_id)
         self.plot.draw_plot()
 
     def msg_box_overwrite(self, space_id):
@@ -691,15 +997,8 @@ class MainWindow(QMainWindow):
                 # Cancel action
                 return 0
             elif ret == QMessageBox.StandardButton.Yes:
-                # Delete widgets
-                set_ids = list(self.widgets[space_id]["dataset_widgets"].keys())
-                for set_id in set_ids:
-                    self.delete_dataset_widget(set_id)
-                    
                 # Delete all datasets within current dataspace
-                data_handler = self.plot.data_handler
-                space_id = data_handler.selected_space_id
-                data_handler.dataspaces[space_id]["datasets"] = {}
+                self.plot.data_handler.clear_datasets(space_id)
                 return 1
             elif ret == QMessageBox.StandardButton.No:
                 return 1
@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import gui.data_operations as do
+
+# Catalog of the measurement files in raw data folders, for browsing without parsing them.
+# Scans are incremental: files whose modification time and size did not change are not read again.
+
+DEFAULT_PATH = os.path.join(os.getcwd(), "session_catalog.sqlite")
+
+EXTENSIONS = (".pssession", ".pst")
+# Scans with more new or changed files than this read them in worker processes
+PARALLEL_MIN_FILES = 64
+
+COLUMNS = ("path", "set_name", "channel", "measurements", "samples", "duration", "timestamp", "method", "title", "folder", "size", "mtime")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    folder TEXT NOT NULL,
+    set_name TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    measurements INTEGER,
+    samples INTEGER,
+    duration REAL,
+    timestamp REAL,
+    method TEXT,
+    title TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files(folder);
+CREATE INDEX IF NOT EXISTS files_set_name ON files(set_name);
+CREATE INDEX IF NOT EXISTS files_channel ON files(channel);
+CREATE INDEX IF NOT EXISTS files_timestamp ON files(timestamp);
+CREATE INDEX IF NOT EXISTS files_method ON files(method);
+"""
+
+def iter_measurement_files(root: str):
+    # Yields (path, mtime, size) of every measurement file under root. scandir gets the types without extra system calls
+    folders = [root]
+    while folders:
+        folder = folders.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.name.endswith(EXTENSIONS):
+                        stat = entry.stat()
+                        yield entry.path, stat.st_mtime, stat.st_size
+        except OSError as e:
+            print(f"iter_measurement_files: {e}")
+
+def summarize_file(filepath):
+    # Run in worker processes. Unreadable files are cataloged with the error so they are not read on every scan
+    try:
+        return do.extract_file_summary(filepath), None
+    except Exception as e:
+        return None, str(e)
+
+class SessionCatalog():
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        # One connection shared by all threads, serialized by the lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def scan(self, root: str, workers: int = None, progress=None):
+        '''
+        Adds new and changed files under root to the catalog and removes the ones that no longer exist.
+        progress(done, total) is called as changed files are read. Returns the counts {"files", "changed", "removed"}.
+        '''
+        root = os.path.abspath(root)
+        with self.lock:
+            # Paths under root, the trailing separator keeps /data/a from matching /data/ab
+            prefix = os.path.join(root, "")
+            known = {
+                path: (mtime, size) for path, mtime, size in self.connection.execute(
+                    "SELECT path, mtime, size FROM files WHERE path = ? OR substr(path, 1, ?) = ?", (root, len(prefix), prefix)
+                )
+            }
+        found = {}
+        changed = []
+        for path, mtime, size in iter_measurement_files(root):
+            found[path] = (mtime, size)
+            if known.get(path) != (mtime, size):
+                changed.append(path)
+        removed = [path for path in known if path not in found]
+
+        if workers == None:
+            workers = os.cpu_count() or 1
+        if len(changed) >= PARALLEL_MIN_FILES and workers > 1:
+            # Spawned rather than forked, forking the GUI process while its other threads hold locks can copy the held locks into the children
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                chunk_size = max(1, len(changed) // (workers * 4))
+                summaries = []
+                for result in pool.map(summarize_file, changed, chunksize=chunk_size):
+                    summaries.append(result)
+                    if progress != None:
+                        progress(len(summaries), len(changed))
+        else:
+            summaries = []
+            for path in changed:
+                summaries.append(summarize_file(path))
+                if progress != None:
+                    progress(len(summaries), len(changed))
+
+        rows = []
+        for path, (summary, error) in zip(changed, summaries):
+            mtime, size = found[path]
+            summary = summary or {"set_name": do.get_set_name(path), "channel": do.get_channel(path)}
+            rows.append((
+                path, os.path.dirname(path), summary["set_name"], summary["channel"], summary.get("measurements"), summary.get("samples"),
+                summary.get("duration"), summary.get("timestamp"), summary.get("method"), summary.get("title"), size, mtime, error
+            ))
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO files (path, folder, set_name, channel, measurements, samples, duration, timestamp, method, title, size, mtime, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET folder = excluded.folder, set_name = excluded.set_name, "
+                "channel = excluded.channel, measurements = excluded.measurements, samples = excluded.samples, duration = excluded.duration, "
+                "timestamp = excluded.timestamp, method = excluded.method, title = excluded.title, size = excluded.size, mtime = excluded.mtime, "
+                "error = excluded.error",
+                rows
+            )
+            self.connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+        return {"files": len(found), "changed": len(changed), "removed": len(removed)}
+
+    def get_distinct(self, column: str):
+        # Distinct channels or methods for the filters, straight from the index
+        if column not in ("channel", "method", "folder"):
+            raise ValueError(f"Unknown column: {column}")
+        with self.lock:
+            return [row[0] for row in self.connection.execute(f"SELECT DISTINCT {column} FROM files WHERE {column} IS NOT NULL ORDER BY {column}")]
+
+    def search(self, text: str = "", channel: str = None, method: str = None, since: float = None, until: float = None, limit: int = None):
+        '''
+        Cataloged files, newest first, as tuples in the order of COLUMNS.
+        text matches any part of the path, set name or title, case insensitive. Other filters are exact, None means any.
+        '''
+        conditions = []
+        params = []
+        if text:
+            conditions.append("(path LIKE ? ESCAPE '\\' OR set_name LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\')")
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params += [pattern] * 3
+        if channel != None:
+            conditions.append("channel = ?")
+            params.append(channel)
+        if method != None:
+            conditions.append("method = ?")
+            params.append(method)
+        if since != None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until != None:
+            conditions.append("timestamp <= ?")
+            params.append(until)
+        query = f"SELECT {', '.join(COLUMNS)} FROM files"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY timestamp DESC, path"
+        if limit != None:
+            query += f" LIMIT {int(limit)}"
+        with self.lock:
+            return self.connection.execute(query, params).fetchall()
+
+    def get_count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
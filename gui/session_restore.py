@@ -0,0 +1,27 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import gui.data_operations as do
+
+class SessionRestoreWorker(QThread):
+    # Reads a save file off the GUI thread.
+    # The header with all dataspace metadata is emitted first, then the datasets of each dataspace in load order.
+
+    headerLoaded = pyqtSignal(object)
+    # space_id, datasets
+    dataspaceLoaded = pyqtSignal(object, object)
+    restoreFailed = pyqtSignal(str)
+
+    def __init__(self, filepath, parent=None):
+        super().__init__(parent)
+        self.filepath = filepath
+
+    def run(self):
+        try:
+            items = do.iter_program_state_file(self.filepath)
+            header = next(items)
+            self.headerLoaded.emit(header)
+            for space_id, datasets in items:
+                if self.isInterruptionRequested():
+                    return
+                self.dataspaceLoaded.emit(space_id, datasets)
+        except Exception as e:
+            self.restoreFailed.emit(f"{type(e).__name__}: {e}")
@@ -0,0 +1,81 @@
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from plotting.dataset_statistics import DESCRIPTORS
+
+class StatisticsTableModel(QAbstractTableModel):
+    # Table model over the summary descriptors of the datasets of one dataspace.
+    # Rows are dicts with "set_id", "name", "concentration", "hidden", "window_mean" and the DESCRIPTORS keys
+
+    # Column key, header
+    columns = [("hidden", "Shown"), ("name", "Name"), ("concentration", "Concentration")] + DESCRIPTORS + [("window_mean", "Window mean")]
+    numeric_keys = {"concentration", "window_mean"} | {key for key, _ in DESCRIPTORS}
+    integer_keys = {"samples", "non_monotonic", "nan_count"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.sort_column = None
+        self.sort_order = Qt.SortOrder.AscendingOrder
+
+    def set_rows(self, rows: list):
+        # Rows keep the last sort order
+        self.beginResetModel()
+        self.rows = self.get_sorted(rows) if self.sort_column != None else rows
+        self.endResetModel()
+
+    def get_set_id(self, row: int):
+        return self.rows[row]["set_id"]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.columns[section][1]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.columns[index.column()][0]
+        value = self.rows[index.row()][key]
+        if key == "hidden":
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Unchecked if value else Qt.CheckState.Checked
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if key in self.integer_keys:
+                return str(value)
+            if key in self.numeric_keys:
+                return "" if np.isnan(value) else f"{value:.6g}"
+            return str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and key in self.numeric_keys:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def get_sorted(self, rows: list):
+        # nan sorts last either way
+        key = self.columns[self.sort_column][0]
+        reverse = self.sort_order == Qt.SortOrder.DescendingOrder
+        if key in self.numeric_keys:
+            present = [row for row in rows if not np.isnan(row[key])]
+            missing = [row for row in rows if np.isnan(row[key])]
+        else:
+            present = rows
+            missing = []
+        return sorted(present, key=lambda row: row[key], reverse=reverse) + missing
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # A reset clears the selection, so it can not point at other rows afterwards
+        self.sort_column = column
+        self.sort_order = order
+        self.beginResetModel()
+        self.rows = self.get_sorted(self.rows)
+        self.endResetModel()
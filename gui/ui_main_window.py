@@ -0,0 +1,418 @@
+# Form implementation generated from reading ui file 'amp_analyzer.ui'
+#
+# Created by: PyQt6 UI code generator 6.11.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1300, 878)
+        self.centralwidget = QtWidgets.QWidget(parent=MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.gridLayout_3 = QtWidgets.QGridLayout(self.centralwidget)
+        self.gridLayout_3.setContentsMargins(12, 12, 12, 0)
+        self.gridLayout_3.setObjectName("gridLayout_3")
+        self.line_3 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_3.setFrameShape(QtWidgets.QFrame.Shape.HLine)
+        self.line_3.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_3.setObjectName("line_3")
+        self.gridLayout_3.addWidget(self.line_3, 2, 0, 1, 3)
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_3.setSpacing(2)
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.horizontalLayout_dataspace_buttons = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_dataspace_buttons.setSizeConstraint(QtWidgets.QLayout.SizeConstraint.SetFixedSize)
+        self.horizontalLayout_dataspace_buttons.setSpacing(2)
+        self.horizontalLayout_dataspace_buttons.setObjectName("horizontalLayout_dataspace_buttons")
+        self.pushButton_dataspace_add = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_dataspace_add.sizePolicy().hasHeightForWidth())
+        self.pushButton_dataspace_add.setSizePolicy(sizePolicy)
+        self.pushButton_dataspace_add.setMinimumSize(QtCore.QSize(0, 30))
+        self.pushButton_dataspace_add.setMaximumSize(QtCore.QSize(200, 40))
+        self.pushButton_dataspace_add.setObjectName("pushButton_dataspace_add")
+        self.horizontalLayout_dataspace_buttons.addWidget(self.pushButton_dataspace_add)
+        self.pushButton_dataspace_remove = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_dataspace_remove.sizePolicy().hasHeightForWidth())
+        self.pushButton_dataspace_remove.setSizePolicy(sizePolicy)
+        self.pushButton_dataspace_remove.setMinimumSize(QtCore.QSize(0, 30))
+        self.pushButton_dataspace_remove.setMaximumSize(QtCore.QSize(200, 40))
+        self.pushButton_dataspace_remove.setCheckable(False)
+        self.pushButton_dataspace_remove.setObjectName("pushButton_dataspace_remove")
+        self.horizontalLayout_dataspace_buttons.addWidget(self.pushButton_dataspace_remove)
+        self.pushButton_dataspace_rename = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_dataspace_rename.sizePolicy().hasHeightForWidth())
+        self.pushButton_dataspace_rename.setSizePolicy(sizePolicy)
+        self.pushButton_dataspace_rename.setMinimumSize(QtCore.QSize(0, 30))
+        self.pushButton_dataspace_rename.setMaximumSize(QtCore.QSize(200, 40))
+        self.pushButton_dataspace_rename.setCheckable(False)
+        self.pushButton_dataspace_rename.setDefault(False)
+        self.pushButton_dataspace_rename.setFlat(False)
+        self.pushButton_dataspace_rename.setObjectName("pushButton_dataspace_rename")
+        self.horizontalLayout_dataspace_buttons.addWidget(self.pushButton_dataspace_rename)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_dataspace_buttons)
+        self.scrollArea_dataspaces = QtWidgets.QScrollArea(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.scrollArea_dataspaces.sizePolicy().hasHeightForWidth())
+        self.scrollArea_dataspaces.setSizePolicy(sizePolicy)
+        self.scrollArea_dataspaces.setMinimumSize(QtCore.QSize(0, 150))
+        self.scrollArea_dataspaces.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        self.scrollArea_dataspaces.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.scrollArea_dataspaces.setWidgetResizable(True)
+        self.scrollArea_dataspaces.setObjectName("scrollArea_dataspaces")
+        self.scrollAreaWidgetContents_dataspaces = QtWidgets.QWidget()
+        self.scrollAreaWidgetContents_dataspaces.setGeometry(QtCore.QRect(0, 0, 212, 148))
+        self.scrollAreaWidgetContents_dataspaces.setObjectName("scrollAreaWidgetContents_dataspaces")
+        self.scrollArea_dataspaces.setWidget(self.scrollAreaWidgetContents_dataspaces)
+        self.verticalLayout_3.addWidget(self.scrollArea_dataspaces)
+        self.gridLayout_3.addLayout(self.verticalLayout_3, 0, 0, 2, 1)
+        self.line = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line.setFrameShape(QtWidgets.QFrame.Shape.VLine)
+        self.line.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line.setObjectName("line")
+        self.gridLayout_3.addWidget(self.line, 0, 1, 2, 1)
+        self.horizontalLayout_toolbox = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_toolbox.setObjectName("horizontalLayout_toolbox")
+        spacerItem = QtWidgets.QSpacerItem(40, 10, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_toolbox.addItem(spacerItem)
+        self.gridLayout_3.addLayout(self.horizontalLayout_toolbox, 0, 3, 1, 1)
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.gridLayout = QtWidgets.QGridLayout()
+        self.gridLayout.setSizeConstraint(QtWidgets.QLayout.SizeConstraint.SetDefaultConstraint)
+        self.gridLayout.setContentsMargins(-1, 0, -1, -1)
+        self.gridLayout.setHorizontalSpacing(6)
+        self.gridLayout.setVerticalSpacing(2)
+        self.gridLayout.setObjectName("gridLayout")
+        self.pushButton_micromol = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_micromol.sizePolicy().hasHeightForWidth())
+        self.pushButton_micromol.setSizePolicy(sizePolicy)
+        self.pushButton_micromol.setMinimumSize(QtCore.QSize(0, 0))
+        self.pushButton_micromol.setMaximumSize(QtCore.QSize(50, 60))
+        self.pushButton_micromol.setObjectName("pushButton_micromol")
+        self.gridLayout.addWidget(self.pushButton_micromol, 1, 1, 1, 1)
+        self.pushButton_nanoA = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_nanoA.sizePolicy().hasHeightForWidth())
+        self.pushButton_nanoA.setSizePolicy(sizePolicy)
+        self.pushButton_nanoA.setMinimumSize(QtCore.QSize(0, 0))
+        self.pushButton_nanoA.setMaximumSize(QtCore.QSize(50, 60))
+        self.pushButton_nanoA.setObjectName("pushButton_nanoA")
+        self.gridLayout.addWidget(self.pushButton_nanoA, 0, 2, 1, 1)
+        self.pushButton_microA = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_microA.sizePolicy().hasHeightForWidth())
+        self.pushButton_microA.setSizePolicy(sizePolicy)
+        self.pushButton_microA.setMinimumSize(QtCore.QSize(0, 0))
+        self.pushButton_microA.setMaximumSize(QtCore.QSize(50, 60))
+        self.pushButton_microA.setObjectName("pushButton_microA")
+        self.gridLayout.addWidget(self.pushButton_microA, 0, 1, 1, 1)
+        self.pushButton_milliA = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_milliA.sizePolicy().hasHeightForWidth())
+        self.pushButton_milliA.setSizePolicy(sizePolicy)
+        self.pushButton_milliA.setMinimumSize(QtCore.QSize(0, 0))
+        self.pushButton_milliA.setMaximumSize(QtCore.QSize(50, 60))
+        self.pushButton_milliA.setObjectName("pushButton_milliA")
+        self.gridLayout.addWidget(self.pushButton_milliA, 0, 0, 1, 1)
+        self.pushButton_nanomol = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_nanomol.sizePolicy().hasHeightForWidth())
+        self.pushButton_nanomol.setSizePolicy(sizePolicy)
+        self.pushButton_nanomol.setMinimumSize(QtCore.QSize(0, 0))
+        self.pushButton_nanomol.setMaximumSize(QtCore.QSize(50, 60))
+        self.pushButton_nanomol.setObjectName("pushButton_nanomol")
+        self.gridLayout.addWidget(self.pushButton_nanomol, 1, 2, 1, 1)
+        self.pushButton_millimol = QtWidgets.QPushButton(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.pushButton_millimol.sizePolicy().hasHeightForWidth())
+        self.pushButton_millimol.setSizePolicy(sizePolicy)
+        self.pushButton_millimol.setMinimumSize(QtCore.QSize(0, 0))
+        self.pushButton_millimol.setMaximumSize(QtCore.QSize(50, 60))
+        self.pushButton_millimol.setObjectName("pushButton_millimol")
+        self.gridLayout.addWidget(self.pushButton_millimol, 1, 0, 1, 1)
+        self.verticalLayout_2.addLayout(self.gridLayout)
+        spacerItem1 = QtWidgets.QSpacerItem(20, 30, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Fixed)
+        self.verticalLayout_2.addItem(spacerItem1)
+        self.line_2 = QtWidgets.QFrame(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.line_2.sizePolicy().hasHeightForWidth())
+        self.line_2.setSizePolicy(sizePolicy)
+        self.line_2.setMinimumSize(QtCore.QSize(165, 0))
+        self.line_2.setFrameShape(QtWidgets.QFrame.Shape.HLine)
+        self.line_2.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_2.setObjectName("line_2")
+        self.verticalLayout_2.addWidget(self.line_2)
+        spacerItem2 = QtWidgets.QSpacerItem(20, 20, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Fixed)
+        self.verticalLayout_2.addItem(spacerItem2)
+        self.gridLayout_2 = QtWidgets.QGridLayout()
+        self.gridLayout_2.setObjectName("gridLayout_2")
+        self.label_2 = QtWidgets.QLabel(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_2.sizePolicy().hasHeightForWidth())
+        self.label_2.setSizePolicy(sizePolicy)
+        self.label_2.setMaximumSize(QtCore.QSize(100, 60))
+        self.label_2.setObjectName("label_2")
+        self.gridLayout_2.addWidget(self.label_2, 1, 0, 1, 1)
+        self.label = QtWidgets.QLabel(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label.sizePolicy().hasHeightForWidth())
+        self.label.setSizePolicy(sizePolicy)
+        self.label.setMaximumSize(QtCore.QSize(100, 60))
+        self.label.setObjectName("label")
+        self.gridLayout_2.addWidget(self.label, 0, 0, 1, 1)
+        self.lineEdit_convert_concentration = QtWidgets.QLineEdit(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lineEdit_convert_concentration.sizePolicy().hasHeightForWidth())
+        self.lineEdit_convert_concentration.setSizePolicy(sizePolicy)
+        self.lineEdit_convert_concentration.setMaximumSize(QtCore.QSize(80, 60))
+        self.lineEdit_convert_concentration.setReadOnly(True)
+        self.lineEdit_convert_concentration.setObjectName("lineEdit_convert_concentration")
+        self.gridLayout_2.addWidget(self.lineEdit_convert_concentration, 1, 1, 1, 1)
+        self.lineEdit_convert_current = QtWidgets.QLineEdit(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lineEdit_convert_current.sizePolicy().hasHeightForWidth())
+        self.lineEdit_convert_current.setSizePolicy(sizePolicy)
+        self.lineEdit_convert_current.setMaximumSize(QtCore.QSize(80, 60))
+        self.lineEdit_convert_current.setObjectName("lineEdit_convert_current")
+        self.gridLayout_2.addWidget(self.lineEdit_convert_current, 0, 1, 1, 1)
+        self.verticalLayout_2.addLayout(self.gridLayout_2)
+        self.gridLayout_3.addLayout(self.verticalLayout_2, 0, 2, 2, 1)
+        self.plotWidget = QtWidgets.QWidget(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.plotWidget.sizePolicy().hasHeightForWidth())
+        self.plotWidget.setSizePolicy(sizePolicy)
+        self.plotWidget.setMinimumSize(QtCore.QSize(750, 500))
+        self.plotWidget.setAutoFillBackground(False)
+        self.plotWidget.setStyleSheet("border: 1px solid grey;")
+        self.plotWidget.setObjectName("plotWidget")
+        self.gridLayout_3.addWidget(self.plotWidget, 1, 3, 6, 1)
+        self.plainTextEdit_space_notes = QtWidgets.QPlainTextEdit(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.plainTextEdit_space_notes.sizePolicy().hasHeightForWidth())
+        self.plainTextEdit_space_notes.setSizePolicy(sizePolicy)
+        self.plainTextEdit_space_notes.setMaximumSize(QtCore.QSize(16777215, 120))
+        self.plainTextEdit_space_notes.setObjectName("plainTextEdit_space_notes")
+        self.gridLayout_3.addWidget(self.plainTextEdit_space_notes, 6, 0, 1, 3)
+        self.tableView_datasets = DatasetTableView(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.tableView_datasets.sizePolicy().hasHeightForWidth())
+        self.tableView_datasets.setSizePolicy(sizePolicy)
+        self.tableView_datasets.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.tableView_datasets.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.AllEditTriggers)
+        self.tableView_datasets.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.tableView_datasets.setObjectName("tableView_datasets")
+        self.tableView_datasets.horizontalHeader().setStretchLastSection(True)
+        self.tableView_datasets.verticalHeader().setVisible(False)
+        self.gridLayout_3.addWidget(self.tableView_datasets, 4, 0, 2, 3)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(parent=MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1300, 22))
+        self.menubar.setObjectName("menubar")
+        self.menuFile = QtWidgets.QMenu(parent=self.menubar)
+        self.menuFile.setObjectName("menuFile")
+        self.menuee = QtWidgets.QMenu(parent=self.menubar)
+        self.menuee.setObjectName("menuee")
+        self.menuAnalysis = QtWidgets.QMenu(parent=self.menubar)
+        self.menuAnalysis.setObjectName("menuAnalysis")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(parent=MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+        self.actionImport_data_from_CSV = QtGui.QAction(parent=MainWindow)
+        self.actionImport_data_from_CSV.setObjectName("actionImport_data_from_CSV")
+        self.actionImport_data_from_XLSX = QtGui.QAction(parent=MainWindow)
+        self.actionImport_data_from_XLSX.setObjectName("actionImport_data_from_XLSX")
+        self.actionee = QtGui.QAction(parent=MainWindow)
+        self.actionee.setObjectName("actionee")
+        self.actionAutomatic_Import = QtGui.QAction(parent=MainWindow)
+        self.actionAutomatic_Import.setCheckable(True)
+        self.actionAutomatic_Import.setObjectName("actionAutomatic_Import")
+        self.actionImport_data_from_PSSESSION_PST = QtGui.QAction(parent=MainWindow)
+        self.actionImport_data_from_PSSESSION_PST.setObjectName("actionImport_data_from_PSSESSION_PST")
+        self.actionDebug_Info = QtGui.QAction(parent=MainWindow)
+        self.actionDebug_Info.setCheckable(True)
+        self.actionDebug_Info.setChecked(False)
+        self.actionDebug_Info.setObjectName("actionDebug_Info")
+        self.actionLegend = QtGui.QAction(parent=MainWindow)
+        self.actionLegend.setCheckable(True)
+        self.actionLegend.setChecked(True)
+        self.actionLegend.setObjectName("actionLegend")
+        self.actionEquation = QtGui.QAction(parent=MainWindow)
+        self.actionEquation.setCheckable(True)
+        self.actionEquation.setChecked(True)
+        self.actionEquation.setObjectName("actionEquation")
+        self.actionProfile_Next_Actions = QtGui.QAction(parent=MainWindow)
+        self.actionProfile_Next_Actions.setObjectName("actionProfile_Next_Actions")
+        self.actionExport_Timing_Trace = QtGui.QAction(parent=MainWindow)
+        self.actionExport_Timing_Trace.setObjectName("actionExport_Timing_Trace")
+        self.actionStall_Report = QtGui.QAction(parent=MainWindow)
+        self.actionStall_Report.setObjectName("actionStall_Report")
+        self.actionPreprocessing = QtGui.QAction(parent=MainWindow)
+        self.actionPreprocessing.setObjectName("actionPreprocessing")
+        self.actionWeighted_Fit = QtGui.QAction(parent=MainWindow)
+        self.actionWeighted_Fit.setCheckable(True)
+        self.actionWeighted_Fit.setObjectName("actionWeighted_Fit")
+        self.actionTime_Windows = QtGui.QAction(parent=MainWindow)
+        self.actionTime_Windows.setObjectName("actionTime_Windows")
+        self.actionMemory_Usage = QtGui.QAction(parent=MainWindow)
+        self.actionMemory_Usage.setObjectName("actionMemory_Usage")
+        self.actionTransient_Fit = QtGui.QAction(parent=MainWindow)
+        self.actionTransient_Fit.setObjectName("actionTransient_Fit")
+        self.actionCalibration_History = QtGui.QAction(parent=MainWindow)
+        self.actionCalibration_History.setObjectName("actionCalibration_History")
+        self.actionSimilar_Curves = QtGui.QAction(parent=MainWindow)
+        self.actionSimilar_Curves.setObjectName("actionSimilar_Curves")
+        self.actionSession_Catalog = QtGui.QAction(parent=MainWindow)
+        self.actionSession_Catalog.setObjectName("actionSession_Catalog")
+        self.actionQuantify_Samples = QtGui.QAction(parent=MainWindow)
+        self.actionQuantify_Samples.setObjectName("actionQuantify_Samples")
+        self.actionDataset_Statistics = QtGui.QAction(parent=MainWindow)
+        self.actionDataset_Statistics.setObjectName("actionDataset_Statistics")
+        self.actionReplicate_Means = QtGui.QAction(parent=MainWindow)
+        self.actionReplicate_Means.setCheckable(True)
+        self.actionReplicate_Means.setObjectName("actionReplicate_Means")
+        self.actionImport_Options = QtGui.QAction(parent=MainWindow)
+        self.actionImport_Options.setObjectName("actionImport_Options")
+        self.actionClean_Up_Saved_Data = QtGui.QAction(parent=MainWindow)
+        self.actionClean_Up_Saved_Data.setObjectName("actionClean_Up_Saved_Data")
+        self.actionExport = QtGui.QAction(parent=MainWindow)
+        self.actionExport.setObjectName("actionExport")
+        self.actionSave = QtGui.QAction(parent=MainWindow)
+        self.actionSave.setObjectName("actionSave")
+        self.actionSave_as = QtGui.QAction(parent=MainWindow)
+        self.actionSave_as.setObjectName("actionSave_as")
+        self.actionLoad = QtGui.QAction(parent=MainWindow)
+        self.actionLoad.setObjectName("actionLoad")
+        self.menuFile.addAction(self.actionImport_data_from_CSV)
+        self.menuFile.addAction(self.actionImport_data_from_XLSX)
+        self.menuFile.addAction(self.actionImport_data_from_PSSESSION_PST)
+        self.menuFile.addAction(self.actionSession_Catalog)
+        self.menuFile.addAction(self.actionImport_Options)
+        self.menuFile.addSeparator()
+        self.menuFile.addAction(self.actionSave)
+        self.menuFile.addAction(self.actionSave_as)
+        self.menuFile.addAction(self.actionLoad)
+        self.menuFile.addAction(self.actionClean_Up_Saved_Data)
+        self.menuFile.addSeparator()
+        self.menuFile.addAction(self.actionExport)
+        self.menuee.addAction(self.actionDebug_Info)
+        self.menuee.addAction(self.actionLegend)
+        self.menuee.addAction(self.actionEquation)
+        self.menuee.addAction(self.actionReplicate_Means)
+        self.menuee.addSeparator()
+        self.menuee.addAction(self.actionProfile_Next_Actions)
+        self.menuee.addAction(self.actionExport_Timing_Trace)
+        self.menuee.addAction(self.actionStall_Report)
+        self.menuee.addAction(self.actionMemory_Usage)
+        self.menuAnalysis.addAction(self.actionPreprocessing)
+        self.menuAnalysis.addAction(self.actionTime_Windows)
+        self.menuAnalysis.addAction(self.actionTransient_Fit)
+        self.menuAnalysis.addAction(self.actionCalibration_History)
+        self.menuAnalysis.addAction(self.actionSimilar_Curves)
+        self.menuAnalysis.addAction(self.actionQuantify_Samples)
+        self.menuAnalysis.addAction(self.actionDataset_Statistics)
+        self.menuAnalysis.addSeparator()
+        self.menuAnalysis.addAction(self.actionWeighted_Fit)
+        self.menubar.addAction(self.menuFile.menuAction())
+        self.menubar.addAction(self.menuee.menuAction())
+        self.menubar.addAction(self.menuAnalysis.menuAction())
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.pushButton_dataspace_add.setText(_translate("MainWindow", "Add"))
+        self.pushButton_dataspace_remove.setText(_translate("MainWindow", "Delete"))
+        self.pushButton_dataspace_rename.setText(_translate("MainWindow", "Rename"))
+        self.pushButton_micromol.setText(_translate("MainWindow", "μmol"))
+        self.pushButton_nanoA.setText(_translate("MainWindow", "nA"))
+        self.pushButton_microA.setText(_translate("MainWindow", "µA"))
+        self.pushButton_milliA.setText(_translate("MainWindow", "mA"))
+        self.pushButton_nanomol.setText(_translate("MainWindow", "nmol"))
+        self.pushButton_millimol.setText(_translate("MainWindow", "mmol"))
+        self.label_2.setText(_translate("MainWindow", "Concentration"))
+        self.label.setText(_translate("MainWindow", "Current"))
+        self.menuFile.setTitle(_translate("MainWindow", "File"))
+        self.menuee.setTitle(_translate("MainWindow", "View"))
+        self.menuAnalysis.setTitle(_translate("MainWindow", "Analysis"))
+        self.actionImport_data_from_CSV.setText(_translate("MainWindow", "Import data from CSV"))
+        self.actionImport_data_from_XLSX.setText(_translate("MainWindow", "Import data from XLSX"))
+        self.actionee.setText(_translate("MainWindow", "Layout"))
+        self.actionAutomatic_Import.setText(_translate("MainWindow", "Automatic Import"))
+        self.actionImport_data_from_PSSESSION_PST.setText(_translate("MainWindow", "Import data from PSSESSION/PST"))
+        self.actionDebug_Info.setText(_translate("MainWindow", "Debug Info"))
+        self.actionLegend.setText(_translate("MainWindow", "Legend"))
+        self.actionEquation.setText(_translate("MainWindow", "Equation"))
+        self.actionProfile_Next_Actions.setText(_translate("MainWindow", "Profile Next Actions..."))
+        self.actionExport_Timing_Trace.setText(_translate("MainWindow", "Export Timing Trace..."))
+        self.actionStall_Report.setText(_translate("MainWindow", "Stall Report..."))
+        self.actionPreprocessing.setText(_translate("MainWindow", "Preprocessing..."))
+        self.actionWeighted_Fit.setText(_translate("MainWindow", "Weighted Fit (1/σ²)"))
+        self.actionTime_Windows.setText(_translate("MainWindow", "Time Windows..."))
+        self.actionMemory_Usage.setText(_translate("MainWindow", "Memory Usage..."))
+        self.actionTransient_Fit.setText(_translate("MainWindow", "Transient Fit..."))
+        self.actionCalibration_History.setText(_translate("MainWindow", "Calibration History..."))
+        self.actionSimilar_Curves.setText(_translate("MainWindow", "Find Similar Curves..."))
+        self.actionSession_Catalog.setText(_translate("MainWindow", "Session Catalog..."))
+        self.actionQuantify_Samples.setText(_translate("MainWindow", "Quantify Samples..."))
+        self.actionDataset_Statistics.setText(_translate("MainWindow", "Dataset Statistics..."))
+        self.actionReplicate_Means.setText(_translate("MainWindow", "Replicate Means (± std)"))
+        self.actionImport_Options.setText(_translate("MainWindow", "Import Options..."))
+        self.actionClean_Up_Saved_Data.setText(_translate("MainWindow", "Clean Up Saved Data..."))
+        self.actionExport.setText(_translate("MainWindow", "Export..."))
+        self.actionSave.setText(_translate("MainWindow", "Save"))
+        self.actionSave_as.setText(_translate("MainWindow", "Save as"))
+        self.actionLoad.setText(_translate("MainWindow", "Load"))
+from gui.custom_widgets import DatasetTableView
+
+
+# Hash of the .ui file this module was compiled from
+UI_SOURCE_HASH = "e8090fc63b8483f7f467df162b372a246df6f997"
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Summary descriptors of every dataset for sorting and filtering the datasets, e.g. to find bad channels.
+# They are computed once per dataset and kept until its times or currents are replaced.
+
+# Key, header
+DESCRIPTORS = [
+    ("samples", "Samples"),
+    ("sample_rate", "Sample rate (Hz)"),
+    ("duration", "Duration (s)"),
+    ("min", "Min current"),
+    ("max", "Max current"),
+    ("mean", "Mean current"),
+    ("noise", "Noise"),
+    ("drift", "Drift (/s)"),
+    ("non_monotonic", "Non-monotonic times"),
+    ("nan_count", "NaN samples")
+]
+
+def get_summary(times, currents):
+    '''
+    Descriptors of one dataset, nan where there are too few finite samples:
+    noise is the standard deviation of the sample to sample changes divided by √2, from their median absolute deviation
+    so that steps and spikes do not dominate it. drift is the least squares slope of the currents over time.
+    non_monotonic counts times that are not larger than the previous one.
+    '''
+    times = np.asarray(times, dtype=float)
+    currents = np.asarray(currents, dtype=float)
+    finite = np.isfinite(times) & np.isfinite(currents)
+    summary = {
+        "samples": len(times),
+        "non_monotonic": int((np.diff(times) <= 0).sum()),
+        "nan_count": int(len(finite) - finite.sum())
+    }
+    times = times[finite]
+    currents = currents[finite]
+    count = len(times)
+    duration = float(times[-1] - times[0]) if count > 1 else np.nan
+    summary["duration"] = duration
+    summary["sample_rate"] = (count - 1) / duration if count > 1 and duration > 0 else np.nan
+    summary["min"] = float(currents.min()) if count > 0 else np.nan
+    summary["max"] = float(currents.max()) if count > 0 else np.nan
+    summary["mean"] = float(currents.mean()) if count > 0 else np.nan
+    if count > 2:
+        differences = np.diff(currents)
+        summary["noise"] = float(np.median(np.abs(differences - np.median(differences))) * 1.4826 / np.sqrt(2))
+    else:
+        summary["noise"] = np.nan
+    if count > 1:
+        centered_times = times - times.mean()
+        sxx = (centered_times**2).sum()
+        summary["drift"] = float((centered_times * (currents - currents.mean())).sum() / sxx) if sxx > 0 else np.nan
+    else:
+        summary["drift"] = np.nan
+    return summary
+
+def get_summaries(datasets: dict, cache: dict):
+    # Summaries by dataset id. Only datasets whose times or currents objects changed since the last call are summarized again
+    for set_id in list(cache):
+        if set_id not in datasets:
+            cache.pop(set_id)
+    for set_id, data in datasets.items():
+        cached = cache.get(set_id)
+        if cached == None or cached[0] is not data["times"] or cached[1] is not data["currents"]:
+            # Keeping the source objects makes the identity check safe
+            cache[set_id] = (data["times"], data["currents"], get_summary(data["times"], data["currents"]))
+    return {set_id: cache[set_id][2] for set_id in datasets}
@@ -0,0 +1,85 @@
+import numpy as np
+
+def decimate_block_mean(times, currents, factor: int):
+    # Replace every block of factor samples with its mean. A shorter last block is kept as its own mean
+    times = np.asarray(times, dtype=float)
+    currents = np.asarray(currents)
+    if factor <= 1 or len(times) <= factor:
+        return times, currents
+
+    full_count = len(times) // factor * factor
+    decimated_times = times[:full_count].reshape(-1, factor).mean(axis=1)
+    decimated_currents = currents[:full_count].reshape(-1, factor).mean(axis=1, dtype=float).astype(currents.dtype, copy=False)
+    if full_count < len(times):
+        decimated_times = np.append(decimated_times, times[full_count:].mean())
+        decimated_currents = np.append(decimated_currents, currents[full_count:].mean()).astype(decimated_currents.dtype, copy=False)
+    return decimated_times, decimated_currents
+
+def decimate_min_max(times, currents, factor: int):
+    # Replace every block of factor samples with its smallest and largest current in time order, so spikes stay visible.
+    # A shorter last block is kept the same way
+    times = np.asarray(times, dtype=float)
+    currents = np.asarray(currents)
+    if factor <= 2 or len(times) <= factor:
+        return times, currents
+
+    full_count = len(times) // factor * factor
+    blocks = currents[:full_count].reshape(-1, factor)
+    offsets = np.arange(0, full_count, factor)
+    kept = [blocks.argmin(axis=1) + offsets, blocks.argmax(axis=1) + offsets]
+    if full_count < len(times):
+        remainder = currents[full_count:]
+        kept.append([full_count + remainder.argmin(), full_count + remainder.argmax()])
+    # Sorted and without duplicates for blocks where both are the same sample
+    kept = np.unique(np.concatenate(kept))
+    return times[kept], currents[kept]
+
+DECIMATION_METHODS = {
+    "mean": decimate_block_mean,
+    "minmax": decimate_min_max
+}
+
+# Import options, recorded in the metadata of every imported dataset
+DEFAULT_INGEST_OPTIONS = {
+    "decimation": None, # None, "mean" or "minmax"
+    "target_rate": 10.0, # Samples per second after decimation
+    "float32": False # Store currents as float32
+}
+
+def get_sample_rate(times):
+    times = np.asarray(times, dtype=float)
+    if len(times) < 2 or times[-1] <= times[0]:
+        return None
+    return float((len(times) - 1) / (times[-1] - times[0]))
+
+def get_decimation_factor(times, target_rate: float, method: str = "mean"):
+    # Block size that brings the sample rate closest to target_rate. Min/max keeps 2 samples per block
+    sample_rate = get_sample_rate(times)
+    if sample_rate == None or target_rate <= 0:
+        return 1
+    samples_per_block = 2 if method == "minmax" else 1
+    return max(1, int(round(sample_rate * samples_per_block / target_rate)))
+
+def apply_ingest_options(times, currents, options: dict):
+    '''
+    Decimates and converts one imported trace according to options, see DEFAULT_INGEST_OPTIONS.
+    Returns times, currents and a record of what was done for the dataset metadata.
+    '''
+    options = {**DEFAULT_INGEST_OPTIONS, **(options or {})}
+    times = np.asarray(times, dtype=float)
+    currents = np.asarray(currents, dtype=float)
+    record = {"source_samples": len(times), "source_rate": get_sample_rate(times)}
+
+    method = options["decimation"]
+    if method != None:
+        if method not in DECIMATION_METHODS:
+            raise ValueError(f"Unknown decimation method: {method}")
+        factor = get_decimation_factor(times, options["target_rate"], method)
+        times, currents = DECIMATION_METHODS[method](times, currents, factor)
+        record.update({"decimation": method, "target_rate": options["target_rate"], "factor": factor})
+
+    if options["float32"]:
+        currents = currents.astype(np.float32)
+    record["dtype"] = str(currents.dtype)
+    record["samples"] = len(times)
+    return times, currents, record
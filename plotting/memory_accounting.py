@@ -0,0 +1,100 @@
+import sys
+import numpy as np
+from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
+from matplotlib.text import Text
+
+def get_nbytes(obj, seen: set = None) -> int:
+    # Approximate memory held by arrays, lists and dicts of them. Objects referenced twice are counted once
+    if seen == None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        # nbytes of a view is the size of its own elements, so rows of a stacked array add up to the stacked array.
+        # A view and its base that are both reachable are counted twice
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        # Lists of floats are common and long, assume they are all floats
+        if len(obj) > 0 and isinstance(obj[0], float):
+            return sys.getsizeof(obj) + len(obj) * sys.getsizeof(0.0)
+        return sys.getsizeof(obj) + sum(get_nbytes(item, seen) for item in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(get_nbytes(value, seen) for value in obj.values())
+    return sys.getsizeof(obj)
+
+def get_artist_nbytes(artist) -> int:
+    # Data copied into a matplotlib artist, not counting the renderer caches
+    if isinstance(artist, Line2D):
+        return artist.get_xydata().nbytes + artist.get_path().vertices.nbytes
+    if isinstance(artist, LineCollection):
+        return sum(np.asarray(segment).nbytes for segment in artist.get_segments())
+    if isinstance(artist, Text):
+        return sys.getsizeof(artist.get_text())
+    return 0
+
+def get_dataset_usage(dataset: dict, artist = None) -> dict:
+    times = dataset["times"]
+    currents = dataset["currents"]
+    return {
+        "name": dataset["name"],
+        "samples": len(currents),
+        "dtype": str(currents.dtype) if isinstance(currents, np.ndarray) else "list",
+        "raw_bytes": get_nbytes(times) + get_nbytes(currents),
+        "artist_bytes": get_artist_nbytes(artist) if artist != None else 0
+    }
+
+def get_dataspace_usage(data_handler, space_id, data_artists: dict = None, result_artists: list = None) -> dict:
+    # Memory held by one dataspace: raw samples, derived caches and indexes, and plot artists
+    dataspace = data_handler.dataspaces[space_id]
+    data_artists = data_artists or {}
+    result_artists = result_artists or []
+
+    datasets = {}
+    for set_id, dataset in dataspace["datasets"].items():
+        datasets[set_id] = get_dataset_usage(dataset, data_artists.get(set_id))
+
+    artists = [data_artists[set_id] for set_id in dataspace["datasets"] if set_id in data_artists] + list(result_artists)
+    usage = {
+        "space_id": space_id,
+        "name": dataspace["name"],
+        "datasets": datasets,
+        "dataset_count": len(datasets),
+        "samples": sum(dataset["samples"] for dataset in datasets.values()),
+        "raw_bytes": sum(dataset["raw_bytes"] for dataset in datasets.values()),
+        "cache_bytes": get_nbytes(data_handler.caches[space_id]) if space_id in data_handler.caches else 0,
+        "index_bytes": get_nbytes(data_handler.indexes[space_id]) if space_id in data_handler.indexes else 0,
+        "artist_count": len(artists),
+        "artist_bytes": sum(get_artist_nbytes(artist) for artist in artists)
+    }
+    usage["total_bytes"] = usage["raw_bytes"] + usage["cache_bytes"] + usage["index_bytes"] + usage["artist_bytes"]
+    return usage
+
+def get_memory_usage(data_handler, data_artists: dict = None, result_artists: dict = None) -> list[dict]:
+    # Usage of every dataspace, largest first
+    result_artists = result_artists or {}
+    rows = [
+        get_dataspace_usage(data_handler, space_id, data_artists, result_artists.get(space_id))
+        for space_id in data_handler.dataspaces
+    ]
+    return sorted(rows, key=lambda row: row["total_bytes"], reverse=True)
+
+def get_process_rss() -> int:
+    # Resident memory of this process, or None where /proc is not available
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def format_bytes(nbytes: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GB"
@@ -1,5 +1,8 @@
 import numpy as np
 import matplotlib.colors as mcolors
+from contextlib import contextmanager
+from utils import instrumentation
+from plotting import preprocessing, window_statistics, regression, transient_fit, quantification, snapshot, dataset_statistics, replicate_average
 
 class PlotDataHandler():
     dataspaces = {}
@@ -9,6 +12,10 @@ class PlotDataHandler():
         0: { 
             "name": "dataspace0", 
             "notes": "lorem ipsum",
+            "preprocessing": {"clip": {...}, "baseline": {...}, "smooth": {...}}, # Optional, see plotting.preprocessing
+            "windows": [{"name": "5 s", "start": 4.5, "end": 5.0}], # Optional named time windows for the results
+            "transient_fit": {"start": 0.0, "end": None, "exponential": False}, # Optional, see plotting.transient_fit
+            "window_statistic": {"statistic": "median", "trim": 0.1}, # Optional, statistic of the currents in a window, see plotting.window_statistics
             "datasets": {
                 0: {
                     "name": "dataset0",
@@ -17,7 +24,9 @@ class PlotDataHandler():
                     "concentration": 5.0,
                     "notes": "lorem ipsum",
                     "hidden": False,
-                    "line_color": colors[0]
+                    "line_color": colors[0],
+                    "version": 0, # Incremented when times or currents are replaced or the dataset is overwritten
+                    "metadata": {"source": "CH1-1.pssession", "measurement_index": 0, "title": "...", "method": "..."} # Optional, from the imported file
                 },
                 1: {
                     ...
@@ -30,15 +39,59 @@ class PlotDataHandler():
     }
     '''
     selected_space_id = 0 # Datasets within this space are drawn on the data plot
-    active_spaces_ids = [0] # Results within these spaces are drawn on the results plot
+    active_spaces_ids = (0,) # Results within these spaces are drawn on the results plot
 
     color_index = 0
     colors = []
 
-    time_range = [0,0]
+    time_range = (0, 0)
 
     def __init__(self):
-        self.create_color_table()
+        # Callables notified with a set of changed dataspace ids after datasets are added or removed
+        self.listeners = []
+        self.batch_depth = 0
+        self.batch_changed_space_ids = set()
+
+        # Data derived from the datasets that can be rebuilt at any time, by dataspace id: {space_id: {name: object}}.
+        # Entries for single datasets are checked against the dataset version
+        self.caches = {}
+        self.indexes = {}
+
+        # Read-only copy of the state for other threads, see plotting.snapshot. Republished after every change,
+        # changes inside batch_update once at the end. Pending changes by dataspace id: {space_id: set of dataset ids or None for all}
+        self.snapshot_changes = {}
+        self.snapshot = snapshot.create_snapshot(self)
+
+    def __setattr__(self, name, value):
+        if name in ("active_spaces_ids", "time_range"):
+            # Tuples, so they only change by assignment, which publishes them
+            value = tuple(value)
+        super().__setattr__(name, value)
+        if "snapshot" not in self.__dict__:
+            return
+        if name == "dataspaces":
+            # A new dict of dataspaces, everything in it may have changed
+            self.snapshot_changes.update({space_id: None for space_id in value})
+            self.publish_snapshot()
+        elif name in ("selected_space_id", "active_spaces_ids", "time_range"):
+            # Assignments of the selection and time range are published at once, they do not copy any datasets
+            self.publish_snapshot()
+
+    def mark_changed(self, space_id, set_ids: list = None):
+        # Record a change for the next snapshot, set_ids None when anything in the dataspace may have changed
+        if set_ids == None or self.snapshot_changes.get(space_id, set()) == None:
+            self.snapshot_changes[space_id] = None
+        else:
+            self.snapshot_changes.setdefault(space_id, set()).update(set_ids)
+        self.publish_snapshot()
+
+    def publish_snapshot(self):
+        # Inside batch_update the snapshot is published at the end of the batch
+        if self.batch_depth > 0:
+            return
+        changes = self.snapshot_changes
+        self.snapshot_changes = {}
+        self.snapshot = snapshot.create_snapshot(self, self.snapshot, changes)
 
     def create_color_table(self):
         tableau_colors = mcolors.TABLEAU_COLORS
@@ -61,50 +114,209 @@ class PlotDataHandler():
         return smallest_times_set
 
     def add_dataset(self, set_id: int, set_name: str, space_name: str, space_notes: str, times: list, currents: list, concentration: float, notes: str, space_id: int = None, hidden = False, color = None):
-        if color == None:
-            if self.color_index > len(self.colors) - 1:
-                self.color_index = 0
-            color = self.colors[self.color_index]
-        self.color_index += 1
-
         dataset = {
+            "set_id": set_id,
             "name": set_name,
             "times": times,
             "currents": currents,
-            "concentration": float(concentration),
+            "concentration": concentration,
             "notes": notes,
             "hidden": hidden,
             "line_color": color
         }
+        self.add_datasets_batch([dataset], space_name, space_notes, space_id)
 
+    def add_datasets_batch(self, datasets: list[dict], space_name: str = "", space_notes: str = "", space_id: int = None):
+        '''
+        Add many datasets to one dataspace with a single change notification.
+        Each item needs keys "set_id", "name", "times" and "currents".
+        Keys "concentration", "notes", "hidden", "line_color" and "metadata" are optional.
+        '''
         if space_id == None:
             space_id = self.selected_space_id
-        # Create new dataspace if id doesnt exist
-        if space_id not in self.dataspaces:
-            self.dataspaces[space_id] = {
-                "name": space_name, 
-                "notes": space_notes,
-                "datasets": {}
-            } 
+        self.create_dataspace(space_id, space_name, space_notes)
+        if len(datasets) == 0:
+            return
 
-        datasets = self.get_datasets()
-        if set_id in datasets:
-            print(f"add_dataset: Dataset with id '{set_id}' already exists. Dataset overwritten")
+        # Assign colors from the color table to datasets without a color
+        if not self.colors:
+            self.create_color_table()
+        color_count = len(self.colors)
+        if self.color_index > color_count - 1:
+            self.color_index = 0
+        uncolored_count = sum(1 for data in datasets if data.get("line_color") == None)
+        color_indices = iter(np.arange(self.color_index, self.color_index + uncolored_count) % color_count)
+        self.color_index += uncolored_count
 
-        # Add dataset to dataspace
-        datasets[set_id] = dataset
+        existing_datasets = self.dataspaces[space_id]["datasets"]
+        new_datasets = {}
+        for data in datasets:
+            color = data.get("line_color")
+            if color == None:
+                color = self.colors[next(color_indices)]
+            new_datasets[data["set_id"]] = {
+                "name": data["name"],
+                "times": data["times"],
+                "currents": data["currents"],
+                "concentration": float(data.get("concentration", 0)),
+                "notes": data.get("notes", ""),
+                "hidden": data.get("hidden", False),
+                "line_color": color,
+                "version": data.get("version", 0),
+                "metadata": data.get("metadata", {})
+            }
+            if data["set_id"] in existing_datasets:
+                # New version so that derived data of the old dataset is not reused
+                new_datasets[data["set_id"]]["version"] = existing_datasets[data["set_id"]].get("version", 0) + 1
 
-    def update_dataset(self, set_id, name, concentration, notes):
-        datasets = self.get_datasets()
-        if set_id in datasets:
+        overwritten_ids = existing_datasets.keys() & new_datasets.keys()
+        if overwritten_ids:
+            print(f"add_datasets_batch: Datasets with ids {sorted(overwritten_ids)} already exist. Datasets overwritten")
+
+        # Add datasets to dataspace
+        existing_datasets.update(new_datasets)
+        self.notify_changed(space_id)
+
+    def create_dataspace(self, space_id, space_name: str, space_notes: str = "", metadata: dict = None):
+        # Create new dataspace if id doesnt exist. Metadata holds any extra dataspace keys, e.g. from a save file
+        if space_id in self.dataspaces:
+            return
+        self.dataspaces[space_id] = {
+            "name": space_name, 
+            "notes": space_notes,
+            "datasets": {}
+        }
+        if metadata:
+            for key, value in metadata.items():
+                if key not in ("name", "notes", "datasets", "dataset_count"):
+                    self.dataspaces[space_id][key] = value
+        self.mark_changed(space_id)
+
+    @contextmanager
+    def batch_update(self):
+        # Collect change notifications inside the block and send them once at the end
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                # Readers see the whole batch at once, before the listeners run
+                self.publish_snapshot()
+            if self.batch_depth == 0 and self.batch_changed_space_ids:
+                changed_space_ids = self.batch_changed_space_ids
+                self.batch_changed_space_ids = set()
+                for listener in self.listeners:
+                    listener(changed_space_ids)
+
+    def notify_changed(self, space_id):
+        self.mark_changed(space_id)
+        self.batch_changed_space_ids.add(space_id)
+        if self.batch_depth > 0:
+            return
+        changed_space_ids = self.batch_changed_space_ids
+        self.batch_changed_space_ids = set()
+        for listener in self.listeners:
+            listener(changed_space_ids)
+
+    def update_dataset(self, set_id, name, concentration, notes, space_id: int = None):
+        datasets = self.get_datasets(space_id)
+        if datasets != None and set_id in datasets:
             # Update concentration and notes for the specified dataset
             datasets[set_id]['name'] = name
             datasets[set_id]['concentration'] = float(concentration)
             datasets[set_id]['notes'] = notes
-            print(datasets[set_id]["name"])
+            self.mark_changed(space_id if space_id != None else self.selected_space_id, [set_id])
         else:
             print(f"update_dataset: Dataset with id '{set_id}' does not exist.")
 
+    def set_dataset_hidden(self, set_id, hidden: bool, space_id: int = None):
+        datasets = self.get_datasets(space_id)
+        if datasets != None and set_id in datasets:
+            datasets[set_id]["hidden"] = hidden
+            self.mark_changed(space_id if space_id != None else self.selected_space_id, [set_id])
+        else:
+            print(f"set_dataset_hidden: Dataset with id '{set_id}' does not exist.")
+
+    def set_datasets_hidden(self, set_ids: list, hidden: bool, space_id: int = None):
+        # Hide or show many datasets with one snapshot. Returns the number of datasets that changed
+        if space_id == None:
+            space_id = self.selected_space_id
+        datasets = self.get_datasets(space_id)
+        if datasets == None:
+            return 0
+        changed_ids = [set_id for set_id in set_ids if set_id in datasets and datasets[set_id]["hidden"] != hidden]
+        for set_id in changed_ids:
+            datasets[set_id]["hidden"] = hidden
+        if changed_ids:
+            self.mark_changed(space_id, changed_ids)
+        return len(changed_ids)
+
+    def replace_dataset_data(self, set_id, times, currents, space_id: int = None):
+        # Replace the samples of a dataset, e.g. after decimation
+        if space_id == None:
+            space_id = self.selected_space_id
+        datasets = self.get_datasets(space_id)
+        if datasets == None or set_id not in datasets:
+            print(f"replace_dataset_data: Dataset with id '{set_id}' does not exist.")
+            return
+        dataset = datasets[set_id]
+        dataset["times"] = times
+        dataset["currents"] = currents
+        dataset["version"] = dataset.get("version", 0) + 1
+        self.mark_changed(space_id, [set_id])
+
+    def get_cache(self, space_id, name: str):
+        # Dict for derived data of a dataspace, created on first use
+        return self.caches.setdefault(space_id, {}).setdefault(name, {})
+
+    def get_index(self, space_id, name: str):
+        return self.indexes.setdefault(space_id, {}).setdefault(name, {})
+
+    def drop_caches(self, space_id = None):
+        # Drop caches and indexes of one dataspace, or of all dataspaces if no id provided
+        if space_id == None:
+            self.caches.clear()
+            self.indexes.clear()
+        else:
+            self.caches.pop(space_id, None)
+            self.indexes.pop(space_id, None)
+
+    def get_preprocessing(self, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        return preprocessing.get_config(self.dataspaces[space_id].get("preprocessing"))
+
+    def set_preprocessing(self, config: dict, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        self.dataspaces[space_id]["preprocessing"] = preprocessing.get_config(config)
+        self.notify_changed(space_id)
+
+    @instrumentation.instrument("results.preprocess")
+    def get_processed_currents(self, space_id: int = None, dataspace: dict = None):
+        # Preprocessed currents by dataset id, or None if the dataspace has no preprocessing enabled.
+        # dataspace is read instead of the live one if given, e.g. a snapshot dataspace
+        if space_id == None:
+            space_id = self.selected_space_id
+        if dataspace == None:
+            dataspace = self.dataspaces[space_id]
+        config = preprocessing.get_config(dataspace.get("preprocessing"))
+        if not preprocessing.is_enabled(config):
+            return None
+        return preprocessing.process(dataspace["datasets"], config, self.get_cache(space_id, "preprocessing"))
+
+    @instrumentation.instrument("results.summaries")
+    def get_dataset_summaries(self, space_id: int = None):
+        # Summaries of the raw samples by dataset id, see plotting.dataset_statistics. Computed when first asked for,
+        # then kept per dataset and only recomputed when its data is replaced
+        if space_id == None:
+            space_id = self.selected_space_id
+        datasets = self.get_datasets(space_id)
+        if datasets == None:
+            return {}
+        return dataset_statistics.get_summaries(datasets, self.get_cache(space_id, "summaries"))
+
     def get_datasets(self, space_id: int = None):
         # If no id provided, get datasets in currently selected space
         if space_id == None:
@@ -123,6 +335,17 @@ class PlotDataHandler():
     def delete_dataset(self, set_id):
         pass
 
+    def clear_datasets(self, space_id: int = None):
+        # If no id provided, clear currently selected space
+        if space_id == None:
+            space_id = self.selected_space_id
+        if not space_id in self.dataspaces:
+            return
+
+        self.dataspaces[space_id]["datasets"] = {}
+        self.drop_caches(space_id)
+        self.notify_changed(space_id)
+
     def delete_dataspace(self, space_id = None):
         # If no id provided, delete currently selected space
         if space_id == None:
@@ -131,44 +354,249 @@ class PlotDataHandler():
             return
             
         self.dataspaces.pop(space_id)
+        self.drop_caches(space_id)
+        self.notify_changed(space_id)
+
+    def set_dataset_metadata(self, set_id, metadata: dict, space_id: int = None):
+        # Replaces the metadata dict, snapshots keep the old one
+        datasets = self.get_datasets(space_id)
+        if datasets != None and set_id in datasets:
+            datasets[set_id]["metadata"] = metadata
+            self.mark_changed(self.selected_space_id if space_id == None else space_id, [set_id])
 
     def rename_dataspace(self, space_id, name):
         if space_id in self.dataspaces:
             self.dataspaces[space_id]["name"] = name
+            self.mark_changed(space_id, [])
+
+    def set_dataspace_notes(self, space_id, notes: str):
+        if space_id in self.dataspaces:
+            self.dataspaces[space_id]["notes"] = notes
+            self.mark_changed(space_id, [])
 
     def get_dataspace_names(self):
         names = [self.dataspaces[space_id]["name"] for space_id in self.active_spaces_ids if space_id in self.dataspaces]
         return names
 
+    @instrumentation.instrument("results.trendline")
     def calculate_trendline(self, x, y):
         slope, intercept = np.polyfit(x, y, 1)
         r_squared = np.corrcoef(x, y)[0, 1]**2
         trendline = slope * np.array(x) + intercept
         return slope, intercept, r_squared, trendline
 
-    def calculate_results(self, datasets: dict):
-        concentration_data = {}
-        for data in datasets.values():
-            if data["hidden"]:
-                continue
-            
-            times = np.array(data["times"])
-            currents = np.array(data["currents"])
-            concentration = data["concentration"]
+    @instrumentation.instrument("results.regression")
+    def calculate_trendlines(self, results: list[list], weighted: bool = False):
+        '''
+        Fits a line to each of many results, as returned by calculate_results, in one batched computation.
+        With weighted the points are weighted by 1/std² of the replicates.
+        Returns the fit_lines dict with arrays packed to results × most concentrations, padded with nan:
+        "concentrations", "averages", "stds", "mask" and "trendlines" in addition to the fit values.
+        '''
+        concentrations, mask = regression.pack_rows([[concentration for concentration, _ in result] for result in results])
+        averages, _ = regression.pack_rows([[stats[0] for _, stats in result] for result in results])
+        stds, _ = regression.pack_rows([[stats[1] for _, stats in result] for result in results])
+        weights = regression.get_inverse_variance_weights(stds, mask) if weighted else None
 
-            # Find indices where times fall within the specified range
-            indices = np.where((times >= self.time_range[0]) & (times <= self.time_range[1]))[0]
+        fit = regression.fit_lines(concentrations, averages, mask, weights)
+        fit["concentrations"] = concentrations
+        fit["averages"] = averages
+        fit["stds"] = stds
+        fit["mask"] = mask
+        fit["trendlines"] = np.where(mask, fit["slope"][:, None] * concentrations + fit["intercept"][:, None], np.nan)
+        return fit
 
-            # Calculate the average current for the specified range
-            avg_current = np.mean(currents[indices])
+    def get_window_means(self, windows, space_id: int = None, datasets: dict = None, statistic_config: dict = None):
+        # Returns dataset ids and a datasets × windows matrix of mean currents, hidden datasets included.
+        # With a dataspace id the currents are preprocessed, the packed arrays are cached and the window statistic
+        # of the dataspace is used instead of the mean, with the range indexes of long datasets kept in the indexes.
+        # statistic_config overrides the statistic
+        indexes = None
+        if space_id == None:
+            packed = window_statistics.get_packed_datasets(datasets)
+        else:
+            packed = self.get_packed_datasets(space_id)
+            if statistic_config == None:
+                statistic_config = self.get_window_statistic_config(space_id)
+            indexes = self.get_index(space_id, "range_index")
+        return packed["set_ids"], window_statistics.window_statistic(packed, windows, statistic_config, indexes)
 
-            if concentration in concentration_data:
-                concentration_data[concentration].append(avg_current)
-            else:
-                concentration_data[concentration] = [avg_current]
-        
-        # Calculate average of average currents for each concentration
-        for concentration, currents_list in concentration_data.items():
-            concentration_data[concentration] = (np.mean(currents_list), np.std(currents_list))
-        sorted_concentration_data = sorted(concentration_data.items())
-        return sorted_concentration_data
+    def get_packed_datasets(self, space_id, dataspace: dict = None):
+        # Preprocessed currents of a dataspace packed for window statistics, cached while they stay the same.
+        # dataspace is read instead of the live one if given, e.g. a snapshot dataspace
+        if dataspace == None:
+            dataspace = self.dataspaces[space_id]
+        processed_currents = self.get_processed_currents(space_id, dataspace)
+        return window_statistics.get_packed_datasets(dataspace["datasets"], processed_currents, self.get_cache(space_id, "window_statistics"))
+
+    def get_window_statistic_config(self, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        return window_statistics.get_config(self.dataspaces[space_id].get("window_statistic"))
+
+    def set_window_statistic_config(self, config: dict, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        self.dataspaces[space_id]["window_statistic"] = window_statistics.get_config(config)
+        self.notify_changed(space_id)
+
+    @instrumentation.instrument("results.calculate")
+    def calculate_results(self, datasets: dict, space_id: int = None):
+        # Mean and std of the average current within time_range for each concentration, sorted by concentration.
+        # With space_id the currents are preprocessed and averaged with the settings of that dataspace
+        set_ids, means = self.get_window_means([self.time_range], space_id, datasets)
+        visible = [i for i, set_id in enumerate(set_ids) if not datasets[set_id]["hidden"]]
+        if len(visible) == 0:
+            return []
+        concentrations = [datasets[set_ids[i]]["concentration"] for i in visible]
+        unique_concentrations, averages, stds, _ = window_statistics.group_by_concentration(concentrations, means[visible])
+        return [(float(concentration), (averages[i, 0], stds[i, 0])) for i, concentration in enumerate(unique_concentrations)]
+
+    def get_windows(self, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        return self.dataspaces[space_id].get("windows", [])
+
+    def set_windows(self, windows: list[dict], space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        self.dataspaces[space_id]["windows"] = [
+            {"name": window["name"], "start": float(window["start"]), "end": float(window["end"])} for window in windows
+        ]
+        self.notify_changed(space_id)
+
+    @instrumentation.instrument("results.windows")
+    def calculate_window_results(self, space_id: int = None, windows: list[dict] = None, weighted: bool = False):
+        '''
+        Statistics of the named windows of a dataspace, or None if it has no windows.
+        windows overrides the windows of the dataspace, and weighted fits with 1/std² weights:
+        {
+            "windows": [{"name", "start", "end"}],
+            "set_ids": [visible dataset ids],
+            "means": datasets × windows mean currents,
+            "concentrations": sorted unique concentrations,
+            "averages", "stds": concentrations × windows,
+            "counts": datasets per concentration,
+            "slopes", "intercepts", "r_squared", "slope_ses", "intercept_ses": one per window
+        }
+        '''
+        if space_id == None:
+            space_id = self.selected_space_id
+        if windows == None:
+            windows = self.get_windows(space_id)
+        if len(windows) == 0:
+            return None
+
+        set_ids, means = self.get_window_means([(window["start"], window["end"]) for window in windows], space_id)
+        return window_statistics.get_window_results(self.dataspaces[space_id]["datasets"], set_ids, means, windows, weighted)
+
+    @instrumentation.instrument("results.replicates")
+    def calculate_replicate_curves(self, space_id: int = None, length: int = 500):
+        # Mean ± std curves of the visible datasets of every concentration on a grid of length points, of the preprocessed
+        # currents if preprocessing is enabled. See plotting.replicate_average. None if the datasets do not overlap in time
+        if space_id == None:
+            space_id = self.selected_space_id
+        datasets = self.dataspaces[space_id]["datasets"]
+        visible = {set_id: data for set_id, data in datasets.items() if not data["hidden"] and len(data["times"]) > 1}
+        grid = replicate_average.get_common_grid([data["times"] for data in visible.values()], length)
+        if grid is None:
+            return None
+        return replicate_average.get_replicate_curves(visible, self.get_processed_currents(space_id), grid, self.get_cache(space_id, "replicates"))
+
+    def get_transient_fit_config(self, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        return transient_fit.get_config(self.dataspaces[space_id].get("transient_fit"))
+
+    def set_transient_fit_config(self, config: dict, space_id: int = None):
+        if space_id == None:
+            space_id = self.selected_space_id
+        self.dataspaces[space_id]["transient_fit"] = transient_fit.get_config(config)
+        self.notify_changed(space_id)
+
+    @instrumentation.instrument("results.transient_fit")
+    def calculate_transient_fits(self, space_id: int = None, dataspace: dict = None):
+        '''
+        Cottrell fits of every dataset of a dataspace, of the preprocessed currents if preprocessing is enabled:
+        {"set_ids": [dataset ids], "a", "b", "c", "tau", "rms", "plateau", "count": one value per dataset}
+        Fits are cached per dataset and only datasets whose data or fit settings changed are refitted, in one batch.
+        dataspace is read instead of the live one if given, e.g. a snapshot dataspace.
+        '''
+        if space_id == None:
+            space_id = self.selected_space_id
+        if dataspace == None:
+            dataspace = self.dataspaces[space_id]
+        datasets = dataspace["datasets"]
+        config = transient_fit.get_config(dataspace.get("transient_fit"))
+        config_key = transient_fit.get_config_key(config)
+        processed_currents = self.get_processed_currents(space_id, dataspace)
+        cache = self.get_cache(space_id, "transient_fit")
+        for set_id in list(cache.keys()):
+            if set_id not in datasets:
+                cache.pop(set_id)
+
+        pending = []
+        for set_id, data in datasets.items():
+            currents = processed_currents[set_id] if processed_currents != None else data["currents"]
+            entry = cache.get(set_id)
+            if entry == None or entry["version"] != data.get("version", 0) or entry["config_key"] != config_key or entry["input"] is not currents:
+                pending.append((set_id, currents))
+        if pending:
+            fits = transient_fit.fit_transients([datasets[set_id]["times"] for set_id, _ in pending], [currents for _, currents in pending], config)
+            for i, (set_id, currents) in enumerate(pending):
+                cache[set_id] = {
+                    "version": datasets[set_id].get("version", 0),
+                    "config_key": config_key,
+                    "input": currents,
+                    "fit": {name: fits[name][i] for name in transient_fit.PARAMETERS}
+                }
+
+        set_ids = list(datasets.keys())
+        results = {"set_ids": set_ids}
+        for name in transient_fit.PARAMETERS:
+            results[name] = np.array([cache[set_id]["fit"][name] for set_id in set_ids], dtype=float)
+        return results
+
+    @instrumentation.instrument("results.quantify")
+    def quantify_samples(self, samples: list[dict], space_id: int = None, statistic: str = "mean", weighted: bool = False):
+        '''
+        Concentrations of unknown samples from the calibration of a dataspace. samples are dicts with "times" and "currents".
+        The statistic is computed like for the calibration datasets, after the preprocessing of the dataspace:
+        "mean" is the window statistic of the dataspace within time_range, others are parameters of the transient fit.
+        weighted fits the calibration line with 1/std² weights, like the trendline with Weighted Fit on.
+        Returns None if the dataspace has no calibration line, else
+        {"values": statistic per sample, "concentrations", "ses", "out_of_range", "calibration"}, see plotting.quantification
+        '''
+        if space_id == None:
+            space_id = self.selected_space_id
+        datasets = self.dataspaces[space_id]["datasets"]
+        if statistic == "mean":
+            results = self.calculate_results(datasets, space_id)
+        else:
+            results = self.calculate_fit_results(datasets, space_id, statistic)
+        calibration = quantification.get_calibration(results, weighted)
+        if calibration == None:
+            return None
+
+        unknowns = {i: {"times": sample["times"], "currents": sample["currents"]} for i, sample in enumerate(samples)}
+        config = self.get_preprocessing(space_id)
+        processed_currents = preprocessing.process(unknowns, config, {}) if preprocessing.is_enabled(config) else {}
+        times_list = [unknown["times"] for unknown in unknowns.values()]
+        currents_list = [processed_currents.get(i, unknown["currents"]) for i, unknown in unknowns.items()]
+        if statistic == "mean":
+            packed = window_statistics.pack_datasets(list(unknowns), times_list, currents_list)
+            values = window_statistics.window_statistic(packed, [self.time_range], self.get_window_statistic_config(space_id))[:, 0]
+        else:
+            values = transient_fit.fit_transients(times_list, currents_list, self.get_transient_fit_config(space_id))[statistic]
+        prediction = quantification.predict_concentrations(values, calibration)
+        return dict(prediction, values=values, calibration=calibration)
+
+    def calculate_fit_results(self, datasets: dict, space_id: int = None, statistic: str = "a"):
+        # Like calculate_results, with a fitted parameter of each dataset instead of its mean current
+        fits = self.calculate_transient_fits(space_id)
+        visible = [i for i, set_id in enumerate(fits["set_ids"]) if not datasets[set_id]["hidden"] and np.isfinite(fits[statistic][i])]
+        if len(visible) == 0:
+            return []
+        concentrations = [datasets[fits["set_ids"][i]]["concentration"] for i in visible]
+        unique_concentrations, averages, stds, _ = window_statistics.group_by_concentration(concentrations, fits[statistic][visible, None])
+        return [(float(concentration), (averages[i, 0], stds[i, 0])) for i, concentration in enumerate(unique_concentrations)]
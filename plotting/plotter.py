@@ -1,15 +1,21 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from contextlib import contextmanager
 import matplotlib.colors as mcolors
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.text import Text
+from matplotlib.ticker import MaxNLocator, AutoLocator
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.widgets import SpanSelector
 from matplotlib.axes import Axes
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from threading import Timer
 from plotting.plot_data_handler import PlotDataHandler
+from plotting.transient_fit import CALIBRATION_STATISTICS
+from utils import instrumentation
 
 class PlotCanvas(FigureCanvas):
-    figure: plt.Figure
+    figure: Figure
     axes1: Axes
     axes2: Axes
 
@@ -17,10 +23,31 @@ class PlotCanvas(FigureCanvas):
     show_debug_info = False
     show_legend = True
     show_equation = True
+    weighted_fit = False # Weight trendline points by 1/std² of the replicates
+    calibration_statistic = "mean" # Per dataset value of the results plot, one of transient_fit.CALIBRATION_STATISTICS
+    show_replicate_means = False # Mean ± std curve of the replicates of every concentration on the data plot
+
+    # Most points of the replicate mean curves, they get about one point per pixel of the data plot
+    replicate_grid_max = 2000
 
     equation_textboxes = []
     plot_legend = None
 
+    # Artists of the last draw, for memory accounting. {set_id: Line2D} and {space_id: [Artist]}
+    data_artists = {}
+    result_artists = {}
+    timings_textbox = None
+
+    # Spans shown in the debug info timings box
+    timing_phases = [
+        "plot.draw", "plot.span_selector", "plot.data", "plot.results", "results.calculate", "results.preprocess", "results.windows", "results.regression",
+        "results.transient_fit", "results.replicates", "results.trendline", "plot.layout", "plot.render", "plot.move_span",
+        "parse.file", "io.save", "io.load", "io.export", "io.restore", "import.files"
+    ]
+
+    # Markers of named window results, the span results use "o"
+    window_markers = ["s", "^", "D", "v", "P", "X", "*", "<", ">", "h"]
+
     # Time span selector
     span = None
     span_initialized = False
@@ -31,32 +58,59 @@ class PlotCanvas(FigureCanvas):
     # Contains data and data operations
     data_handler: PlotDataHandler
 
+    # Redraws requested inside hold_redraw() are merged into one
+    redraw_hold_depth = 0
+    redraw_pending = False
+
     def __init__(self, parent=None): 
-        self.figure, (self.axes1, self.axes2) = plt.subplots(1, 2)
+        # Figure is created without pyplot, which is slow to import and not needed in a Qt app
+        self.figure = Figure()
+        self.axes1, self.axes2 = self.figure.subplots(1, 2)
         super().__init__(self.figure)
         self.setParent(parent)
 
         self.data_handler = PlotDataHandler()
         self.textbox_pick_cid = self.mpl_connect("pick_event", self.on_pick)
+        # Callables called with the dataspace ids after the results plot is drawn, e.g. to record the calibrations
+        self.results_listeners = []
     
     def toggle_debug_info(self):
-        self.show_debug_info = not self.show_debug_info
+        self.set_debug_info(not self.show_debug_info)
         self.draw_plot()
-        print(f"show debug info: {self.show_debug_info}")
+
+    def set_debug_info(self, show: bool):
+        self.show_debug_info = show
+        # Timings are only collected while debug info is shown or a profile is running
+        instrumentation.set_enabled(show or instrumentation.is_profiling())
 
     def toggle_legend(self):
         self.show_legend = not self.show_legend
         self.draw_plot()
-        print(f"show legend: {self.show_legend}")
 
     def toggle_equation(self):
         self.show_equation = not self.show_equation
         self.draw_plot()
-        print(f"show equation: {self.show_equation}")
 
+    def toggle_weighted_fit(self):
+        self.weighted_fit = not self.weighted_fit
+        self.draw_plot()
+
+    def toggle_replicate_means(self):
+        self.show_replicate_means = not self.show_replicate_means
+        self.draw_plot()
+
+    def set_calibration_statistic(self, statistic: str):
+        if statistic not in CALIBRATION_STATISTICS:
+            print(f"set_calibration_statistic: Unknown statistic '{statistic}'")
+            return
+        self.calibration_statistic = statistic
+        self.draw_plot()
+
+    @instrumentation.instrument("plot.data")
     def plot_data(self):
         # Clear existing plot
         self.axes1.clear()
+        self.data_artists = {}
 
         datasets = self.data_handler.get_datasets()
         if datasets == None:
@@ -65,17 +119,27 @@ class PlotCanvas(FigureCanvas):
             return
         
         # Plot each dataset      
-        for data in datasets.values():
+        processed_currents = self.data_handler.get_processed_currents()
+        times = None
+        for set_id, data in datasets.items():
             if data["hidden"]:
                 continue
 
             times = data['times']
-            currents = data['currents']
+            currents = processed_currents[set_id] if processed_currents else data['currents']
             name = data['name']
             line_color = data['line_color']
-            self.axes1.plot(times, currents, label=name, color=line_color)
+            # Replicates fade behind their mean curves, drawn over their whole time range as without the overlay
+            alpha = 0.3 if self.show_replicate_means else None
+            line, = self.axes1.plot(times, currents, label=name, color=line_color, alpha=alpha)
+            self.data_artists[set_id] = line
+
+        # Only the mean ± std bands are on the common grid, which covers the time range all replicates share
+        curves = self.get_replicate_curves() if self.show_replicate_means and times is not None else None
+        if curves != None:
+            self.plot_replicate_means(curves)
         
-        if self.show_legend:
+        if self.show_legend and times is not None:
             self.update_legend()
 
         # Set grid, labels, title
@@ -86,13 +150,27 @@ class PlotCanvas(FigureCanvas):
         self.axes1.set_title(space_name)
         
         # Set tick locations
-        self.axes1.xaxis.set_major_locator(plt.MaxNLocator(10))
-        self.axes1.yaxis.set_major_locator(plt.MaxNLocator(10))
+        self.axes1.xaxis.set_major_locator(MaxNLocator(10))
+        self.axes1.yaxis.set_major_locator(MaxNLocator(10))
 
-        if not self.span_initialized: 
+        if not self.span_initialized and times is not None: 
             self.create_span_selector(np.array(times))
-            print("span initialized")
 
+    def get_replicate_curves(self):
+        # The curves are resampled to about one point per pixel, so hundreds of replicates draw as fast as one line
+        length = int(min(max(self.axes1.bbox.width, 100), self.replicate_grid_max))
+        return self.data_handler.calculate_replicate_curves(length=length)
+
+    def plot_replicate_means(self, curves: dict):
+        # One mean line and std band per concentration
+        colors = list(mcolors.TABLEAU_COLORS.values())
+        grid = curves["grid"]
+        for i, (concentration, mean, std, count) in enumerate(zip(curves["concentrations"], curves["means"], curves["stds"], curves["counts"])):
+            color = colors[i % len(colors)]
+            self.axes1.fill_between(grid, mean - std, mean + std, color=color, alpha=0.2, linewidth=0)
+            self.axes1.plot(grid, mean, color=color, linewidth=2, label=f"{concentration:g} {self.unit_concentration} mean (n={count})")
+
+    @instrumentation.instrument("plot.results")
     def plot_results(self): 
         active_datasets = self.data_handler.get_datasets_in_active_dataspaces()
         if len(active_datasets) == 0:
@@ -100,9 +178,13 @@ class PlotCanvas(FigureCanvas):
             self.display_results_info_text(info_text)
             return
    
+        space_ids = [space_id for space_id in self.data_handler.active_spaces_ids if space_id in self.data_handler.dataspaces]
         results = []
-        for dataset in active_datasets:
-            result = self.data_handler.calculate_results(dataset)
+        for dataset, space_id in zip(active_datasets, space_ids):
+            if self.calibration_statistic == "mean":
+                result = self.data_handler.calculate_results(dataset, space_id)
+            else:
+                result = self.data_handler.calculate_fit_results(dataset, space_id, self.calibration_statistic)
             results.append(result)
 
         self.axes2.clear()
@@ -110,6 +192,7 @@ class PlotCanvas(FigureCanvas):
         labels = self.data_handler.get_dataspace_names()
 
         self.equation_textboxes = []
+        self.result_artists = {}
 
         for i, result in enumerate(results):
             if result == None:
@@ -119,17 +202,25 @@ class PlotCanvas(FigureCanvas):
                 info_text = f"Add atleast 2 different concentrations \n to \"{labels[i]}\""
                 self.display_results_info_text(info_text)
                 return
-            
-            # Unpack data
-            concentrations, calculated_currents = zip(*result)
-            avg_currents, std_currents = zip(*calculated_currents)
 
-            # Calculate trendline
-            slope, intercept, r_squared, trendline = self.data_handler.calculate_trendline(concentrations, avg_currents)
+        # Fit all dataspaces at once
+        fit = self.data_handler.calculate_trendlines(results, self.weighted_fit)
+
+        for i, result in enumerate(results):
+            count = len(result)
+            concentrations = fit["concentrations"][i, :count]
+            avg_currents = fit["averages"][i, :count]
+            std_currents = fit["stds"][i, :count]
+            trendline = fit["trendlines"][i, :count]
+            slope, intercept, r_squared = fit["slope"][i], fit["intercept"][i], fit["r_squared"][i]
 
             # Plot the data
-            self.axes2.errorbar(concentrations, avg_currents, yerr=std_currents, marker="o", capsize=3, label=labels[i], color=tableau_colors[i])
-            self.axes2.plot(concentrations, trendline, linestyle="--", color=tableau_colors[i])
+            color = tableau_colors[i % len(tableau_colors)]
+            errorbar = self.axes2.errorbar(concentrations, avg_currents, yerr=std_currents, marker="o", capsize=3, label=labels[i], color=color)
+            trendline_line, = self.axes2.plot(concentrations, trendline, linestyle="--", color=color)
+            artists = self.result_artists.setdefault(space_ids[i], [])
+            artists.extend(errorbar.lines[:1] + errorbar.lines[1] + errorbar.lines[2])
+            artists.append(trendline_line)
 
             # Display the equation
             if self.show_equation:
@@ -141,43 +232,106 @@ class PlotCanvas(FigureCanvas):
                     text_x, text_y, 
                     f"{equation_text}\n{r_squared_text}", 
                     fontsize=9, 
-                    bbox=dict(facecolor=tableau_colors[i], alpha=0.3), 
+                    bbox=dict(facecolor=color, alpha=0.3), 
                     horizontalalignment="left", verticalalignment="center", 
                     transform=self.axes2.transAxes,
                     picker=True
                 )
                 # Save text boxes for repositioning them later
                 self.equation_textboxes.append(equation_textbox)
+                artists.append(equation_textbox)
+
+            # Named windows of the dataspace are drawn over the span results
+            if self.calibration_statistic == "mean":
+                window_results = self.data_handler.calculate_window_results(space_ids[i], weighted=self.weighted_fit)
+                if window_results != None:
+                    artists.extend(self.plot_window_results(window_results, labels[i], color))
 
         # Set legend, grid, title, labels 
         if self.show_legend:
             self.axes2.legend(fontsize=9)
         self.axes2.grid(True)
         self.axes2.set_title("Results")
-        self.axes2.set_ylabel(f"current({self.unit_current})")
+        self.axes2.set_ylabel(self.get_results_ylabel())
         self.axes2.set_xlabel(f"concentration({self.unit_concentration})")
         
-        self.axes2.xaxis.set_major_locator(plt.AutoLocator())
-        self.axes2.yaxis.set_major_locator(plt.MaxNLocator(10))
+        self.axes2.xaxis.set_major_locator(AutoLocator())
+        self.axes2.yaxis.set_major_locator(MaxNLocator(10))
 
         if self.show_debug_info and len(results) == 1:
             self.draw_debug_box(concentrations, avg_currents, std_currents, slope, intercept, trendline)
+
+        for listener in self.results_listeners:
+            listener(space_ids)
     
+    def plot_window_results(self, window_results: dict, label: str, color):
+        # One errorbar series and trendline per window, told apart by marker
+        artists = []
+        concentrations = window_results["concentrations"]
+        if len(concentrations) < 2:
+            return artists
+        for j, window in enumerate(window_results["windows"]):
+            errorbar = self.axes2.errorbar(
+                concentrations, window_results["averages"][:, j], yerr=window_results["stds"][:, j],
+                marker=self.window_markers[j % len(self.window_markers)], linestyle="none", capsize=2, alpha=0.7,
+                label=f"{label} {window['name']}", color=color
+            )
+            trendline = window_results["slopes"][j] * concentrations + window_results["intercepts"][j]
+            trendline_line, = self.axes2.plot(concentrations, trendline, linestyle=":", color=color, alpha=0.7)
+            artists.extend(errorbar.lines[:1] + errorbar.lines[1] + errorbar.lines[2])
+            artists.append(trendline_line)
+        return artists
+
+    def get_results_ylabel(self):
+        if self.calibration_statistic == "a":
+            return f"Cottrell a({self.unit_current}·s½)"
+        if self.calibration_statistic == "plateau":
+            return f"plateau current({self.unit_current})"
+        return f"current({self.unit_current})"
+
     def display_results_info_text(self, text):
         self.axes2.clear()
         self.axes2.set_title("Results")
-        self.axes2.set_ylabel(f"current({self.unit_current})")
+        self.axes2.set_ylabel(self.get_results_ylabel())
         self.axes2.set_xlabel(f"concentration({self.unit_concentration})")
         self.axes2.text(0.5, 0.5, text, fontsize=10, horizontalalignment="center", verticalalignment="center", transform=self.axes2.transAxes)
 
-    def draw_plot(self):
-        self.handle_span_selector()
-        self.plot_data()
-        self.plot_results()
-        self.figure.tight_layout()
-        self.draw()
-        print(f"draw_plot called")
+    @contextmanager
+    def hold_redraw(self, defer: bool = False):
+        # Skip redraws inside the block and draw once at the end if any were requested.
+        # With defer the draw waits for the event loop, e.g. so the window can be shown first
+        self.redraw_hold_depth += 1
+        try:
+            yield
+        finally:
+            self.redraw_hold_depth -= 1
+            if self.redraw_hold_depth == 0 and self.redraw_pending:
+                if defer:
+                    QTimer.singleShot(0, self.draw_pending_plot)
+                else:
+                    self.draw_plot()
+
+    def draw_pending_plot(self):
+        # Another draw may have happened before a deferred one got its turn
+        if self.redraw_pending:
+            self.draw_plot()
 
+    def draw_plot(self):
+        if self.redraw_hold_depth > 0:
+            self.redraw_pending = True
+            return
+        self.redraw_pending = False
+        with instrumentation.span("plot.draw"):
+            self.handle_span_selector()
+            self.plot_data()
+            self.plot_results()
+            with instrumentation.span("plot.layout"):
+                self.figure.tight_layout()
+            self.update_timings_box()
+            with instrumentation.span("plot.render"):
+                self.draw()
+
+    @instrumentation.instrument("plot.span_selector")
     def handle_span_selector(self):
         if not self.span:
             return
@@ -186,10 +340,7 @@ class PlotCanvas(FigureCanvas):
         smallest_times_set = self.data_handler.get_smallest_times_dataset()
         if len(smallest_times_set) == 0:
             return
-        
-        print(f"smallest_times_set[-1]: {smallest_times_set[-1]}")
-        print(f"self.span.snap_values[-1]: {self.span.snap_values[-1]}")
-        
+
         # Depending on current snap values and span selection, recreate span
         if smallest_times_set[-1] < self.span.snap_values[-1]:
             if smallest_times_set[-1] >= self.span.extents[1]:
@@ -200,19 +351,20 @@ class PlotCanvas(FigureCanvas):
             self.create_span_selector(np.array(smallest_times_set), self.span.extents)
 
     def on_move_span(self, vmin, vmax):   
-        self.data_handler.time_range = (vmin, vmax)
-        print(vmin, vmax)
-        self.plot_results()
-        self.draw()
+        with instrumentation.span("plot.move_span"):
+            self.data_handler.time_range = (vmin, vmax)
+            self.plot_results()
+            self.update_timings_box()
+            with instrumentation.span("plot.render"):
+                self.draw()
     
     def set_span_visibility(self):
         # Hide time span selector if selected plot is not active
-        if self.data_handler.selected_space_id in self.data_handler.active_spaces_ids:
-            self.span.set_visible(True)
-            self.span.set_active(True)
-        else:
-            self.span.set_visible(False)
-            self.span.set_active(False)
+        visible = self.data_handler.selected_space_id in self.data_handler.active_spaces_ids
+        self.span.set_visible(visible)
+        # Activating re-renders the whole figure for blitting, only do it when the state changes
+        if self.span.active != visible:
+            self.span.set_active(visible)
 
     def create_span_selector(self, times, extents: tuple[int, int] = None):  
         self.span = SpanSelector(
@@ -236,7 +388,6 @@ class PlotCanvas(FigureCanvas):
         self.span_initialized = True
         self.data_handler.time_range = self.span.extents
         self.span.set_active(True)
-        print("span created") 
 
     def draw_debug_box(self, concentrations, avg_currents, std_currents, slope, intercept, trendline):
         concentrations_text = f"CONCENTRATIONS: {concentrations}"
@@ -252,9 +403,28 @@ class PlotCanvas(FigureCanvas):
                         horizontalalignment="left", verticalalignment="center", 
                         transform=self.axes2.transAxes)
         
+    def update_timings_box(self):
+        # Live per-phase timings, shown with debug info
+        if not self.show_debug_info:
+            if self.timings_textbox:
+                self.timings_textbox.set_visible(False)
+            return
+
+        text = instrumentation.format_stats(self.timing_phases) or "No timings yet"
+        if self.timings_textbox == None:
+            self.timings_textbox = self.figure.text(
+                0.01, 0.99, text,
+                fontsize=7, family="monospace",
+                bbox=dict(facecolor="white", alpha=0.8),
+                horizontalalignment="left", verticalalignment="top"
+            )
+        else:
+            self.timings_textbox.set_text(text)
+        self.timings_textbox.set_visible(True)
+
     def update_plot_units(self):
         self.axes1.set_ylabel(f"current({self.unit_current})")
-        self.axes2.set_ylabel(f"current({self.unit_current})")
+        self.axes2.set_ylabel(self.get_results_ylabel())
         self.axes2.set_xlabel(f"concentration({self.unit_concentration})")
         self.draw()
     
@@ -284,7 +454,7 @@ class PlotCanvas(FigureCanvas):
 
     def on_pick(self, event):
         # Copy equation to clipboard on click
-        artist: plt.Text = event.artist
+        artist: Text = event.artist
         text = artist.get_text()
         QApplication.clipboard().setText(text)
 
@@ -295,6 +465,6 @@ class PlotCanvas(FigureCanvas):
         
         Timer(0.05, lambda: self.reset_textbox_alpha(artist, old_alpha)).start()
 
-    def reset_textbox_alpha(self, textbox: plt.Text, old_alpha):
+    def reset_textbox_alpha(self, textbox: Text, old_alpha):
         textbox.get_bbox_patch().set_alpha(old_alpha)
         self.draw()
@@ -0,0 +1,118 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Stages in the order they are applied. Spikes are clipped first so they do not leak into the baseline or get smeared by smoothing
+STAGES = ("clip", "baseline", "smooth")
+
+DEFAULT_CONFIG = {
+    "clip": {"enabled": False, "window": 5, "threshold": 5.0},
+    "baseline": {"enabled": False, "start": 0.0, "end": 1.0},
+    "smooth": {"enabled": False, "method": "savgol", "window": 11, "polyorder": 2}
+}
+
+SMOOTHING_METHODS = {"savgol": "Savitzky-Golay", "moving_average": "Moving average"}
+
+def get_config(config: dict = None):
+    # Complete config with defaults for missing stages and parameters
+    config = config or {}
+    return {stage: dict(DEFAULT_CONFIG[stage], **config.get(stage, {})) for stage in STAGES}
+
+def is_enabled(config: dict):
+    return any(config[stage]["enabled"] for stage in STAGES)
+
+def get_stage_key(config: dict, stage: str):
+    params = config[stage]
+    if not params["enabled"]:
+        return (stage, "disabled")
+    return (stage,) + tuple(sorted(params.items()))
+
+def pad_edges(currents: np.ndarray, window: int):
+    half = window // 2
+    return np.pad(currents, ((0, 0), (half, window - 1 - half)), mode="edge")
+
+def clip_spikes(times: np.ndarray, currents: np.ndarray, params: dict):
+    # Replace samples further than threshold * MAD from the running median with the running median
+    window = max(3, int(params["window"]) | 1)
+    if currents.shape[1] < window:
+        return currents
+    medians = np.median(sliding_window_view(pad_edges(currents, window), window, axis=1), axis=-1)
+    residuals = currents - medians
+    # 1.4826 scales MAD to the standard deviation of normally distributed noise
+    mad = 1.4826 * np.median(np.abs(residuals), axis=1, keepdims=True)
+    spikes = np.abs(residuals) > params["threshold"] * mad
+    return np.where(spikes, medians, currents)
+
+def subtract_baseline(times: np.ndarray, currents: np.ndarray, params: dict):
+    # Subtract the mean current between start and end times. Rows without samples in the range are left as is
+    mask = (times >= params["start"]) & (times <= params["end"])
+    counts = mask.sum(axis=1, keepdims=True)
+    sums = np.where(mask, currents, 0.0).sum(axis=1, keepdims=True)
+    baselines = np.divide(sums, counts, out=np.zeros_like(sums, dtype=float), where=counts > 0)
+    return currents - baselines
+
+def get_smoothing_coefficients(method: str, window: int, polyorder: int):
+    if method == "moving_average":
+        return np.full(window, 1 / window)
+    # Savitzky-Golay: value at the window center of the least squares polynomial fit
+    half = window // 2
+    x = np.arange(-half, half + 1)
+    vandermonde = np.vander(x, min(polyorder, window - 1) + 1, increasing=True)
+    return np.linalg.pinv(vandermonde)[0]
+
+def smooth(times: np.ndarray, currents: np.ndarray, params: dict):
+    window = max(3, int(params["window"]) | 1)
+    if currents.shape[1] < window:
+        return currents
+    coefficients = get_smoothing_coefficients(params["method"], window, int(params["polyorder"]))
+    return sliding_window_view(pad_edges(currents, window), window, axis=1) @ coefficients
+
+STAGE_FUNCTIONS = {"clip": clip_spikes, "baseline": subtract_baseline, "smooth": smooth}
+
+def process(datasets: dict, config: dict, cache: dict):
+    # Returns {set_id: preprocessed currents}.
+    # The output of every stage is cached per dataset with the parameters of that stage and all before it,
+    # so changing one stage only recomputes it and the stages after it.
+    # Datasets with the same sample count are stacked and processed as one array.
+    stage_keys = [get_stage_key(config, stage) for stage in STAGES]
+
+    for set_id in list(cache):
+        if set_id not in datasets:
+            cache.pop(set_id)
+
+    for set_id, data in datasets.items():
+        version = data.get("version", 0)
+        entry = cache.get(set_id)
+        if entry == None or entry["version"] != version:
+            entry = {"version": version, "input": np.asarray(data["currents"]), "keys": [], "outputs": []}
+            cache[set_id] = entry
+        # Keep the cached stages up to the first one whose parameters changed
+        valid = 0
+        while valid < len(entry["keys"]) and entry["keys"][valid] == stage_keys[valid]:
+            valid += 1
+        del entry["keys"][valid:]
+        del entry["outputs"][valid:]
+
+    for i, stage in enumerate(STAGES):
+        pending = [set_id for set_id in datasets if len(cache[set_id]["keys"]) == i]
+        if len(pending) == 0:
+            continue
+
+        groups = {}
+        for set_id in pending:
+            entry = cache[set_id]
+            previous = entry["outputs"][-1] if entry["outputs"] else entry["input"]
+            groups.setdefault(len(previous), []).append(set_id)
+
+        for set_ids in groups.values():
+            inputs = [cache[set_id]["outputs"][-1] if cache[set_id]["outputs"] else cache[set_id]["input"] for set_id in set_ids]
+            if config[stage]["enabled"]:
+                times = np.array([datasets[set_id]["times"] for set_id in set_ids], dtype=float)
+                outputs = STAGE_FUNCTIONS[stage](times, np.array(inputs, dtype=float), config[stage])
+            else:
+                # Disabled stage passes its input through without a copy
+                outputs = inputs
+            for set_id, output in zip(set_ids, outputs):
+                cache[set_id]["keys"].append(stage_keys[i])
+                cache[set_id]["outputs"].append(output)
+
+    return {set_id: cache[set_id]["outputs"][-1] for set_id in datasets}
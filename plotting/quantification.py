@@ -0,0 +1,53 @@
+import numpy as np
+from plotting import regression
+
+# Concentrations of unknown samples from a calibration line current = slope * concentration + intercept
+
+def get_calibration(results: list, weighted: bool = False):
+    '''
+    Calibration line from results as returned by calculate_results, None without a usable line. weighted fits with
+    1/std² weights:
+    {"slope", "intercept", "residual_std", "count", "mean_concentration", "mean_current", "sxx", "current_range": (low, high)}
+    '''
+    if len(results) < 2:
+        return None
+    concentrations = np.array([concentration for concentration, _ in results], dtype=float)
+    averages = np.array([stats[0] for _, stats in results], dtype=float)
+    weights = regression.get_inverse_variance_weights(np.array([stats[1] for _, stats in results], dtype=float)) if weighted else None
+    fit = regression.fit_lines(concentrations, averages, weights=weights)
+    slope = float(fit["slope"])
+    intercept = float(fit["intercept"])
+    if not np.isfinite(slope) or slope == 0:
+        return None
+    count = len(concentrations)
+    residuals = fit["residuals"][np.isfinite(fit["residuals"])]
+    # The converter interpolates within the trendline at the calibration concentrations, so that is the valid range
+    trendline = slope * concentrations + intercept
+    return {
+        "slope": slope,
+        "intercept": intercept,
+        "residual_std": float(np.sqrt((residuals**2).sum() / (count - 2))) if count > 2 else np.nan,
+        "count": count,
+        "mean_concentration": float(concentrations.mean()),
+        "mean_current": float(averages.mean()),
+        "sxx": float(((concentrations - concentrations.mean())**2).sum()),
+        "current_range": (float(trendline.min()), float(trendline.max()))
+    }
+
+def predict_concentrations(currents, calibration: dict, replicates: int = 1):
+    '''
+    Inverse prediction of every current at once: {"concentrations", "ses", "out_of_range"}.
+    ses are the standard errors of the concentrations from the scatter of the calibration points around the line,
+    nan with less than 3 calibration points. replicates is the number of measurements averaged into each current.
+    Currents outside the calibration range and nan currents are out of range.
+    '''
+    currents = np.asarray(currents, dtype=float)
+    slope = calibration["slope"]
+    concentrations = (currents - calibration["intercept"]) / slope
+    # Classical inverse regression: s_x = s_y / |m| * sqrt(1/k + 1/n + (y - ȳ)² / (m² Sxx))
+    ses = calibration["residual_std"] / abs(slope) * np.sqrt(
+        1 / replicates + 1 / calibration["count"] + (currents - calibration["mean_current"])**2 / (slope**2 * calibration["sxx"])
+    )
+    low, high = calibration["current_range"]
+    out_of_range = ~((currents >= low) & (currents <= high))
+    return {"concentrations": concentrations, "ses": ses, "out_of_range": out_of_range}
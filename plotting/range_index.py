@@ -0,0 +1,132 @@
+import numpy as np
+
+# Order statistics of any range of one trace without sorting the range, from a wavelet matrix.
+# The values are replaced by their ranks, and every level of the matrix splits the ranks by one bit, from the highest,
+# keeping their order otherwise. A query follows its range down the levels, so the k-th smallest value or the sum of
+# the k smallest values of a range costs one step per bit of the length, whatever the length of the range.
+# All steps are numpy operations over arrays of queries, so many ranges are answered at once.
+# The bits of every level are packed with a count of zeros every RANK_BLOCK_BYTES bytes, about 0.2 bytes per value
+# and level. The sums for trimmed means take 8 bytes per value and level and are only built when asked for.
+
+RANK_BLOCK_BYTES = 8
+POPCOUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+def build_rank_dictionary(bits: np.ndarray):
+    # Packed bits and the number of set bits before every block. Padded so positions up to len(bits) can be counted
+    block_count = len(bits) // (8 * RANK_BLOCK_BYTES) + 1
+    packed = np.zeros(block_count * RANK_BLOCK_BYTES, dtype=np.uint8)
+    packed_bits = np.packbits(bits, bitorder="little")
+    packed[:len(packed_bits)] = packed_bits
+    block_sums = POPCOUNTS[packed].reshape(block_count, RANK_BLOCK_BYTES).sum(axis=1)
+    block_counts = np.concatenate(([0], np.cumsum(block_sums)[:-1])).astype(np.int64)
+    return packed, block_counts
+
+def count_bits(packed: np.ndarray, block_counts: np.ndarray, positions: np.ndarray):
+    # Number of set bits before every position
+    byte_index = positions >> 3
+    block = byte_index // RANK_BLOCK_BYTES
+    offsets = np.arange(RANK_BLOCK_BYTES)
+    block_bytes = packed[block[..., None] * RANK_BLOCK_BYTES + offsets]
+    whole_bytes = offsets < (byte_index % RANK_BLOCK_BYTES)[..., None]
+    partial = packed[byte_index] & ((1 << (positions & 7)) - 1)
+    return block_counts[block] + (POPCOUNTS[block_bytes] * whole_bytes).sum(axis=-1) + POPCOUNTS[partial]
+
+def build_range_index(values, with_sums: bool = False):
+    # with_sums is needed for sum_smallest and trimmed means
+    values = np.asarray(values, dtype=float)
+    count = len(values)
+    level_count = max(1, int(count - 1).bit_length())
+    # Ranks are distinct, equal values are ranked by position. Non-finite values rank above every finite one
+    order = np.argsort(np.where(np.isfinite(values), values, np.inf), kind="stable")
+    ranks = np.empty(count, dtype=np.int64)
+    ranks[order] = np.arange(count)
+    current_ranks = ranks
+    current_values = values
+    levels = []
+    for level in range(level_count):
+        bit = level_count - 1 - level
+        zeros = ((current_ranks >> bit) & 1) == 0
+        packed, block_counts = build_rank_dictionary(zeros)
+        zero_sums = None
+        if with_sums:
+            # Prefix sums start with 0 so that the sum over [l, r) is sums[r] - sums[l]. Non-finite values are left out
+            zero_sums = np.concatenate(([0.0], np.cumsum(np.where(zeros & np.isfinite(current_values), current_values, 0.0))))
+        levels.append({"zero_count": int(zeros.sum()), "packed": packed, "block_counts": block_counts, "zero_sums": zero_sums})
+        # Stable partition, zeros first
+        current_ranks = np.concatenate((current_ranks[zeros], current_ranks[~zeros]))
+        if with_sums:
+            current_values = np.concatenate((current_values[zeros], current_values[~zeros]))
+    return {"level_count": level_count, "sorted_values": values[order], "levels": levels, "with_sums": with_sums}
+
+def descend(index: dict, starts, ends, k):
+    # Follows the ranges [starts, ends) down to the rank of their k-th smallest value, k from 0.
+    # Returns the ranks and, for indexes with sums, the sums of the values smaller than them
+    starts = np.array(starts, dtype=np.int64)
+    ends = np.array(ends, dtype=np.int64)
+    k = np.array(k, dtype=np.int64)
+    ranks = np.zeros(starts.shape, dtype=np.int64)
+    sums = np.zeros(starts.shape)
+    level_count = index["level_count"]
+    for i, level in enumerate(index["levels"]):
+        zero_starts = count_bits(level["packed"], level["block_counts"], starts)
+        zero_ends = count_bits(level["packed"], level["block_counts"], ends)
+        zeros_in_range = zero_ends - zero_starts
+        left = k < zeros_in_range
+        if level["zero_sums"] is not None:
+            # Going right passes every zero in the range, they are all smaller
+            sums += np.where(left, 0.0, level["zero_sums"][ends] - level["zero_sums"][starts])
+        k = np.where(left, k, k - zeros_in_range)
+        zero_count = level["zero_count"]
+        starts, ends = np.where(left, zero_starts, zero_count + starts - zero_starts), np.where(left, zero_ends, zero_count + ends - zero_ends)
+        ranks |= np.where(left, 0, 1 << (level_count - 1 - i))
+    return ranks, sums
+
+def kth_smallest(index: dict, starts, ends, k):
+    # k-th smallest value of every range [starts, ends), k from 0 and less than the length of the range
+    ranks, _ = descend(index, starts, ends, k)
+    return index["sorted_values"][np.minimum(ranks, len(index["sorted_values"]) - 1)]
+
+def sum_smallest(index: dict, starts, ends, k):
+    # Sum of the k smallest values of every range [starts, ends), k up to the length of the range
+    if not index["with_sums"]:
+        raise ValueError("sum_smallest needs an index built with sums")
+    sorted_values = index["sorted_values"]
+    k = np.asarray(k, dtype=np.int64)
+    if len(sorted_values) == 0:
+        return np.zeros(k.shape)
+    # The sum of all values below the k-th, the k-th itself is left out as k counts from 0
+    ranks, sums = descend(index, starts, ends, np.maximum(k - 1, 0))
+    return np.where(k > 0, sums + sorted_values[np.minimum(ranks, len(sorted_values) - 1)], 0.0)
+
+def range_medians(index: dict, starts, ends, counts=None):
+    '''
+    Median of every range [starts, ends), nan for empty ranges. Even lengths give the mean of the two middle values.
+    counts are the numbers of finite values in the ranges, non-finite values are left out with them
+    '''
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    counts = ends - starts if counts is None else np.asarray(counts, dtype=np.int64)
+    if len(index["sorted_values"]) == 0:
+        return np.full(counts.shape, np.nan)
+    valid = counts > 0
+    lower = kth_smallest(index, starts, ends, np.where(valid, (counts - 1) // 2, 0))
+    upper = kth_smallest(index, starts, ends, np.where(valid, counts // 2, 0))
+    return np.where(valid, (lower + upper) / 2, np.nan)
+
+def get_trim_counts(counts, trim: float):
+    # Values cut from each end of ranges of counts values, at least one value is kept
+    counts = np.asarray(counts, dtype=np.int64)
+    cut = np.floor(counts * min(max(trim, 0.0), 0.5)).astype(np.int64)
+    return np.where(counts - 2 * cut < 1, np.maximum(counts - 1, 0) // 2, cut)
+
+def range_trimmed_means(index: dict, starts, ends, trim: float, counts=None):
+    # Mean of every range [starts, ends) without the floor(trim × length) smallest and largest values, nan for empty ranges.
+    # counts as for range_medians
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    counts = ends - starts if counts is None else np.asarray(counts, dtype=np.int64)
+    cut = get_trim_counts(counts, trim)
+    kept = counts - 2 * cut
+    sums = sum_smallest(index, starts, ends, counts - cut) - sum_smallest(index, starts, ends, cut)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / kept, np.nan)
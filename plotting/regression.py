@@ -0,0 +1,73 @@
+import numpy as np
+
+def pack_rows(rows: list):
+    # Pads 1D sequences of different lengths with nan into one rows × longest array, and returns it with a mask of real values
+    lengths = np.array([len(row) for row in rows], dtype=int)
+    packed = np.full((len(rows), lengths.max(initial=0)), np.nan)
+    mask = np.arange(packed.shape[1]) < lengths[:, None]
+    if len(rows) > 0:
+        packed[mask] = np.concatenate([np.asarray(row, dtype=float) for row in rows])
+    return packed, mask
+
+def get_inverse_variance_weights(stds, mask = None):
+    # Weights 1/σ². A zero σ gets the smallest nonzero σ of its row, rows without any nonzero σ get equal weights
+    stds = np.abs(np.asarray(stds, dtype=float))
+    valid = np.isfinite(stds) & (stds > 0)
+    if mask is not None:
+        valid &= mask
+    smallest = np.where(valid, stds, np.inf).min(axis=-1, keepdims=True)
+    stds = np.where(valid, stds, smallest)
+    weights = np.where(np.isfinite(stds), 1 / stds**2, 1.0)
+    return weights
+
+def fit_lines(x, y, mask = None, weights = None):
+    '''
+    Least squares lines y = slope * x + intercept for every row of x and y at once, in closed form.
+    Samples where mask is False or y is nan are left out. Optional weights are usually 1/σ².
+    Returns a dict of arrays with one value per row: "slope", "intercept", "r_squared", "slope_se",
+    "intercept_se", "count", and "residuals" with the shape of y.
+    Rows with less than 2 distinct x values give nan, standard errors need at least 3 points.
+    '''
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x, y = np.broadcast_arrays(x, y)
+    valid = np.isfinite(y) & np.isfinite(x)
+    if mask is not None:
+        valid &= np.broadcast_to(mask, y.shape)
+    w = np.ones(y.shape) if weights is None else np.broadcast_to(np.asarray(weights, dtype=float), y.shape)
+    w = np.where(valid, w, 0.0)
+    x0 = np.where(valid, x, 0.0)
+    y0 = np.where(valid, y, 0.0)
+
+    count = valid.sum(axis=-1)
+    sum_w = w.sum(axis=-1)
+    sum_wx = (w * x0).sum(axis=-1)
+    sum_wy = (w * y0).sum(axis=-1)
+    sum_wxx = (w * x0 * x0).sum(axis=-1)
+    sum_wxy = (w * x0 * y0).sum(axis=-1)
+    determinant = sum_w * sum_wxx - sum_wx**2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (sum_w * sum_wxy - sum_wx * sum_wy) / determinant
+        intercept = (sum_wy - slope * sum_wx) / sum_w
+
+        residuals = np.where(valid, y - (slope[..., None] * x + intercept[..., None]), np.nan)
+        residual_ss = (w * np.where(valid, residuals, 0.0)**2).sum(axis=-1)
+        mean_y = sum_wy / sum_w
+        total_ss = (w * np.where(valid, y - mean_y[..., None], 0.0)**2).sum(axis=-1)
+        r_squared = 1 - residual_ss / total_ss
+
+        # Residual variance scales the covariance, like np.polyfit(cov=True)
+        variance = np.where(count > 2, residual_ss / (count - 2), np.nan)
+        slope_se = np.sqrt(variance * sum_w / determinant)
+        intercept_se = np.sqrt(variance * sum_wxx / determinant)
+
+    return {
+        "slope": slope,
+        "intercept": intercept,
+        "r_squared": r_squared,
+        "slope_se": slope_se,
+        "intercept_se": intercept_se,
+        "count": count,
+        "residuals": residuals
+    }
@@ -0,0 +1,83 @@
+import numpy as np
+
+# Mean and standard deviation transient curves of the replicates of every concentration.
+# Datasets are resampled onto one shared time grid with linear interpolation. Datasets that share their times array,
+# as replicates of one measurement session usually do, are interpolated together with one lookup of the grid.
+# The resampled rows are cached per grid, so only new or changed datasets are interpolated again.
+
+def get_common_grid(times_list: list, length: int):
+    # Grid of length points over the time range covered by every dataset, None if they do not overlap
+    starts = [float(times[0]) for times in times_list if len(times) > 1]
+    ends = [float(times[-1]) for times in times_list if len(times) > 1]
+    if len(starts) == 0 or length < 2:
+        return None
+    start = max(starts)
+    end = min(ends)
+    if end <= start:
+        return None
+    return np.linspace(start, end, length)
+
+def interpolate_rows(times, currents_rows: np.ndarray, grid: np.ndarray):
+    # Linear interpolation of every row of currents_rows, all sampled at times, at the grid times
+    times = np.asarray(times, dtype=float)
+    right = np.clip(np.searchsorted(times, grid, side="right"), 1, len(times) - 1)
+    left = right - 1
+    spans = times[right] - times[left]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = np.where(spans > 0, (grid - times[left]) / spans, 0.0)
+    weights = np.clip(weights, 0.0, 1.0)
+    return currents_rows[:, left] * (1 - weights) + currents_rows[:, right] * weights
+
+def resample(datasets: dict, currents_by_id: dict, grid: np.ndarray, cache: dict):
+    '''
+    datasets × grid matrix of the currents of datasets interpolated at the grid times, in the order of datasets.
+    currents_by_id overrides the currents of datasets, e.g. preprocessed ones. Rows are cached in cache while the grid
+    and the times and currents objects of the dataset stay the same.
+    '''
+    currents_by_id = currents_by_id or {}
+    grid_key = (float(grid[0]), float(grid[-1]), len(grid))
+    if cache.get("grid") != grid_key:
+        cache.clear()
+        cache["grid"] = grid_key
+    rows = cache.setdefault("rows", {})
+    for set_id in list(rows):
+        if set_id not in datasets:
+            rows.pop(set_id)
+
+    # Datasets without a cached row, grouped by their times array
+    pending = {}
+    for set_id, data in datasets.items():
+        currents = currents_by_id.get(set_id, data["currents"])
+        cached = rows.get(set_id)
+        if cached == None or cached[0] is not data["times"] or cached[1] is not currents:
+            pending.setdefault(id(data["times"]), []).append(set_id)
+    for set_ids in pending.values():
+        times = datasets[set_ids[0]]["times"]
+        currents_list = [currents_by_id.get(set_id, datasets[set_id]["currents"]) for set_id in set_ids]
+        interpolated = interpolate_rows(times, np.asarray(currents_list, dtype=float), grid)
+        for set_id, currents, row in zip(set_ids, currents_list, interpolated):
+            # Keeping the source objects makes the identity check safe
+            rows[set_id] = (datasets[set_id]["times"], currents, row)
+
+    if len(datasets) == 0:
+        return np.empty((0, len(grid)))
+    return np.stack([rows[set_id][2] for set_id in datasets])
+
+def get_replicate_curves(datasets: dict, currents_by_id: dict, grid: np.ndarray, cache: dict):
+    '''
+    Mean and population std curves of the datasets with the same concentration:
+    {"grid", "concentrations": sorted unique concentrations, "means", "stds": concentrations × grid, "counts": datasets per concentration}
+    '''
+    matrix = resample(datasets, currents_by_id, grid, cache)
+    concentrations = np.array([data["concentration"] for data in datasets.values()], dtype=float)
+    # Rows sorted by concentration so every group is one block, then sums of the blocks in one reduction
+    order = np.argsort(concentrations, kind="stable")
+    unique_concentrations, starts, counts = np.unique(concentrations[order], return_index=True, return_counts=True)
+    if len(order) == 0:
+        return {"grid": grid, "concentrations": unique_concentrations, "means": matrix, "stds": matrix, "counts": counts}
+    sorted_matrix = matrix[order]
+    means = np.add.reduceat(sorted_matrix, starts, axis=0) / counts[:, None]
+    # Deviations from the group means rather than sums of squares, which lose precision for small currents with an offset
+    deviations = sorted_matrix - np.repeat(means, counts, axis=0)
+    stds = np.sqrt(np.add.reduceat(deviations**2, starts, axis=0) / counts[:, None])
+    return {"grid": grid, "concentrations": unique_concentrations, "means": means, "stds": stds, "counts": counts}
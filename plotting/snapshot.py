@@ -0,0 +1,76 @@
+from types import MappingProxyType
+
+# Read-only views of the PlotDataHandler state for readers on other threads, e.g. autosave.
+# The handler publishes a new Snapshot after every change, on the thread that made the change, and readers take
+# handler.snapshot without a lock. A snapshot never changes: dataspace and dataset dicts are shallow copies behind
+# read-only proxies, and the arrays and every unchanged dataspace and dataset are shared with the previous snapshot.
+# This relies on writers replacing arrays and nested values (metadata, windows, preprocessing) instead of changing them in place.
+
+def freeze(mapping: dict):
+    return MappingProxyType(dict(mapping))
+
+def thaw(value):
+    # Plain dicts again, e.g. for pickling. Arrays are still shared
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    return value
+
+def freeze_dataspace(dataspace: dict, datasets: dict):
+    # datasets are the already frozen datasets of the dataspace
+    return MappingProxyType(dict(dataspace, datasets=MappingProxyType(datasets)))
+
+class Snapshot():
+    __slots__ = ("generation", "dataspaces", "selected_space_id", "active_spaces_ids", "time_range")
+
+    def __init__(self, generation: int, dataspaces: MappingProxyType, selected_space_id, active_spaces_ids: tuple, time_range: tuple):
+        object.__setattr__(self, "generation", generation)
+        object.__setattr__(self, "dataspaces", dataspaces)
+        object.__setattr__(self, "selected_space_id", selected_space_id)
+        object.__setattr__(self, "active_spaces_ids", active_spaces_ids)
+        object.__setattr__(self, "time_range", time_range)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshot is read-only")
+
+    def get_datasets(self, space_id):
+        dataspace = self.dataspaces.get(space_id)
+        return dataspace["datasets"] if dataspace != None else None
+
+    def get_dataspaces_dict(self):
+        return thaw(self.dataspaces)
+
+def create_snapshot(handler, previous: Snapshot = None, changes: dict = None):
+    '''
+    Snapshot of the handler state. changes tells what changed since previous: {space_id: set of dataset ids, or None for all}.
+    Dataspaces not in changes are taken from previous as they are, so the cost is in the changed datasets only.
+    Without previous or changes everything is copied.
+    '''
+    if previous == None or changes == None:
+        changes = {space_id: None for space_id in handler.dataspaces}
+        dataspaces = {}
+    else:
+        dataspaces = dict(previous.dataspaces)
+
+    for space_id, set_ids in changes.items():
+        dataspace = handler.dataspaces.get(space_id)
+        if dataspace == None:
+            dataspaces.pop(space_id, None)
+            continue
+        source_datasets = dataspace["datasets"]
+        old = dataspaces.get(space_id)
+        if set_ids == None or old == None:
+            datasets = {set_id: freeze(data) for set_id, data in source_datasets.items()}
+        else:
+            datasets = dict(old["datasets"])
+            for set_id in set_ids:
+                if set_id in source_datasets:
+                    datasets[set_id] = freeze(source_datasets[set_id])
+                else:
+                    datasets.pop(set_id, None)
+        dataspaces[space_id] = freeze_dataspace(dataspace, datasets)
+
+    # Keep the order of the live dataspaces
+    if list(dataspaces) != list(handler.dataspaces):
+        dataspaces = {space_id: dataspaces[space_id] for space_id in handler.dataspaces if space_id in dataspaces}
+    generation = previous.generation + 1 if previous != None else 0
+    return Snapshot(generation, MappingProxyType(dataspaces), handler.selected_space_id, tuple(handler.active_spaces_ids), tuple(handler.time_range))
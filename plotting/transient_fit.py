@@ -0,0 +1,158 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from plotting.regression import pack_rows
+
+# Cottrell model I = a·t^-1/2 + b, optionally + c·exp(-t/tau). Fitted over start <= t <= end, end None is the end of the trace
+DEFAULT_CONFIG = {"start": 0.0, "end": None, "exponential": False}
+
+PARAMETERS = ("a", "b", "c", "tau", "rms", "plateau", "count")
+
+# Statistics the calibration curve can use. "mean" is the mean current within the time range
+CALIBRATION_STATISTICS = {"mean": "Window mean", "a": "Cottrell a", "plateau": "Plateau"}
+
+# Time constants tried for the exponential term, log spaced over the fitted time range
+TAU_GRID_SIZE = 32
+# Sessions with more samples than this are fitted in worker processes
+PARALLEL_MIN_SAMPLES = 20_000_000
+# Traces are fitted in blocks of similar length of at most this many padded samples, which bounds the temporaries
+BLOCK_SAMPLES = 1_000_000
+
+def get_config(config: dict = None):
+    return dict(DEFAULT_CONFIG, **(config or {}))
+
+def get_config_key(config: dict):
+    return tuple(sorted(config.items()))
+
+def solve(sums: dict, names: tuple):
+    # Normal equations of the basis columns in names from their pairwise sums, nan where the system is singular
+    size = len(names)
+    xtx = np.empty(sums["y"].shape + (size, size))
+    xty = np.empty(sums["y"].shape + (size,))
+    for i, first in enumerate(names):
+        xty[..., i] = sums[first + "y"]
+        for j, second in enumerate(names):
+            xtx[..., i, j] = sums[first + second] if first + second in sums else sums[second + first]
+    params = np.full(xty.shape, np.nan)
+    # Determinant relative to the product of the diagonal is 0 for collinear columns and 1 for orthogonal ones
+    with np.errstate(divide="ignore", invalid="ignore"):
+        solvable = np.linalg.det(xtx) > 1e-10 * np.prod(np.diagonal(xtx, axis1=-2, axis2=-1), axis=-1)
+    if solvable.any():
+        params[solvable] = np.linalg.solve(xtx[solvable], xty[solvable][..., None])[..., 0]
+    # Residual sum of squares from the sums, Σy² - 2pᵀXᵀy + pᵀXᵀXp. Good enough to compare candidates
+    rss = sums["yy"] - 2 * np.einsum("...i,...i", params, xty) + np.einsum("...i,...ij,...j", params, xtx, params)
+    return params, np.maximum(rss, 0)
+
+def fit_packed(times: np.ndarray, currents: np.ndarray, valid: np.ndarray, exponential: bool):
+    # Fits the rows of nan padded times × samples arrays. Returns a dict of one value per row for each of PARAMETERS
+    count = valid.sum(axis=-1)
+    s = np.where(valid, 1 / np.sqrt(np.where(valid, times, 1.0)), 0.0) # t^-1/2
+    one = valid.astype(float)
+    y = np.where(valid, currents, 0.0)
+    sums = {
+        "y": y.sum(axis=-1), "yy": (y * y).sum(axis=-1),
+        "ss": (s * s).sum(axis=-1), "s1": s.sum(axis=-1), "11": count.astype(float),
+        "sy": (s * y).sum(axis=-1), "1y": y.sum(axis=-1)
+    }
+    params, rss = solve(sums, ("s", "1"))
+    a, b = params[..., 0], params[..., 1]
+    c = np.zeros(len(a))
+    tau = np.full(len(a), np.nan)
+    offsets = None
+
+    if exponential and valid.any():
+        # c and tau by grid search over tau, the other parameters are linear for a fixed tau
+        starts = np.where(valid, times, np.inf).min(axis=-1)
+        ends = np.where(valid, times, -np.inf).max(axis=-1)
+        span = np.max(np.where(valid.any(axis=-1), ends - starts, 0))
+        if span > 0:
+            offsets = np.where(valid, times - np.where(np.isfinite(starts), starts, 0)[:, None], 0.0)
+            # One buffer for the exponential term of every candidate, and sums of products without temporaries
+            e = np.empty_like(offsets)
+            for candidate in np.geomspace(span / 1000, span, TAU_GRID_SIZE):
+                np.divide(offsets, -candidate, out=e)
+                np.exp(e, out=e)
+                e *= one
+                sums.update({
+                    "es": np.einsum("ij,ij->i", e, s), "e1": e.sum(axis=-1), "ee": np.einsum("ij,ij->i", e, e), "ey": np.einsum("ij,ij->i", e, y)
+                })
+                candidate_params, candidate_rss = solve(sums, ("s", "1", "e"))
+                better = candidate_rss < rss
+                better &= np.isfinite(candidate_params).all(axis=-1)
+                a = np.where(better, candidate_params[..., 0], a)
+                b = np.where(better, candidate_params[..., 1], b)
+                c = np.where(better, candidate_params[..., 2], c)
+                tau = np.where(better, candidate, tau)
+                rss = np.where(better, candidate_rss, rss)
+
+    # Residuals of the chosen fits directly, the sums lose precision when the residuals are small
+    model = a[:, None] * s + b[:, None] * one
+    if offsets is not None:
+        fitted = np.isfinite(tau)
+        model[fitted] += c[fitted, None] * np.exp(-offsets[fitted] / tau[fitted, None])
+    rss = (np.where(valid, y - model, 0.0)**2).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rms = np.where(np.isfinite(a), np.sqrt(rss / count), np.nan)
+    return {"a": a, "b": b, "c": c, "tau": tau, "rms": rms, "plateau": b, "count": count}
+
+def fit_block(times_list: list, currents_list: list, config: dict):
+    times, mask = pack_rows(times_list)
+    currents, _ = pack_rows(currents_list)
+    end = np.inf if config["end"] == None else config["end"]
+    # t^-1/2 needs t > 0
+    with np.errstate(invalid="ignore"):
+        valid = mask & np.isfinite(currents) & (times > 0) & (times >= config["start"]) & (times <= end)
+    return fit_packed(times, currents, valid, config["exponential"])
+
+def get_blocks(lengths: list):
+    # Row indices grouped by length, shortest first, so that padding to the longest row of a block wastes little
+    # and no block has more than BLOCK_SAMPLES padded samples, unless it is one row
+    blocks = []
+    block = []
+    for index in np.argsort(lengths, kind="stable"):
+        if block and (len(block) + 1) * lengths[index] > BLOCK_SAMPLES:
+            blocks.append(block)
+            block = []
+        block.append(index)
+    if block:
+        blocks.append(block)
+    return blocks
+
+def fit_chunk(times_list: list, currents_list: list, config: dict):
+    blocks = get_blocks([len(times) for times in times_list])
+    if len(blocks) < 2:
+        return fit_block(times_list, currents_list, config)
+    fits = {}
+    for block in blocks:
+        block_fits = fit_block([times_list[i] for i in block], [currents_list[i] for i in block], config)
+        for name in PARAMETERS:
+            if name not in fits:
+                fits[name] = np.empty(len(times_list), dtype=block_fits[name].dtype)
+            fits[name][block] = block_fits[name]
+    return fits
+
+def fit_transients(times_list: list, currents_list: list, config: dict = None, workers: int = None):
+    '''
+    Fits every transient at once, see DEFAULT_CONFIG for the config.
+    Returns a dict of arrays with one value per transient: a, b, c, tau (nan without the exponential term),
+    rms (residual RMS), plateau (b, the current the transient decays to) and count (samples fitted).
+    Large sessions are split over worker processes. They are spawned rather than forked, as forking a process
+    with threads, e.g. the GUI or the service, can copy held locks into the children.
+    '''
+    config = get_config(config)
+    total_samples = sum(len(times) for times in times_list)
+    if workers == None:
+        workers = os.cpu_count() or 1
+    if total_samples < PARALLEL_MIN_SAMPLES or workers < 2 or len(times_list) < 2:
+        return fit_chunk(times_list, currents_list, config)
+
+    chunk_count = min(workers, len(times_list))
+    bounds = np.linspace(0, len(times_list), chunk_count + 1).astype(int)
+    with ProcessPoolExecutor(max_workers=chunk_count, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(fit_chunk, times_list[first:last], currents_list[first:last], config)
+            for first, last in zip(bounds[:-1], bounds[1:])
+        ]
+        chunks = [future.result() for future in futures]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in PARAMETERS}
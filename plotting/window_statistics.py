@@ -0,0 +1,233 @@
+import weakref
+import numpy as np
+from plotting import range_index, regression
+
+# Mean current of every dataset in many time windows, from cumulative sums.
+# All datasets of a dataspace are packed into flat arrays, with the times of each dataset shifted
+# into its own range. One searchsorted over the packed times then finds the samples of every
+# dataset × window pair, so a window costs two lookups per dataset instead of a pass over the samples.
+# Medians and trimmed means partition the samples of each window. A long trace that keeps being queried with long
+# windows gets a range index of its own instead, kept in the indexes dict passed in, see plotting.range_index.
+
+# Statistic of the currents within a window, per dataspace
+WINDOW_STATISTICS = {"mean": "Mean", "median": "Median", "trimmed_mean": "Trimmed mean"}
+DEFAULT_CONFIG = {
+    "statistic": "mean",
+    "trim": 0.1 # Proportion of the currents cut from each end for the trimmed mean
+}
+# A dataset gets a range index only when it has this many samples and a window holds this many of them, and once
+# the samples partitioned in such windows add up to RANGE_INDEX_PAYBACK times its length. Building the index
+# costs about as much as partitioning 50 times the samples, so it then has paid for itself
+RANGE_INDEX_MIN_SAMPLES = 200_000
+RANGE_INDEX_MIN_WINDOW = 20_000
+RANGE_INDEX_PAYBACK = 50
+
+def get_config(config: dict = None):
+    return dict(DEFAULT_CONFIG, **(config or {}))
+
+def get_ordered_trace(times, currents):
+    # Samples of one dataset in time order without non-finite times, as windows are found by binary search.
+    # Traces that already are, as nearly all are, are returned as they are
+    times = np.asarray(times, dtype=float)
+    currents = np.asarray(currents)
+    if len(times) == 0 or (np.isfinite(times[[0, -1]]).all() and np.all(np.diff(times) >= 0)):
+        return times, currents
+    finite = np.flatnonzero(np.isfinite(times))
+    order = finite[np.argsort(times[finite], kind="stable")]
+    return times[order], currents[order]
+
+def pack_datasets(set_ids: list, times_list: list, currents_list: list):
+    ordered = [get_ordered_trace(times, currents) for times, currents in zip(times_list, currents_list)]
+    times_arrays = [times for times, _ in ordered]
+    currents_list = [currents for _, currents in ordered]
+    lengths = np.array([len(times) for times in times_arrays])
+    min_time = min((times[0] for times in times_arrays if len(times) > 0), default=0.0)
+    max_time = max((times[-1] for times in times_arrays if len(times) > 0), default=0.0)
+    stride = max_time - min_time + 1.0
+
+    row_offsets = np.arange(len(times_arrays)) * stride
+    packed_times = np.concatenate([times - min_time + offset for times, offset in zip(times_arrays, row_offsets)]) if len(times_arrays) > 0 else np.empty(0)
+    # Cumulative sums start with 0 so that the sum of samples [i, j) is sums[j] - sums[i]. nan currents are left out
+    # of the sums and counts, so they only affect windows they are in and not every later one
+    packed_sums = np.concatenate([
+        np.concatenate(([0.0], np.cumsum(np.where(np.isfinite(currents), currents, 0.0), dtype=float))) for currents in currents_list
+    ]) if len(currents_list) > 0 else np.empty(0)
+    packed_counts = np.concatenate([
+        np.concatenate(([0], np.cumsum(np.isfinite(currents), dtype=np.int64))) for currents in currents_list
+    ]) if len(currents_list) > 0 else np.empty(0, dtype=np.int64)
+
+    return {
+        "set_ids": list(set_ids),
+        "min_time": min_time,
+        "stride": stride,
+        "row_offsets": row_offsets,
+        "time_starts": np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) > 0 else lengths,
+        "sum_starts": np.concatenate(([0], np.cumsum(lengths + 1)[:-1])) if len(lengths) > 0 else lengths,
+        "packed_times": packed_times,
+        "packed_sums": packed_sums,
+        "packed_counts": packed_counts,
+        # Ordered currents of every dataset, for medians and trimmed means
+        "currents_list": list(currents_list)
+    }
+
+def get_packed_datasets(datasets: dict, currents_by_id: dict = None, cache: dict = None):
+    # Packed arrays of all datasets, reused while the times and currents objects of every dataset stay the same
+    currents_by_id = currents_by_id or {}
+    sources = [(set_id, data["times"], currents_by_id.get(set_id, data["currents"])) for set_id, data in datasets.items()]
+    if cache != None:
+        packed = cache.get("packed")
+        if packed != None and len(packed["sources"]) == len(sources) and all(
+            set_id == cached[0] and times is cached[1] and currents is cached[2]
+            for (set_id, times, currents), cached in zip(sources, packed["sources"])
+        ):
+            return packed
+
+    set_ids, times_list, currents_list = zip(*sources) if sources else ([], [], [])
+    packed = pack_datasets(set_ids, times_list, currents_list)
+    # Keeping the source objects makes the identity check above safe
+    packed["sources"] = sources
+    if cache != None:
+        cache["packed"] = packed
+    return packed
+
+def get_window_ranges(packed: dict, windows: np.ndarray):
+    # Positions [first, last) of the samples of every dataset × window pair within each dataset
+    stride = packed["stride"]
+    # Clamp into the range of each row so that queries do not reach into the neighbouring rows
+    starts = np.clip(windows[:, 0] - packed["min_time"], -0.5, stride - 0.5)
+    ends = np.clip(windows[:, 1] - packed["min_time"], -0.5, stride - 0.5)
+    row_offsets = packed["row_offsets"][:, None]
+    first = np.searchsorted(packed["packed_times"], starts[None, :] + row_offsets, side="left")
+    last = np.searchsorted(packed["packed_times"], ends[None, :] + row_offsets, side="right")
+
+    # Positions within each row
+    time_starts = packed["time_starts"][:, None]
+    return first - time_starts, last - time_starts
+
+def window_means(packed: dict, windows):
+    # Returns a datasets × windows matrix of mean currents. windows is a sequence of (start, end) times, both inclusive.
+    # Windows without finite samples give nan
+    windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+    row_count = len(packed["set_ids"])
+    if row_count == 0 or len(windows) == 0:
+        return np.empty((row_count, len(windows)))
+
+    first, last = get_window_ranges(packed, windows)
+    sum_starts = packed["sum_starts"][:, None]
+    sums = packed["packed_sums"][sum_starts + last] - packed["packed_sums"][sum_starts + first]
+    counts = packed["packed_counts"][sum_starts + last] - packed["packed_counts"][sum_starts + first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def get_range_index(indexes: dict, set_id, currents: np.ndarray, with_sums: bool, window_samples: int):
+    '''
+    Range index of one dataset from indexes, None until it pays for itself. window_samples are the samples the
+    query would partition without it. Entries are rebuilt when the currents object changes or sums are missing
+    '''
+    entry = indexes.get(set_id)
+    # A weak reference, so the currents are not counted with the indexes in the memory accounting and the
+    # check fails once they are gone
+    if entry == None or entry["currents"]() is not currents or (with_sums and entry["index"] != None and not entry["index"]["with_sums"]):
+        entry = {"currents": weakref.ref(currents), "index": None, "partitioned": 0}
+        indexes[set_id] = entry
+    if entry["index"] == None:
+        entry["partitioned"] += window_samples
+        if entry["partitioned"] < RANGE_INDEX_PAYBACK * len(currents):
+            return None
+        entry["index"] = range_index.build_range_index(currents, with_sums)
+    return entry["index"]
+
+def partition_statistic(window: np.ndarray, statistic: str, trim: float):
+    # Median or trimmed mean of the finite values of one window, only the order statistics needed are placed
+    window = window[np.isfinite(window)]
+    count = len(window)
+    if count == 0:
+        return np.nan
+    if statistic == "median":
+        middle = [(count - 1) // 2, count // 2]
+        return float(np.partition(window, middle)[middle].mean())
+    cut = int(range_index.get_trim_counts(count, trim))
+    if cut == 0:
+        return float(window.mean())
+    return float(np.partition(window, [cut, count - cut - 1])[cut:count - cut].mean())
+
+def window_statistic(packed: dict, windows, config: dict = None, indexes: dict = None):
+    '''
+    Like window_means, with the statistic of config, see DEFAULT_CONFIG. nan currents are left out.
+    indexes keeps the range indexes of long datasets by dataset id between calls; without it none are built
+    '''
+    config = get_config(config)
+    statistic = config["statistic"]
+    if statistic == "mean":
+        return window_means(packed, windows)
+    if statistic not in WINDOW_STATISTICS:
+        raise ValueError(f"Unknown window statistic: {statistic}")
+    if indexes != None:
+        # Indexes of removed datasets are freed
+        set_ids = set(packed["set_ids"])
+        for set_id in list(indexes):
+            if set_id not in set_ids:
+                indexes.pop(set_id)
+    windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+    row_count = len(packed["set_ids"])
+    if row_count == 0 or len(windows) == 0:
+        return np.empty((row_count, len(windows)))
+
+    first, last = get_window_ranges(packed, windows)
+    sum_starts = packed["sum_starts"][:, None]
+    finite_counts = packed["packed_counts"][sum_starts + last] - packed["packed_counts"][sum_starts + first]
+
+    results = np.full(first.shape, np.nan)
+    for row, (set_id, currents) in enumerate(zip(packed["set_ids"], packed["currents_list"])):
+        lengths = last[row] - first[row]
+        index = None
+        if indexes != None and len(currents) >= RANGE_INDEX_MIN_SAMPLES and lengths.max() >= RANGE_INDEX_MIN_WINDOW:
+            index = get_range_index(indexes, set_id, currents, statistic == "trimmed_mean", int(lengths.sum()))
+        if index == None:
+            currents = np.asarray(currents, dtype=float)
+            results[row] = [partition_statistic(currents[start:end], statistic, config["trim"]) for start, end in zip(first[row], last[row])]
+        elif statistic == "median":
+            results[row] = range_index.range_medians(index, first[row], last[row], finite_counts[row])
+        else:
+            results[row] = range_index.range_trimmed_means(index, first[row], last[row], config["trim"], finite_counts[row])
+    return results
+
+def group_by_concentration(concentrations, means: np.ndarray):
+    # Mean and population std of the rows of means with the same concentration.
+    # Returns sorted unique concentrations and concentrations × windows arrays
+    concentrations = np.asarray(concentrations, dtype=float)
+    unique_concentrations, inverse = np.unique(concentrations, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique_concentrations))[:, None]
+    sums = np.zeros((len(unique_concentrations), means.shape[1]))
+    np.add.at(sums, inverse, means)
+    averages = sums / counts
+    squares = np.zeros_like(sums)
+    np.add.at(squares, inverse, (means - averages[inverse])**2)
+    stds = np.sqrt(squares / counts)
+    return unique_concentrations, averages, stds, counts[:, 0]
+
+def get_window_results(datasets: dict, set_ids: list, means: np.ndarray, windows: list, weighted: bool = False):
+    # Groups the visible rows of means, as returned by window_statistic for set_ids, by concentration and fits one line
+    # per window, see PlotDataHandler.calculate_window_results
+    visible = [i for i, set_id in enumerate(set_ids) if not datasets[set_id]["hidden"]]
+    set_ids = [set_ids[i] for i in visible]
+    means = means[visible]
+    concentrations = [datasets[set_id]["concentration"] for set_id in set_ids]
+    unique_concentrations, averages, stds, counts = group_by_concentration(concentrations, means)
+    # One line per window, fitted to the concentration averages
+    weights = regression.get_inverse_variance_weights(stds.T) if weighted else None
+    fit = regression.fit_lines(unique_concentrations, averages.T, weights=weights)
+    return {
+        "windows": windows,
+        "set_ids": set_ids,
+        "means": means,
+        "concentrations": unique_concentrations,
+        "averages": averages,
+        "stds": stds,
+        "counts": counts,
+        "slopes": fit["slope"],
+        "intercepts": fit["intercept"],
+        "r_squared": fit["r_squared"],
+        "slope_ses": fit["slope_se"],
+        "intercept_ses": fit["intercept_se"]
+    }
@@ -0,0 +1,609 @@
+"""
+Local HTTP/JSON analysis service. Uses the same parsers and PlotDataHandler maths as the app, without Qt.
+
+Usage:
+    python -m service.server --port 8750 --workers 8
+
+Endpoints (JSON unless noted, add ?format=npz for NumPy .npz responses):
+    GET  /health
+    GET  /metrics                                    request latency and queue statistics
+    GET  /dataspaces                                 dataspaces with dataset counts
+    POST /import                                     {"paths": [...], "space_id"?, "space_name"?, "concentrations"?: [...], "ingest"?: {...}}
+    POST /dataspaces/<space_id>/datasets             .npz body with "times" and "currents", ?name=&concentration=
+    GET  /dataspaces/<space_id>/datasets             dataset metadata
+    GET  /dataspaces/<space_id>/datasets/<set_id>    trace, ?format=npz for binary
+    POST /dataspaces/<space_id>/concentrations       {"<set_id>": concentration, ...}
+    POST /dataspaces/<space_id>/windows              [{"name", "start", "end"}, ...]
+    DELETE /dataspaces/<space_id>
+    GET  /dataspaces/<space_id>/results              ?start=&end=&weighted=, named windows of the dataspace included
+    GET  /dataspaces/<space_id>/calibration          ?start=&end=&weighted=
+    POST /dataspaces/<space_id>/calibration/predict  {"currents": [...], "start"?, "end"?, "weighted"?}
+    GET  /dataspaces/<space_id>/transient_fit        Cottrell fit parameters per dataset
+    POST /dataspaces/<space_id>/transient_fit        {"start"?, "end"?, "exponential"?} fit settings
+    GET  /history                                    ?batch=&window=span&field=slope&since=&until=, calibration drift, needs --history
+    GET  /history/batches                            batches (dataspace names) in the calibration history
+
+The optional "ingest" options decimate and convert the imported traces, see plotting.decimation.DEFAULT_INGEST_OPTIONS.
+
+Requests run on a bounded pool of worker threads. File parsing runs on a separate process pool and outside the
+data lock, so a large import does not hold up results queries. Results and calibrations are computed outside
+the lock too, from the data handler snapshot. Parsed files are cached by path, size and modification time across
+requests. Request inputs are checked before any state changes.
+"""
+
+import os
+import io
+import re
+import json
+import socket
+import argparse
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import gui.data_operations as do
+import gui.calibration_history as ch
+from plotting.plot_data_handler import PlotDataHandler
+from plotting.decimation import apply_ingest_options
+from plotting import transient_fit, window_statistics, quantification
+from utils import instrumentation
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ParseCache():
+    # Parsed files by (path, size, mtime), least recently used files dropped first
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, filepath):
+        stat = os.stat(filepath)
+        return (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, parsed):
+        with self.lock:
+            self.entries[key] = parsed
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+def parse_file(filepath):
+    # Runs in a parse worker process. Returns (times, currents, name, metadata) of every measurement in the file
+    return [
+        (measurement["arrays"]["time"], measurement["arrays"]["currents"], measurement["name"], measurement["metadata"])
+        for measurement in do.extract_measurements_from_file(filepath)
+    ]
+
+class AnalysisService():
+    # Shared state of the service. The lock guards the data handler, parsing happens outside it
+
+    def __init__(self, parse_workers: int = 4, cache_entries: int = 1024, history_path: str = None):
+        # Parsing runs in processes so that it does not compete with request threads for the GIL
+        self.data_handler = PlotDataHandler()
+        self.data_handler.dataspaces = {} # Instance dict instead of the class level one
+        self.data_handler.active_spaces_ids = []
+        self.lock = threading.RLock()
+        # The state is read from the snapshot under the lock and the statistics are computed outside it, under a lock
+        # per dataspace, as the derived data caches of a dataspace are updated in place
+        self.compute_locks = {}
+        self.parse_cache = ParseCache(cache_entries)
+        self.parse_workers = parse_workers
+        # Spawned rather than forked, forking while request threads hold locks can copy the held locks into the children
+        self.parse_pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"))
+        self.next_space_id = 0
+        self.next_set_id = 0
+        # Results are recorded to the calibration history if a path is given
+        self.history = ch.CalibrationHistory(history_path) if history_path else None
+
+    def create_ids(self, space_id, count: int):
+        # Picks a dataspace id if none given and reserves dataset ids. Called with the lock held
+        if space_id == None:
+            space_id = self.next_space_id
+        self.next_space_id = max(self.next_space_id, space_id + 1)
+        set_ids = list(range(self.next_set_id, self.next_set_id + count))
+        self.next_set_id += count
+        return space_id, set_ids
+
+    def get_compute_lock(self, space_id):
+        # setdefault is atomic, so two requests can not get different locks
+        return self.compute_locks.setdefault(space_id, threading.Lock())
+
+    def get_dataspace(self, space_id):
+        dataspace = self.data_handler.dataspaces.get(space_id)
+        if dataspace == None:
+            raise ServiceError(404, f"Dataspace {space_id} does not exist")
+        return dataspace
+
+    def import_files(self, paths: list, space_id = None, space_name: str = "", concentrations: list = None, ingest: dict = None):
+        # Every input is checked before parsing, so a bad request leaves no dataspace or ids behind
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            raise ServiceError(400, "paths must be a list of file paths")
+        if space_id != None and (not isinstance(space_id, int) or isinstance(space_id, bool) or space_id < 0):
+            raise ServiceError(400, "space_id must be a non-negative integer")
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            raise ServiceError(400, f"Files not found: {missing}")
+        if concentrations != None:
+            if not isinstance(concentrations, list) or len(concentrations) != len(paths):
+                raise ServiceError(400, "concentrations must have one value per path")
+            try:
+                concentrations = [float(concentration) for concentration in concentrations]
+            except (TypeError, ValueError):
+                raise ServiceError(400, "concentrations must be numbers")
+
+        # Parse without the lock so that other requests keep running
+        keys = [self.parse_cache.get_key(path) for path in paths]
+        parsed = [self.parse_cache.get(key) for key in keys]
+        missing_indices = [i for i, item in enumerate(parsed) if item == None]
+        chunk_size = max(1, len(missing_indices) // (4 * self.parse_workers))
+        for i, item in zip(missing_indices, self.parse_pool.map(parse_file, [paths[i] for i in missing_indices], chunksize=chunk_size)):
+            self.parse_cache.put(keys[i], item)
+            parsed[i] = item
+
+        # Cached traces stay raw, ingest options are applied per import
+        try:
+            parsed = [
+                [(*apply_ingest_options(times, currents, ingest), set_name, metadata) for times, currents, set_name, metadata in measurements]
+                for measurements in parsed
+            ]
+        except (ValueError, TypeError, KeyError) as e:
+            raise ServiceError(400, f"Invalid ingest options: {e}")
+
+        # A file can hold several measurements, they all get the concentration of the file
+        with self.lock:
+            space_id, set_ids = self.create_ids(space_id, sum(len(measurements) for measurements in parsed))
+            datasets = []
+            for i, measurements in enumerate(parsed):
+                for times, currents, ingest_record, set_name, metadata in measurements:
+                    datasets.append({
+                        "set_id": set_ids[len(datasets)],
+                        "name": set_name,
+                        "times": times,
+                        "currents": currents,
+                        "concentration": concentrations[i] if concentrations != None else 0.0,
+                        "metadata": {**metadata, "ingest": ingest_record}
+                    })
+            self.data_handler.add_datasets_batch(datasets, space_name or f"Set {space_id}", "", space_id)
+        return {"space_id": space_id, "set_ids": set_ids}
+
+    def add_array_dataset(self, space_id, times: np.ndarray, currents: np.ndarray, name: str, concentration: float):
+        if times.ndim != 1 or times.shape != currents.shape:
+            raise ServiceError(400, "times and currents must be 1D arrays of the same length")
+        with self.lock:
+            space_id, set_ids = self.create_ids(space_id, 1)
+            dataset = {"set_id": set_ids[0], "name": name or f"Data {set_ids[0]}", "times": times, "currents": currents, "concentration": concentration}
+            self.data_handler.add_datasets_batch([dataset], f"Set {space_id}", "", space_id)
+        return {"space_id": space_id, "set_ids": set_ids}
+
+    def list_dataspaces(self):
+        with self.lock:
+            return [
+                {"space_id": space_id, "name": dataspace["name"], "dataset_count": len(dataspace["datasets"]), "windows": dataspace.get("windows", [])}
+                for space_id, dataspace in self.data_handler.dataspaces.items()
+            ]
+
+    def list_datasets(self, space_id):
+        with self.lock:
+            dataspace = self.get_dataspace(space_id)
+            return [
+                {"set_id": set_id, "name": data["name"], "concentration": data["concentration"], "hidden": data["hidden"], "samples": len(data["times"]),
+                 "metadata": data.get("metadata", {})}
+                for set_id, data in dataspace["datasets"].items()
+            ]
+
+    def get_trace(self, space_id, set_id):
+        with self.lock:
+            datasets = self.get_dataspace(space_id)["datasets"]
+            if set_id not in datasets:
+                raise ServiceError(404, f"Dataset {set_id} does not exist")
+            data = datasets[set_id]
+            return {"name": data["name"], "times": np.asarray(data["times"]), "currents": np.asarray(data["currents"])}
+
+    def set_concentrations(self, space_id, concentrations: dict):
+        try:
+            concentrations = {int(set_id): float(concentration) for set_id, concentration in concentrations.items()}
+        except (AttributeError, TypeError, ValueError):
+            raise ServiceError(400, "Give a concentration number for every dataset id")
+        with self.lock:
+            datasets = self.get_dataspace(space_id)["datasets"]
+            missing = [set_id for set_id in concentrations if set_id not in datasets]
+            if missing:
+                raise ServiceError(404, f"Datasets {missing} do not exist")
+            with self.data_handler.batch_update():
+                for set_id, concentration in concentrations.items():
+                    data = datasets[set_id]
+                    self.data_handler.update_dataset(set_id, data["name"], concentration, data["notes"], space_id)
+        return {"updated": len(concentrations)}
+
+    def set_windows(self, space_id, windows: list):
+        try:
+            windows = [{"name": str(window["name"]), "start": float(window["start"]), "end": float(window["end"])} for window in windows]
+        except (KeyError, TypeError, ValueError):
+            raise ServiceError(400, "windows must be a list of {\"name\", \"start\", \"end\"}")
+        with self.lock:
+            self.get_dataspace(space_id)
+            self.data_handler.set_windows(windows, space_id)
+        return {"windows": len(windows)}
+
+    def delete_dataspace(self, space_id):
+        # After running computations, which would otherwise recreate the dropped caches. Compute locks are always taken before the lock
+        with self.get_compute_lock(space_id), self.lock:
+            self.get_dataspace(space_id)
+            self.data_handler.delete_dataspace(space_id)
+        return {"deleted": space_id}
+
+    def get_results(self, space_id, start: float = None, end: float = None, weighted: bool = False):
+        # Only the snapshot is taken under the lock. Preprocessing, packing and the statistics run outside it, so results
+        # queries do not hold up imports, edits or queries of other dataspaces
+        with self.lock:
+            self.get_dataspace(space_id)
+            dataspace = self.data_handler.snapshot.dataspaces[space_id]
+        windows = list(dataspace.get("windows", []))
+        if start != None and end != None:
+            windows.insert(0, {"name": "span", "start": start, "end": end})
+        if len(windows) == 0:
+            raise ServiceError(400, "Give start and end, or add windows to the dataspace")
+        config = window_statistics.get_config(dataspace.get("window_statistic"))
+        with self.get_compute_lock(space_id):
+            packed = self.data_handler.get_packed_datasets(space_id, dataspace)
+            indexes = self.data_handler.get_index(space_id, "range_index")
+            means = window_statistics.window_statistic(packed, [(window["start"], window["end"]) for window in windows], config, indexes)
+        results = window_statistics.get_window_results(dataspace["datasets"], packed["set_ids"], means, windows, weighted)
+        if self.history:
+            entries = ch.get_result_entries(dataspace, results, weighted)
+            if entries:
+                self.history.record(entries, origin="service")
+        results["concentrations"] = results["concentrations"].tolist()
+        return results
+
+    def get_history(self):
+        if self.history == None:
+            raise ServiceError(404, "Calibration history is not enabled, start the service with --history")
+        return self.history
+
+    def query_history(self, batch: str, window: str = "span", field: str = "slope", since: float = None, until: float = None):
+        if field not in ch.FIELDS:
+            raise ServiceError(400, f"field must be one of {list(ch.FIELDS)}")
+        drift = self.get_history().query_drift(batch, window, field, since, until)
+        return {"batch": batch, "window": window, "field": field, **drift}
+
+    def get_calibration(self, space_id, start: float, end: float, weighted: bool = False):
+        results = self.get_results(space_id, start, end, weighted)
+        # The first window is the requested span
+        calibration_results = [(concentration, (results["averages"][i, 0], results["stds"][i, 0])) for i, concentration in enumerate(results["concentrations"])]
+        return {
+            "space_id": space_id,
+            "start": start,
+            "end": end,
+            "weighted": weighted,
+            "slope": results["slopes"][0],
+            "intercept": results["intercepts"][0],
+            "r_squared": results["r_squared"][0],
+            "slope_se": results["slope_ses"][0],
+            "intercept_se": results["intercept_ses"][0],
+            "concentration_range": [min(results["concentrations"], default=np.nan), max(results["concentrations"], default=np.nan)],
+            # For predict, see plotting.quantification
+            "line": quantification.get_calibration(calibration_results, weighted)
+        }
+
+    def predict(self, space_id, currents: list, start: float, end: float, weighted: bool = False):
+        # Same inverse prediction as Quantify Samples in the app: out of range outside the currents of the calibration line
+        calibration = self.get_calibration(space_id, start, end, weighted)
+        line = calibration["line"]
+        if line == None:
+            raise ServiceError(400, "The dataspace has no calibration line in this time range")
+        prediction = quantification.predict_concentrations(currents, line)
+        return dict(calibration, concentrations=prediction["concentrations"], ses=prediction["ses"], out_of_range=prediction["out_of_range"])
+
+    def get_transient_fits(self, space_id):
+        # Fitted outside the lock like get_results
+        with self.lock:
+            self.get_dataspace(space_id)
+            dataspace = self.data_handler.snapshot.dataspaces[space_id]
+        with self.get_compute_lock(space_id):
+            fits = self.data_handler.calculate_transient_fits(space_id, dataspace)
+        fits["config"] = transient_fit.get_config(dataspace.get("transient_fit"))
+        return fits
+
+    def set_transient_fit_config(self, space_id, config: dict):
+        unknown = config.keys() - transient_fit.DEFAULT_CONFIG.keys()
+        if unknown:
+            raise ServiceError(400, f"Unknown transient fit settings: {sorted(unknown)}")
+        with self.lock:
+            self.get_dataspace(space_id)
+            self.data_handler.set_transient_fit_config(config, space_id)
+            return self.data_handler.get_transient_fit_config(space_id)
+
+def to_json(value):
+    # JSON compatible copy, nan and inf become null
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return to_json(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+def to_npz(value: dict):
+    arrays = {}
+    for key, item in value.items():
+        if isinstance(item, (np.ndarray, list, tuple, int, float, bool, np.generic)):
+            array = np.asarray(item)
+            if array.dtype != object:
+                arrays[key] = array
+        elif isinstance(item, str):
+            arrays[key] = np.array(item)
+        elif key == "windows":
+            arrays["window_names"] = np.array([window["name"] for window in item])
+            arrays["window_bounds"] = np.array([[window["start"], window["end"]] for window in item], dtype=float)
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: "ServiceHTTPServer"
+    # One request per connection (HTTP/1.0), so idle clients do not hold a worker
+    timeout = 30
+
+    # (method, pattern, handler method name, metrics name)
+    routes = [
+        ("GET", r"/health", "get_health", "health"),
+        ("GET", r"/metrics", "get_metrics", "metrics"),
+        ("GET", r"/dataspaces", "get_dataspaces", "dataspaces"),
+        ("POST", r"/import", "post_import", "import"),
+        ("POST", r"/dataspaces/(\d+)/datasets", "post_datasets", "datasets.add"),
+        ("GET", r"/dataspaces/(\d+)/datasets", "get_datasets", "datasets"),
+        ("GET", r"/dataspaces/(\d+)/datasets/(\d+)", "get_trace", "trace"),
+        ("POST", r"/dataspaces/(\d+)/concentrations", "post_concentrations", "concentrations"),
+        ("POST", r"/dataspaces/(\d+)/windows", "post_windows", "windows"),
+        ("DELETE", r"/dataspaces/(\d+)", "delete_dataspace", "dataspaces.delete"),
+        ("GET", r"/dataspaces/(\d+)/results", "get_results", "results"),
+        ("GET", r"/dataspaces/(\d+)/calibration", "get_calibration", "calibration"),
+        ("POST", r"/dataspaces/(\d+)/calibration/predict", "post_predict", "calibration.predict"),
+        ("GET", r"/dataspaces/(\d+)/transient_fit", "get_transient_fit", "transient_fit"),
+        ("POST", r"/dataspaces/(\d+)/transient_fit", "post_transient_fit", "transient_fit.settings"),
+        ("GET", r"/history", "get_history", "history"),
+        ("GET", r"/history/batches", "get_history_batches", "history.batches")
+    ]
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def dispatch(self, method: str):
+        url = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        for route_method, pattern, handler_name, metric_name in self.routes:
+            match = re.fullmatch(pattern, url.path.rstrip("/") or "/")
+            if match and route_method == method:
+                break
+        else:
+            self.send_json({"error": f"No route for {method} {url.path}"}, 404)
+            return
+
+        try:
+            with instrumentation.span(f"service.{metric_name}"):
+                args = [int(group) for group in match.groups()]
+                result = getattr(self, handler_name)(*args)
+                if self.query.get("format") == "npz" and isinstance(result, dict):
+                    self.send_bytes(to_npz(result), "application/x-npz")
+                else:
+                    self.send_json(result)
+        except ServiceError as e:
+            self.send_json({"error": str(e)}, e.status)
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            self.send_json({"error": f"Bad request: {e}"}, 400)
+        except Exception as e:
+            print(f"service: {method} {url.path}: {e}")
+            self.send_json({"error": str(e)}, 500)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > self.server.max_body_bytes:
+            raise ServiceError(413, "Request body too large")
+        return self.rfile.read(length) if length > 0 else b""
+
+    def read_json(self):
+        body = self.read_body()
+        return json.loads(body) if body else {}
+
+    def send_json(self, value, status: int = 200):
+        self.send_bytes(json.dumps(to_json(value)).encode("utf-8"), "application/json", status)
+
+    def send_bytes(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_float(self, name: str, body: dict = None):
+        value = (body or {}).get(name, self.query.get(name))
+        return float(value) if value != None else None
+
+    def get_bool(self, name: str, body: dict = None):
+        value = (body or {}).get(name, self.query.get(name, False))
+        return value in (True, "1", "true", "True")
+
+    # Routes
+
+    def get_health(self):
+        return {"status": "ok"}
+
+    def get_metrics(self):
+        service: AnalysisService = self.server.service
+        requests = {name[len("service."):]: stats for name, stats in instrumentation.get_stats().items() if name.startswith("service.")}
+        return {
+            "requests": requests,
+            "workers": self.server.workers,
+            "queued": self.server.queued,
+            "rejected": self.server.rejected,
+            "parse_cache": {"entries": len(service.parse_cache.entries), "hits": service.parse_cache.hits, "misses": service.parse_cache.misses}
+        }
+
+    def get_dataspaces(self):
+        return self.server.service.list_dataspaces()
+
+    def post_import(self):
+        body = self.read_json()
+        return self.server.service.import_files(body["paths"], body.get("space_id"), body.get("space_name", ""), body.get("concentrations"), body.get("ingest"))
+
+    def post_datasets(self, space_id):
+        with np.load(io.BytesIO(self.read_body()), allow_pickle=False) as arrays:
+            times = np.asarray(arrays["times"], dtype=float)
+            currents = np.asarray(arrays["currents"])
+        concentration = self.get_float("concentration") or 0.0
+        return self.server.service.add_array_dataset(space_id, times, currents, self.query.get("name", ""), concentration)
+
+    def get_datasets(self, space_id):
+        return self.server.service.list_datasets(space_id)
+
+    def get_trace(self, space_id, set_id):
+        return self.server.service.get_trace(space_id, set_id)
+
+    def post_concentrations(self, space_id):
+        return self.server.service.set_concentrations(space_id, self.read_json())
+
+    def post_windows(self, space_id):
+        return self.server.service.set_windows(space_id, self.read_json())
+
+    def delete_dataspace(self, space_id):
+        return self.server.service.delete_dataspace(space_id)
+
+    def get_results(self, space_id):
+        return self.server.service.get_results(space_id, self.get_float("start"), self.get_float("end"), self.get_bool("weighted"))
+
+    def get_calibration(self, space_id):
+        start, end = self.get_float("start"), self.get_float("end")
+        if start == None or end == None:
+            raise ServiceError(400, "start and end are required")
+        return self.server.service.get_calibration(space_id, start, end, self.get_bool("weighted"))
+
+    def post_predict(self, space_id):
+        body = self.read_json()
+        start, end = self.get_float("start", body), self.get_float("end", body)
+        if start == None or end == None:
+            raise ServiceError(400, "start and end are required")
+        return self.server.service.predict(space_id, body["currents"], start, end, self.get_bool("weighted", body))
+
+    def get_transient_fit(self, space_id):
+        return self.server.service.get_transient_fits(space_id)
+
+    def post_transient_fit(self, space_id):
+        return self.server.service.set_transient_fit_config(space_id, self.read_json())
+
+    def get_history(self):
+        if "batch" not in self.query:
+            raise ServiceError(400, "batch is required")
+        return self.server.service.query_history(self.query["batch"], self.query.get("window", "span"), self.query.get("field", "slope"),
+                                                 self.get_float("since"), self.get_float("until"))
+
+    def get_history_batches(self):
+        return self.server.service.get_history().get_batches()
+
+class ServiceHTTPServer(HTTPServer):
+    # Connections are handled on a bounded thread pool. When the queue is full new connections get 503
+    def __init__(self, address, service: AnalysisService, workers: int = 8, queue_size: int = 64, max_body_bytes: int = 512 * 1024 * 1024, verbose: bool = False):
+        super().__init__(address, RequestHandler)
+        self.service = service
+        self.workers = workers
+        self.max_body_bytes = max_body_bytes
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="request")
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.queued = 0
+        self.rejected = 0
+        self.counter_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            with self.counter_lock:
+                self.rejected += 1
+            self.reject_request(request)
+            return
+        with self.counter_lock:
+            self.queued += 1
+        self.pool.submit(self.process_request_in_pool, request, client_address)
+
+    def process_request_in_pool(self, request, client_address):
+        with self.counter_lock:
+            self.queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def reject_request(self, request: socket.socket):
+        try:
+            request.sendall(b"HTTP/1.0 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+        self.service.parse_pool.shutdown(wait=True)
+
+def create_server(host: str = "127.0.0.1", port: int = 8750, workers: int = 8, parse_workers: int = 4, queue_size: int = 64, verbose: bool = False,
+                  history_path: str = None):
+    # Latency metrics come from the instrumentation spans
+    instrumentation.set_enabled(True)
+    service = AnalysisService(parse_workers, history_path=history_path)
+    return ServiceHTTPServer((host, port), service, workers, queue_size, verbose=verbose)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON analysis service")
+    parser.add_argument("--host", default="127.0.0.1", help="Only bind to other addresses on trusted networks, there is no authentication")
+    parser.add_argument("--port", type=int, default=8750)
+    parser.add_argument("--workers", type=int, default=8, help="Threads handling requests")
+    parser.add_argument("--parse-workers", type=int, default=4, help="Processes parsing imported files")
+    parser.add_argument("--queue-size", type=int, default=64, help="Connections waiting for a worker before new ones get 503")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--history", metavar="PATH", help="Record calibrations to this SQLite calibration history")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.workers, args.parse_workers, args.queue_size, args.verbose, args.history)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
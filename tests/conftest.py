@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app packages are imported from the repository root, and Qt needs no display
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
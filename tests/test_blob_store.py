@@ -0,0 +1,77 @@
+import os
+import pickle
+import numpy as np
+from gui.blob_store import BlobStore, BlobRef, get_digest
+import gui.data_operations as do
+
+def test_put_and_get_round_trip(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    for array in (np.linspace(0, 1, 100), np.arange(10, dtype=np.float32), np.array([]), [1.0, 2.0]):
+        ref = store.put(array)
+        loaded = store.get(ref)
+        assert np.array_equal(loaded, np.asarray(array))
+        assert loaded.dtype == np.asarray(array).dtype
+
+def test_equal_arrays_are_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    first = store.put(np.arange(100.0))
+    second = store.put(np.arange(100.0))
+    assert first.digest == second.digest
+    assert len(list(store.iter_blobs())) == 1
+    # dtype and shape are part of the digest
+    assert get_digest(np.arange(4.0)) != get_digest(np.arange(4.0).astype(np.float32))
+    assert get_digest(np.zeros(4)) != get_digest(np.zeros((2, 2)))
+
+def test_refs_pickle_by_value():
+    ref = BlobRef("ab" * 20, "<f8", (3,))
+    loaded = pickle.loads(pickle.dumps(ref))
+    assert (loaded.digest, loaded.dtype, loaded.shape) == (ref.digest, ref.dtype, ref.shape)
+
+def test_remove_unreferenced(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    kept = store.put(np.arange(3.0))
+    dropped = store.put(np.arange(4.0))
+    # New blobs are kept, they may belong to a save in progress
+    assert store.remove_unreferenced({kept.digest}, min_age=3600) == (0, 0)
+    count, size = store.remove_unreferenced({kept.digest}, min_age=0, dry_run=True)
+    assert count == 1 and size > 0
+    assert os.path.exists(store.get_path(dropped.digest))
+    assert store.remove_unreferenced({kept.digest}, min_age=0)[0] == 1
+    assert not os.path.exists(store.get_path(dropped.digest))
+    assert np.array_equal(store.get(kept), np.arange(3.0))
+
+def get_state(dataspaces):
+    return {
+        "window": {"space_widget_id": 0},
+        "plot": {"selected_space_id": 0, "active_spaces_ids": [0], "dataspaces": dataspaces}
+    }
+
+def test_collect_blob_garbage_keeps_arrays_of_saves(tmp_path):
+    times = np.linspace(0, 1, 50)
+    state = get_state({0: {"name": "a", "notes": "", "datasets": {0: {"name": "x", "times": times, "currents": times * 2}}}})
+    do.save_program_state_to_file(state, str(tmp_path / "first.pickle"))
+    state["plot"]["dataspaces"][0]["datasets"][0]["currents"] = times * 3
+    do.save_program_state_to_file(state, str(tmp_path / "second.pickle"))
+    # times are shared, the first currents are only in the first save
+    assert do.collect_blob_garbage(str(tmp_path), min_age=0, dry_run=True)[0] == 0
+    os.remove(tmp_path / "first.pickle")
+    assert do.collect_blob_garbage(str(tmp_path), min_age=0)[0] == 1
+    loaded = do.load_program_state_from_file(str(tmp_path / "second.pickle"))
+    assert np.array_equal(loaded["plot"]["dataspaces"][0]["datasets"][0]["currents"], times * 3)
+
+def test_put_after_removal_writes_the_blob_again(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    array = np.arange(5.0)
+    ref = store.put(array)
+    assert store.remove_unreferenced(set(), min_age=0)[0] == 1
+    assert all(known[1].digest != ref.digest for known in store.known_arrays.values())
+    assert np.array_equal(store.get(store.put(array)), array)
+
+def test_put_after_removal_by_another_process(tmp_path):
+    # Blobs removed with the command line gc are not known to the store of a running app
+    store = BlobStore(str(tmp_path / "blobs"))
+    array = np.arange(5.0)
+    ref = store.put(array)
+    BlobStore(str(tmp_path / "blobs")).remove_unreferenced(set(), min_age=0)
+    assert not os.path.exists(store.get_path(ref.digest))
+    assert np.array_equal(store.get(store.put(array)), array)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import gui.calibration_history as ch
+from plotting.plot_data_handler import PlotDataHandler
+
+@pytest.fixture
+def history(tmp_path):
+    history = ch.CalibrationHistory(str(tmp_path / "history.sqlite"))
+    yield history
+    history.close()
+
+def get_entry(slope, batch="B1", window="span", sources=("a", "b")):
+    return {
+        "batch": batch, "window": window, "start": 1.0, "end": 2.0, "weighted": False,
+        "slope": slope, "intercept": 0.5, "r_squared": 0.99, "slope_se": 0.01 * slope, "intercept_se": np.nan,
+        "dataset_count": 4, "concentrations": [(0.0, 2, 0.5, 0.1), (1.0, 2, 0.5 + slope, np.nan)], "sources": list(sources)
+    }
+
+def test_record_then_query_drift(history):
+    for day, slope in enumerate([1.0, 1.1, 1.3]):
+        assert history.record([get_entry(slope), get_entry(slope * 2, window="late")], created=1000.0 + day * 86400) == 2
+    drift = history.query_drift("B1", "span", "slope")
+    assert drift["values"].tolist() == pytest.approx([1.0, 1.1, 1.3])
+    assert drift["errors"].tolist() == pytest.approx([0.01, 0.011, 0.013])
+    assert drift["created"].tolist() == [1000.0, 87400.0, 173800.0]
+    # Time limits, and nan for stored nan
+    drift = history.query_drift("B1", "late", "intercept_se", since=2000.0)
+    assert len(drift["values"]) == 2 and np.isnan(drift["values"]).all() and np.isnan(drift["errors"]).all()
+    assert history.get_batches() == ["B1"] and history.get_windows("B1") == ["late", "span"]
+    assert len(history.query_drift("B2")["ids"]) == 0
+    with pytest.raises(ValueError):
+        history.query_drift("B1", field="count")
+
+def test_details_and_shared_sources(history):
+    history.record([get_entry(1.0), get_entry(2.0, batch="B2")])
+    ids = [history.query_drift(batch)["ids"][0] for batch in ("B1", "B2")]
+    stats = history.get_concentration_stats(ids[0])
+    assert stats[0] == (0.0, 2, 0.5, 0.1) and stats[1][3] == None
+    assert history.get_sources(ids[0]) == history.get_sources(ids[1]) == ["a", "b"]
+    assert history.connection.execute("SELECT COUNT(*) FROM source_sets").fetchone()[0] == 1
+
+def test_unchanged_calibrations_are_recorded_once(history):
+    assert history.record([get_entry(1.0)]) == 1
+    assert history.record([get_entry(1.0)]) == 0
+    assert history.record([get_entry(1.0)], skip_unchanged=False) == 1
+    assert history.record([get_entry(1.2)]) == 1
+    assert history.get_count() == 3
+
+def test_entries_from_the_data_handler(history):
+    handler = PlotDataHandler()
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0]
+    handler.time_range = (0.0, 1.0)
+    times = np.linspace(0, 1, 11)
+    handler.add_datasets_batch([
+        {"set_id": i, "name": str(i), "times": times, "currents": np.full(11, 2.0 * concentration), "concentration": concentration,
+         "metadata": {"sha1": f"hash{i}"}}
+        for i, concentration in enumerate([0.0, 1.0, 2.0])
+    ], "batch 7", "", 0)
+    handler.set_windows([{"name": "w", "start": 0.5, "end": 1.0}], 0)
+    entries = ch.get_calibration_entries(handler, [0])
+    assert [(entry["batch"], entry["window"]) for entry in entries] == [("batch 7", "span"), ("batch 7", "w")]
+    assert entries[0]["slope"] == pytest.approx(2.0)
+    assert entries[0]["sources"] == ["hash0", "hash1", "hash2"]
+    history.record(entries)
+    assert history.query_drift("batch 7", "w")["values"].tolist() == pytest.approx([2.0])
@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import gui.curve_index as ci
+from benchmarks.generate_sessions import write_pst, TICKS_2024
+
+TIMES = np.arange(1, 201) * 0.05
+
+def write_curves(folder, shapes):
+    # One .pst file per curve shape
+    os.makedirs(folder, exist_ok=True)
+    filepaths = []
+    for i, currents in enumerate(shapes):
+        filepath = os.path.join(folder, f"CH{i + 1}-{i:05d}.pst")
+        write_pst(filepath, TIMES, currents, TICKS_2024)
+        filepaths.append(filepath)
+    return filepaths
+
+def get_shapes(count):
+    # Decays with different time constants, so every shape is different
+    return [-np.exp(-TIMES / (0.2 + 0.3 * i)) for i in range(count)]
+
+def test_features_ignore_scale_and_offset():
+    currents = np.sin(TIMES)
+    features = ci.get_features(TIMES, currents)
+    assert features.dtype == np.float32 and len(features) == ci.FEATURE_LENGTH
+    assert np.allclose(ci.get_features(TIMES, 5 * currents + 3), features, atol=1e-5)
+    assert np.isclose(features.mean(), 0, atol=1e-6) and np.isclose(features.std(), 1, atol=1e-5)
+    assert not ci.get_features(TIMES, np.ones(len(TIMES))).any()
+
+def test_query_finds_the_same_shape(tmp_path):
+    shapes = get_shapes(12)
+    filepaths = write_curves(str(tmp_path / "archive"), shapes)
+    index = ci.build_curve_index(filepaths, str(tmp_path / "index"), workers=1)
+    assert index.get_count() == 12
+    matches = index.query(TIMES, 2 * shapes[7] + 1, k=3)
+    assert len(matches) == 3
+    assert index.entries[matches[0][0]]["source"] == os.path.abspath(filepaths[7])
+    assert matches[0][1] < 1e-3 and matches[0][1] < matches[1][1] <= matches[2][1]
+    # The queried curve itself can be left out
+    entry = index.entries[matches[0][0]]
+    excluded = index.query(TIMES, shapes[7], k=3, exclude=(entry["sha1"], entry["measurement_index"]))
+    assert matches[0][0] not in [row for row, _ in excluded]
+
+def test_prefilter_gives_the_full_scan_results(tmp_path, monkeypatch):
+    shapes = get_shapes(30)
+    index = ci.build_curve_index(write_curves(str(tmp_path / "archive"), shapes), str(tmp_path / "index"), workers=1)
+    monkeypatch.setattr(ci, "PREFILTER_MIN_CANDIDATES", 10)
+    monkeypatch.setattr(ci, "PREFILTER_FACTOR", 5)
+    query = shapes[11] + 0.001 * np.cos(TIMES)
+    assert index.query(query, query, k=2, prefilter=True)[0][0] == index.query(query, query, k=2, prefilter=False)[0][0]
+
+def test_rebuild_reuses_unchanged_files(tmp_path, monkeypatch):
+    archive = str(tmp_path / "archive")
+    directory = str(tmp_path / "index")
+    filepaths = write_curves(archive, get_shapes(4))
+    index = ci.build_curve_index(filepaths, directory, workers=1)
+    index.close()
+    # Only the new file is parsed, the removed one is dropped
+    parsed = []
+    extract_file_features = ci.extract_file_features
+    def extract(filepath):
+        parsed.append(filepath)
+        return extract_file_features(filepath)
+    monkeypatch.setattr(ci, "extract_file_features", extract)
+    new_path = write_curves(str(tmp_path / "more"), get_shapes(5)[4:])[0]
+    index = ci.build_curve_index(filepaths[1:] + [new_path], directory, workers=1)
+    assert parsed == [os.path.abspath(new_path)]
+    assert [entry["source"] for entry in index.entries] == [os.path.abspath(filepath) for filepath in filepaths[1:] + [new_path]]
+    assert np.allclose(index.features[0], ci.get_features(TIMES, get_shapes(2)[1]), atol=1e-5)
+
+def test_empty_index(tmp_path):
+    index = ci.build_curve_index([], str(tmp_path / "index"), workers=1)
+    assert index.get_count() == 0 and index.query(TIMES, TIMES) == []
@@ -0,0 +1,70 @@
+import csv
+import os
+import numpy as np
+import pytest
+import gui.data_export as de
+from plotting.plot_data_handler import PlotDataHandler
+
+@pytest.fixture
+def handler():
+    handler = PlotDataHandler()
+    # Instance state instead of the class level defaults
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0, 1]
+    handler.time_range = (2.0, 4.0)
+    times = np.linspace(0, 10, 101)
+    for space_id in (0, 1):
+        datasets = [
+            {"set_id": space_id * 10 + i, "name": f"d{i}", "times": times, "currents": np.full(len(times), (space_id + 1) * concentration + 1.0), "concentration": concentration}
+            for i, concentration in enumerate([0.0, 1.0, 2.0])
+        ]
+        handler.add_datasets_batch(datasets, f"space {space_id}", "", space_id)
+    handler.set_windows([{"name": "late", "start": 6.0, "end": 8.0}], 1)
+    return handler
+
+def read_csv(filepath):
+    with open(filepath, newline="", encoding="utf-8") as file:
+        return list(csv.DictReader(file))
+
+def test_csv_and_npz_hold_the_same_results(handler, tmp_path):
+    path_base = str(tmp_path / "export")
+    filepaths = de.export_session(handler, path_base, traces="raw")
+    assert sorted(os.path.basename(filepath) for filepath in filepaths) == sorted([
+        "export_window_means.csv", "export_concentration_stats.csv", "export_trendlines.csv", "export_traces.csv", "export.npz"
+    ])
+
+    trendlines = read_csv(f"{path_base}_trendlines.csv")
+    assert [(row["space_id"], row["window"]) for row in trendlines] == [("0", "span"), ("1", "span"), ("1", "late")]
+    assert [float(row["slope"]) for row in trendlines] == pytest.approx([1.0, 2.0, 2.0])
+    assert [float(row["intercept"]) for row in trendlines] == pytest.approx([1.0, 1.0, 1.0])
+    window_means = read_csv(f"{path_base}_window_means.csv")
+    # 3 datasets in the span of space 0, 3 in the span and 3 in the window of space 1
+    assert len(window_means) == 9
+
+    with np.load(f"{path_base}.npz") as arrays:
+        assert np.allclose(arrays["trendlines/slope"], [float(row["slope"]) for row in trendlines])
+        assert arrays["trendlines/window"].tolist() == ["span", "span", "late"]
+        assert np.allclose(arrays["window_means/mean"], [float(row["mean"]) for row in window_means])
+        data = handler.dataspaces[1]["datasets"][12]
+        assert np.array_equal(arrays["traces/1/12/times"], data["times"])
+        assert np.array_equal(arrays["traces/1/12/currents"], data["currents"])
+
+    traces = np.loadtxt(f"{path_base}_traces.csv", delimiter=",", skiprows=1)
+    assert len(traces) == 6 * 101
+    rows = traces[(traces[:, 0] == 1) & (traces[:, 1] == 12)]
+    assert np.allclose(rows[:, 2], data["times"]) and np.allclose(rows[:, 3], data["currents"])
+
+def test_decimated_traces(handler, tmp_path):
+    path_base = str(tmp_path / "export")
+    de.export_session(handler, path_base, formats=("npz",), traces="decimated", decimation_factor=10, space_ids=[0])
+    with np.load(f"{path_base}.npz") as arrays:
+        assert len(arrays["traces/0/0/times"]) == 11
+        assert "traces/1/10/times" not in arrays.files
+
+def test_cancel_removes_partial_files(handler, tmp_path):
+    path_base = str(tmp_path / "export")
+    with pytest.raises(de.ExportCancelled):
+        # Cancel after the first dataspace
+        de.export_session(handler, path_base, traces="raw", progress=lambda done, total: done == 0)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,67 @@
+import hashlib
+import numpy as np
+import pytest
+import gui.data_operations as do
+from benchmarks.generate_sessions import pssession_measurement, write_pssession, write_pst, TICKS_2024
+
+def get_measurements(count, capitalized=True):
+    times = np.arange(1, 51) * 0.1
+    return [
+        (times, -1.0 / np.sqrt(times) - i, pssession_measurement(times, -1.0 / np.sqrt(times) - i, 0.4 + i * 0.1, TICKS_2024, f"Run {i}", capitalized))
+        for i in range(count)
+    ]
+
+@pytest.mark.parametrize("capitalized", [True, False])
+def test_every_measurement_of_a_pssession(tmp_path, capitalized):
+    folder = tmp_path / "batch"
+    folder.mkdir()
+    filepath = str(folder / "CH3-00001.pssession")
+    measurements = get_measurements(3, capitalized)
+    write_pssession(filepath, [measurement for _, _, measurement in measurements], capitalized)
+
+    extracted = do.extract_measurements_from_file(filepath)
+    assert [measurement["name"] for measurement in extracted] == ["batch CH3 Run 0", "batch CH3 Run 1", "batch CH3 Run 2"]
+    with open(filepath, "rb") as file:
+        sha1 = hashlib.sha1(file.read()).hexdigest()
+    for i, ((times, currents, _), measurement) in enumerate(zip(measurements, extracted)):
+        assert np.allclose(measurement["arrays"]["time"], times)
+        assert np.allclose(measurement["arrays"]["currents"], currents)
+        metadata = measurement["metadata"]
+        assert metadata["potential"] == pytest.approx(0.4 + i * 0.1)
+        assert (metadata["sha1"], metadata["measurement_index"], metadata["measurement_count"]) == (sha1, i, 3)
+        assert metadata["timestamp"] == TICKS_2024 and metadata["title"] == f"Run {i}"
+
+    # The single measurement reader gives the last one
+    times, currents, set_name = do.extract_pssession_pst_data_from_file(filepath)
+    assert np.allclose(currents, measurements[-1][1]) and set_name == "batch CH3"
+
+def test_measurements_without_currents_are_skipped(tmp_path):
+    measurements = get_measurements(2)
+    values = measurements[0][2]["DataSet"]["Values"]
+    measurements[0][2]["DataSet"]["Values"] = [value for value in values if not value["Type"].endswith("Currents")]
+    filepath = str(tmp_path / "CH1-00001.pssession")
+    write_pssession(filepath, [measurement for _, _, measurement in measurements])
+    extracted = do.extract_measurements_from_file(filepath)
+    assert len(extracted) == 1 and extracted[0]["metadata"]["measurement_count"] == 1
+
+def test_pst(tmp_path):
+    times = np.arange(1, 21) * 0.5
+    currents = np.linspace(-3, -1, 20)
+    filepath = str(tmp_path / "CH2-00004.pst")
+    write_pst(filepath, times, currents, TICKS_2024)
+    extracted = do.extract_measurements_from_file(filepath)
+    assert len(extracted) == 1
+    assert np.allclose(extracted[0]["arrays"]["time"], times)
+    assert np.allclose(extracted[0]["arrays"]["currents"], currents, rtol=1e-5)
+
+def test_unsupported_and_broken_files(tmp_path):
+    filepath = str(tmp_path / "notes.txt")
+    with open(filepath, "w") as file:
+        file.write("x")
+    with pytest.raises(ValueError):
+        do.extract_measurements_from_file(filepath)
+    broken = str(tmp_path / "CH1-1.pssession")
+    with open(broken, "w", encoding="utf-16-le") as file:
+        file.write("{not json")
+    # Files that fail give no measurements, the rest of an import goes on
+    assert do.extract_measurements_from_files([broken, filepath], workers=1) == [[], []]
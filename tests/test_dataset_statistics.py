@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from plotting import dataset_statistics
+from plotting.plot_data_handler import PlotDataHandler
+
+@pytest.fixture
+def handler():
+    handler = PlotDataHandler()
+    # Instance state instead of the class level defaults
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0]
+    times = np.linspace(0, 10, 1001)
+    handler.add_datasets_batch([{"set_id": i, "name": str(i), "times": times, "currents": 0.1 * i * times + 1, "concentration": i} for i in range(3)], "space", "", 0)
+    return handler
+
+def test_summary_of_a_noisy_line():
+    times = np.linspace(0, 100, 10001)
+    noise = np.random.default_rng(1).normal(0, 0.05, len(times))
+    currents = 2.0 + 0.01 * times + noise
+    currents[5000] += 10.0
+    summary = dataset_statistics.get_summary(times, currents)
+    assert summary["samples"] == 10001 and summary["sample_rate"] == pytest.approx(100)
+    assert summary["duration"] == pytest.approx(100)
+    assert summary["drift"] == pytest.approx(0.01, rel=0.05)
+    # The spike does not dominate the robust noise estimate
+    assert summary["noise"] == pytest.approx(0.05, rel=0.1)
+    assert summary["max"] == pytest.approx(currents.max())
+    assert (summary["non_monotonic"], summary["nan_count"]) == (0, 0)
+
+def test_nan_and_non_monotonic_times():
+    summary = dataset_statistics.get_summary([0.0, 1.0, 1.0, 0.5, 2.0], [1.0, np.nan, 2.0, 3.0, 4.0])
+    assert summary["non_monotonic"] == 2 and summary["nan_count"] == 1
+    assert summary["mean"] == pytest.approx(2.5)
+    empty = dataset_statistics.get_summary([], [])
+    assert empty["samples"] == 0 and np.isnan(empty["mean"]) and np.isnan(empty["noise"])
+
+def test_summaries_are_computed_when_first_asked_for(handler):
+    assert handler.get_cache(0, "summaries") == {}
+    summaries = handler.get_dataset_summaries(0)
+    assert [summaries[set_id]["drift"] for set_id in range(3)] == pytest.approx([0.0, 0.1, 0.2])
+    cached = dict(handler.get_cache(0, "summaries"))
+
+    times = handler.dataspaces[0]["datasets"][1]["times"]
+    handler.replace_dataset_data(1, times, np.ones(len(times)), 0)
+    summaries = handler.get_dataset_summaries(0)
+    # Only the replaced dataset is summarized again
+    assert handler.get_cache(0, "summaries")[0] is cached[0]
+    assert handler.get_cache(0, "summaries")[1] is not cached[1]
+    assert summaries[1]["drift"] == pytest.approx(0.0)
+
+def test_bulk_hide_publishes_one_snapshot(handler):
+    generation = handler.snapshot.generation
+    assert handler.set_datasets_hidden([0, 2, 99], True, 0) == 2
+    assert handler.snapshot.generation == generation + 1
+    assert [handler.snapshot.dataspaces[0]["datasets"][set_id]["hidden"] for set_id in range(3)] == [True, False, True]
+    # Nothing changes, nothing is published
+    assert handler.set_datasets_hidden([0, 2], True, 0) == 0
+    assert handler.snapshot.generation == generation + 1
+
+def test_table_sorts_nan_last():
+    from PyQt6.QtCore import Qt
+    from gui.statistics_table_model import StatisticsTableModel
+    model = StatisticsTableModel()
+    rows = [dict({key: np.nan for key, _ in dataset_statistics.DESCRIPTORS}, set_id=i, name=str(i), concentration=0.0, hidden=False, window_mean=np.nan)
+            for i in range(3)]
+    rows[0]["noise"], rows[2]["noise"] = 0.3, 0.1
+    model.set_rows(rows)
+    column = [key for key, _ in model.columns].index("noise")
+    model.sort(column, Qt.SortOrder.AscendingOrder)
+    assert [model.get_set_id(row) for row in range(3)] == [2, 0, 1]
+    model.sort(column, Qt.SortOrder.DescendingOrder)
+    assert [model.get_set_id(row) for row in range(3)] == [0, 2, 1]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from plotting import decimation
+
+def test_block_mean():
+    times = np.arange(10.0)
+    currents = np.arange(10.0) * 2
+    decimated_times, decimated_currents = decimation.decimate_block_mean(times, currents, 4)
+    # The shorter last block is kept as its own mean
+    assert decimated_times.tolist() == [1.5, 5.5, 8.5]
+    assert decimated_currents.tolist() == [3.0, 11.0, 17.0]
+
+def test_block_mean_keeps_dtype_and_short_traces():
+    currents = np.arange(9, dtype=np.float32)
+    assert decimation.decimate_block_mean(np.arange(9.0), currents, 3)[1].dtype == np.float32
+    times, currents = decimation.decimate_block_mean(np.arange(3.0), np.arange(3.0), 5)
+    assert times.tolist() == [0, 1, 2]
+    assert decimation.decimate_block_mean(np.arange(3.0), np.arange(3.0), 1)[0].tolist() == [0, 1, 2]
+
+def test_min_max_keeps_spikes():
+    times = np.arange(20.0)
+    currents = np.zeros(20)
+    currents[7] = 5.0
+    currents[13] = -3.0
+    decimated_times, decimated_currents = decimation.decimate_min_max(times, currents, 10)
+    assert 7.0 in decimated_times and 13.0 in decimated_times
+    assert decimated_currents.max() == 5.0 and decimated_currents.min() == -3.0
+    assert (np.diff(decimated_times) > 0).all()
+
+def test_decimation_factor():
+    times = np.linspace(0, 10, 10_001) # 1 kHz
+    assert decimation.get_sample_rate(times) == pytest.approx(1000)
+    assert decimation.get_decimation_factor(times, 10) == 100
+    assert decimation.get_decimation_factor(times, 10, "minmax") == 200
+    assert decimation.get_decimation_factor(times, 5000) == 1
+    assert decimation.get_decimation_factor(np.array([1.0]), 10) == 1
+
+def test_default_options_change_nothing():
+    times = np.linspace(0, 1, 101)
+    currents = np.sin(times)
+    new_times, new_currents, record = decimation.apply_ingest_options(times, currents, None)
+    assert np.array_equal(new_times, times) and np.array_equal(new_currents, currents)
+    assert record["samples"] == 101 and record["dtype"] == "float64"
+    assert "decimation" not in record
+    assert decimation.DEFAULT_INGEST_OPTIONS["decimation"] == None
+
+def test_apply_ingest_options():
+    times = np.linspace(0, 10, 10_001)
+    currents = np.cos(times)
+    new_times, new_currents, record = decimation.apply_ingest_options(times, currents, {"decimation": "mean", "target_rate": 10, "float32": True})
+    assert new_currents.dtype == np.float32
+    assert len(new_times) == len(new_currents) == record["samples"] == 101
+    assert record["factor"] == 100 and record["source_samples"] == 10_001
+    assert record["source_rate"] == pytest.approx(1000)
+    assert np.allclose(new_currents, np.cos(new_times), atol=1e-3)
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        decimation.apply_ingest_options(np.arange(10.0), np.arange(10.0), {"decimation": "median"})
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from plotting import preprocessing
+from plotting.plot_data_handler import PlotDataHandler
+
+@pytest.fixture
+def handler():
+    handler = PlotDataHandler()
+    # Instance state instead of the class level defaults
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0]
+    times = np.linspace(0, 10, 101)
+    handler.add_datasets_batch([{"set_id": i, "name": str(i), "times": times, "currents": times + i, "concentration": i} for i in range(3)], "space", "", 0)
+    return handler
+
+BASELINE = {"baseline": {"enabled": True, "start": 0.0, "end": 1.0}}
+
+def test_disabled_pipeline_gives_no_currents(handler):
+    assert handler.get_processed_currents(0) == None
+
+def test_baseline_subtraction(handler):
+    handler.set_preprocessing(BASELINE, 0)
+    processed = handler.get_processed_currents(0)
+    times = handler.dataspaces[0]["datasets"][0]["times"]
+    for set_id in range(3):
+        # Mean of times 0..1 is 0.5, the offset cancels
+        assert np.allclose(processed[set_id], times - 0.5)
+
+def test_unchanged_pipeline_reuses_outputs(handler):
+    handler.set_preprocessing(BASELINE, 0)
+    first = handler.get_processed_currents(0)
+    second = handler.get_processed_currents(0)
+    assert all(second[set_id] is first[set_id] for set_id in first)
+
+def test_pipeline_change_recomputes_from_the_changed_stage(handler):
+    handler.set_preprocessing(dict(BASELINE, clip={"enabled": True, "window": 5, "threshold": 5.0}), 0)
+    handler.get_processed_currents(0)
+    cache = handler.get_cache(0, "preprocessing")
+    clipped = cache[0]["outputs"][0]
+    handler.set_preprocessing(dict(BASELINE, clip={"enabled": True, "window": 5, "threshold": 5.0}, baseline={"enabled": True, "start": 0.0, "end": 2.0}), 0)
+    processed = handler.get_processed_currents(0)
+    # The clip stage before the changed one is kept
+    assert cache[0]["outputs"][0] is clipped
+    assert np.allclose(processed[0], handler.dataspaces[0]["datasets"][0]["times"] - 1.0)
+
+def test_replaced_data_is_processed_again(handler):
+    handler.set_preprocessing(BASELINE, 0)
+    first = handler.get_processed_currents(0)
+    times = handler.dataspaces[0]["datasets"][1]["times"]
+    handler.replace_dataset_data(1, times, times * 2, 0)
+    processed = handler.get_processed_currents(0)
+    assert processed[0] is first[0]
+    assert processed[1] is not first[1]
+    assert np.allclose(processed[1], times * 2 - 1.0)
+
+def test_removed_datasets_leave_the_cache(handler):
+    handler.set_preprocessing(BASELINE, 0)
+    handler.get_processed_currents(0)
+    handler.dataspaces[0]["datasets"].pop(2)
+    assert set(handler.get_processed_currents(0)) == {0, 1}
+    assert set(handler.get_cache(0, "preprocessing")) == {0, 1}
+
+def test_results_use_the_processed_currents(handler):
+    handler.time_range = (0.0, 1.0)
+    assert [stats[0] for _, stats in handler.calculate_results(handler.dataspaces[0]["datasets"], 0)] == pytest.approx([0.5, 1.5, 2.5])
+    handler.set_preprocessing(BASELINE, 0)
+    assert [stats[0] for _, stats in handler.calculate_results(handler.dataspaces[0]["datasets"], 0)] == pytest.approx([0, 0, 0])
+
+def test_smoothing_keeps_lines():
+    times = np.linspace(0, 1, 50)[None, :]
+    currents = 3 * times + 1
+    for method in preprocessing.SMOOTHING_METHODS:
+        smoothed = preprocessing.smooth(times, currents, {"method": method, "window": 7, "polyorder": 2})
+        # Edges are padded with the edge value, inside the window a line stays a line
+        assert np.allclose(smoothed[:, 3:-3], currents[:, 3:-3])
+
+def test_spikes_are_clipped():
+    times = np.linspace(0, 1, 100)[None, :]
+    currents = np.sin(times * 3) + np.random.default_rng(0).normal(0, 0.01, times.shape)
+    spiked = currents.copy()
+    spiked[0, 40] += 5.0
+    clipped = preprocessing.clip_spikes(times, spiked, {"window": 5, "threshold": 5.0})
+    assert abs(clipped[0, 40] - currents[0, 40]) < 0.1
+    assert np.array_equal(clipped[0, :40], spiked[0, :40])
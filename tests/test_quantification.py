@@ -0,0 +1,81 @@
+import numpy as np
+from plotting import quantification
+
+def get_results(concentrations, slope=2.0, intercept=0.5, noise=None):
+    noise = np.zeros(len(concentrations)) if noise is None else noise
+    return [(concentration, (slope * concentration + intercept + error, 0.1)) for concentration, error in zip(concentrations, noise)]
+
+def test_exact_line_is_inverted():
+    calibration = quantification.get_calibration(get_results([0, 1, 2, 4]))
+    assert np.isclose(calibration["slope"], 2.0) and np.isclose(calibration["intercept"], 0.5)
+    assert np.allclose(calibration["current_range"], (0.5, 8.5))
+    predicted = quantification.predict_concentrations([0.5, 4.5, 8.5], calibration)
+    assert np.allclose(predicted["concentrations"], [0, 2, 4])
+    assert np.allclose(predicted["ses"], 0)
+    assert not predicted["out_of_range"].any()
+
+def test_out_of_range_and_nan_currents():
+    calibration = quantification.get_calibration(get_results([0, 1, 2, 4]))
+    predicted = quantification.predict_concentrations([0.4, 8.6, np.nan, 3.0], calibration)
+    assert predicted["out_of_range"].tolist() == [True, True, True, False]
+    # Out of range currents still get an extrapolated concentration
+    assert np.isclose(predicted["concentrations"][0], -0.05)
+
+def test_standard_errors_match_classical_inverse_regression():
+    concentrations = np.array([0, 1, 2, 3, 4, 5], dtype=float)
+    noise = np.array([0.05, -0.1, 0.02, 0.08, -0.03, -0.02])
+    calibration = quantification.get_calibration(get_results(concentrations, noise=noise))
+    currents = np.array([1.0, 5.0, 10.0])
+    predicted = quantification.predict_concentrations(currents, calibration, replicates=3)
+
+    slope, intercept = np.polyfit(concentrations, 2.0 * concentrations + 0.5 + noise, 1)
+    residuals = 2.0 * concentrations + 0.5 + noise - (slope * concentrations + intercept)
+    s_y = np.sqrt((residuals**2).sum() / (len(concentrations) - 2))
+    sxx = ((concentrations - concentrations.mean())**2).sum()
+    mean_current = (2.0 * concentrations + 0.5 + noise).mean()
+    expected = s_y / abs(slope) * np.sqrt(1 / 3 + 1 / len(concentrations) + (currents - mean_current)**2 / (slope**2 * sxx))
+    assert np.allclose(predicted["concentrations"], (currents - intercept) / slope)
+    assert np.allclose(predicted["ses"], expected)
+    # More replicates, smaller errors
+    assert (quantification.predict_concentrations(currents, calibration, replicates=10)["ses"] < predicted["ses"]).all()
+
+def test_two_points_have_no_standard_errors():
+    calibration = quantification.get_calibration(get_results([1, 2]))
+    assert np.isnan(calibration["residual_std"])
+    assert np.isnan(quantification.predict_concentrations([3.0], calibration)["ses"]).all()
+
+def test_no_line():
+    assert quantification.get_calibration([]) == None
+    assert quantification.get_calibration(get_results([1])) == None
+    # Zero slope can not be inverted
+    assert quantification.get_calibration(get_results([1, 2, 3], slope=0.0)) == None
+
+def test_weighted_calibration_follows_precise_points():
+    results = [(0.0, (0.0, 0.01)), (1.0, (1.0, 0.01)), (2.0, (3.0, 10.0))]
+    weighted = quantification.get_calibration(results, weighted=True)
+    unweighted = quantification.get_calibration(results)
+    assert abs(weighted["slope"] - 1.0) < abs(unweighted["slope"] - 1.0)
+
+def test_samples_are_quantified_against_the_plotted_trendline():
+    from plotting.plot_data_handler import PlotDataHandler
+    handler = PlotDataHandler()
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0]
+    handler.time_range = (0.0, 1.0)
+    times = np.linspace(0, 1, 11)
+    # Replicates with little scatter at 0 and 1, much at 2, so weighting moves the line
+    currents = {0: [0.0, 0.02], 1: [1.0, 1.02], 2: [2.0, 4.0]}
+    datasets = [
+        {"set_id": concentration * 10 + i, "name": "", "times": times, "currents": np.full(11, current), "concentration": float(concentration)}
+        for concentration, values in currents.items() for i, current in enumerate(values)
+    ]
+    handler.add_datasets_batch(datasets, "space", "", 0)
+    samples = [{"times": times, "currents": np.full(11, 1.5)}]
+    results = handler.calculate_results(handler.dataspaces[0]["datasets"], 0)
+    for weighted in (False, True):
+        quantified = handler.quantify_samples(samples, 0, weighted=weighted)
+        fit = handler.calculate_trendlines([results], weighted)
+        assert np.isclose(quantified["calibration"]["slope"], fit["slope"][0])
+        assert np.isclose(quantified["concentrations"][0], (1.5 - fit["intercept"][0]) / fit["slope"][0])
+    assert not np.isclose(handler.quantify_samples(samples, 0)["calibration"]["slope"], handler.quantify_samples(samples, 0, weighted=True)["calibration"]["slope"])
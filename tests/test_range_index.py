@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from plotting import range_index, window_statistics
+
+def reference(values, statistic, trim=0.0):
+    # numpy baseline over the finite values of one range
+    values = np.sort(values[np.isfinite(values)])
+    if len(values) == 0:
+        return np.nan
+    if statistic == "median":
+        return np.median(values)
+    cut = int(range_index.get_trim_counts(len(values), trim))
+    return values[cut:len(values) - cut].mean()
+
+def get_ranges(rng, length, count=300):
+    starts = rng.integers(0, length + 1, count)
+    ends = rng.integers(0, length + 1, count)
+    return np.minimum(starts, ends), np.maximum(starts, ends)
+
+@pytest.mark.parametrize("length", [1, 2, 3, 7, 64, 65, 1000])
+def test_medians_and_trimmed_means_match_numpy(length):
+    rng = np.random.default_rng(length)
+    # Few distinct values, so ties are common
+    values = rng.integers(0, 6, length).astype(float)
+    index = range_index.build_range_index(values, with_sums=True)
+    starts, ends = get_ranges(rng, length)
+    medians = range_index.range_medians(index, starts, ends)
+    trimmed = range_index.range_trimmed_means(index, starts, ends, 0.2)
+    assert np.allclose(medians, [reference(values[s:e], "median") for s, e in zip(starts, ends)], equal_nan=True)
+    assert np.allclose(trimmed, [reference(values[s:e], "trimmed_mean", 0.2) for s, e in zip(starts, ends)], equal_nan=True)
+
+def test_nan_values_are_left_out_with_finite_counts():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500)
+    values[rng.integers(0, 500, 40)] = np.nan
+    index = range_index.build_range_index(values, with_sums=True)
+    starts, ends = get_ranges(rng, len(values))
+    finite = np.concatenate(([0], np.cumsum(np.isfinite(values))))
+    counts = finite[ends] - finite[starts]
+    medians = range_index.range_medians(index, starts, ends, counts)
+    trimmed = range_index.range_trimmed_means(index, starts, ends, 0.1, counts)
+    assert np.allclose(medians, [reference(values[s:e], "median") for s, e in zip(starts, ends)], equal_nan=True)
+    assert np.allclose(trimmed, [reference(values[s:e], "trimmed_mean", 0.1) for s, e in zip(starts, ends)], equal_nan=True)
+
+def test_kth_smallest_and_sum_smallest():
+    values = np.array([5.0, 1.0, 4.0, 2.0, 3.0])
+    index = range_index.build_range_index(values, with_sums=True)
+    assert list(range_index.kth_smallest(index, [0] * 5, [5] * 5, range(5))) == [1, 2, 3, 4, 5]
+    assert list(range_index.sum_smallest(index, [1] * 4, [4] * 4, range(4))) == [0, 1, 3, 7]
+
+def test_sum_smallest_needs_sums():
+    index = range_index.build_range_index(np.arange(4.0))
+    with pytest.raises(ValueError):
+        range_index.sum_smallest(index, [0], [4], [2])
+
+@pytest.mark.parametrize("statistic", ["median", "trimmed_mean"])
+def test_window_statistic_partition_and_index_agree(statistic, monkeypatch):
+    rng = np.random.default_rng(1)
+    times_list = [np.sort(rng.uniform(0, 10, length)) for length in (50, 400, 600)]
+    currents_list = [rng.normal(size=len(times)) for times in times_list]
+    currents_list[2][5] = np.nan
+    windows = [(0, 10), (2, 3), (4.5, 9), (11, 12)]
+    packed = window_statistics.pack_datasets([1, 2, 3], times_list, currents_list)
+    expected = [[reference(currents[(times >= start) & (times <= end)], statistic, 0.1) for start, end in windows]
+                for times, currents in zip(times_list, currents_list)]
+    assert np.allclose(window_statistics.window_statistic(packed, windows, {"statistic": statistic}), expected, equal_nan=True)
+
+    # Small thresholds so the two longer datasets get an index at once
+    monkeypatch.setattr(window_statistics, "RANGE_INDEX_MIN_SAMPLES", 100)
+    monkeypatch.setattr(window_statistics, "RANGE_INDEX_MIN_WINDOW", 10)
+    monkeypatch.setattr(window_statistics, "RANGE_INDEX_PAYBACK", 0)
+    indexes = {}
+    assert np.allclose(window_statistics.window_statistic(packed, windows, {"statistic": statistic}, indexes), expected, equal_nan=True)
+    assert sorted(indexes) == [2, 3]
+
+def test_index_is_built_once_it_pays_off(monkeypatch):
+    monkeypatch.setattr(window_statistics, "RANGE_INDEX_MIN_SAMPLES", 100)
+    monkeypatch.setattr(window_statistics, "RANGE_INDEX_MIN_WINDOW", 10)
+    monkeypatch.setattr(window_statistics, "RANGE_INDEX_PAYBACK", 3)
+    times = np.linspace(0, 10, 200)
+    packed = window_statistics.pack_datasets([7], [times], [np.sin(times)])
+    indexes = {}
+    for _ in range(2):
+        window_statistics.window_statistic(packed, [(0, 10)], {"statistic": "median"}, indexes)
+        assert indexes[7]["index"] == None
+    window_statistics.window_statistic(packed, [(0, 10)], {"statistic": "median"}, indexes)
+    assert indexes[7]["index"] != None
+    # Removed datasets free their index
+    window_statistics.window_statistic(window_statistics.pack_datasets([], [], []), [(0, 10)], {"statistic": "median"}, indexes)
+    assert indexes == {}
@@ -0,0 +1,67 @@
+import numpy as np
+from plotting import regression
+
+def test_fit_lines_matches_polyfit():
+    rng = np.random.default_rng(0)
+    x = np.array([0.0, 1.0, 2.0, 5.0, 10.0])
+    y = 3.0 * x + 1.0 + rng.normal(0, 0.1, (4, len(x)))
+    fit = regression.fit_lines(x, y)
+    for row in range(len(y)):
+        (slope, intercept), cov = np.polyfit(x, y[row], 1, cov=True)
+        assert np.isclose(fit["slope"][row], slope)
+        assert np.isclose(fit["intercept"][row], intercept)
+        assert np.isclose(fit["slope_se"][row], np.sqrt(cov[0, 0]))
+        assert np.isclose(fit["intercept_se"][row], np.sqrt(cov[1, 1]))
+        assert np.isclose(fit["r_squared"][row], np.corrcoef(x, y[row])[0, 1]**2)
+
+def test_fit_lines_leaves_out_masked_and_nan():
+    x = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    y = np.array([1.0, 3.0, np.nan, 7.0, 100.0])
+    mask = np.array([True, True, True, True, False])
+    fit = regression.fit_lines(x, y, mask)
+    assert np.isclose(fit["slope"], 2.0)
+    assert np.isclose(fit["intercept"], 1.0)
+    assert fit["count"] == 3
+    assert np.isnan(fit["residuals"][2]) and np.isnan(fit["residuals"][4])
+
+def test_fit_lines_weighted_matches_polyfit():
+    x = np.array([0.0, 1.0, 2.0, 3.0])
+    y = np.array([0.1, 1.2, 1.9, 3.5])
+    stds = np.array([0.1, 0.2, 0.1, 0.5])
+    fit = regression.fit_lines(x, y, weights=regression.get_inverse_variance_weights(stds))
+    # polyfit weights multiply the residuals, so they are 1/σ
+    slope, intercept = np.polyfit(x, y, 1, w=1 / stds)
+    assert np.isclose(fit["slope"], slope)
+    assert np.isclose(fit["intercept"], intercept)
+
+def test_fit_lines_degenerate_rows_give_nan():
+    fit = regression.fit_lines(np.array([[1.0, 1.0, 1.0], [0.0, 1.0, 2.0]]), np.array([[1.0, 2.0, 3.0], [1.0, 2.0, np.nan]]))
+    assert np.isnan(fit["slope"][0])
+    # Two points give a line without standard errors
+    assert np.isclose(fit["slope"][1], 1.0)
+    assert np.isnan(fit["slope_se"][1])
+
+def test_pack_rows_pads_with_nan():
+    packed, mask = regression.pack_rows([[1.0, 2.0, 3.0], [4.0], []])
+    assert packed.shape == (3, 3)
+    assert mask.tolist() == [[True, True, True], [True, False, False], [False, False, False]]
+    assert np.isnan(packed[1, 1:]).all()
+
+def test_calculate_trendlines_fits_ragged_results():
+    from plotting.plot_data_handler import PlotDataHandler
+    handler = PlotDataHandler()
+    # (concentration, (mean, std)) per dataspace, with different numbers of concentrations
+    results = [
+        [(0.0, (1.0, 0.1)), (1.0, (3.0, 0.1)), (2.0, (5.0, 0.1))],
+        [(0.0, (2.0, 0.2)), (4.0, (0.0, 0.2))]
+    ]
+    fit = handler.calculate_trendlines(results)
+    assert np.allclose(fit["slope"], [2.0, -0.5])
+    assert np.allclose(fit["intercept"], [1.0, 2.0])
+    assert fit["mask"].tolist() == [[True, True, True], [True, True, False]]
+    assert np.allclose(fit["trendlines"][0], [1.0, 3.0, 5.0])
+    assert np.isnan(fit["trendlines"][1, 2])
+    for i, result in enumerate(results):
+        x = [concentration for concentration, _ in result]
+        y = [stats[0] for _, stats in result]
+        assert np.isclose(fit["slope"][i], np.polyfit(x, y, 1)[0])
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from plotting import replicate_average
+from plotting.plot_data_handler import PlotDataHandler
+
+def get_datasets():
+    # Two replicates of concentration 1 on a shared times array, one of concentration 2 on its own longer one
+    shared = np.linspace(0, 10, 101)
+    longer = np.linspace(-1, 12, 53)
+    return {
+        1: {"times": shared, "currents": shared * 2, "concentration": 1.0},
+        2: {"times": shared, "currents": shared * 2 + 1, "concentration": 1.0},
+        3: {"times": longer, "currents": np.sin(longer), "concentration": 2.0}
+    }
+
+def test_common_grid_covers_the_shared_range():
+    datasets = get_datasets()
+    grid = replicate_average.get_common_grid([data["times"] for data in datasets.values()], 11)
+    assert grid.tolist() == pytest.approx(np.linspace(0, 10, 11).tolist())
+    assert replicate_average.get_common_grid([np.array([0.0, 1.0]), np.array([2.0, 3.0])], 10) is None
+    assert replicate_average.get_common_grid([np.array([1.0])], 10) is None
+
+def test_means_and_stds_match_a_hand_computation():
+    datasets = get_datasets()
+    grid = np.linspace(0.5, 9.5, 7)
+    curves = replicate_average.get_replicate_curves(datasets, {}, grid, {})
+    assert curves["concentrations"].tolist() == [1.0, 2.0]
+    assert curves["counts"].tolist() == [2, 1]
+    rows = [np.interp(grid, data["times"], data["currents"]) for data in datasets.values()]
+    assert np.allclose(curves["means"][0], (rows[0] + rows[1]) / 2)
+    # Population std of two values is half their difference
+    assert np.allclose(curves["stds"][0], np.abs(rows[0] - rows[1]) / 2)
+    assert np.allclose(curves["means"][1], rows[2]) and np.allclose(curves["stds"][1], 0)
+
+def test_overridden_currents_and_cache():
+    datasets = get_datasets()
+    grid = np.linspace(0, 10, 5)
+    cache = {}
+    replicate_average.get_replicate_curves(datasets, {}, grid, cache)
+    rows = dict(cache["rows"])
+    processed = {2: datasets[2]["currents"] - 1}
+    curves = replicate_average.get_replicate_curves(datasets, processed, grid, cache)
+    # Only the dataset with other currents is interpolated again
+    assert cache["rows"][1] is rows[1] and cache["rows"][2] is not rows[2]
+    assert np.allclose(curves["stds"][0], 0)
+    # A new grid starts over
+    replicate_average.get_replicate_curves(datasets, {}, np.linspace(0, 10, 6), cache)
+    assert cache["grid"] == (0.0, 10.0, 6)
+
+def test_handler_uses_visible_datasets():
+    handler = PlotDataHandler()
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0]
+    datasets = get_datasets()
+    handler.add_datasets_batch([dict(data, set_id=set_id, name=str(set_id)) for set_id, data in datasets.items()], "space", "", 0)
+    handler.set_datasets_hidden([3], True, 0)
+    curves = handler.calculate_replicate_curves(0, length=11)
+    assert curves["concentrations"].tolist() == [1.0]
+    assert np.allclose(curves["means"][0], np.linspace(0, 10, 11) * 2 + 0.5)
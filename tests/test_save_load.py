@@ -0,0 +1,98 @@
+import pickle
+import numpy as np
+import pytest
+import gui.data_operations as do
+from gui.blob_store import BlobRef
+
+def get_state():
+    times = np.linspace(0, 10, 200)
+    dataspaces = {}
+    for space_id in (0, 1, 2):
+        dataspaces[space_id] = {
+            "name": f"space {space_id}",
+            "notes": "notes",
+            "windows": [{"name": "w", "start": 1.0, "end": 2.0}],
+            "datasets": {
+                space_id * 10 + i: {"name": f"set {i}", "times": times, "currents": np.sin(times) + i + space_id, "concentration": float(i),
+                                    "notes": "", "hidden": i == 1, "line_color": "tab:blue", "metadata": {"sha1": "abc"}}
+                for i in range(3)
+            }
+        }
+    return {
+        "window": {"space_widget_id": 3, "set_widget_id": 9, "current_convert_value": "1.5"},
+        "plot": {"selected_space_id": 1, "active_spaces_ids": [1, 2], "span_extents": (1.0, 2.0), "dataspaces": dataspaces}
+    }
+
+def assert_same_state(loaded, state):
+    assert loaded["window"] == state["window"]
+    for key, value in state["plot"].items():
+        if key != "dataspaces":
+            assert loaded["plot"][key] == value
+    # Original dataspace order, not the load order
+    assert list(loaded["plot"]["dataspaces"]) == list(state["plot"]["dataspaces"])
+    for space_id, dataspace in state["plot"]["dataspaces"].items():
+        loaded_dataspace = loaded["plot"]["dataspaces"][space_id]
+        assert {key: value for key, value in loaded_dataspace.items() if key != "datasets"} == {key: value for key, value in dataspace.items() if key != "datasets"}
+        assert list(loaded_dataspace["datasets"]) == list(dataspace["datasets"])
+        for set_id, data in dataspace["datasets"].items():
+            loaded_data = loaded_dataspace["datasets"][set_id]
+            for key, value in data.items():
+                if isinstance(value, np.ndarray):
+                    assert np.array_equal(loaded_data[key], value)
+                else:
+                    assert loaded_data[key] == value
+
+def test_round_trip(tmp_path):
+    state = get_state()
+    filepath = str(tmp_path / "session.pickle")
+    do.save_program_state_to_file(state, filepath)
+    assert_same_state(do.load_program_state_from_file(filepath), state)
+
+def test_header_comes_first_with_dataspaces_in_load_order(tmp_path):
+    filepath = str(tmp_path / "session.pickle")
+    do.save_program_state_to_file(get_state(), filepath)
+    items = do.iter_program_state_file(filepath, load_arrays=False)
+    header = next(items)
+    assert header["format"] == do.STATE_FORMAT_VERSION
+    assert header["plot"]["dataspaces"][0]["dataset_count"] == 3
+    # Selected first, then active, then the rest
+    records = list(items)
+    assert [space_id for space_id, _ in records] == [1, 2, 0]
+    assert isinstance(records[0][1][10]["times"], BlobRef)
+
+def test_interrupted_save_keeps_previous_file(tmp_path, monkeypatch):
+    filepath = str(tmp_path / "session.pickle")
+    state = get_state()
+    do.save_program_state_to_file(state, filepath)
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(do.os, "replace", fail)
+    do.save_program_state_to_file(get_state(), filepath)
+    assert_same_state(do.load_program_state_from_file(filepath), state)
+
+def write_format_1(state, filepath):
+    # One pickled dict with the arrays inline
+    with open(filepath, "wb") as file:
+        pickle.dump(state, file)
+
+def write_format_2(state, filepath):
+    # Header, then one pickle per dataspace with the arrays inline
+    header, records = do.split_program_state(state)
+    header["format"] = 2
+    del header["blob_directory"]
+    with open(filepath, "wb") as file:
+        pickle.dump(header, file)
+        for space_id, datasets in records:
+            pickle.dump({"space_id": space_id, "datasets": datasets}, file)
+
+@pytest.mark.parametrize("write", [write_format_1, write_format_2])
+def test_older_formats_load(tmp_path, write):
+    state = get_state()
+    filepath = str(tmp_path / "old.pickle")
+    write(state, filepath)
+    loaded = do.load_program_state_from_file(filepath)
+    assert_same_state(loaded, state)
+    # Saving again writes the current format
+    do.save_program_state_to_file(loaded, filepath)
+    assert next(do.iter_program_state_file(filepath))["format"] == do.STATE_FORMAT_VERSION
+    assert_same_state(do.load_program_state_from_file(filepath), state)
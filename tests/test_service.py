@@ -0,0 +1,133 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from benchmarks.generate_sessions import generate_session_tree
+from plotting import transient_fit, window_statistics
+from service.server import AnalysisService, create_server
+
+@pytest.fixture(scope="module")
+def url():
+    server = create_server(port=0, parse_workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+def request(url, method="GET", body=None):
+    # Returns the status and the decoded JSON response, errors included
+    data = json.dumps(body).encode("utf-8") if body != None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method=method)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.fixture(scope="module")
+def space_id(url, tmp_path_factory):
+    paths = generate_session_tree(str(tmp_path_factory.mktemp("sessions")), 1, 10, 500)
+    concentrations = [[0, 1, 2, 5, 10][i % 5] for i in range(len(paths))]
+    status, imported = request(f"{url}/import", "POST", {"paths": paths, "concentrations": concentrations, "space_name": "batch"})
+    assert status == 200 and len(imported["set_ids"]) == 10
+    return imported["space_id"]
+
+def test_health_and_dataspaces(url, space_id):
+    assert request(f"{url}/health") == (200, {"status": "ok"})
+    status, dataspaces = request(f"{url}/dataspaces")
+    assert [(dataspace["space_id"], dataspace["name"], dataspace["dataset_count"]) for dataspace in dataspaces] == [(space_id, "batch", 10)]
+    status, datasets = request(f"{url}/dataspaces/{space_id}/datasets")
+    assert len(datasets) == 10 and all(dataset["samples"] == 500 for dataset in datasets)
+
+def test_results_and_calibration(url, space_id):
+    status, results = request(f"{url}/dataspaces/{space_id}/results?start=20&end=40")
+    assert status == 200
+    assert results["concentrations"] == [0.0, 1.0, 2.0, 5.0, 10.0]
+    status, calibration = request(f"{url}/dataspaces/{space_id}/calibration?start=20&end=40")
+    assert status == 200
+    assert np.isclose(calibration["slope"], results["slopes"][0])
+    assert np.isclose(calibration["line"]["slope"], calibration["slope"])
+    assert calibration["concentration_range"] == [0.0, 10.0]
+
+def test_predict(url, space_id):
+    status, calibration = request(f"{url}/dataspaces/{space_id}/calibration?start=20&end=40")
+    slope, intercept = calibration["line"]["slope"], calibration["line"]["intercept"]
+    currents = [intercept + slope * 3, intercept + slope * 100]
+    status, predicted = request(f"{url}/dataspaces/{space_id}/calibration/predict", "POST", {"currents": currents, "start": 20, "end": 40})
+    assert status == 200
+    assert np.allclose(predicted["concentrations"], [3, 100])
+    assert predicted["out_of_range"] == [False, True]
+    assert predicted["ses"][0] > 0
+
+def test_windows_and_concentrations(url, space_id):
+    windows = [{"name": "early", "start": 5, "end": 10}, {"name": "late", "start": 40, "end": 49}]
+    assert request(f"{url}/dataspaces/{space_id}/windows", "POST", windows) == (200, {"windows": 2})
+    status, results = request(f"{url}/dataspaces/{space_id}/results")
+    assert status == 200 and len(results["slopes"]) == 2
+
+    status, datasets = request(f"{url}/dataspaces/{space_id}/datasets")
+    set_id = datasets[0]["set_id"]
+    assert request(f"{url}/dataspaces/{space_id}/concentrations", "POST", {str(set_id): 20}) == (200, {"updated": 1})
+    status, datasets = request(f"{url}/dataspaces/{space_id}/datasets")
+    assert datasets[0]["concentration"] == 20.0
+    status, results = request(f"{url}/dataspaces/{space_id}/results")
+    assert 20.0 in results["concentrations"]
+
+def test_npz_format(url, space_id):
+    status, datasets = request(f"{url}/dataspaces/{space_id}/datasets")
+    with urllib.request.urlopen(f"{url}/dataspaces/{space_id}/datasets/{datasets[0]['set_id']}?format=npz") as response:
+        with np.load(io.BytesIO(response.read())) as arrays:
+            assert len(arrays["times"]) == len(arrays["currents"]) == 500
+
+def test_validation_errors(url, space_id, tmp_path):
+    # Nothing is imported from a bad request
+    count = len(request(f"{url}/dataspaces")[1])
+    assert request(f"{url}/import", "POST", {"paths": [str(tmp_path / "missing.pst")]})[0] == 400
+    assert request(f"{url}/import", "POST", {"paths": "file.pst"})[0] == 400
+    assert request(f"{url}/import", "POST", {"paths": [], "space_id": -1})[0] == 400
+    paths = generate_session_tree(str(tmp_path), 1, 2, 100)
+    assert request(f"{url}/import", "POST", {"paths": paths, "concentrations": [1]})[0] == 400
+    assert request(f"{url}/import", "POST", {"paths": paths, "concentrations": ["a", 1]})[0] == 400
+    assert len(request(f"{url}/dataspaces")[1]) == count
+
+    assert request(f"{url}/dataspaces/999/results?start=1&end=2")[0] == 404
+    assert request(f"{url}/dataspaces/{space_id}/calibration")[0] == 400
+    assert request(f"{url}/dataspaces/{space_id}/concentrations", "POST", {"999999": 1})[0] == 404
+    assert request(f"{url}/dataspaces/{space_id}/concentrations", "POST", {"0": "a"})[0] == 400
+    assert request(f"{url}/dataspaces/{space_id}/windows", "POST", [{"name": "w"}])[0] == 400
+    assert request(f"{url}/dataspaces/{space_id}/transient_fit", "POST", {"unknown": 1})[0] == 400
+    assert request(f"{url}/nothing")[0] == 404
+
+def is_lock_free(lock):
+    # From another thread, the lock is reentrant
+    acquired = []
+    def take():
+        if lock.acquire(timeout=5):
+            acquired.append(True)
+            lock.release()
+    thread = threading.Thread(target=take)
+    thread.start()
+    thread.join()
+    return acquired == [True]
+
+def test_results_and_fits_are_computed_outside_the_lock(monkeypatch):
+    service = AnalysisService(parse_workers=1)
+    try:
+        times = np.linspace(0.1, 10, 200)
+        for concentration in (0.0, 1.0, 2.0):
+            service.add_array_dataset(0, times, (1 + concentration) / np.sqrt(times) + concentration, "", concentration)
+        checks = []
+        window_statistic = window_statistics.window_statistic
+        fit_transients = transient_fit.fit_transients
+        monkeypatch.setattr(window_statistics, "window_statistic", lambda *args: checks.append(is_lock_free(service.lock)) or window_statistic(*args))
+        monkeypatch.setattr(transient_fit, "fit_transients", lambda *args: checks.append(is_lock_free(service.lock)) or fit_transients(*args))
+        results = service.get_results(0, 1.0, 2.0)
+        fits = service.get_transient_fits(0)
+        assert checks == [True, True]
+        assert results["concentrations"] == [0.0, 1.0, 2.0]
+        assert np.allclose(fits["a"], [1, 2, 3])
+    finally:
+        service.parse_pool.shutdown()
@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import pytest
+import gui.data_operations as do
+import gui.session_catalog as sc
+from benchmarks.generate_sessions import generate_session_tree, pssession_measurement, write_pssession, TICKS_2024
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = sc.SessionCatalog(str(tmp_path / "catalog.sqlite"))
+    yield catalog
+    catalog.close()
+
+def test_scan_is_incremental(catalog, tmp_path):
+    root = str(tmp_path / "data")
+    filepaths = generate_session_tree(root, 2, 5, 50, file_format="mixed")
+    assert catalog.scan(root, workers=1) == {"files": 10, "changed": 10, "removed": 0}
+    assert catalog.scan(root, workers=1) == {"files": 10, "changed": 0, "removed": 0}
+
+    os.remove(filepaths[0])
+    with open(filepaths[1], "a", encoding="utf-8") as file:
+        file.write("\n")
+    assert catalog.scan(root, workers=1) == {"files": 9, "changed": 1, "removed": 1}
+    assert catalog.get_count() == 9
+
+def test_search_filters(catalog, tmp_path):
+    root = str(tmp_path / "data")
+    generate_session_tree(root, 2, 4, 50)
+    catalog.scan(root, workers=1)
+    rows = catalog.search()
+    assert len(rows) == 8
+    columns = {name: i for i, name in enumerate(sc.COLUMNS)}
+    # Newest first
+    timestamps = [row[columns["timestamp"]] for row in rows]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert {row[columns["samples"]] for row in rows} == {50}
+    assert len(catalog.search(channel="CH2")) == 2
+    assert len(catalog.search(text="batch_001")) == 4
+    assert len(catalog.search(text="%")) == 0
+    assert len(catalog.search(method="ad", limit=3)) == 3
+    assert len(catalog.search(since=timestamps[2])) == 3
+    assert catalog.get_distinct("channel") == ["CH1", "CH2", "CH3", "CH4"]
+    with pytest.raises(ValueError):
+        catalog.get_distinct("path; DROP TABLE files")
+
+def test_unreadable_files_are_cataloged_once(catalog, tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    with open(root / "CH1-00001.pssession", "w", encoding="utf-16-le") as file:
+        file.write("{broken")
+    assert catalog.scan(str(root), workers=1)["changed"] == 1
+    assert catalog.scan(str(root), workers=1)["changed"] == 0
+    error = catalog.connection.execute("SELECT error FROM files").fetchone()[0]
+    assert error
+
+def test_summary_matches_the_full_parse(tmp_path):
+    # The summary is read from the text without decoding the json
+    filepath = str(tmp_path / "CH5-00001.pssession")
+    times = np.arange(1, 51) * 0.1
+    write_pssession(filepath, [pssession_measurement(times, -1.0 / np.sqrt(times) - i, 0.4, TICKS_2024, f"Run {i}", True) for i in range(2)])
+    summary = do.extract_file_summary(filepath)
+    measurements = do.extract_measurements_from_file(filepath)
+    assert (summary["measurements"], summary["samples"]) == (len(measurements), sum(len(m["arrays"]["time"]) for m in measurements))
+    assert (summary["method"], summary["title"], summary["channel"]) == ("ad", "Run 0", "CH5")
+    assert summary["duration"] == pytest.approx(4.9)
+    assert summary["timestamp"] == pytest.approx(do.ticks_to_unix_time(TICKS_2024))
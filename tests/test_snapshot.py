@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from types import MappingProxyType
+from plotting import snapshot
+from plotting.plot_data_handler import PlotDataHandler
+
+@pytest.fixture
+def handler():
+    handler = PlotDataHandler()
+    # Instance state instead of the class level defaults
+    handler.dataspaces = {}
+    handler.selected_space_id = 0
+    handler.active_spaces_ids = [0]
+    times = np.linspace(0, 1, 10)
+    handler.add_datasets_batch([{"set_id": i, "name": str(i), "times": times, "currents": times * i, "concentration": i} for i in range(3)], "space", "", 0)
+    return handler
+
+def test_freeze_and_thaw_round_trip():
+    array = np.arange(3)
+    frozen = snapshot.freeze({"a": 1, "b": snapshot.freeze({"c": array})})
+    assert isinstance(frozen, MappingProxyType)
+    with pytest.raises(TypeError):
+        frozen["a"] = 2
+    thawed = snapshot.thaw(frozen)
+    assert thawed == {"a": 1, "b": {"c": array}}
+    assert type(thawed["b"]) is dict
+    # Arrays are shared, not copied
+    assert thawed["b"]["c"] is array
+
+def test_snapshot_is_read_only(handler):
+    current = handler.snapshot
+    with pytest.raises(AttributeError):
+        current.selected_space_id = 1
+    with pytest.raises(TypeError):
+        current.dataspaces[0]["datasets"][0]["name"] = "x"
+
+def test_snapshot_does_not_see_later_changes(handler):
+    before = handler.snapshot
+    handler.update_dataset(1, "renamed", 5.0, "", 0)
+    handler.set_datasets_hidden([2], True, 0)
+    after = handler.snapshot
+    assert after.generation > before.generation
+    assert before.get_datasets(0)[1]["name"] == "1"
+    assert after.get_datasets(0)[1]["name"] == "renamed"
+    assert after.get_datasets(0)[2]["hidden"] and not before.get_datasets(0)[2]["hidden"]
+    # Unchanged datasets are shared with the previous snapshot
+    assert after.get_datasets(0)[0] is before.get_datasets(0)[0]
+
+def test_selection_and_time_range_are_published(handler):
+    handler.time_range = [1.0, 2.0]
+    handler.active_spaces_ids = [0, 1]
+    assert handler.snapshot.time_range == (1.0, 2.0)
+    assert handler.snapshot.active_spaces_ids == (0, 1)
+    # Stored as tuples so they can not change in place behind the snapshot
+    with pytest.raises(TypeError):
+        handler.time_range[0] = 0
+
+def test_batch_update_publishes_once(handler):
+    generation = handler.snapshot.generation
+    with handler.batch_update():
+        handler.update_dataset(0, "a", 1.0, "", 0)
+        handler.update_dataset(1, "b", 1.0, "", 0)
+        assert handler.snapshot.generation == generation
+    assert handler.snapshot.generation == generation + 1
+    assert [data["name"] for data in handler.snapshot.get_datasets(0).values()] == ["a", "b", "2"]
+
+def test_deleted_dataspaces_leave_the_snapshot(handler):
+    handler.add_datasets_batch([{"set_id": 10, "name": "other", "times": [0.0, 1.0], "currents": [0.0, 1.0]}], "other", "", 1)
+    assert list(handler.snapshot.dataspaces) == [0, 1]
+    handler.delete_dataspace(0)
+    assert list(handler.snapshot.dataspaces) == [1]
+    assert handler.snapshot.get_datasets(0) == None
+
+def test_get_dataspaces_dict_matches_live_state(handler):
+    dataspaces = handler.snapshot.get_dataspaces_dict()
+    assert dataspaces[0]["name"] == handler.dataspaces[0]["name"]
+    assert dataspaces[0]["datasets"].keys() == handler.dataspaces[0]["datasets"].keys()
+    assert type(dataspaces[0]["datasets"][0]) is dict
@@ -0,0 +1,67 @@
+import numpy as np
+from plotting import transient_fit
+
+def get_transients(count=6, exponential=False):
+    times_list, currents_list, expected = [], [], []
+    for i in range(count):
+        times = np.linspace(0.1, 20, 300 + 50 * i)
+        a, b, c, tau = 1.0 + i, 0.2 * i - 0.5, 0.5 if exponential else 0.0, 2.0
+        currents = a / np.sqrt(times) + b + c * np.exp(-(times - times[0]) / tau)
+        times_list.append(times)
+        currents_list.append(currents)
+        expected.append((a, b, c, tau))
+    return times_list, currents_list, np.array(expected)
+
+def test_cottrell_parameters_are_recovered():
+    times_list, currents_list, expected = get_transients()
+    fits = transient_fit.fit_transients(times_list, currents_list)
+    assert np.allclose(fits["a"], expected[:, 0])
+    assert np.allclose(fits["b"], expected[:, 1])
+    assert np.allclose(fits["plateau"], fits["b"])
+    assert np.isnan(fits["tau"]).all()
+    assert np.allclose(fits["rms"], 0, atol=1e-9)
+    assert fits["count"].tolist() == [len(times) for times in times_list]
+
+def test_exponential_term_is_recovered():
+    times_list, currents_list, expected = get_transients(exponential=True)
+    fits = transient_fit.fit_transients(times_list, currents_list, {"exponential": True})
+    # tau is on a grid, so the others are close rather than exact
+    assert np.allclose(fits["tau"], expected[:, 3], rtol=0.15)
+    assert np.allclose(fits["c"], expected[:, 2], rtol=0.1)
+    assert np.allclose(fits["a"], expected[:, 0], rtol=0.05)
+    assert (fits["rms"] < 0.01).all()
+
+def test_time_range_and_invalid_samples():
+    times_list, currents_list, expected = get_transients(count=2)
+    currents_list[0] = currents_list[0].copy()
+    currents_list[0][100] = np.nan
+    currents_list[1] = currents_list[1].copy()
+    # Outside the fitted range, ignored
+    currents_list[1][times_list[1] > 15] = 100.0
+    fits = transient_fit.fit_transients(times_list, currents_list, {"start": 1.0, "end": 15.0})
+    assert np.allclose(fits["a"], expected[:, 0])
+    assert fits["count"][0] == ((times_list[0] >= 1) & (times_list[0] <= 15)).sum() - 1
+
+def test_unfittable_trace_gives_nan():
+    fits = transient_fit.fit_transients([np.array([1.0]), np.array([])], [np.array([1.0]), np.array([])])
+    assert np.isnan(fits["a"]).all() and np.isnan(fits["rms"]).all()
+
+def test_blocks_give_same_results(monkeypatch):
+    times_list, currents_list, _ = get_transients(count=8, exponential=True)
+    order = [3, 0, 7, 1, 5, 2, 6, 4]
+    times_list = [times_list[i] for i in order]
+    currents_list = [currents_list[i] for i in order]
+    unblocked = transient_fit.fit_transients(times_list, currents_list, {"exponential": True})
+    monkeypatch.setattr(transient_fit, "BLOCK_SAMPLES", 1000)
+    assert len(transient_fit.get_blocks([len(times) for times in times_list])) > 2
+    blocked = transient_fit.fit_transients(times_list, currents_list, {"exponential": True})
+    for name in transient_fit.PARAMETERS:
+        assert np.allclose(blocked[name], unblocked[name], equal_nan=True)
+
+def test_blocks_are_sorted_and_bounded(monkeypatch):
+    monkeypatch.setattr(transient_fit, "BLOCK_SAMPLES", 100)
+    lengths = [50, 10, 200, 20, 30]
+    blocks = transient_fit.get_blocks(lengths)
+    assert sorted(i for block in blocks for i in block) == list(range(len(lengths)))
+    for block in blocks:
+        assert len(block) == 1 or len(block) * max(lengths[i] for i in block) <= 100
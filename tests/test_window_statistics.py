@@ -0,0 +1,64 @@
+import numpy as np
+from plotting import window_statistics
+
+def masked_means(times_list, currents_list, windows):
+    # Baseline: mean of the finite currents of every dataset within every window, by boolean masks
+    means = np.full((len(times_list), len(windows)), np.nan)
+    for row, (times, currents) in enumerate(zip(times_list, currents_list)):
+        for column, (start, end) in enumerate(windows):
+            inside = (times >= start) & (times <= end) & np.isfinite(currents)
+            if inside.any():
+                means[row, column] = currents[inside].mean()
+    return means
+
+def get_traces(seed=0):
+    rng = np.random.default_rng(seed)
+    times_list = [np.sort(rng.uniform(0, 10, length)) for length in (50, 200, 1, 0, 500)]
+    currents_list = [rng.normal(0, 1, len(times)) for times in times_list]
+    return times_list, currents_list
+
+def test_window_means_match_masked_means():
+    times_list, currents_list = get_traces()
+    windows = [(0, 10), (2.5, 3.5), (9.9, 20), (-5, -1), (4, 4)]
+    packed = window_statistics.pack_datasets(range(len(times_list)), times_list, currents_list)
+    means = window_statistics.window_means(packed, windows)
+    assert np.allclose(means, masked_means(times_list, currents_list, windows), equal_nan=True)
+
+def test_nan_currents_only_affect_their_windows():
+    times_list, currents_list = get_traces(1)
+    currents_list[1][10] = np.nan
+    currents_list[4][:3] = np.nan
+    windows = [(0, 10), (0, 1), (5, 10)]
+    packed = window_statistics.pack_datasets(range(len(times_list)), times_list, currents_list)
+    means = window_statistics.window_means(packed, windows)
+    assert np.allclose(means, masked_means(times_list, currents_list, windows), equal_nan=True)
+    assert np.isfinite(means[1, 2])
+
+def test_unordered_times_are_sorted_when_packed():
+    times_list, currents_list = get_traces(2)
+    order = np.random.default_rng(0).permutation(len(times_list[4]))
+    times_list[4] = times_list[4][order]
+    currents_list[4] = currents_list[4][order]
+    # Non-finite times can not be in any window
+    times_list[2] = np.array([np.nan])
+    windows = [(0, 10), (3, 6)]
+    packed = window_statistics.pack_datasets(range(len(times_list)), times_list, currents_list)
+    means = window_statistics.window_means(packed, windows)
+    assert np.allclose(means, masked_means(times_list, currents_list, windows), equal_nan=True)
+
+def test_packed_datasets_are_cached_by_identity():
+    times_list, currents_list = get_traces()
+    datasets = {set_id: {"times": times, "currents": currents} for set_id, (times, currents) in enumerate(zip(times_list, currents_list))}
+    cache = {}
+    packed = window_statistics.get_packed_datasets(datasets, None, cache)
+    assert window_statistics.get_packed_datasets(datasets, None, cache) is packed
+    datasets[0]["currents"] = datasets[0]["currents"] + 1
+    assert window_statistics.get_packed_datasets(datasets, None, cache) is not packed
+
+def test_group_by_concentration():
+    means = np.array([[1.0, 2.0], [3.0, 4.0], [10.0, 10.0]])
+    concentrations, averages, stds, counts = window_statistics.group_by_concentration([1, 1, 2], means)
+    assert np.array_equal(concentrations, [1, 2])
+    assert np.allclose(averages, [[2, 3], [10, 10]])
+    assert np.allclose(stds, [[1, 1], [0, 0]])
+    assert np.array_equal(counts, [2, 1])
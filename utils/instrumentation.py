@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import deque
+from functools import wraps
+
+# Named timing spans with per-span counters and latency histograms.
+# When disabled, span() returns a shared no-op context manager, so instrumented code pays one flag check.
+# While tracking is on, e.g. while a stall watchdog runs, disabled spans still keep the names of the open spans
+# of every thread, without timing them, so active_spans() works either way.
+
+enabled = False
+tracking = False
+
+# Latency histogram buckets are powers of two in microseconds: bucket n holds durations in [2^(n-1), 2^n) us
+HISTOGRAM_BUCKETS = 32
+# Completed spans kept for trace export
+TRACE_CAPACITY = 100_000
+
+class SpanStats():
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.last = duration
+        if duration > self.max:
+            self.max = duration
+        bucket = min(int(duration * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float):
+        # Upper edge of the histogram bucket containing the percentile, in seconds
+        if self.count == 0:
+            return 0.0
+        target = fraction * self.count
+        cumulative = 0
+        for bucket, bucket_count in enumerate(self.histogram):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min((2 ** bucket) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.mean(),
+            "last_s": self.last,
+            "max_s": self.max,
+            "p50_s": self.percentile(0.5),
+            "p95_s": self.percentile(0.95),
+            "histogram_us_log2": self.histogram
+        }
+
+stats: dict[str, SpanStats] = {}
+trace_events = deque(maxlen=TRACE_CAPACITY)
+_lock = threading.Lock()
+_local = threading.local()
+# Span stacks of all threads by thread id, read by other threads (e.g. a stall watchdog)
+_active_stacks: dict[int, list] = {}
+_start_time = time.perf_counter()
+
+# cProfile state for profiling the next N user actions
+_profiler = None
+_profile_actions_left = 0
+_profile_output_path = None
+_enabled_before_profiling = False
+
+class _NoopSpan():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def _push_name(name: str):
+    # Adds name to the span stack of this thread and returns the stack
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+        with _lock:
+            _active_stacks[threading.get_ident()] = stack
+    stack.append(name)
+    return stack
+
+def _pop_name(stack: list):
+    # Returns the depth left
+    stack.pop()
+    depth = len(stack)
+    if depth == 0:
+        # Unregister so that finished threads do not leave stacks behind
+        with _lock:
+            _active_stacks.pop(threading.get_ident(), None)
+        _local.stack = None
+    return depth
+
+class _NameSpan():
+    # Only keeps the span name on the stack, for tracking without timing
+    __slots__ = ("name", "stack")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.stack = _push_name(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        _pop_name(self.stack)
+        return False
+
+class _Span():
+    __slots__ = ("name", "start", "stack")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.stack = _push_name(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        duration = end - self.start
+        depth = _pop_name(self.stack)
+        with _lock:
+            span_stats = stats.get(self.name)
+            if span_stats is None:
+                span_stats = stats[self.name] = SpanStats(self.name)
+            span_stats.add(duration)
+            trace_events.append((self.name, self.start, duration, threading.get_ident(), depth))
+        # Top level spans on the GUI thread are user actions
+        if _profiler is not None and depth == 0 and threading.current_thread() is threading.main_thread():
+            _count_profiled_action()
+        return False
+
+def span(name: str):
+    # Usage: with instrumentation.span("plot.draw"): ...
+    if not enabled:
+        return _NameSpan(name) if tracking else _NOOP_SPAN
+    return _Span(name)
+
+def instrument(name: str):
+    # Decorator version of span()
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                if not tracking:
+                    return function(*args, **kwargs)
+                with _NameSpan(name):
+                    return function(*args, **kwargs)
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_enabled(value: bool):
+    global enabled
+    enabled = value
+
+def set_tracking(value: bool):
+    global tracking
+    tracking = value
+
+def reset():
+    with _lock:
+        stats.clear()
+        trace_events.clear()
+
+def active_spans(thread_id: int = None):
+    # Names of the currently open spans of a thread, outermost first
+    if thread_id is None:
+        thread_id = threading.get_ident()
+    with _lock:
+        stack = _active_stacks.get(thread_id)
+        return list(stack) if stack else []
+
+def get_stats():
+    with _lock:
+        return {name: span_stats.to_dict() for name, span_stats in stats.items()}
+
+def format_stats(names: list = None):
+    # One line per span: name, last, mean and p95 in milliseconds
+    with _lock:
+        items = [stats[name] for name in names if name in stats] if names else sorted(stats.values(), key=lambda s: s.name)
+        lines = [f"{s.name}: last {s.last * 1e3:.1f} ms, mean {s.mean() * 1e3:.1f} ms, p95 {s.percentile(0.95) * 1e3:.1f} ms, n={s.count}" for s in items]
+    return "\n".join(lines)
+
+def export_trace(filepath):
+    # Chrome trace event format, open in chrome://tracing or https://ui.perfetto.dev
+    with _lock:
+        events = list(trace_events)
+    pid = os.getpid()
+    trace = {
+        "traceEvents": [
+            {
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start - _start_time) * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"depth": depth}
+            }
+            for name, start, duration, thread_id, depth in events
+        ],
+        "displayTimeUnit": "ms",
+        "otherData": {"stats": get_stats()}
+    }
+    with open(filepath, "w") as file:
+        json.dump(trace, file)
+    print("Trace exported to:", filepath)
+
+def profile_next_actions(action_count: int, output_path):
+    # Run cProfile on the GUI thread until action_count top level spans have finished
+    global _profiler, _profile_actions_left, _profile_output_path, _enabled_before_profiling
+    if _profiler is not None:
+        _profiler.disable()
+    _enabled_before_profiling = enabled if _profiler is None else _enabled_before_profiling
+    _profile_actions_left = action_count
+    _profile_output_path = output_path
+    set_enabled(True)
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    print(f"Profiling next {action_count} actions")
+
+def is_profiling():
+    return _profiler is not None
+
+def _count_profiled_action():
+    global _profile_actions_left
+    _profile_actions_left -= 1
+    if _profile_actions_left <= 0:
+        _finish_profiling()
+
+def _finish_profiling():
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    profiler.disable()
+    set_enabled(_enabled_before_profiling)
+
+    profiler.dump_stats(_profile_output_path)
+    print("Profile stats saved at:", _profile_output_path)
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import traceback
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from utils import instrumentation
+
+# Frames from these directories are attributed as the stall source before library frames
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StallWatchdog():
+    # Detects when the GUI thread stops processing events.
+    # The GUI thread calls beat() from a timer. A side thread checks how long ago the last beat was,
+    # and while the GUI thread is blocked past the threshold it samples the GUI thread stack.
+    # Each stall is written to a rotating log at log_path, if given, and aggregated by source for the summary view.
+    # Span tracking is on while it runs, so stalls are attributed to the open instrumentation spans even when
+    # timing is off.
+
+    def __init__(self, threshold: float = 0.5, check_interval: float = 0.05, log_path = None, max_log_bytes: int = 1_000_000, log_backups: int = 3, max_samples: int = 50):
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.max_samples = max_samples
+        self.main_thread_id = threading.main_thread().ident
+
+        self.last_beat = time.perf_counter()
+        self.max_latency = 0.0
+        self.beat_count = 0
+
+        # Current stall, only touched by the watchdog thread
+        self.stall_start = None
+        self.stall_samples = []
+        self.stall_spans = []
+
+        # Aggregated stalls by source: source -> {"count", "total_s", "max_s", "spans"}
+        self.sources = {}
+        self.stall_count = 0
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger("amp_analyzer.stalls")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if log_path and not self.logger.handlers:
+            handler = RotatingFileHandler(log_path, maxBytes=max_log_bytes, backupCount=log_backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread:
+            return
+        self.last_beat = time.perf_counter()
+        self.stop_event.clear()
+        instrumentation.set_tracking(True)
+        self.thread = threading.Thread(target=self._run, name="StallWatchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+            instrumentation.set_tracking(False)
+
+    def beat(self, expected_interval: float = 0.0):
+        # Called on the GUI thread. Latency is how late the beat arrived compared to its timer interval
+        now = time.perf_counter()
+        latency = now - self.last_beat - expected_interval
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.beat_count += 1
+        self.last_beat = now
+
+    def _run(self):
+        while not self.stop_event.wait(self.check_interval):
+            now = time.perf_counter()
+            last_beat = self.last_beat
+            blocked_for = now - last_beat
+
+            if blocked_for > self.threshold:
+                if self.stall_start == None:
+                    self.stall_start = last_beat
+                    self.stall_samples = []
+                    self.stall_spans = instrumentation.active_spans(self.main_thread_id)
+                if len(self.stall_samples) < self.max_samples:
+                    self._sample_stack()
+            elif self.stall_start != None:
+                # GUI thread is responsive again, stall ended at the last beat
+                self._record_stall(last_beat - self.stall_start)
+                self.stall_start = None
+
+    def _sample_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame == None:
+            return
+        self.stall_samples.append(traceback.extract_stack(frame))
+
+    def _record_stall(self, duration: float):
+        if not self.stall_samples:
+            return
+
+        # Attribute the stall to the application frame seen in most samples
+        sources = Counter(self.get_source(stack) for stack in self.stall_samples)
+        source, _ = sources.most_common(1)[0]
+        stack = next(stack for stack in self.stall_samples if self.get_source(stack) == source)
+
+        event = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_s": round(duration, 4),
+            "source": source,
+            "spans": self.stall_spans,
+            "samples": len(self.stall_samples),
+            "stack": traceback.format_list(stack)
+        }
+        self.logger.info(json.dumps(event))
+
+        with self.lock:
+            self.stall_count += 1
+            summary = self.sources.setdefault(source, {"count": 0, "total_s": 0.0, "max_s": 0.0, "spans": Counter()})
+            summary["count"] += 1
+            summary["total_s"] += duration
+            summary["max_s"] = max(summary["max_s"], duration)
+            if self.stall_spans:
+                summary["spans"][self.stall_spans[-1]] += 1
+
+    @staticmethod
+    def get_source(stack: traceback.StackSummary):
+        # Innermost frame in application code outside the instrumentation, or innermost frame if the stack is only library code
+        for frame in reversed(stack):
+            filename = os.path.abspath(frame.filename)
+            if filename.startswith(APP_ROOT) and "site-packages" not in filename and not filename.endswith(("stall_watchdog.py", "instrumentation.py")):
+                return f"{os.path.relpath(filename, APP_ROOT)}:{frame.lineno} {frame.name}"
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+    def get_summary(self):
+        # List of sources sorted by total stalled time
+        with self.lock:
+            rows = [
+                {
+                    "source": source,
+                    "count": summary["count"],
+                    "total_s": summary["total_s"],
+                    "max_s": summary["max_s"],
+                    "span": summary["spans"].most_common(1)[0][0] if summary["spans"] else ""
+                }
+                for source, summary in self.sources.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)